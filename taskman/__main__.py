@@ -5,6 +5,7 @@
 タスク管理システムのメインエントリポイント
 """
 
+import os
 import sys
 import argparse
 
@@ -33,6 +34,11 @@ def main():
             sys.exit(1)
     else:
         # CLIモード（既存のコード）
+        # 1回で終了するコマンドではコネクションプールを使わない
+        # （DB_POOL_MODE が指定されている場合はそれを優先）
+        # shell/batch は複数のコマンドで接続を再利用するためプールを使う
+        if args.command not in ("shell", "batch"):
+            os.environ.setdefault("DB_POOL_MODE", "null")
         from taskman.cli import app
         app()
 
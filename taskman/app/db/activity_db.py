@@ -8,6 +8,7 @@
 
 import logging
 from datetime import datetime, timedelta
+from taskman.app.db.cache import CachedMonitorDB
 from taskman.app.db.monitor_db import ProcessMonitorDB, get_db_instance
 
 logger = logging.getLogger(__name__)
@@ -17,18 +18,33 @@ class ActivityDatabase:
     ActivityDatabaseクラス - ProcessMonitorDBとの互換性を提供
     """
     
-    def __init__(self):
+    def __init__(self, db=None):
         """
         初期化: 実際の処理はProcessMonitorDBに委譲
+
+        Args:
+            db: 接続済みのProcessMonitorDB（省略時は共有インスタンスに接続し、共有キャッシュを通す）
         """
-        self.db = get_db_instance()
-        self.db.connect()
+        if db is None:
+            db = get_db_instance()
+            db.connect()
+            db = CachedMonitorDB(db)
+        self.db = db
         logger.info("ActivityDatabaseを初期化しました")
     
     def get_recent_activities(self, limit=10):
         """最近のアクティビティを取得"""
         return self.db.get_recent_activities(limit)
     
+    def log_activity(self, process_id, action, details=None):
+        """
+        アプリでの操作を記録
+        
+        アクティビティ専用のテーブルはないため、ログに出力します
+        （画面のアクティビティはタスクの更新履歴から作られます）。
+        """
+        logger.info(f"プロセス {process_id}: {action}" + (f"（{details}）" if details else ""))
+    
     # 他の必要なメソッドも同様に実装
     def __getattr__(self, name):
         """未実装メソッドはProcessMonitorDBに転送"""
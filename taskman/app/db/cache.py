@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+プロセスモニターの読み取りキャッシュ
+
+ProcessMonitorDB の読み取りメソッドの結果を、メソッドと引数ごとに
+サイズ上限付きのLRUへ保持します。エントリはメソッドごとの有効期間（TTL）で
+期限切れになるほか、次の場合に明示的に破棄されます。
+
+- アプリ自身が書き込んだ場合（インスタンスの開始・完了・中断）
+- 変更検知の透かし（get_change_watermarks）が変化した場合:
+  変化したテーブルに依存するメソッドのエントリだけを破棄する
+
+キャッシュはメインスレッドとバックグラウンド読み込みのワーカーで共有します
+（shared_cache）。1回の更新の中で同じクエリ（get_processes など）は1回だけ実行されます。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from taskman.app.db.change_feed import WATCHED_TABLES, changed_tables
+
+# 保持するエントリ数の上限
+CACHE_SIZE = 256
+
+ALL_TABLES = frozenset(WATCHED_TABLES)
+
+# キャッシュするメソッド → (有効期間[秒], 依存するテーブル)
+# workflow など透かしを読まないテーブルの変更は有効期間で反映される。
+# 進捗カウンタの更新では親の updated_at が変わらないため、進捗を返すメソッドは
+# 子のテーブルにも依存させる。
+CACHED_METHODS = {
+    'get_processes': (30, frozenset({'process', 'task'})),
+    'get_process_by_id': (30, frozenset({'process', 'task'})),
+    'get_process_by_name_version': (30, frozenset({'process'})),
+    'get_tasks_by_process_id': (30, frozenset({'task'})),
+    'get_workflow_steps': (30, frozenset({'task', 'process_instance', 'task_instance'})),
+    'get_workflow_for_process': (30, frozenset({'task'})),
+    'get_recent_activities': (10, frozenset({'process', 'task'})),
+    'get_process_instances': (10, frozenset({'process', 'process_instance', 'task_instance'})),
+    'get_process_instance_by_id': (10, frozenset({'process', 'process_instance', 'task_instance'})),
+    'get_task_instances_by_process_instance_id': (10, frozenset({'task', 'task_instance'})),
+    'get_dashboard_summary': (10, ALL_TABLES),
+    'get_process_etas': (30, frozenset({'task', 'process_instance', 'task_instance'})),
+}
+
+# アプリ自身の書き込み → 破棄するテーブル
+WRITE_METHODS = {
+    'start_process_instance': frozenset({'process', 'process_instance', 'task_instance'}),
+    'complete_process_instance': frozenset({'process', 'process_instance'}),
+    'cancel_process_instance': frozenset({'process', 'process_instance'}),
+}
+
+
+@dataclass
+class CacheStats:
+    """キャッシュの統計"""
+    hits: int = 0
+    misses: int = 0
+    size: int = 0
+    by_method: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class MonitorCache:
+    """
+    TTL付きのLRUキャッシュ（スレッドセーフ）
+
+    Args:
+        size: 保持するエントリ数の上限
+        clock: 現在時刻[秒]を返す関数（テスト用）
+    """
+
+    def __init__(self, size=CACHE_SIZE, clock=time.monotonic):
+        self.size = size
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.watermarks = None
+
+    def get(self, key):
+        """
+        キャッシュされた値を取得
+
+        Returns:
+            (見つかったかどうか, 値)
+        """
+        method = key[0]
+        with self._lock:
+            hits, misses = self._stats.get(method, (0, 0))
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self._stats[method] = (hits + 1, misses)
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._stats[method] = (hits, misses + 1)
+            return False, None
+
+    def put(self, key, value, ttl, tables):
+        """値を保持する（上限を超えたら最も古く使われたエントリを捨てる）"""
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value, tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tables=None):
+        """
+        エントリを破棄する
+
+        Args:
+            tables: 変化したテーブル名の集合（Noneならすべて）
+
+        Returns:
+            破棄したエントリ数
+        """
+        with self._lock:
+            if tables is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def observe_watermarks(self, watermarks):
+        """透かしを記録し、前回から変化したテーブルに依存するエントリを破棄する"""
+        with self._lock:
+            previous, self.watermarks = self.watermarks, watermarks
+        changed = changed_tables(previous, watermarks)
+        if changed:
+            self.invalidate(changed)
+
+    def stats(self):
+        """CacheStats を返す"""
+        with self._lock:
+            by_method = dict(self._stats)
+            return CacheStats(
+                hits=sum(hits for hits, _ in by_method.values()),
+                misses=sum(misses for _, misses in by_method.values()),
+                size=len(self._entries),
+                by_method=by_method,
+            )
+
+    def clear(self):
+        """すべてのエントリと統計を消去する"""
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self.watermarks = None
+
+
+# メインスレッドとワーカーで共有するキャッシュ
+shared_cache = MonitorCache()
+
+
+def _freeze(value):
+    """引数をキャッシュのキーにできる形にする（辞書は項目の組に）"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _copy(value):
+    """
+    呼び出し側が結果の辞書を書き換えてもキャッシュが変わらないよう、
+    辞書（とリストの中の辞書）を浅くコピーする
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+class CachedMonitorDB:
+    """
+    ProcessMonitorDB の読み取りをキャッシュするラッパー
+
+    CACHED_METHODS のメソッドはキャッシュを通し、WRITE_METHODS のメソッドは
+    実行後に関係するエントリを破棄します。その他の属性は ProcessMonitorDB に転送します。
+
+    Args:
+        db: ProcessMonitorDB
+        cache: MonitorCache（省略時は shared_cache）
+    """
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.cache = cache if cache is not None else shared_cache
+
+    def __getattr__(self, name):
+        attribute = getattr(self.db, name)
+        if name in CACHED_METHODS:
+            return self._cached(name, attribute)
+        if name in WRITE_METHODS:
+            return self._invalidating(name, attribute)
+        return attribute
+
+    def _cached(self, name, method):
+        ttl, tables = CACHED_METHODS[name]
+
+        def call(*args, **kwargs):
+            try:
+                key = (name, _freeze(args), _freeze(kwargs))
+                hash(key)
+            except TypeError:
+                return method(*args, **kwargs)
+            found, value = self.cache.get(key)
+            if not found:
+                value = method(*args, **kwargs)
+                self.cache.put(key, value, ttl, tables)
+            return _copy(value)
+        return call
+
+    def _invalidating(self, name, method):
+        def call(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.cache.invalidate(WRITE_METHODS[name])
+        return call
+
+    def get_change_watermarks(self):
+        """透かしを取得し、変化したテーブルに依存するキャッシュを破棄する"""
+        watermarks = self.db.get_change_watermarks()
+        self.cache.observe_watermarks(watermarks)
+        return watermarks
+
+    def cache_stats(self):
+        """キャッシュの CacheStats を返す"""
+        return self.cache.stats()
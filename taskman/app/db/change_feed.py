@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+プロセスモニターの変更検知
+
+テーブルごとの透かし（最大ID・最大更新日時・件数）を定期更新のたびに
+1回のクエリで読み、前回の値と比べて変化したテーブルを求めます。
+画面の各部分は依存するテーブルが変化した場合だけ読み込み直します。
+
+- 追加: 最大IDが増える
+- 更新: 最大更新日時が進む（updated_at は ORM の onupdate と Core の update で更新される。
+  進捗カウンタの更新では親の updated_at は変わらないため、カウンタを表示する部分は
+  子のテーブルにも依存させる）
+- 削除・アーカイブ: 件数が減る（追加と同時でも最大IDと件数の組み合わせで検知できる）
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# 透かしを読むテーブル（monitor_queries.CHANGE_WATERMARKS_SQL と同じ順）
+WATCHED_TABLES = ('process', 'task', 'process_instance', 'task_instance')
+
+# 画面の部分（RefreshSnapshot の属性名） → 依存するテーブル
+DEPENDENCIES = {
+    'running_processes': {'process', 'task', 'process_instance', 'task_instance'},
+    'activities': {'process', 'task'},
+    'process_definitions': {'process', 'task'},
+    'process_details': {'process', 'task'},
+    'process_instances': {'process', 'process_instance', 'task_instance'},
+}
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """テーブルの透かし"""
+    max_id: Optional[int]
+    max_updated_at: Any
+    row_count: int
+
+
+def changed_tables(previous: Optional[Dict[str, Watermark]], current: Dict[str, Watermark]):
+    """
+    前回から変化したテーブルを求める
+
+    Args:
+        previous: 前回の透かし（初回はNone）
+        current: 今回の透かし
+
+    Returns:
+        変化したテーブル名の集合（初回はすべて）
+    """
+    if previous is None:
+        return set(current)
+    return {name for name, mark in current.items() if previous.get(name) != mark}
+
+
+def stale_parts(changed):
+    """
+    変化したテーブルに依存する画面の部分を求める
+
+    Args:
+        changed: 変化したテーブル名の集合
+
+    Returns:
+        読み込み直す部分の名前の集合
+    """
+    return {part for part, tables in DEPENDENCIES.items() if tables & changed}
+
+
+def may_have_deletions(previous: Watermark, current: Watermark):
+    """
+    追加された行の数がわからないテーブルで、前回から削除があったかもしれないかどうか
+
+    IDの増分を追加された行の数とみなして件数と比べる。IDに欠番があると
+    削除がなくてもTrueになるが、その場合は全件を読み込み直すだけで済む。
+
+    Args:
+        previous: 前回の透かし
+        current: 今回の透かし
+
+    Returns:
+        削除があったかもしれなければTrue
+    """
+    added = (current.max_id or 0) - (previous.max_id or 0)
+    return previous.row_count + added != current.row_count
+
+
+def has_deletions(previous: Watermark, current: Watermark, inserted: int):
+    """
+    前回から削除（アーカイブを含む）があったかどうか
+
+    新しい行のIDはすべて前回の最大IDより大きいため、削除がなければ
+    今回の件数は前回の件数と新しい行の数の和に一致する。
+
+    Args:
+        previous: 前回の透かし
+        current: 今回の透かし
+        inserted: 前回の最大IDより大きいIDの行の数
+
+    Returns:
+        削除があればTrue（差分では反映できないため全件を読み込み直す）
+    """
+    return previous.row_count + inserted != current.row_count
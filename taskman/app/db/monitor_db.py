@@ -53,6 +53,12 @@ except ImportError as e:
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     use_existing_connection = False
 
+from taskman.database.monitor_queries import (
+    DASHBOARD_STATS_SQL, DASHBOARD_LISTS_SQL, PROCESS_TASKS_SQL, WORKFLOW_STEPS_SQL,
+    PROCESS_INSTANCES_SQL, TASK_INSTANCES_SQL, CHANGE_WATERMARKS_SQL, CHANGED_PROCESS_INSTANCES_SQL,
+)
+from taskman.app.db.change_feed import Watermark
+
 # シングルトン用のインスタンス
 _db_instance = None
 
@@ -105,12 +111,9 @@ class ProcessMonitorDB:
         SELECT 
             p.id as id, 
             p.name as name, 
+            p.version as version, 
             p.status, 
-            IFNULL(
-                (SELECT COUNT(*) FROM task t WHERE t.process_id = p.id AND t.status = '完了') * 100.0 / 
-                NULLIF((SELECT COUNT(*) FROM task t WHERE t.process_id = p.id), 0),
-                0
-            ) as progress,
+            IFNULL(p.completed_tasks * 100.0 / NULLIF(p.total_tasks, 0), 0) as progress,
             p.created_at as start_date, 
             p.updated_at as end_date, 
             NULL as owner
@@ -148,12 +151,9 @@ class ProcessMonitorDB:
         SELECT 
             p.id as id, 
             p.name as name, 
+            p.version as version, 
             p.status, 
-            IFNULL(
-                (SELECT COUNT(*) FROM task t WHERE t.process_id = p.id AND t.status = '完了') * 100.0 / 
-                NULLIF((SELECT COUNT(*) FROM task t WHERE t.process_id = p.id), 0),
-                0
-            ) as progress,
+            IFNULL(p.completed_tasks * 100.0 / NULLIF(p.total_tasks, 0), 0) as progress,
             p.created_at as start_date, 
             p.updated_at as end_date, 
             NULL as owner
@@ -175,6 +175,62 @@ class ProcessMonitorDB:
         
         return process
     
+    def get_process_by_name_version(self, name, version):
+        """
+        名前とバージョンでプロセスを取得（一意インデックス ix_process_name_version を使用）
+        
+        Args:
+            name: プロセス名
+            version: バージョン
+            
+        Returns:
+            プロセス情報（辞書形式、get_process_by_id と同じ形）。見つからなければNone
+        """
+        if not self.connected:
+            raise Exception("データベースに接続されていません")
+        
+        query = text("""
+        SELECT 
+            p.id as id, 
+            p.name as name, 
+            p.version as version, 
+            p.status, 
+            IFNULL(p.completed_tasks * 100.0 / NULLIF(p.total_tasks, 0), 0) as progress,
+            p.created_at as start_date, 
+            p.updated_at as end_date, 
+            NULL as owner
+        FROM process p
+        WHERE p.name = :name AND p.version = :version
+        """)
+        
+        row = self.session.execute(query, {"name": name, "version": version}).fetchone()
+        if not row:
+            return None
+        
+        process = dict(row._mapping)
+        process['progress'] = round(float(process['progress']))
+        return process
+    
+    def get_process_versions(self, updated_since=None):
+        """
+        プロセス定義の (ID, 名前, バージョン, 更新日時) を取得
+        
+        Args:
+            updated_since: 指定した場合はこの更新日時以降に変更された行だけ
+            
+        Returns:
+            辞書のリスト
+        """
+        if not self.connected:
+            raise Exception("データベースに接続されていません")
+        
+        query = "SELECT p.id, p.name, p.version, p.updated_at FROM process p"
+        params = {}
+        if updated_since is not None:
+            query += " WHERE p.updated_at >= :updated_since"
+            params["updated_since"] = updated_since
+        return [dict(row._mapping) for row in self.session.execute(text(query + " ORDER BY p.id"), params)]
+    
     def get_tasks_by_process_id(self, process_id):
         """
         指定したプロセスIDに関連するタスクを取得
@@ -188,19 +244,7 @@ class ProcessMonitorDB:
         if not self.connected:
             raise Exception("データベースに接続されていません")
             
-        query = text("""
-        SELECT 
-            t.id as id, 
-            t.process_id, 
-            t.name as name, 
-            t.status, 
-            t.priority,
-            t.assigned_to as owner,
-            t.description
-        FROM task t
-        WHERE t.process_id = :process_id
-        ORDER BY t.id
-        """)
+        query = text(PROCESS_TASKS_SQL)
         
         result = self.session.execute(query, {"process_id": process_id})
         tasks = []
@@ -215,6 +259,9 @@ class ProcessMonitorDB:
         """
         指定したプロセスIDに関連するワークフローステップを取得
         
+        遷移元・遷移先のタスク名とステップの状態（実行中のプロセスインスタンスのタスクインスタンスから算出）を
+        1回のクエリで取得します。遷移の数によらずクエリは1回です。
+        
         Args:
             process_id: プロセスID
             
@@ -224,44 +271,16 @@ class ProcessMonitorDB:
         if not self.connected:
             raise Exception("データベースに接続されていません")
             
-        # ワークフロー情報の取得
-        query = text("""
-        SELECT 
-            w.id,
-            w.from_task_id,
-            w.to_task_id,
-            w.condition_type,
-            w.sequence_number
-        FROM workflow w
-        WHERE w.process_id = :process_id
-        ORDER BY w.sequence_number
-        """)
-        
-        result = self.session.execute(query, {"process_id": process_id})
+        result = self.session.execute(text(WORKFLOW_STEPS_SQL), {"process_id": process_id})
         workflows = []
         
         for row in result:
-            workflow = dict(row._mapping)
-            # タスク情報の取得
-            start_task_query = text("""
-            SELECT name FROM task WHERE id = :task_id
-            """)
-            start_task_result = self.session.execute(start_task_query, {"task_id": workflow['from_task_id']})
-            start_task_row = start_task_result.fetchone()
-            
-            end_task_query = text("""
-            SELECT name FROM task WHERE id = :task_id
-            """)
-            end_task_result = self.session.execute(end_task_query, {"task_id": workflow['to_task_id']})
-            end_task_row = end_task_result.fetchone()
-            
-            # ワークフロー情報の構築
             step = {
-                "id": workflow['id'],
-                "workflow_id": workflow['id'],
-                "name": f"{start_task_row[0] if start_task_row else 'スタート'} → {end_task_row[0] if end_task_row else 'エンド'}",
-                "sequence": workflow['sequence_number'],
-                "status": "未着手"  # ステータスはタスクの状態から計算する必要がある
+                "id": row.id,
+                "workflow_id": row.id,
+                "name": f"{row.from_task_name or 'スタート'} → {row.to_task_name or 'エンド'}",
+                "sequence": row.sequence_number,
+                "status": row.status,
             }
             workflows.append(step)
         
@@ -286,7 +305,8 @@ class ProcessMonitorDB:
             t.id as id,
             t.process_id,
             p.name as process_name,
-            CONCAT(t.name, 'が', t.status, 'になりました') as description,
+            t.name as task_name,
+            t.status as task_status,
             t.updated_at as timestamp,
             t.assigned_to as user
         FROM task t
@@ -300,6 +320,8 @@ class ProcessMonitorDB:
         
         for row in result:
             activity = dict(row._mapping)
+            # 説明文はSQLの文字列連結（MySQLの CONCAT、SQLiteの ||）に頼らずここで組み立てる
+            activity['description'] = f"{activity.pop('task_name')}が{activity.pop('task_status')}になりました"
             activities.append(activity)
         
         return activities
@@ -317,21 +339,7 @@ class ProcessMonitorDB:
         if not self.connected:
             raise Exception("データベースに接続されていません")
             
-        query = text("""
-        SELECT 
-            pi.id, 
-            p.name as process_name,
-            p.id as process_id,
-            pi.status,
-            pi.started_at,
-            pi.completed_at,
-            pi.created_by,
-            (SELECT COUNT(*) FROM task_instance ti WHERE ti.process_instance_id = pi.id AND ti.status = '完了') * 100.0 / 
-            NULLIF((SELECT COUNT(*) FROM task_instance ti WHERE ti.process_instance_id = pi.id), 0) as progress
-        FROM process_instance pi
-        JOIN process p ON pi.process_id = p.id
-        WHERE 1=1
-        """)
+        query = text(PROCESS_INSTANCES_SQL)
         
         # フィルター条件の追加
         params = {}
@@ -361,6 +369,71 @@ class ProcessMonitorDB:
         
         return instances
     
+    def get_change_watermarks(self):
+        """
+        変更検知の透かしを取得
+
+        データに変化がなければ、定期更新で実行されるクエリはこれだけです。
+
+        Returns:
+            {テーブル名: Watermark}
+        """
+        if not self.connected:
+            raise Exception("データベースに接続されていません")
+
+        result = self.session.execute(text(CHANGE_WATERMARKS_SQL))
+        return {
+            row.table_name: Watermark(row.max_id, row.max_updated_at, row.row_count)
+            for row in result
+        }
+
+    def get_process_instances_since(self, watermarks, current=None):
+        """
+        前回の透かし以降に追加・変更されたプロセスインスタンスを取得
+
+        プロセス名の変更も反映するため、プロセスが更新されたインスタンスも含みます。
+        進捗を反映するため、タスクインスタンスが追加・変更されたインスタンスも含みます。
+        更新日時は同じ時刻の変更を取りこぼさないよう透かしと等しいものも含めるため、
+        前回と同じ行が返ることがあります（画面ではIDで置き換えるので問題ありません）。
+        今回の透かしを渡すと、変化していないテーブルの更新日時の条件は使いません
+        （透かしと同じ更新日時の行を毎回読み直さないため）。
+
+        Args:
+            watermarks: 前回の {テーブル名: Watermark}
+            current: 今回の {テーブル名: Watermark}（省略時はすべてのテーブルの条件を使う）
+
+        Returns:
+            プロセスインスタンスのリスト（辞書形式、get_process_instances と同じ形）
+        """
+        if not self.connected:
+            raise Exception("データベースに接続されていません")
+
+        def updated_since(table):
+            # NULL との比較は偽になるため、変化していないテーブルの条件は効かなくなる
+            if current is not None and current[table] == watermarks[table]:
+                return None
+            return watermarks[table].max_updated_at
+
+        query = text(CHANGED_PROCESS_INSTANCES_SQL + " ORDER BY pi.started_at DESC")
+        result = self.session.execute(query, {
+            "after_id": watermarks['process_instance'].max_id or 0,
+            "updated_since": updated_since('process_instance'),
+            "process_updated_since": updated_since('process'),
+            "task_instance_after_id": watermarks['task_instance'].max_id or 0,
+            "task_instance_updated_since": updated_since('task_instance'),
+        })
+        instances = []
+
+        for row in result:
+            instance = dict(row._mapping)
+            if instance['progress'] is not None:
+                instance['progress'] = round(float(instance['progress']))
+            else:
+                instance['progress'] = 0
+            instances.append(instance)
+
+        return instances
+
     def get_process_instance_by_id(self, instance_id):
         """
         指定したIDのプロセスインスタンスを取得
@@ -383,8 +456,7 @@ class ProcessMonitorDB:
             pi.started_at,
             pi.completed_at,
             pi.created_by,
-            (SELECT COUNT(*) FROM task_instance ti WHERE ti.process_instance_id = pi.id AND ti.status = '完了') * 100.0 / 
-            NULLIF((SELECT COUNT(*) FROM task_instance ti WHERE ti.process_instance_id = pi.id), 0) as progress
+            pi.completed_tasks * 100.0 / NULLIF(pi.total_tasks, 0) as progress
         FROM process_instance pi
         JOIN process p ON pi.process_id = p.id
         WHERE pi.id = :instance_id
@@ -417,21 +489,7 @@ class ProcessMonitorDB:
         if not self.connected:
             raise Exception("データベースに接続されていません")
             
-        query = text("""
-        SELECT 
-            ti.id, 
-            ti.process_instance_id,
-            t.name,
-            ti.status,
-            ti.assigned_to,
-            ti.started_at,
-            ti.completed_at,
-            t.priority
-        FROM task_instance ti
-        JOIN task t ON ti.task_id = t.id
-        WHERE ti.process_instance_id = :instance_id
-        ORDER BY ti.id
-        """)
+        query = text(TASK_INSTANCES_SQL)
         
         result = self.session.execute(query, {"instance_id": instance_id})
         task_instances = []
@@ -443,169 +501,237 @@ class ProcessMonitorDB:
         return task_instances
         
     def get_dashboard_summary(self):
-        """ダッシュボード用の概要データを取得"""
+        """
+        ダッシュボード用の概要データを取得
+
+        カード・一覧・統計のすべてを2回のクエリ（集計とリスト）で取得します。
+        進捗率はプロセスインスタンスの進捗カウンタを使用するため、
+        インスタンスごとの相関サブクエリは発生しません。
+        """
         try:
             summary = {}
-            
-            # SQLAlchemyのSessionを使って結果を取得する
-            # アクティブなプロセスインスタンス数
-            query = text("""
-                SELECT COUNT(*) as active_count
-                FROM process_instance
-                WHERE status != '完了'
-            """)
-            result = self.session.execute(query).fetchone()
-            summary['active_instances_count'] = result[0] if result else 0
-            
-            # 完了したプロセスインスタンス数
-            query = text("""
-                SELECT COUNT(*) as completed_count
-                FROM process_instance
-                WHERE status = '完了'
-            """)
-            result = self.session.execute(query).fetchone()
-            summary['completed_instances_count'] = result[0] if result else 0
-            
-            # 期限切れタスク数
-            query = text("""
-                SELECT COUNT(*) as overdue_count
-                FROM task_instance ti
-                WHERE ti.status != '完了' AND ti.created_at < CURRENT_DATE()
-            """)
-            result = self.session.execute(query).fetchone()
-            summary['overdue_tasks_count'] = result[0] if result else 0
-            
-            # 今日が期限のタスク数
-            query = text("""
-                SELECT COUNT(*) as today_count
-                FROM task_instance ti
-                WHERE ti.status != '完了' AND DATE(ti.created_at) = CURRENT_DATE()
-            """)
-            result = self.session.execute(query).fetchone()
-            summary['today_tasks_count'] = result[0] if result else 0
-            
-            # アクティブなプロセスインスタンス一覧
-            query = text("""
-                SELECT 
-                    pi.id, 
-                    p.name as process_name,
-                    pi.status,
-                    pi.started_at as start_time, 
-                    (SELECT COUNT(*) FROM task_instance ti WHERE ti.process_instance_id = pi.id) as total_tasks,
-                    (SELECT COUNT(*) FROM task_instance ti WHERE ti.process_instance_id = pi.id AND ti.status = '完了') as completed_tasks
-                FROM process_instance pi
-                JOIN process p ON pi.process_id = p.id
-                WHERE pi.status != '完了'
-                ORDER BY pi.started_at DESC
-                LIMIT 10
-            """)
-            
-            result = self.session.execute(query)
-            active_instances = []
+
+            # 件数カードとプロセスタイプ統計
+            result = self.session.execute(text(DASHBOARD_STATS_SQL))
+            active_total = 0
+            completed_total = 0
+            overdue_count = 0
+            today_count = 0
+            process_stats = []
+            for row in result:
+                row_dict = dict(row._mapping)
+                active_count = int(row_dict.get('active_count') or 0)
+                completed_count = int(row_dict.get('completed_count') or 0)
+                active_total += active_count
+                completed_total += completed_count
+                overdue_count = int(row_dict.get('overdue_count') or 0)
+                today_count = int(row_dict.get('today_count') or 0)
+                # プロセスが存在しない行は件数のみ集計し、統計には含めない
+                if row_dict.get('process_type') is None:
+                    continue
+                process_stats.append({
+                    'process_type': row_dict.get('process_type'),
+                    'active_count': active_count,
+                    'completed_count': completed_count
+                })
+
+            summary['active_instances_count'] = active_total
+            summary['completed_instances_count'] = completed_total
+            summary['overdue_tasks_count'] = overdue_count
+            summary['today_tasks_count'] = today_count
+
+            # 実行中インスタンス・最近のアクティビティ・緊急タスク
+            result = self.session.execute(text(DASHBOARD_LISTS_SQL))
+            sections = {'active': [], 'activity': [], 'urgent': []}
             for row in result:
                 row_dict = dict(row._mapping)
+                sections[row_dict['section']].append(row_dict)
+
+            # UNION ALL は順序を保証しないため、セクションごとに並べ直す
+            def newest_first(rows):
+                return sorted(rows, key=lambda r: (r['ts'] is not None, r['ts'] or ''), reverse=True)
+
+            active_instances = []
+            for row_dict in newest_first(sections['active']):
                 total_tasks = row_dict.get('total_tasks') or 1  # 0除算を防ぐ
                 completed_tasks = row_dict.get('completed_tasks') or 0
-                progress = int((completed_tasks / total_tasks) * 100)
-                
                 active_instances.append({
                     'id': row_dict.get('id'),
                     'process_name': row_dict.get('process_name'),
                     'status': row_dict.get('status'),
-                    'started_at': row_dict.get('start_time'),
-                    'progress': progress
+                    'started_at': row_dict.get('ts'),
+                    'progress': int((completed_tasks / total_tasks) * 100)
                 })
+            # 完了予定（クリティカルパスの計画と実績からの予測）
+            etas = self.get_instance_etas([instance['id'] for instance in active_instances])
+            for instance in active_instances:
+                instance['eta'] = etas.get(instance['id'])
             summary['active_instances'] = active_instances
-            
-            # 最近のアクティビティ
-            query = text("""
-                SELECT 
-                    ti.updated_at as last_updated, 
-                    p.name as process_name, 
-                    t.name as task_name, 
-                    ti.status
-                FROM task_instance ti
-                JOIN process_instance pi ON ti.process_instance_id = pi.id
-                JOIN process p ON pi.process_id = p.id
-                JOIN task t ON ti.task_id = t.id
-                ORDER BY ti.updated_at DESC
-                LIMIT 15
-            """)
-            result = self.session.execute(query)
+
             activities = []
-            for row in result:
-                row_dict = dict(row._mapping)
+            for row_dict in newest_first(sections['activity']):
                 activities.append({
-                    'timestamp': row_dict.get('last_updated'),
+                    'timestamp': row_dict.get('ts'),
                     'process_name': row_dict.get('process_name'),
                     'task_name': row_dict.get('task_name'),
                     'description': f"タスク「{row_dict.get('task_name')}」のステータスが「{row_dict.get('status')}」に変更されました"
                 })
             summary['activities'] = activities
-            
-            # 緊急タスク一覧
-            query = text("""
-                SELECT 
-                    t.name as task_name, 
-                    p.name as process_name, 
-                    ti.created_at as deadline, 
-                    t.priority
-                FROM task_instance ti
-                JOIN task t ON ti.task_id = t.id
-                JOIN process_instance pi ON ti.process_instance_id = pi.id
-                JOIN process p ON pi.process_id = p.id
-                WHERE ti.status != '完了'
-                ORDER BY 
-                    CASE 
-                        WHEN t.priority = '緊急' THEN 1
-                        WHEN t.priority = '高' THEN 2
-                        WHEN t.priority = '中' THEN 3
-                        WHEN t.priority = '低' THEN 4
-                        ELSE 5
-                    END,
-                    ti.created_at ASC
-                LIMIT 10
-            """)
-            result = self.session.execute(query)
+
+            urgent_rows = sorted(
+                sections['urgent'],
+                key=lambda r: (r['priority_rank'], r['ts'] is None, r['ts'] or '')
+            )
             urgent_tasks = []
-            for row in result:
-                row_dict = dict(row._mapping)
+            for row_dict in urgent_rows:
                 urgent_tasks.append({
                     'task_name': row_dict.get('task_name'),
                     'process_name': row_dict.get('process_name'),
-                    'deadline': row_dict.get('deadline'),
+                    'deadline': row_dict.get('ts'),
                     'priority': row_dict.get('priority')
                 })
             summary['urgent_tasks'] = urgent_tasks
-            
-            # プロセスタイプ統計
-            query = text("""
-                SELECT 
-                    p.name as process_type,
-                    COUNT(CASE WHEN pi.status != '完了' THEN 1 ELSE NULL END) as active_count,
-                    COUNT(CASE WHEN pi.status = '完了' THEN 1 ELSE NULL END) as completed_count
-                FROM process_instance pi
-                JOIN process p ON pi.process_id = p.id
-                GROUP BY p.name
-                ORDER BY active_count DESC
-            """)
-            result = self.session.execute(query)
-            process_stats = []
-            for row in result:
-                row_dict = dict(row._mapping)
-                process_stats.append({
-                    'process_type': row_dict.get('process_type', '未分類'),
-                    'active_count': row_dict.get('active_count', 0),
-                    'completed_count': row_dict.get('completed_count', 0)
-                })
+
+            process_stats.sort(key=lambda s: s['active_count'], reverse=True)
             summary['process_stats'] = process_stats
-            
+
             return summary
-            
+
         except Exception as e:
             logger.error(f"ダッシュボードデータ取得エラー: {str(e)}")
             return None
 
+    def start_process_instance(self, process_id, created_by=None):
+        """
+        プロセスインスタンスを開始
+
+        CLIの `instance create` と同じく、ワークフローの開始タスクの
+        タスクインスタンスを同じトランザクションで作成します。
+
+        Args:
+            process_id: プロセスID
+            created_by: 作成者
+
+        Returns:
+            作成したプロセスインスタンスのID
+
+        Raises:
+            ValueError: プロセスが見つからない、またはアクティブでない場合
+        """
+        if not self.connected:
+            raise Exception("データベースに接続されていません")
+
+        from taskman.engine.advance import start_process_instance
+        from taskman.models.process import Process
+        from taskman.models.process_instance import ProcessInstance
+
+        try:
+            process = self.session.get(Process, process_id)
+            if process is None:
+                raise ValueError(f"プロセス（ID: {process_id}）が見つかりません")
+            if process.status != "アクティブ":
+                raise ValueError(f"プロセス（ID: {process_id}）はアクティブではありません")
+
+            instance = ProcessInstance(
+                process_id=process_id, status="実行中", started_at=datetime.now(), created_by=created_by
+            )
+            self.session.add(instance)
+            start_process_instance(self.session, instance)
+            self.session.commit()
+            return instance.id
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def complete_process_instance(self, instance_id):
+        """
+        実行中のプロセスインスタンスを完了にする
+
+        Args:
+            instance_id: プロセスインスタンスID
+
+        Raises:
+            ValueError: インスタンスが見つからない、または実行中でない場合
+        """
+        self._finish_process_instance(instance_id, "完了")
+
+    def cancel_process_instance(self, instance_id):
+        """
+        実行中のプロセスインスタンスを中断する
+
+        Args:
+            instance_id: プロセスインスタンスID
+
+        Raises:
+            ValueError: インスタンスが見つからない、または実行中でない場合
+        """
+        self._finish_process_instance(instance_id, "中断")
+
+    def _finish_process_instance(self, instance_id, status):
+        if not self.connected:
+            raise Exception("データベースに接続されていません")
+
+        from taskman.models.process_instance import ProcessInstance
+
+        try:
+            instance = self.session.get(ProcessInstance, instance_id)
+            if instance is None:
+                raise ValueError(f"プロセスインスタンス（ID: {instance_id}）が見つかりません")
+            if instance.status != "実行中":
+                raise ValueError(f"プロセスインスタンス（ID: {instance_id}）は実行中ではありません（{instance.status}）")
+            instance.status = status
+            instance.completed_at = datetime.now()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def get_instance_etas(self, instance_ids):
+        """
+        プロセスインスタンスの完了予定日時を取得
+
+        キャッシュされたクリティカルパスの計画と、
+        タスクインスタンスの開始・完了日時および実績の平均所要時間から予測します。
+        インスタンス数によらずクエリは一定回数です。
+
+        Args:
+            instance_ids: プロセスインスタンスIDのリスト
+
+        Returns:
+            {インスタンスID: 完了予定日時（予測できない場合はNone）}
+        """
+        try:
+            from taskman.engine.schedule import forecast_instances
+            forecasts = forecast_instances(self.session, instance_ids)
+            return {instance_id: forecast.eta for instance_id, forecast in forecasts.items()}
+        except Exception as e:
+            logger.error(f"完了予定の計算エラー: {str(e)}")
+            return {}
+
+    def get_process_etas(self):
+        """
+        プロセスごとに、実行中インスタンスの最も遅い完了予定日時を取得
+
+        Returns:
+            {プロセスID: 完了予定日時}
+        """
+        try:
+            rows = self.session.execute(text("""
+                SELECT id, process_id
+                FROM process_instance
+                WHERE status = '実行中'
+            """)).fetchall()
+            etas = self.get_instance_etas([row.id for row in rows])
+            result = {}
+            for row in rows:
+                eta = etas.get(row.id)
+                if eta is not None and (result.get(row.process_id) is None or eta > result[row.process_id]):
+                    result[row.process_id] = eta
+            return result
+        except Exception as e:
+            logger.error(f"完了予定の取得エラー: {str(e)}")
+            return {}
+
     def get_workflow_for_process(self, process_id):
         """
         プロセスIDに基づくワークフローデータを取得する
@@ -630,24 +756,30 @@ class ProcessMonitorDB:
             
             process_row = dict(result._mapping)
             
+            # ワークフローグラフ（プロセスのバージョンとワークフローのスタンプごとにキャッシュ）
+            from taskman.engine.graph import get_graph
+            graph = get_graph(self.session, process_id)
+            
             # プロセスに関連するタスクを取得
             query = text("""
                 SELECT id, name, description, status, assigned_to as assignee, priority
                 FROM task
                 WHERE process_id = :process_id
-                ORDER BY id
             """)
             
-            result = self.session.execute(query, {"process_id": process_id})
+            rows = {row.id: dict(row._mapping) for row in self.session.execute(query, {"process_id": process_id})}
             
             tasks = []
-            task_ids = []
-            
-            for i, row in enumerate(result):
-                row_dict = dict(row._mapping)
-                # タスクの位置情報を自動生成
-                pos_x = i * 200
-                pos_y = 0
+            layer_counts = {}
+            
+            # トポロジカル順に並べ、開始点からの深さを列、同じ深さの中の順番を行として配置する
+            for task_id in graph.order:
+                row_dict = rows.get(task_id)
+                if row_dict is None:
+                    continue
+                depth = graph.depth.get(task_id, 0)
+                row_index = layer_counts.get(depth, 0)
+                layer_counts[depth] = row_index + 1
                 
                 tasks.append({
                     'id': row_dict.get('id'),
@@ -656,27 +788,29 @@ class ProcessMonitorDB:
                     'status': row_dict.get('status'),
                     'assignee': row_dict.get('assignee'),
                     'priority': row_dict.get('priority'),
-                    'position_x': pos_x,
-                    'position_y': pos_y
+                    'position_x': depth * 200,
+                    'position_y': row_index * 100
                 })
-                task_ids.append(row_dict.get('id'))
-            
-            # タスク間の遷移を取得（今はダミーデータ）
-            transitions = []
             
-            # タスクが複数ある場合、単純な順序で遷移を作成
-            for i in range(len(task_ids) - 1):
-                transitions.append({
-                    'from_task_id': task_ids[i],
-                    'to_task_id': task_ids[i + 1],
-                    'condition': ''
-                })
+            # タスク間の遷移（開始点・終了点との辺は start/end_task_ids で表す）
+            transitions = [
+                {
+                    'from_task_id': edge.from_task_id,
+                    'to_task_id': edge.to_task_id,
+                    'condition_type': edge.condition_type,
+                    'condition': edge.condition_expression or ''
+                }
+                for edge in graph.edges
+                if edge.from_task_id is not None and edge.to_task_id is not None
+            ]
             
             workflow_data = {
                 'process_id': process_row.get('id'),
                 'process_name': process_row.get('name'),
                 'tasks': tasks,
-                'transitions': transitions
+                'transitions': transitions,
+                'start_task_ids': list(graph.start_nodes),
+                'end_task_ids': list(graph.end_nodes)
             }
             
             return workflow_data
@@ -725,7 +859,7 @@ if __name__ == "__main__":
             print(f"\nプロセス {process_id} のワークフローステップ:")
             steps = db.get_workflow_steps(process_id)
             for step in steps:
-                print(f"  {step['order']}: {step['name']} ({step['status']})")
+                print(f"  {step['sequence']}: {step['name']} ({step['status']})")
         
         print("\n最近のアクティビティ:")
         activities = db.get_recent_activities(5)
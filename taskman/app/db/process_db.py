@@ -7,7 +7,9 @@
 """
 
 import logging
+from taskman.app.db.cache import CachedMonitorDB
 from taskman.app.db.monitor_db import ProcessMonitorDB, get_db_instance
+from taskman.app.db.registry import ProcessRegistry, process_registry
 
 logger = logging.getLogger(__name__)
 
@@ -16,17 +18,31 @@ class ProcessDatabase:
     ProcessDatabaseクラス - ProcessMonitorDBとの互換性を提供
     """
     
-    def __init__(self):
+    def __init__(self, db=None, registry=None):
         """
         初期化: 実際の処理はProcessMonitorDBに委譲
+
+        Args:
+            db: 接続済みのProcessMonitorDB（省略時は共有インスタンスに接続し、共有キャッシュを通す）
+            registry: プロセス定義のレジストリ（省略時、dbも省略していれば共有のレジストリ）
         """
-        self.db = get_db_instance()
-        self.db.connect()
+        if db is None:
+            db = get_db_instance()
+            db.connect()
+            db = CachedMonitorDB(db)
+            if registry is None:
+                registry = process_registry
+        self.db = db
+        self.registry = registry if registry is not None else ProcessRegistry()
         logger.info("ProcessDatabaseを初期化しました")
     
     def get_running_processes(self):
-        """実行中のプロセスを取得"""
-        return self.db.get_processes()
+        """実行中のプロセスを取得（実行中インスタンスの完了予定日時を含む）"""
+        processes = self.db.get_processes()
+        etas = self.db.get_process_etas()
+        for process in processes:
+            process['eta'] = etas.get(process.get('id'))
+        return processes
     
     def get_process_definitions(self):
         """プロセス定義を取得"""
@@ -91,13 +107,28 @@ class ProcessDatabase:
         Returns:
             プロセスID
         """
-        # プロセス定義を取得して名前とバージョンで検索
-        processes = self.db.get_processes()
-        for process in processes:
-            if (process.get('name', '') == name and 
-                process.get('version', '') == version):
-                return process.get('id')
-        return None
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return None
+        
+        # レジストリになければ一意インデックスで検索してレジストリに加える
+        process_id = self.registry.lookup(name, version)
+        if process_id is None:
+            process = self.db.get_process_by_name_version(name, version)
+            if process:
+                process_id = process['id']
+                self.registry.add(process_id, process['name'], process['version'])
+        return process_id
+    
+    def refresh_registry(self, watermark):
+        """
+        プロセス定義のレジストリにプロセステーブルの変化を反映
+        
+        Args:
+            watermark: プロセステーブルの現在の透かし（前回と同じならクエリは実行しない）
+        """
+        return self.registry.refresh(self.db, watermark)
         
     def __del__(self):
         """デストラクタ: データベース接続を閉じる"""
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+プロセス定義のレジストリ
+
+プロセス名 → {バージョン: プロセスID} の対応をメモリに保持し、
+プロセス定義タブで選択された行のIDをクエリなしで求めます。
+
+対応はプロセステーブルの透かし（change_feed.Watermark）が変化した時だけ、
+前回の最大更新日時以降に変更された行を読んで差分で更新します。
+件数が合わない場合（削除があった場合）はすべて読み込み直します。
+"""
+
+import threading
+
+
+class ProcessRegistry:
+    """プロセス名とバージョンからIDを引く対応表（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}      # (名前, バージョン) → ID
+        self._keys = {}     # ID → (名前, バージョン)
+        self.watermark = None
+
+    def lookup(self, name, version):
+        """名前とバージョンからプロセスIDを求める（なければNone）"""
+        with self._lock:
+            return self._ids.get((name, version))
+
+    def versions(self, name):
+        """プロセス名のバージョンを昇順で返す"""
+        with self._lock:
+            return sorted(version for key_name, version in self._ids if key_name == name)
+
+    def names(self):
+        """プロセス名を昇順で返す"""
+        with self._lock:
+            return sorted({name for name, _ in self._ids})
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def add(self, process_id, name, version):
+        """1件を追加・更新する（名前やバージョンが変わった場合は古い対応を消す）"""
+        with self._lock:
+            self._put(process_id, name, version)
+
+    def _put(self, process_id, name, version):
+        old = self._keys.get(process_id)
+        if old is not None and self._ids.get(old) == process_id:
+            del self._ids[old]
+        self._keys[process_id] = (name, version)
+        self._ids[(name, version)] = process_id
+
+    def refresh(self, db, watermark):
+        """
+        プロセステーブルの変化を反映する
+
+        Args:
+            db: get_process_versions を持つ ProcessMonitorDB 互換のオブジェクト
+            watermark: プロセステーブルの現在の透かし
+
+        Returns:
+            読み込みを行ったかどうか（透かしが前回と同じならFalse）
+        """
+        with self._lock:
+            previous = self.watermark
+        if watermark == previous:
+            return False
+
+        full = previous is None or previous.max_updated_at is None
+        rows = db.get_process_versions(None if full else previous.max_updated_at)
+        with self._lock:
+            if full:
+                self._ids.clear()
+                self._keys.clear()
+            for row in rows:
+                self._put(row['id'], row['name'], row['version'])
+            complete = len(self._keys) == watermark.row_count
+        if not complete:
+            # 削除があった: 残っている行だけで作り直す
+            rows = db.get_process_versions()
+            with self._lock:
+                self._ids.clear()
+                self._keys.clear()
+                for row in rows:
+                    self._put(row['id'], row['name'], row['version'])
+        with self._lock:
+            self.watermark = watermark
+        return True
+
+    def clear(self):
+        """対応表を空にする（次の refresh ですべて読み込む）"""
+        with self._lock:
+            self._ids.clear()
+            self._keys.clear()
+            self.watermark = None
+
+
+# メインスレッドとバックグラウンド読み込みのワーカーで共有するレジストリ
+process_registry = ProcessRegistry()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+プロセスモニターのバックグラウンド読み込み
+
+画面の更新に必要なクエリをすべて QThreadPool のワーカーで実行し、
+結果（RefreshSnapshot）をシグナルでメインスレッドに渡します。
+ワーカーは読み込みごとに専用のセッションを開くため、
+メインスレッドのセッションとは共有しません。
+
+- 読み込み中に更新が要求された場合、実行中の読み込みは古くなるので
+  クエリの合間で中断し、その後に最新の条件で1回だけ読み込み直します
+  （何回要求されても追加の読み込みは1回にまとめられます）。
+- 世代番号が最新でない読み込みの結果は破棄されます。
+- 定期更新では最初に変更検知の透かし（change_feed）を読み、前回反映した
+  読み込みから変化したテーブルに依存する部分だけを読み込みます。
+  データに変化がなければクエリは透かしの1回だけです。
+  プロセスインスタンスは追加・変更された行だけを読み、画面の表で置き換えます。
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+from taskman.app.db.change_feed import DEPENDENCIES, changed_tables, has_deletions, may_have_deletions, stale_parts
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RefreshSnapshot:
+    """
+    1回の更新で読み込んだデータ
+
+    前回から変化がなく読み込まなかった部分はNoneです。
+    process_instance_updates はプロセスインスタンスの差分
+    （追加・変更された行）で、process_instances を全件読み込んだ場合はNoneです。
+    """
+    generation: int
+    process_id: Optional[int]
+    watermarks: Optional[Dict[str, Any]] = None
+    running_processes: Optional[List[Dict[str, Any]]] = None
+    activities: Optional[List[Dict[str, Any]]] = None
+    process_definitions: Optional[List[Dict[str, Any]]] = None
+    process_details: Optional[Dict[str, Any]] = None
+    process_instances: Optional[List[Dict[str, Any]]] = None
+    process_instance_updates: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def unchanged(self):
+        """前回から何も変化していなかったかどうか"""
+        return all(
+            getattr(self, part) is None for part in list(DEPENDENCIES) + ['process_instance_updates']
+        )
+
+
+class LoadCancelled(Exception):
+    """読み込みが中断された"""
+
+
+def open_sources():
+    """
+    ワーカー用のデータソースを開く
+
+    Returns:
+        (ProcessDatabase, ActivityDatabase) - 専用のセッションを持つ ProcessMonitorDB を共有
+        （読み取りのキャッシュとプロセス定義のレジストリはメインスレッドと共有する）
+    """
+    from taskman.app.db.activity_db import ActivityDatabase
+    from taskman.app.db.cache import CachedMonitorDB
+    from taskman.app.db.monitor_db import ProcessMonitorDB
+    from taskman.app.db.process_db import ProcessDatabase
+    from taskman.app.db.registry import process_registry
+
+    db = CachedMonitorDB(ProcessMonitorDB())
+    db.connect()
+    return ProcessDatabase(db, process_registry), ActivityDatabase(db)
+
+
+def load_snapshot(process_db, activity_db, generation, process_id=None, cancelled=None, previous=None):
+    """
+    画面の更新に必要なデータをまとめて読み込む
+
+    previous を渡すと、透かしを比べて変化した部分だけを読み込む。
+
+    Args:
+        process_db: ProcessDatabase 互換のオブジェクト
+        activity_db: ActivityDatabase 互換のオブジェクト
+        generation: 読み込みの世代番号
+        process_id: 詳細を表示しているプロセスID（なければNone）
+        cancelled: 中断を通知する threading.Event（クエリの合間に確認する）
+        previous: 前回画面に反映した RefreshSnapshot（なければすべて読み込む）
+
+    Returns:
+        RefreshSnapshot
+
+    Raises:
+        LoadCancelled: 読み込みが中断された場合
+    """
+    def check():
+        if cancelled is not None and cancelled.is_set():
+            raise LoadCancelled()
+
+    snapshot = RefreshSnapshot(generation, process_id)
+    check()
+    snapshot.watermarks = process_db.get_change_watermarks()
+    # プロセス定義のレジストリ（プロセステーブルが変化していなければクエリなし）
+    process_db.refresh_registry(snapshot.watermarks['process'])
+
+    if previous is None or previous.watermarks is None:
+        stale = set(DEPENDENCIES)
+    else:
+        stale = stale_parts(changed_tables(previous.watermarks, snapshot.watermarks))
+        if process_id != previous.process_id:
+            stale.add('process_details')
+    if not process_id:
+        stale.discard('process_details')
+
+    steps = [
+        ('running_processes', process_db.get_running_processes),
+        ('activities', lambda: activity_db.get_recent_activities(10)),
+        ('process_definitions', process_db.get_process_definitions),
+        ('process_details', lambda: process_db.get_process_details(process_id)),
+        ('process_instances', process_db.get_process_instances),
+    ]
+    for name, load in steps:
+        if name not in stale:
+            continue
+        check()
+        if name == 'process_instances' and previous is not None and previous.watermarks is not None:
+            updates = _load_instance_updates(process_db, previous.watermarks, snapshot.watermarks)
+            if updates is not None:
+                snapshot.process_instance_updates = updates
+                continue
+            check()
+        setattr(snapshot, name, load())
+    return snapshot
+
+
+def _load_instance_updates(process_db, previous, current):
+    """
+    プロセスインスタンスの差分を読み込む
+
+    Returns:
+        追加・変更された行のリスト（削除があり差分では反映できない場合はNone）
+    """
+    before = previous['process_instance']
+    if before.max_updated_at is None or previous['process'].max_updated_at is None:
+        return None
+    # タスクインスタンスの削除はインスタンスの進捗を変えるが差分では検知できない
+    if may_have_deletions(previous['task_instance'], current['task_instance']):
+        return None
+    updates = process_db.get_process_instances_since(previous, current)
+    inserted = sum(1 for row in updates if row['id'] > (before.max_id or 0))
+    if has_deletions(before, current['process_instance'], inserted):
+        return None
+    return updates
+
+
+class RefreshSignals(QObject):
+    """RefreshWorker のシグナル（QRunnable は QObject ではないため分けて持つ）"""
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(int, str)
+    stopped = pyqtSignal(int)
+
+
+class RefreshWorker(QRunnable):
+    """1回分の読み込みを実行するワーカー"""
+
+    def __init__(self, generation, process_id, source_factory, previous=None):
+        super().__init__()
+        self.generation = generation
+        self.process_id = process_id
+        self.previous = previous
+        self.source_factory = source_factory
+        self.cancelled = threading.Event()
+        self.signals = RefreshSignals()
+        # シグナルの送信元を完了までPython側で保持する
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        """クエリの合間で読み込みを中断する"""
+        self.cancelled.set()
+
+    def run(self):
+        process_db = None
+        try:
+            process_db, activity_db = self.source_factory()
+            snapshot = load_snapshot(
+                process_db, activity_db, self.generation, self.process_id, self.cancelled, self.previous
+            )
+            self.signals.loaded.emit(snapshot)
+        except LoadCancelled:
+            logger.info(f"古い読み込みを中断しました（世代 {self.generation}）")
+        except Exception as e:
+            logger.error(f"バックグラウンドでのデータ読み込み中にエラーが発生しました: {e}")
+            self.signals.failed.emit(self.generation, str(e))
+        finally:
+            if process_db is not None:
+                process_db.close()
+            self.signals.stopped.emit(self.generation)
+
+
+class RefreshLoader(QObject):
+    """
+    更新要求をまとめてワーカーに渡し、最新の結果だけを通知する
+
+    Signals:
+        loaded(RefreshSnapshot): 最新の要求に対する読み込みが完了した
+        failed(str): 最新の要求に対する読み込みが失敗した
+    """
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None, source_factory=open_sources):
+        super().__init__(parent)
+        self.source_factory = source_factory
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self.generation = 0
+        self.process_id = None
+        self.worker = None
+        self.pending = False
+        # 最後に画面へ反映した読み込み（差分の基準）
+        self.applied = None
+
+    @property
+    def busy(self):
+        """読み込み中かどうか"""
+        return self.worker is not None
+
+    def request(self, process_id=None, full=False):
+        """
+        更新を要求する
+
+        読み込み中であれば、その読み込みを中断して終了後にもう一度読み込む。
+
+        Args:
+            process_id: 詳細を表示しているプロセスID
+            full: Trueの場合は変化の有無によらずすべて読み込み直す
+        """
+        self.generation += 1
+        self.process_id = process_id
+        if full:
+            self.reset()
+        if self.worker is not None:
+            self.worker.cancel()
+            self.pending = True
+            return
+        self._start()
+
+    def _start(self):
+        self.pending = False
+        worker = RefreshWorker(self.generation, self.process_id, self.source_factory, self.applied)
+        worker.signals.loaded.connect(self._on_loaded)
+        worker.signals.failed.connect(self._on_failed)
+        worker.signals.stopped.connect(self._on_stopped)
+        self.worker = worker
+        self.pool.start(worker)
+
+    @pyqtSlot(object)
+    def _on_loaded(self, snapshot):
+        if snapshot.generation == self.generation:
+            # 透かしは結果を反映する時にだけ進める（中断・破棄した読み込みの変更を失わない）
+            self.applied = snapshot
+            self.loaded.emit(snapshot)
+
+    @pyqtSlot(int, str)
+    def _on_failed(self, generation, message):
+        if generation == self.generation:
+            self.failed.emit(message)
+
+    @pyqtSlot(int)
+    def _on_stopped(self, generation):
+        self.worker = None
+        if self.pending:
+            self._start()
+
+    def reset(self):
+        """差分の基準を捨て、次の読み込みですべて読み込み直す"""
+        self.applied = None
+
+    def shutdown(self, msecs=5000):
+        """実行中の読み込みを中断し、ワーカーの終了を待つ"""
+        self.pending = False
+        if self.worker is not None:
+            self.worker.cancel()
+        return self.pool.waitForDone(msecs)
@@ -11,9 +11,9 @@ from datetime import datetime
 
 from PyQt6.QtWidgets import (
     QMainWindow, QApplication, QTabWidget, QStatusBar,
-    QMessageBox, QMenu, QMenuBar, QTableWidgetItem, QDialog, QVBoxLayout, QGroupBox, QFormLayout, QLabel, QDialogButtonBox
+    QMessageBox, QMenu, QMenuBar, QTableWidget, QTableWidgetItem, QDialog, QVBoxLayout, QGroupBox, QFormLayout, QLabel, QDialogButtonBox
 )
-from PyQt6.QtCore import QTimer, Qt, pyqtSlot
+from PyQt6.QtCore import QModelIndex, QTimer, Qt, pyqtSlot
 from PyQt6.QtGui import QAction, QIcon
 
 from taskman.app.gui.tabs import (
@@ -22,6 +22,8 @@ from taskman.app.gui.tabs import (
 )
 from taskman.app.db.process_db import ProcessDatabase
 from taskman.app.db.activity_db import ActivityDatabase
+from taskman.app.db.cache import shared_cache
+from taskman.app.gui.loader import RefreshLoader
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,11 @@ class ProcessMonitorApp(QMainWindow):
         # 現在選択されているプロセス
         self.current_process_id = None
         
+        # バックグラウンドでのデータ読み込み
+        self.loader = RefreshLoader(self)
+        self.loader.loaded.connect(self.apply_snapshot)
+        self.loader.failed.connect(self.on_refresh_failed)
+        
         self.init_ui()
         self.setup_refresh_timer()
         
@@ -83,7 +90,7 @@ class ProcessMonitorApp(QMainWindow):
         
         refresh_action = QAction("更新", self)
         refresh_action.setShortcut("F5")
-        refresh_action.triggered.connect(self.refresh_data)
+        refresh_action.triggered.connect(self.reload_data)
         file_menu.addAction(refresh_action)
         
         exit_action = QAction("終了", self)
@@ -105,7 +112,7 @@ class ProcessMonitorApp(QMainWindow):
         self.tab_widget.addTab(self.dashboard_tab, "ダッシュボード")
         
         # シグナル接続
-        self.dashboard_tab.instance_table.cellClicked.connect(self.on_dashboard_process_selected)
+        self.dashboard_tab.instance_table.clicked.connect(self.on_dashboard_process_selected)
     
     def init_process_definition_tab(self):
         """プロセス定義タブの初期化"""
@@ -113,7 +120,7 @@ class ProcessMonitorApp(QMainWindow):
         self.tab_widget.addTab(self.process_def_tab, "プロセス定義")
         
         # シグナル接続
-        self.process_def_tab.process_def_table.cellClicked.connect(self.on_process_definition_selected)
+        self.process_def_tab.process_def_table.clicked.connect(self.on_process_definition_selected)
     
     def init_process_details_tab(self):
         """プロセス詳細タブの初期化"""
@@ -126,7 +133,7 @@ class ProcessMonitorApp(QMainWindow):
         self.tab_widget.addTab(self.process_instance_tab, "インスタンス")
         
         # シグナル接続
-        self.process_instance_tab.instance_table.cellClicked.connect(self.on_process_instance_selected)
+        self.process_instance_tab.instance_table.clicked.connect(self.on_process_instance_selected)
         self.process_instance_tab.start_instance_button.clicked.connect(self.start_process_instance)
         self.process_instance_tab.complete_instance_button.clicked.connect(self.complete_process_instance)
         self.process_instance_tab.cancel_instance_button.clicked.connect(self.cancel_process_instance)
@@ -150,68 +157,95 @@ class ProcessMonitorApp(QMainWindow):
     
     @pyqtSlot()
     def refresh_data(self):
-        """すべてのタブのデータを更新"""
+        """前回から変化したデータの読み込みをバックグラウンドで開始"""
+        self.loader.request(self.current_process_id)
+        self.status_bar.showMessage("更新中...")
+    
+    @pyqtSlot()
+    def reload_data(self):
+        """変化の有無によらずすべてのタブのデータを読み込み直す"""
+        self.loader.request(self.current_process_id, full=True)
+        self.status_bar.showMessage("更新中...")
+    
+    @pyqtSlot(object)
+    def apply_snapshot(self, snapshot):
+        """バックグラウンドで読み込んだデータを各タブに反映（変化のなかった部分はそのまま）"""
         try:
             # ダッシュボードデータの更新
-            self.update_dashboard_data()
+            if snapshot.running_processes is not None:
+                self.show_running_processes(snapshot.running_processes)
+            if snapshot.activities is not None:
+                self.show_activities(snapshot.activities)
             
             # プロセス定義の更新
-            self.update_process_definitions()
+            if snapshot.process_definitions is not None:
+                self.update_process_definitions(snapshot.process_definitions)
             
-            # 選択されているプロセスの詳細を更新
-            if self.current_process_id:
-                self.update_process_details(self.current_process_id)
+            # 選択されているプロセスの詳細を更新（読み込み後に選択が変わっていなければ）
+            if snapshot.process_details and snapshot.process_id == self.current_process_id:
+                self.show_process_details(snapshot.process_details)
             
-            # プロセスインスタンスの更新
-            self.update_process_instances()
+            # プロセスインスタンスの更新（差分であれば該当する行だけ置き換える）
+            if snapshot.process_instances is not None:
+                self.update_process_instances(snapshot.process_instances)
+            if snapshot.process_instance_updates:
+                self.patch_process_instances(snapshot.process_instance_updates)
             
             # ステータスバー更新
             self.status_bar.showMessage(f"最終更新: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             
-            logger.info("すべてのデータが更新されました")
+            if snapshot.unchanged:
+                logger.debug("データに変化はありませんでした")
+            else:
+                logger.info("データが更新されました")
+            stats = shared_cache.stats()
+            logger.debug(f"キャッシュ: ヒット {stats.hits} / ミス {stats.misses}（{stats.size}件）")
         except Exception as e:
             logger.error(f"データ更新中にエラーが発生しました: {e}")
             self.status_bar.showMessage(f"エラー: {str(e)}")
+            # 画面の状態が読み込みと一致しないため、次回はすべて読み込み直す
+            self.loader.reset()
     
-    def update_dashboard_data(self):
-        """ダッシュボードデータを更新"""
+    @pyqtSlot(str)
+    def on_refresh_failed(self, message):
+        """バックグラウンドでの読み込みが失敗した時の処理"""
+        self.status_bar.showMessage(f"エラー: {message}")
+    
+    def update_dashboard_data(self, running_processes=None, activities=None):
+        """ダッシュボードデータを更新（データを省略した場合はここで取得）"""
         # プロセスインスタンスの更新
-        running_processes = self.process_db.get_running_processes()
-        
-        self.dashboard_tab.instance_table.setRowCount(len(running_processes))
-        for i, process in enumerate(running_processes):
-            self.dashboard_tab.instance_table.setItem(i, 0, QTableWidgetItem(str(process.get('id', ''))))
-            self.dashboard_tab.instance_table.setItem(i, 1, QTableWidgetItem(str(process.get('name', ''))))
-            self.dashboard_tab.instance_table.setItem(i, 2, QTableWidgetItem(str(process.get('status', ''))))
-            self.dashboard_tab.instance_table.setItem(i, 3, QTableWidgetItem(f"{process.get('progress', 0)}%"))
-            self.dashboard_tab.instance_table.setItem(i, 4, QTableWidgetItem(str(process.get('start_date', ''))))
+        if running_processes is None:
+            running_processes = self.process_db.get_running_processes()
+        self.show_running_processes(running_processes)
         
         # アクティビティの更新
-        activities = self.activity_db.get_recent_activities(10)
-        
-        self.dashboard_tab.activity_table.setRowCount(len(activities))
-        for i, activity in enumerate(activities):
-            self.dashboard_tab.activity_table.setItem(i, 0, QTableWidgetItem(str(activity.get('timestamp', ''))))
-            self.dashboard_tab.activity_table.setItem(i, 1, QTableWidgetItem(str(activity.get('process_name', ''))))
-            self.dashboard_tab.activity_table.setItem(i, 2, QTableWidgetItem(str(activity.get('description', ''))))
+        if activities is None:
+            activities = self.activity_db.get_recent_activities(10)
+        self.show_activities(activities)
     
-    def update_process_definitions(self):
-        """プロセス定義を更新"""
-        process_defs = self.process_db.get_process_definitions()
-        
-        self.process_def_tab.process_def_table.setRowCount(len(process_defs))
-        for i, process in enumerate(process_defs):
-            self.process_def_tab.process_def_table.setItem(i, 0, QTableWidgetItem(str(process.get('name', ''))))
-            self.process_def_tab.process_def_table.setItem(i, 1, QTableWidgetItem(str(process.get('version', ''))))
-            self.process_def_tab.process_def_table.setItem(i, 2, QTableWidgetItem(str(process.get('status', ''))))
-            self.process_def_tab.process_def_table.setItem(i, 3, QTableWidgetItem(str(process.get('task_count', 0))))
+    def show_running_processes(self, running_processes):
+        """取得済みの実行中プロセスをダッシュボードに表示"""
+        self.dashboard_tab.instance_model.set_rows(running_processes)
+    
+    def show_activities(self, activities):
+        """取得済みのアクティビティをダッシュボードに表示"""
+        self.dashboard_tab.activity_model.set_rows(activities)
+    
+    def update_process_definitions(self, process_defs=None):
+        """プロセス定義を更新（データを省略した場合はここで取得）"""
+        if process_defs is None:
+            process_defs = self.process_db.get_process_definitions()
+        self.process_def_tab.process_def_model.set_rows(process_defs)
     
     def update_process_details(self, process_id):
         """プロセス詳細情報の更新"""
         process = self.process_db.get_process_details(process_id)
         if not process:
             return
-        
+        self.show_process_details(process)
+    
+    def show_process_details(self, process):
+        """取得済みのプロセス詳細情報を表示"""
         # ヘッダーの更新
         self.process_details_tab.detail_header.setText(f"プロセス詳細: {str(process.get('name', ''))}")
         
@@ -222,31 +256,44 @@ class ProcessMonitorApp(QMainWindow):
         self.process_details_tab.info_values[3].setText(str(process.get('creation_date', '')))
         self.process_details_tab.info_values[4].setText(str(process.get('description', '')))
     
-    def update_process_instances(self):
-        """プロセスインスタンスの更新"""
-        instances = self.process_db.get_process_instances()
-        
-        self.process_instance_tab.instance_table.setRowCount(len(instances))
-        for i, instance in enumerate(instances):
-            self.process_instance_tab.instance_table.setItem(i, 0, QTableWidgetItem(str(instance.get('id', ''))))
-            self.process_instance_tab.instance_table.setItem(i, 1, QTableWidgetItem(str(instance.get('process_name', ''))))
-            self.process_instance_tab.instance_table.setItem(i, 2, QTableWidgetItem(str(instance.get('status', ''))))
-            self.process_instance_tab.instance_table.setItem(i, 3, QTableWidgetItem(str(instance.get('start_time', ''))))
-            self.process_instance_tab.instance_table.setItem(i, 4, QTableWidgetItem(str(instance.get('end_time', '-'))))
+    def update_process_instances(self, instances=None):
+        """プロセスインスタンスの更新（データを省略した場合はここで取得）"""
+        if instances is None:
+            instances = self.process_db.get_process_instances()
+        self.process_instance_tab.instance_model.set_rows(instances)
+    
+    def patch_process_instances(self, instances):
+        """追加・変更されたプロセスインスタンスの行だけを置き換える（新しい行は先頭に追加）"""
+        # 開始日時の降順で届くため、そのまま先頭に並べれば順序が保たれる
+        self.process_instance_tab.instance_model.upsert_rows(instances)
+    
+    def selected_process_instance(self):
+        """
+        インスタンスタブで選択されている行の (インスタンスID, ステータス) を取得
+        
+        Returns:
+            選択がなければNone
+        """
+        rows = self.process_instance_tab.instance_table.selectionModel().selectedRows()
+        if not rows:
+            return None
+        model = self.process_instance_tab.instance_model
+        row = rows[0].row()
+        return model.value(row, 'id'), model.value(row, 'status')
     
-    @pyqtSlot(int, int)
-    def on_dashboard_process_selected(self, row, col):
+    @pyqtSlot(QModelIndex)
+    def on_dashboard_process_selected(self, index):
         """ダッシュボードタブでプロセスが選択された時の処理"""
-        process_id = int(self.dashboard_tab.instance_table.item(row, 0).text())
+        process_id = self.dashboard_tab.instance_model.value(index.row(), 'id')
         self.current_process_id = process_id
         self.update_process_details(process_id)
         self.tab_widget.setCurrentIndex(2)  # プロセス詳細タブへ切り替え
     
-    @pyqtSlot(int, int)
-    def on_process_definition_selected(self, row, col):
+    @pyqtSlot(QModelIndex)
+    def on_process_definition_selected(self, index):
         """プロセス定義タブでプロセスが選択された時の処理"""
-        process_name = self.process_def_tab.process_def_table.item(row, 0).text()
-        process_version = self.process_def_tab.process_def_table.item(row, 1).text()
+        process_name = self.process_def_tab.process_def_model.value(index.row(), 'name')
+        process_version = self.process_def_tab.process_def_model.value(index.row(), 'version')
         
         # プロセス名とバージョンからIDを取得
         process_id = self.process_db.get_process_id_by_name_version(process_name, process_version)
@@ -255,10 +302,10 @@ class ProcessMonitorApp(QMainWindow):
             self.update_process_details(process_id)
             self.tab_widget.setCurrentIndex(2)  # プロセス詳細タブへ切り替え
     
-    @pyqtSlot(int, int)
-    def on_process_instance_selected(self, row, col):
+    @pyqtSlot(QModelIndex)
+    def on_process_instance_selected(self, index):
         """プロセスインスタンスタブでインスタンスが選択された時の処理"""
-        instance_id = int(self.process_instance_tab.instance_table.item(row, 0).text())
+        instance_id = self.process_instance_tab.instance_model.value(index.row(), 'id')
         
         try:
             # インスタンス情報を取得
@@ -358,16 +405,14 @@ class ProcessMonitorApp(QMainWindow):
     @pyqtSlot()
     def complete_process_instance(self):
         """選択されたプロセスインスタンスを完了"""
-        selected_rows = self.process_instance_tab.instance_table.selectedItems()
-        if not selected_rows:
+        selected = self.selected_process_instance()
+        if not selected:
             QMessageBox.warning(self, "警告", "インスタンスが選択されていません")
             return
         
-        row = selected_rows[0].row()
-        instance_id = int(self.process_instance_tab.instance_table.item(row, 0).text())
-        status = self.process_instance_tab.instance_table.item(row, 2).text()
+        instance_id, status = selected
         
-        if status == "完了" or status == "キャンセル":
+        if status != "実行中":
             QMessageBox.warning(self, "警告", "このインスタンスは既に終了しています")
             return
         
@@ -393,16 +438,14 @@ class ProcessMonitorApp(QMainWindow):
     @pyqtSlot()
     def cancel_process_instance(self):
         """選択されたプロセスインスタンスをキャンセル"""
-        selected_rows = self.process_instance_tab.instance_table.selectedItems()
-        if not selected_rows:
+        selected = self.selected_process_instance()
+        if not selected:
             QMessageBox.warning(self, "警告", "インスタンスが選択されていません")
             return
         
-        row = selected_rows[0].row()
-        instance_id = int(self.process_instance_tab.instance_table.item(row, 0).text())
-        status = self.process_instance_tab.instance_table.item(row, 2).text()
+        instance_id, status = selected
         
-        if status == "完了" or status == "キャンセル":
+        if status != "実行中":
             QMessageBox.warning(self, "警告", "このインスタンスは既に終了しています")
             return
         
@@ -456,8 +499,9 @@ class ProcessMonitorApp(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            # タイマーを停止
+            # タイマーを停止し、読み込み中のワーカーの終了を待つ
             self.refresh_timer.stop()
+            self.loader.shutdown()
             
             # データベース接続をクローズ
             if hasattr(self, 'process_db'):
@@ -2,11 +2,30 @@
 タブモジュール - プロセスモニターGUIのタブコンポーネントを提供します
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableView, QAbstractItemView
 from PyQt6.QtWidgets import QTabWidget, QFrame, QSplitter, QPushButton, QHBoxLayout, QGridLayout
 from PyQt6.QtCore import Qt, pyqtSlot
 from PyQt6.QtGui import QFont
 
+from taskman.app.gui.tabs.table_model import Column, ColumnarTableModel
+
+
+def create_table_view(model, select_rows=True):
+    """
+    モデルを表示する読み取り専用のテーブルビューを作成
+
+    行の高さを固定にして、描画とスクロールの計算を表示中の行だけで済ませる。
+    """
+    view = QTableView()
+    view.setModel(model)
+    if select_rows:
+        view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    view.horizontalHeader().setStretchLastSection(True)
+    view.verticalHeader().setSectionResizeMode(view.verticalHeader().ResizeMode.Fixed)
+    view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 8)
+    return view
+
 class DashboardTab(QWidget):
     """ダッシュボードタブ - プロセスの概要と最近のアクティビティを表示"""
     
@@ -29,12 +48,15 @@ class DashboardTab(QWidget):
         instance_header.setFont(QFont("Helvetica", 12, QFont.Weight.Bold))
         instance_layout.addWidget(instance_header)
         
-        self.instance_table = QTableWidget()
-        self.instance_table.setColumnCount(5)
-        self.instance_table.setHorizontalHeaderLabels(["ID", "プロセス名", "ステータス", "進捗", "開始日時"])
-        self.instance_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.instance_table.horizontalHeader().setStretchLastSection(True)
-        self.instance_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.instance_model = ColumnarTableModel([
+            Column('id', "ID"),
+            Column('name', "プロセス名"),
+            Column('status', "ステータス"),
+            Column('progress', "進捗", lambda progress: f"{progress}%", default="0%"),
+            Column('start_date', "開始日時"),
+            Column('eta', "完了予定", lambda eta: eta.strftime('%Y-%m-%d %H:%M'), default='-'),
+        ], parent=self)
+        self.instance_table = create_table_view(self.instance_model)
         instance_layout.addWidget(self.instance_table)
         
         instance_button = QPushButton("すべて表示")
@@ -49,11 +71,12 @@ class DashboardTab(QWidget):
         activity_header.setFont(QFont("Helvetica", 12, QFont.Weight.Bold))
         activity_layout.addWidget(activity_header)
         
-        self.activity_table = QTableWidget()
-        self.activity_table.setColumnCount(3)
-        self.activity_table.setHorizontalHeaderLabels(["時間", "プロセス", "アクション"])
-        self.activity_table.horizontalHeader().setStretchLastSection(True)
-        self.activity_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.activity_model = ColumnarTableModel([
+            Column('timestamp', "時間"),
+            Column('process_name', "プロセス"),
+            Column('description', "アクション"),
+        ], parent=self)
+        self.activity_table = create_table_view(self.activity_model, select_rows=False)
         activity_layout.addWidget(self.activity_table)
         
         main_splitter.addWidget(activity_frame)
@@ -73,12 +96,13 @@ class ProcessDefinitionTab(QWidget):
         layout.addWidget(header)
         
         # プロセス定義テーブル
-        self.process_def_table = QTableWidget()
-        self.process_def_table.setColumnCount(4)
-        self.process_def_table.setHorizontalHeaderLabels(["プロセス名", "バージョン", "ステータス", "タスク数"])
-        self.process_def_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.process_def_table.horizontalHeader().setStretchLastSection(True)
-        self.process_def_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.process_def_model = ColumnarTableModel([
+            Column('name', "プロセス名"),
+            Column('version', "バージョン"),
+            Column('status', "ステータス"),
+            Column('task_count', "タスク数", default='0'),
+        ], parent=self)
+        self.process_def_table = create_table_view(self.process_def_model)
         layout.addWidget(self.process_def_table)
 
 
@@ -142,11 +166,14 @@ class ProcessInstanceTab(QWidget):
         layout.addWidget(header)
         
         # プロセスインスタンステーブル
-        self.instance_table = QTableWidget()
-        self.instance_table.setColumnCount(5)
-        self.instance_table.setHorizontalHeaderLabels(["インスタンスID", "プロセス名", "ステータス", "開始時間", "終了時間"])
-        self.instance_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.instance_table.horizontalHeader().setStretchLastSection(True)
+        self.instance_model = ColumnarTableModel([
+            Column('id', "インスタンスID"),
+            Column('process_name', "プロセス名"),
+            Column('status', "ステータス"),
+            Column('started_at', "開始時間"),
+            Column('completed_at', "終了時間", default='-'),
+        ], parent=self)
+        self.instance_table = create_table_view(self.instance_model)
         layout.addWidget(self.instance_table)
         
         # アクションボタン
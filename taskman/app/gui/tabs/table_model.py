@@ -0,0 +1,140 @@
+"""
+テーブルモデル - 一覧表示用の列指向の QAbstractTableModel を提供します
+
+行ごとの辞書や QTableWidgetItem を持たず、列ごとのリストに値だけを保持します。
+表示用の文字列はビューが描画する行についてだけ data() で作ります。
+行はビューのスクロールに合わせて fetch_size 件ずつ公開します（canFetchMore/fetchMore）。
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+@dataclass(frozen=True)
+class Column:
+    """表の列: 行データのキー、見出し、表示形式"""
+    key: str
+    header: str
+    format: Optional[Callable[[Any], str]] = None
+    default: str = ''
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    """
+    列指向で行を保持する読み取り専用のテーブルモデル
+
+    Args:
+        columns: Column のリスト
+        key: 行を識別するキー（upsert_rows で使う）
+        fetch_size: 一度に公開する行数
+    """
+
+    def __init__(self, columns, key='id', fetch_size=200, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.key = key
+        self.fetch_size = fetch_size
+        # 表示列に加えて識別キーも保持する（表示しない場合もある）
+        self._keys = [c.key for c in self.columns]
+        if key not in self._keys:
+            self._keys.append(key)
+        self._data = {name: [] for name in self._keys}
+        self._row_of = {}
+        self._loaded = 0
+
+    # --- 行データの設定 ---
+
+    def set_rows(self, rows):
+        """すべての行を置き換える（最初の fetch_size 件だけを公開する）"""
+        self.beginResetModel()
+        self._data = {name: [row.get(name) for row in rows] for name in self._keys}
+        self._reindex()
+        self._loaded = min(len(rows), self.fetch_size)
+        self.endResetModel()
+
+    def upsert_rows(self, rows):
+        """
+        識別キーが同じ行を置き換え、新しい行を先頭に追加する
+
+        rows の順序のまま先頭に並ぶ（新しい順で渡す）。
+        """
+        new_rows = []
+        for row in rows:
+            position = self._row_of.get(row.get(self.key))
+            if position is None:
+                new_rows.append(row)
+                continue
+            for name in self._keys:
+                self._data[name][position] = row.get(name)
+            if position < self._loaded:
+                self.dataChanged.emit(
+                    self.index(position, 0), self.index(position, len(self.columns) - 1)
+                )
+
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), 0, len(new_rows) - 1)
+            for name in self._keys:
+                self._data[name][:0] = [row.get(name) for row in new_rows]
+            self._reindex()
+            self._loaded += len(new_rows)
+            self.endInsertRows()
+
+    def _reindex(self):
+        self._row_of = {value: i for i, value in enumerate(self._data[self.key])}
+
+    # --- 行データの参照 ---
+
+    def total_rows(self):
+        """公開していない行も含めた行数"""
+        return len(self._data[self.key])
+
+    def value(self, row, key):
+        """指定した行の生の値"""
+        return self._data[key][row]
+
+    def row_of(self, key_value):
+        """識別キーの値から行番号を求める（なければNone）"""
+        return self._row_of.get(key_value)
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        value = self._data[column.key][index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return column.default
+            return column.format(value) if column.format else str(value)
+        if role == Qt.ItemDataRole.UserRole:
+            return value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section].header
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self.total_rows()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.fetch_size, self.total_rows() - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
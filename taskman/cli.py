@@ -1,41 +1,55 @@
 """
 Main CLI application entry point
 """
+import importlib
+
 import typer
+from typer.core import TyperGroup
 from rich.console import Console
 from rich.panel import Panel
 
-from taskman.commands import db, objective, task, process, workflow, process_instance, task_instance, task_step
-
-app = typer.Typer(
-    name="taskman",
-    help="Task Management System CLI",
-    add_completion=False,
-)
-
-# Add database commands
-app.add_typer(db.app, name="db", help="Database management commands")
-
-# Add objective commands
-app.add_typer(objective.app, name="objective", help="Objective management commands")
+# サブコマンドの登録表: コマンド名 -> (モジュール, ヘルプ)
+# モジュール（とそれが読み込むモデルやDBエンジン）は、そのサブコマンドが
+# 実行されるときに初めてインポートされる
+COMMAND_MODULES = {
+    "db": ("taskman.commands.db", "Database management commands"),
+    "objective": ("taskman.commands.objective", "Objective management commands"),
+    "task": ("taskman.commands.task", "Task management commands"),
+    "process": ("taskman.commands.process", "Process management commands"),
+    "workflow": ("taskman.commands.workflow", "Workflow management commands"),
+    "instance": ("taskman.commands.process_instance", "Process instance management commands"),
+    "task-instance": ("taskman.commands.task_instance", "Task instance management commands"),
+    "step": ("taskman.commands.task_step", "Task step management commands"),
+    "import": ("taskman.commands.bulk_import", "Bulk import commands"),
+    "export": ("taskman.commands.export", "Export data to NDJSON or CSV files"),
+}
 
-# Add task commands
-app.add_typer(task.app, name="task", help="Task management commands")
 
-# Add process commands
-app.add_typer(process.app, name="process", help="Process management commands")
+class LazyCommandGroup(TyperGroup):
+    """
+    Click group that imports sub-apps from COMMAND_MODULES on first use
+    """
 
-# Add workflow commands
-app.add_typer(workflow.app, name="workflow", help="Workflow management commands")
+    def list_commands(self, ctx):
+        return sorted(set(self.commands) | set(COMMAND_MODULES))
 
-# Add process instance commands
-app.add_typer(process_instance.app, name="instance", help="Process instance management commands")
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in COMMAND_MODULES:
+            module_name, help_text = COMMAND_MODULES[cmd_name]
+            module = importlib.import_module(module_name)
+            command = typer.main.get_command(module.app)
+            command.name = cmd_name
+            command.help = command.help or help_text
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
 
-# Add task instance commands
-app.add_typer(task_instance.app, name="task-instance", help="Task instance management commands")
 
-# Add task step commands
-app.add_typer(task_step.app, name="step", help="Task step management commands")
+app = typer.Typer(
+    name="taskman",
+    help="Task Management System CLI",
+    add_completion=False,
+    cls=LazyCommandGroup,
+)
 
 console = Console()
 
@@ -54,5 +68,42 @@ def version():
     from taskman import __version__
     console.print(Panel(f"Task Management System CLI v{__version__}", title="Version"))
 
+@app.command()
+def shell():
+    """
+    Start an interactive shell that runs commands in one process and session
+    """
+    from taskman.cli.repl import run_shell
+    run_shell()
+
+@app.command()
+def batch(
+    file: str = typer.Argument(..., help="Command file, one command per line ('-' for stdin)"),
+    stop_on_error: bool = typer.Option(False, "--stop-on-error", help="Stop at the first failing command"),
+    echo: bool = typer.Option(False, "--echo", help="Print each command before running it")
+):
+    """
+    Run commands from a file in one process and session
+    """
+    from taskman.cli.repl import run_batch, open_batch_file
+
+    try:
+        batch_file = open_batch_file(file)
+    except OSError as e:
+        console.print(Panel(f"Cannot open batch file: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
+    with batch_file as stream:
+        succeeded, failures = run_batch(stream, stop_on_error=stop_on_error, echo=echo)
+
+    if failures:
+        lines = ", ".join(str(line_no) for line_no, _ in failures)
+        console.print(Panel(
+            f"{succeeded} commands succeeded, {len(failures)} failed (lines: {lines})",
+            title="Batch", style="red"
+        ))
+        raise typer.Exit(1)
+    console.print(Panel(f"{succeeded} commands succeeded", title="Batch"))
+
 if __name__ == "__main__":
-    app() 
\ No newline at end of file
+    app()
@@ -0,0 +1,148 @@
+"""
+Shell and batch modes for the CLI
+
+Both modes run many taskman commands in one process: the Typer app is
+built once and every command shares one engine and one database session.
+"""
+import shlex
+import sys
+from contextlib import nullcontext
+
+import click
+import typer
+from rich.console import Console
+
+console = Console()
+
+# シェル/バッチの中からは実行できないコマンド
+NESTED_COMMANDS = {"shell", "batch"}
+
+
+def iter_commands(stream):
+    """
+    Yield (line number, command line) for each command in a stream
+
+    Blank lines and lines starting with # are skipped.
+    """
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        yield line_no, line
+
+
+def parse_command(line):
+    """Split a command line into argv, or return None if it cannot be parsed"""
+    try:
+        return shlex.split(line)
+    except ValueError as e:
+        console.print(f"[red]コマンドを解析できません: {e}[/red]")
+        return None
+
+
+def run_command(command, argv, session):
+    """
+    Run one command with the shared session and return its exit code
+
+    Args:
+        command: Click command built from the root Typer app
+        argv: Command arguments (without the program name)
+        session: Shared database session
+    """
+    if argv and argv[0] in NESTED_COMMANDS:
+        console.print(f"[red]'{argv[0]}' は実行できません[/red]")
+        return 1
+
+    try:
+        result = command.main(args=argv, prog_name="taskman", standalone_mode=False)
+        exit_code = result if isinstance(result, int) else 0
+    except click.ClickException as e:
+        e.show()
+        exit_code = e.exit_code
+    except click.Abort:
+        exit_code = 1
+    except Exception as e:
+        console.print(f"[red]コマンド実行中にエラーが発生しました: {e}[/red]")
+        exit_code = 1
+
+    # 各コマンドは自身で commit するため、残ったトランザクションは破棄して
+    # コネクションをプールに返す（失敗したコマンドの変更もここで取り消される）
+    session.rollback()
+    return exit_code
+
+
+def run_batch(stream, stop_on_error=False, echo=False):
+    """
+    Run commands read line by line from a stream
+
+    Args:
+        stream: Iterable of command lines
+        stop_on_error: Stop at the first failing command
+        echo: Print each command before running it
+
+    Returns:
+        (number of succeeded commands, list of (line number, exit code) failures)
+    """
+    from taskman.cli.app import app
+    from taskman.database.connection import shared_session
+
+    command = typer.main.get_command(app)
+    succeeded = 0
+    failures = []
+
+    with shared_session() as session:
+        for line_no, line in iter_commands(stream):
+            if echo:
+                console.print(f"[dim]{line_no}: taskman {line}[/dim]")
+            argv = parse_command(line)
+            exit_code = 1 if argv is None else run_command(command, argv, session)
+            if exit_code == 0:
+                succeeded += 1
+                continue
+            failures.append((line_no, exit_code))
+            if stop_on_error:
+                break
+
+    return succeeded, failures
+
+
+def run_shell():
+    """Read commands interactively until exit/quit or EOF"""
+    from taskman.cli.app import app
+    from taskman.database.connection import shared_session
+
+    try:
+        import readline  # 入力履歴と行編集を有効にする
+    except ImportError:
+        pass
+
+    command = typer.main.get_command(app)
+    console.print("taskman shell - 'exit' または Ctrl-D で終了します。'--help' でコマンド一覧を表示します。")
+
+    with shared_session() as session:
+        while True:
+            try:
+                line = input("taskman> ")
+            except EOFError:
+                console.print()
+                break
+            except KeyboardInterrupt:
+                console.print()
+                continue
+
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line in ("exit", "quit"):
+                break
+
+            argv = parse_command(line)
+            if argv is not None:
+                run_command(command, argv, session)
+
+
+def open_batch_file(path):
+    """Open a batch file, or stdin for '-' (stdin is left open on exit)"""
+    if path == "-":
+        return nullcontext(sys.stdin)
+    return open(path, encoding="utf-8")
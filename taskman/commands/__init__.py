@@ -1,5 +1,5 @@
 """
 Command modules for the task management system
+
+Modules are imported on demand by taskman.cli.app.LazyCommandGroup.
 """
-from . import db
-from . import objective 
\ No newline at end of file
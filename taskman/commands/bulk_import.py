@@ -0,0 +1,472 @@
+"""
+Bulk import commands
+
+Tasks, task steps and workflows are read row by row from CSV or NDJSON.
+Rows are validated in chunks: referenced ids are checked with one IN query
+per chunk instead of one lookup per row, and valid rows are written with a
+single multi-row INSERT per chunk. The whole import runs in one transaction.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from taskman.database.connection import get_db
+from taskman.models.process import Process
+from taskman.models.task import Task
+from taskman.models.task_step import TaskStep
+from taskman.models.workflow import Workflow
+from taskman.models.progress import apply_counter_deltas, COMPLETED_STATUS
+from taskman.engine.graph import invalidate_graph
+from taskman.engine.schedule import invalidate_schedule
+from taskman.engine.conditions import validate_condition
+
+console = Console()
+app = typer.Typer()
+
+TASK_STATUSES = ["未着手", "進行中", "完了", "保留"]
+TASK_PRIORITIES = ["低", "中", "高", "緊急"]
+CONDITION_TYPES = ["常時", "条件付き", "並列"]
+
+# エラー一覧に表示する最大件数
+MAX_REPORTED_ERRORS = 50
+
+
+class RowError(ValueError):
+    """Raised when a single input row is invalid"""
+
+
+def detect_format(path, fmt):
+    """Return 'csv' or 'ndjson' from the --format option or the file extension"""
+    if fmt:
+        fmt = fmt.lower()
+        if fmt not in ("csv", "ndjson"):
+            raise RowError("形式は 'csv' または 'ndjson' を指定してください")
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    return "csv" if ext == ".csv" else "ndjson"
+
+
+def read_records(stream, fmt):
+    """
+    Yield (record number, row dict or RowError) from a CSV or NDJSON stream
+
+    The record number is the line number in the input file, so errors can be
+    traced back to the source. Empty CSV cells are read as None.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items() if k}
+        return
+
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, RowError(f"JSONを解析できません: {e.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError("各行はJSONオブジェクトである必要があります")
+            continue
+        yield line_no, row
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _text(row, field, required=False, max_length=None):
+    value = row.get(field)
+    if value is None or str(value).strip() == "":
+        if required:
+            raise RowError(f"{field} は必須です")
+        return None
+    value = str(value)
+    if max_length and len(value) > max_length:
+        raise RowError(f"{field} は{max_length}文字以内で指定してください")
+    return value
+
+
+def _int(row, field, required=False):
+    value = row.get(field)
+    if value is None or value == "":
+        if required:
+            raise RowError(f"{field} は必須です")
+        return None
+    if isinstance(value, bool):
+        raise RowError(f"{field} は整数で指定してください")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise RowError(f"{field} は整数で指定してください")
+
+
+def _choice(row, field, choices, default):
+    value = row.get(field) or default
+    if value not in choices:
+        raise RowError(f"{field} は {', '.join(choices)} のいずれかを指定してください")
+    return value
+
+
+def _date(row, field):
+    value = row.get(field)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), "%Y-%m-%d").date()
+    except ValueError:
+        raise RowError(f"{field} はYYYY-MM-DD形式で指定してください")
+
+
+def _existing_ids(db, column, ids):
+    """Return the subset of ids that exist, with one IN query"""
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return set()
+    return set(db.execute(select(column).where(column.in_(ids))).scalars())
+
+
+# --- タスク ---
+
+def prepare_task(row):
+    return {
+        "process_id": _int(row, "process_id", required=True),
+        "name": _text(row, "name", required=True, max_length=100),
+        "description": _text(row, "description"),
+        "estimated_duration": _int(row, "estimated_duration"),
+        "status": _choice(row, "status", TASK_STATUSES, "未着手"),
+        "priority": _choice(row, "priority", TASK_PRIORITIES, "中"),
+        "assigned_to": _text(row, "assigned_to", max_length=100),
+        "due_date": _date(row, "due_date"),
+    }
+
+
+def check_tasks(db, chunk, state):
+    """Check that every referenced process exists"""
+    processes = _existing_ids(db, Process.id, (values["process_id"] for _, values in chunk))
+    for _, values in chunk:
+        if values["process_id"] not in processes:
+            yield RowError(f"プロセス（ID: {values['process_id']}）が見つかりません")
+        else:
+            yield None
+
+
+def after_insert_tasks(db, rows):
+    """Bulk inserts bypass the ORM hooks, so update counters and cached graphs here"""
+    deltas = {}
+    for values in rows:
+        total, completed = deltas.get(values["process_id"], (0, 0))
+        deltas[values["process_id"]] = (total + 1, completed + (values["status"] == COMPLETED_STATUS))
+    apply_counter_deltas(db, Process.__table__, deltas)
+    for process_id in deltas:
+        invalidate_graph(process_id)
+
+
+# --- タスクステップ ---
+
+def prepare_step(row):
+    return {
+        "task_id": _int(row, "task_id", required=True),
+        "step_number": _int(row, "step_number"),
+        "name": _text(row, "name", required=True, max_length=100),
+        "description": _text(row, "description"),
+        "expected_duration": _int(row, "expected_duration"),
+        "required_resources": _text(row, "required_resources"),
+        "verification_method": _text(row, "verification_method"),
+    }
+
+
+def check_steps(db, chunk, state):
+    """
+    Check task references and assign or verify step numbers
+
+    The step numbers already used by each task are loaded once per task with
+    one query per chunk and kept in state, so rows earlier in the same
+    import are taken into account as well.
+    """
+    used = state.setdefault("used_step_numbers", {})
+    last = state.setdefault("last_step_number", {})
+    task_ids = {values["task_id"] for _, values in chunk}
+    tasks = _existing_ids(db, Task.id, task_ids)
+
+    new_ids = tasks - set(used)
+    if new_ids:
+        for task_id in new_ids:
+            used[task_id] = set()
+        rows = db.execute(
+            select(TaskStep.task_id, TaskStep.step_number).where(TaskStep.task_id.in_(new_ids))
+        )
+        for task_id, step_number in rows:
+            used[task_id].add(step_number)
+        for task_id in new_ids:
+            last[task_id] = max(used[task_id], default=0)
+
+    for _, values in chunk:
+        task_id = values["task_id"]
+        if task_id not in tasks:
+            yield RowError(f"タスク（ID: {task_id}）が見つかりません")
+            continue
+        numbers = used[task_id]
+        if values["step_number"] is None:
+            values["step_number"] = last[task_id] + 1
+        elif values["step_number"] in numbers:
+            yield RowError(f"ステップ番号 {values['step_number']} は既にタスク（ID: {task_id}）に存在します")
+            continue
+        numbers.add(values["step_number"])
+        last[task_id] = max(last[task_id], values["step_number"])
+        yield None
+
+
+def after_insert_steps(db, rows):
+    """Step durations feed the planned task durations, so drop the cached schedules"""
+    invalidate_schedule()
+
+
+# --- ワークフロー ---
+
+def prepare_workflow(row):
+    values = {
+        "process_id": _int(row, "process_id", required=True),
+        "from_task_id": _int(row, "from_task_id"),
+        "to_task_id": _int(row, "to_task_id"),
+        "condition_type": _choice(row, "condition_type", CONDITION_TYPES, "常時"),
+        "condition_expression": _text(row, "condition_expression"),
+        "sequence_number": _int(row, "sequence_number"),
+    }
+    if values["condition_type"] == "条件付き" and not values["condition_expression"]:
+        raise RowError("条件付きワークフローには condition_expression が必要です")
+    if values["condition_expression"]:
+        error = validate_condition(values["condition_expression"])
+        if error:
+            raise RowError(f"無効な条件式です: {error}")
+    return values
+
+
+def check_workflows(db, chunk, state):
+    """Check that the process exists and that both tasks belong to it"""
+    processes = _existing_ids(db, Process.id, (values["process_id"] for _, values in chunk))
+    task_ids = {
+        task_id
+        for _, values in chunk
+        for task_id in (values["from_task_id"], values["to_task_id"])
+        if task_id is not None
+    }
+    task_process = {}
+    if task_ids:
+        task_process = dict(db.execute(select(Task.id, Task.process_id).where(Task.id.in_(task_ids))).all())
+
+    for _, values in chunk:
+        if values["process_id"] not in processes:
+            yield RowError(f"プロセス（ID: {values['process_id']}）が見つかりません")
+            continue
+        error = None
+        for field in ("from_task_id", "to_task_id"):
+            task_id = values[field]
+            if task_id is None:
+                continue
+            if task_id not in task_process:
+                error = RowError(f"タスク（ID: {task_id}）が見つかりません")
+            elif task_process[task_id] != values["process_id"]:
+                error = RowError(f"タスク（ID: {task_id}）はプロセス（ID: {values['process_id']}）に属していません")
+            if error:
+                break
+        yield error
+
+
+def after_insert_workflows(db, rows):
+    """Drop the cached workflow graphs of the affected processes"""
+    for process_id in {values["process_id"] for values in rows}:
+        invalidate_graph(process_id)
+
+
+# 種類ごとの処理: (テーブル, 行の変換, 参照チェック, 挿入後の処理)
+IMPORT_KINDS = {
+    "tasks": (Task.__table__, prepare_task, check_tasks, after_insert_tasks),
+    "steps": (TaskStep.__table__, prepare_step, check_steps, after_insert_steps),
+    "workflows": (Workflow.__table__, prepare_workflow, check_workflows, after_insert_workflows),
+}
+
+
+def import_records(db, kind, records, batch_size=500):
+    """
+    Validate and insert records in chunks without committing
+
+    Args:
+        db: Database session
+        kind: Key of IMPORT_KINDS
+        records: Iterable of (record number, row dict or RowError)
+        batch_size: Number of rows validated and inserted per statement
+
+    Returns:
+        (number of inserted rows, list of (record number, error message))
+    """
+    table, prepare, check, after_insert = IMPORT_KINDS[kind]
+    state = {}
+    inserted = 0
+    errors = []
+
+    for records_chunk in chunked(records, batch_size):
+        chunk = []
+        for record_no, row in records_chunk:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                chunk.append((record_no, prepare(row)))
+            except RowError as e:
+                errors.append((record_no, str(e)))
+
+        if not chunk:
+            continue
+
+        valid = []
+        for (record_no, values), error in zip(chunk, check(db, chunk, state)):
+            if error is not None:
+                errors.append((record_no, str(error)))
+            else:
+                valid.append(values)
+
+        if valid:
+            db.execute(insert(table).values(valid))
+            if after_insert:
+                after_insert(db, valid)
+            inserted += len(valid)
+
+    errors.sort()
+    return inserted, errors
+
+
+def print_errors(errors):
+    """Print per-row errors as a table"""
+    table = Table(title=f"エラー（{len(errors)}件）")
+    table.add_column("行", style="cyan")
+    table.add_column("エラー内容", style="red")
+    for record_no, message in errors[:MAX_REPORTED_ERRORS]:
+        table.add_row(str(record_no), message)
+    console.print(table)
+    if len(errors) > MAX_REPORTED_ERRORS:
+        console.print(f"... ほか {len(errors) - MAX_REPORTED_ERRORS} 件")
+
+
+def run_import(kind, label, file, fmt, batch_size, dry_run, strict):
+    """Shared implementation of the import subcommands"""
+    try:
+        fmt = detect_format(file, fmt)
+        if batch_size < 1:
+            raise RowError("--batch-size は1以上を指定してください")
+    except RowError as e:
+        console.print(Panel(str(e), title="エラー", style="red"))
+        raise typer.Exit(1)
+
+    try:
+        db = next(get_db())
+        with open(file, encoding="utf-8-sig", newline="") as stream:
+            inserted, errors = import_records(db, kind, read_records(stream, fmt), batch_size)
+
+        if errors:
+            print_errors(errors)
+
+        if dry_run:
+            db.rollback()
+            console.print(Panel(
+                f"ドライラン: {label} {inserted}件を登録できます（エラー {len(errors)}件）",
+                title="ドライラン",
+            ))
+        elif errors and strict:
+            db.rollback()
+            console.print(Panel(
+                f"エラーがあるため{label}を登録しませんでした（エラー {len(errors)}件）",
+                title="エラー", style="red",
+            ))
+        else:
+            db.commit()
+            console.print(Panel(f"{label} {inserted}件を登録しました（エラー {len(errors)}件）", title="成功"))
+
+        if errors:
+            raise typer.Exit(1)
+
+    except typer.Exit:
+        raise
+    except OSError as e:
+        console.print(Panel(f"ファイルを読み込めません: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"インポート中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
+FILE_HELP = "入力ファイル（CSV または NDJSON）"
+FORMAT_HELP = "入力形式（csv, ndjson）。省略時は拡張子から判定"
+BATCH_HELP = "1回のINSERTで登録する行数"
+DRY_RUN_HELP = "検証のみ行い、登録しない"
+STRICT_HELP = "エラーが1件でもあれば何も登録しない"
+
+
+@app.command()
+def tasks(
+    file: str = typer.Argument(..., help=FILE_HELP),
+    fmt: Optional[str] = typer.Option(None, "--format", "-f", help=FORMAT_HELP),
+    batch_size: int = typer.Option(500, "--batch-size", help=BATCH_HELP),
+    dry_run: bool = typer.Option(False, "--dry-run", help=DRY_RUN_HELP),
+    strict: bool = typer.Option(False, "--strict", help=STRICT_HELP),
+):
+    """
+    タスクを一括登録
+
+    列: process_id, name, description, estimated_duration, status, priority, assigned_to, due_date
+    """
+    run_import("tasks", "タスク", file, fmt, batch_size, dry_run, strict)
+
+
+@app.command()
+def steps(
+    file: str = typer.Argument(..., help=FILE_HELP),
+    fmt: Optional[str] = typer.Option(None, "--format", "-f", help=FORMAT_HELP),
+    batch_size: int = typer.Option(500, "--batch-size", help=BATCH_HELP),
+    dry_run: bool = typer.Option(False, "--dry-run", help=DRY_RUN_HELP),
+    strict: bool = typer.Option(False, "--strict", help=STRICT_HELP),
+):
+    """
+    タスクステップを一括登録
+
+    列: task_id, step_number, name, description, expected_duration, required_resources, verification_method
+    step_number を省略した行はタスクごとに連番が割り当てられます。
+    """
+    run_import("steps", "タスクステップ", file, fmt, batch_size, dry_run, strict)
+
+
+@app.command()
+def workflows(
+    file: str = typer.Argument(..., help=FILE_HELP),
+    fmt: Optional[str] = typer.Option(None, "--format", "-f", help=FORMAT_HELP),
+    batch_size: int = typer.Option(500, "--batch-size", help=BATCH_HELP),
+    dry_run: bool = typer.Option(False, "--dry-run", help=DRY_RUN_HELP),
+    strict: bool = typer.Option(False, "--strict", help=STRICT_HELP),
+):
+    """
+    ワークフローを一括登録
+
+    列: process_id, from_task_id, to_task_id, condition_type, condition_expression, sequence_number
+    """
+    run_import("workflows", "ワークフロー", file, fmt, batch_size, dry_run, strict)
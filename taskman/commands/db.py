@@ -2,10 +2,14 @@
 Database management commands
 """
 import typer
+from typing import Optional
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
+from sqlalchemy import text
 
 from taskman.database.init_db import create_database, init_db
+from taskman.database.monitor_queries import EXPLAIN_QUERIES
 from taskman.database.seed_data import create_sample_data
 
 console = Console()
@@ -39,14 +43,252 @@ def seed():
         raise typer.Exit(1)
 
 @app.command()
-def reset():
+def reset(
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask for confirmation")
+):
     """
     Reset the database by dropping and recreating all tables
     """
+    from taskman.database.connection import engine
+    from taskman.database.migrations import reset as reset_schema
+
+    if not yes and not typer.confirm("This deletes all data. Continue?"):
+        raise typer.Exit(1)
+
     try:
         console.print(Panel("Resetting database...", title="Database Reset"))
-        # TODO: Implement database reset
-        console.print(Panel("Database reset successfully!", title="Success"))
+        applied = reset_schema(engine, log=console.print)
+        console.print(Panel(f"Database reset successfully! (schema version {applied[-1].version})", title="Success"))
     except Exception as e:
         console.print(Panel(f"Error resetting database: {e}", title="Error", style="red"))
-        raise typer.Exit(1) 
\ No newline at end of file
+        raise typer.Exit(1)
+
+
+def _run_upgrade(target, batch_size):
+    from taskman.database.connection import engine
+    from taskman.database.migrations import MigrationError, current_version, upgrade as upgrade_schema
+
+    try:
+        applied = upgrade_schema(engine, target, batch_size=batch_size, log=console.print)
+        version = current_version(engine)
+    except MigrationError as e:
+        console.print(Panel(str(e), title="Error", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"Error migrating database: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
+    if applied:
+        console.print(Panel(
+            f"Applied {len(applied)} migrations; schema version is {version}", title="Success"
+        ))
+    else:
+        console.print(Panel(f"Database is up to date (schema version {version})", title="Success"))
+
+
+@app.command()
+def migrate(
+    batch_size: int = typer.Option(
+        1000, "--batch-size", min=1, help="Rows updated per transaction when backfilling"
+    )
+):
+    """
+    Apply every pending schema migration
+    """
+    _run_upgrade(None, batch_size)
+
+
+@app.command()
+def upgrade(
+    target: Optional[int] = typer.Argument(None, help="Schema version to upgrade to (default: latest)"),
+    batch_size: int = typer.Option(
+        1000, "--batch-size", min=1, help="Rows updated per transaction when backfilling"
+    )
+):
+    """
+    Apply the schema migrations up to a version
+    """
+    _run_upgrade(target, batch_size)
+
+
+@app.command()
+def downgrade(
+    target: int = typer.Argument(..., help="Schema version to go back to (0 drops all tables)"),
+    yes: bool = typer.Option(False, "--yes", "-y", help="Do not ask for confirmation")
+):
+    """
+    Revert the schema migrations above a version
+    """
+    from taskman.database.connection import engine
+    from taskman.database.migrations import MigrationError, downgrade as downgrade_schema
+
+    if not yes and not typer.confirm(f"Downgrading to version {target} may delete data. Continue?"):
+        raise typer.Exit(1)
+
+    try:
+        reverted = downgrade_schema(engine, target, log=console.print)
+    except MigrationError as e:
+        console.print(Panel(str(e), title="Error", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"Error downgrading database: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
+    console.print(Panel(
+        f"Reverted {len(reverted)} migrations; schema version is {target}", title="Success"
+    ))
+
+
+@app.command()
+def status():
+    """
+    Show the applied and pending schema migrations
+    """
+    from taskman.database.connection import engine
+    from taskman.database.migrations import head, status as migration_status
+
+    try:
+        rows = migration_status(engine)
+    except Exception as e:
+        console.print(Panel(f"Error reading schema version: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
+    table = Table(title="Schema Migrations")
+    table.add_column("Version", justify="right")
+    table.add_column("Name")
+    table.add_column("Applied At")
+    for migration, applied_at in rows:
+        table.add_row(
+            str(migration.version),
+            migration.name,
+            applied_at.strftime("%Y-%m-%d %H:%M:%S") if applied_at else "pending",
+        )
+    console.print(table)
+
+    current = max((m.version for m, applied_at in rows if applied_at), default=0)
+    pending = sum(1 for _, applied_at in rows if not applied_at)
+    console.print(f"Current version: {current} / latest: {head()} ({pending} pending)")
+
+
+@app.command()
+def archive(
+    older_than: str = typer.Option(
+        ..., "--older-than", help="Archive completed process instances older than this (e.g. 90d, 12w, 36h)"
+    ),
+    batch_size: int = typer.Option(500, "--batch-size", min=1, help="Process instances moved per transaction"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only count the process instances to archive")
+):
+    """
+    Move completed process instances and their task instances to the archive tables
+    """
+    from datetime import datetime
+    from taskman.database.archive import archive_completed, count_archivable, parse_age
+    from taskman.database.connection import engine
+
+    try:
+        cutoff = datetime.now() - parse_age(older_than)
+    except ValueError as e:
+        console.print(Panel(str(e), title="Error", style="red"))
+        raise typer.Exit(1)
+
+    try:
+        if dry_run:
+            count = count_archivable(engine, cutoff)
+            console.print(Panel(
+                f"{count} process instances completed before {cutoff:%Y-%m-%d %H:%M} would be archived",
+                title="Dry Run"
+            ))
+            return
+        result = archive_completed(engine, cutoff, batch_size=batch_size, log=console.print)
+    except Exception as e:
+        console.print(Panel(f"Error archiving process instances: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
+    message = (
+        f"Archived {result.process_instances} process instances and {result.task_instances} task instances "
+        f"in {result.batches} batches"
+    )
+    if result.skipped:
+        message += f"\nSkipped {result.skipped} process instances whose ids are already in the archive"
+    console.print(Panel(message, title="Success"))
+
+
+@app.command("rebuild-counters")
+def rebuild_counters():
+    """
+    Recompute the progress counters on process and process_instance
+    """
+    from sqlalchemy import inspect
+    from taskman.database.connection import engine
+    from taskman.models.progress import INSTANCE_COUNTERS, TASK_COUNTERS, rebuild_progress_counters
+
+    try:
+        inspector = inspect(engine)
+        missing = [
+            f"{table}.{column}"
+            for table, columns in (("process", TASK_COUNTERS + INSTANCE_COUNTERS), ("process_instance", TASK_COUNTERS))
+            for column in columns
+            if column not in {c["name"] for c in inspector.get_columns(table)}
+        ]
+        if missing:
+            console.print(Panel(
+                f"Missing counter columns: {', '.join(missing)}. Run `taskman db migrate` first.",
+                title="Error", style="red"
+            ))
+            raise typer.Exit(1)
+
+        console.print(Panel("Rebuilding progress counters...", title="Progress Counters"))
+        with engine.begin() as conn:
+            processes, instances = rebuild_progress_counters(conn)
+        console.print(Panel(
+            f"Updated {processes} processes and {instances} process instances",
+            title="Success"
+        ))
+    except typer.Exit:
+        raise
+    except Exception as e:
+        console.print(Panel(f"Error rebuilding progress counters: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
+
+def explain_prefix(dialect_name):
+    """Return the statement prefix that shows a query plan on this database"""
+    if dialect_name == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    return "EXPLAIN "
+
+
+@app.command()
+def explain(
+    query: Optional[str] = typer.Option(
+        None, "--query", "-q", help=f"Only this query ({', '.join(EXPLAIN_QUERIES)})"
+    )
+):
+    """
+    Print the query plans of the process monitor queries
+    """
+    if query is not None and query not in EXPLAIN_QUERIES:
+        console.print(Panel(
+            f"Unknown query: {query} (choose from {', '.join(EXPLAIN_QUERIES)})", title="Error", style="red"
+        ))
+        raise typer.Exit(1)
+
+    from taskman.database.connection import engine
+
+    names = [query] if query else list(EXPLAIN_QUERIES)
+    try:
+        prefix = explain_prefix(engine.dialect.name)
+        with engine.connect() as conn:
+            for name in names:
+                sql, params = EXPLAIN_QUERIES[name]
+                result = conn.execute(text(prefix + sql), params)
+                table = Table(title=name)
+                for column in result.keys():
+                    table.add_column(str(column))
+                for row in result:
+                    table.add_row(*("" if value is None else str(value) for value in row))
+                console.print(table)
+    except Exception as e:
+        console.print(Panel(f"Error explaining queries: {e}", title="Error", style="red"))
+        raise typer.Exit(1)
+
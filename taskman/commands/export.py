@@ -0,0 +1,141 @@
+"""
+Data export command
+
+Every table of the data model is streamed to its own NDJSON or CSV file.
+Rows are read with a server-side cursor (stream_results + yield_per) and
+written as they arrive, so memory use does not grow with table size.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import typer
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from taskman.models.objective import Objective
+from taskman.models.process import Process
+from taskman.models.task import Task
+from taskman.models.workflow import Workflow
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task_instance import TaskInstance
+from taskman.models.task_step import TaskStep
+from taskman.models.mapping import objective_process_mapping
+from taskman.utils.serialization import RowWriter, open_output
+
+console = Console()
+app = typer.Typer()
+
+# エクスポート対象のテーブル（ファイル名 -> テーブル）
+EXPORT_TABLES = {
+    "objective": Objective.__table__,
+    "process": Process.__table__,
+    "objective_process_mapping": objective_process_mapping,
+    "task": Task.__table__,
+    "task_step": TaskStep.__table__,
+    "workflow": Workflow.__table__,
+    "process_instance": ProcessInstance.__table__,
+    "task_instance": TaskInstance.__table__,
+}
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+
+def export_table(engine, table, path, fmt, compress=False, batch_size=1000):
+    """
+    Stream one table to a file
+
+    Args:
+        engine: SQLAlchemy engine (each call uses its own connection)
+        table: Table to export
+        path: Output path without the .gz suffix
+        fmt: 'ndjson' or 'csv'
+        compress: Write a gzip-compressed file
+        batch_size: Rows fetched per round trip (yield_per)
+
+    Returns:
+        (actual path, number of rows)
+    """
+    query = select(table).order_by(*table.primary_key.columns)
+    stream, path = open_output(path, compress)
+    with stream, engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(query)
+        writer = RowWriter(stream, fmt, result.keys())
+        for row in result:
+            writer.writerow(row)
+        writer.close()
+    return path, writer.count
+
+
+def export_tables(engine, names, output_dir, fmt, compress=False, jobs=1, batch_size=1000):
+    """
+    Export several tables, optionally in parallel
+
+    Returns:
+        List of (table name, path, number of rows) in the order of names
+    """
+    def run(name):
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        return (name, *export_table(engine, EXPORT_TABLES[name], path, fmt, compress, batch_size))
+
+    if jobs <= 1 or len(names) <= 1:
+        return [run(name) for name in names]
+    with ThreadPoolExecutor(max_workers=min(jobs, len(names))) as executor:
+        return list(executor.map(run, names))
+
+
+@app.command()
+def export(
+    output_dir: str = typer.Option(".", "--output-dir", "-o", help="出力先ディレクトリ"),
+    fmt: str = typer.Option("ndjson", "--format", "-f", help="出力形式（ndjson, csv）"),
+    tables: Optional[str] = typer.Option(
+        None, "--tables", "-t", help=f"対象テーブル（カンマ区切り）: {', '.join(EXPORT_TABLES)}"
+    ),
+    compress: bool = typer.Option(False, "--gzip", "-z", help="gzipで圧縮する"),
+    jobs: int = typer.Option(1, "--jobs", "-j", help="並列に出力するテーブル数"),
+    batch_size: int = typer.Option(1000, "--batch-size", help="1回のフェッチで読み込む行数"),
+):
+    """
+    Export data to NDJSON or CSV files
+    """
+    from taskman.database import connection
+
+    names = [t.strip() for t in tables.split(",") if t.strip()] if tables else list(EXPORT_TABLES)
+    unknown = [name for name in names if name not in EXPORT_TABLES]
+    if unknown:
+        console.print(Panel(
+            f"不明なテーブルです: {', '.join(unknown)}（{', '.join(EXPORT_TABLES)} から指定してください）",
+            title="エラー", style="red",
+        ))
+        raise typer.Exit(1)
+    if fmt not in EXPORT_FORMATS:
+        console.print(Panel("形式は 'ndjson' または 'csv' を指定してください", title="エラー", style="red"))
+        raise typer.Exit(1)
+    if jobs < 1 or batch_size < 1:
+        console.print(Panel("--jobs と --batch-size は1以上を指定してください", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        results = export_tables(connection.engine, names, output_dir, fmt, compress, jobs, batch_size)
+
+        table = Table(title="エクスポート結果")
+        table.add_column("テーブル", style="cyan")
+        table.add_column("件数", justify="right")
+        table.add_column("ファイル")
+        for name, path, count in results:
+            table.add_row(name, str(count), path)
+        console.print(table)
+
+        total = sum(count for _, _, count in results)
+        console.print(Panel(f"{len(results)}テーブル、{total}行をエクスポートしました", title="成功"))
+
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except OSError as e:
+        console.print(Panel(f"ファイルを書き込めません: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
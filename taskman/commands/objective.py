@@ -2,32 +2,53 @@
 Objective management commands
 """
 import typer
+from typing import Optional
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.tree import Tree
+from sqlalchemy import delete as sql_delete, insert, select, update as sql_update
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
-from taskman.models import Objective
+from taskman.database.repository import objective_query, paginate
+from taskman.database.objective_tree import load_tree, rollup, rollups, descendant_ids, delete_subtree
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, check_list_options, attribute_getter, write_rows, print_next_page_hint
+)
+from taskman.models import Objective, Process
+from taskman.models.mapping import objective_process_mapping
+from taskman.models.objective_progress import recompute_objectives
+from taskman.models.progress import rebuild_instance_counters
 
 console = Console()
 app = typer.Typer()
 
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = [
+    "id", "title", "measure", "target_value", "current_value", "time_frame", "status", "parent_id",
+]
+
+
 @app.command()
 def list(
-    status: str = typer.Option(None, "--status", "-s", help="Filter by status (進行中, 達成, 未達成, 中止)")
+    status: str = typer.Option(None, "--status", "-s", help="Filter by status (進行中, 達成, 未達成, 中止)"),
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP)
 ):
     """
     List all objectives
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        query = db.query(Objective)
-        
-        if status:
-            query = query.filter(Objective.status == status)
-            
+        query = paginate(objective_query(db, status=status), Objective.id, after=after, limit=limit)
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, attribute_getter(LIST_COLUMNS), fmt)
+            return
         objectives = query.all()
         
         if not objectives:
@@ -55,6 +76,7 @@ def list(
             )
         
         console.print(table)
+        print_next_page_hint(len(objectives), limit, objectives[-1].id if objectives else None)
     except Exception as e:
         console.print(Panel(f"目標一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -126,8 +148,10 @@ def show(
         if objective.parent_id:
             parent = db.query(Objective).filter(Objective.id == objective.parent_id).first()
         
-        # 子目標の取得
-        children = db.query(Objective).filter(Objective.parent_id == objective_id).all()
+        # 子目標と配下全体の集計（再帰CTEでそれぞれ1回のクエリ）
+        (node,) = load_tree(db, objective_id, max_depth=1)
+        children = [child.objective for child in node.children]
+        subtree = rollup(db, objective_id)
         
         # 詳細情報の表示
         console.print(Panel(f"[bold]目標詳細（ID: {objective.id}）[/bold]", title="情報"))
@@ -144,6 +168,10 @@ def show(
         if parent:
             console.print(f"[bold]親目標:[/bold] {parent.title} (ID: {parent.id})")
         
+        if subtree.count > 1:
+            console.print(f"[bold]配下の目標:[/bold] {subtree.count - 1}件")
+            console.print(f"[bold]加重進捗（配下を含む）:[/bold] {format_progress(subtree.progress)}")
+        
         if children:
             console.print("\n[bold]子目標:[/bold]")
             child_table = Table()
@@ -164,6 +192,66 @@ def show(
         raise typer.Exit(1)
 
 
+@app.command()
+def tree(
+    objective_id: Optional[int] = typer.Argument(None, help="ルートにする目標のID（省略時はすべての最上位目標）"),
+    depth: Optional[int] = typer.Option(None, "--depth", "-d", help="表示する深さ（ルートは0）")
+):
+    """
+    Show the objective tree with weighted progress
+    """
+    if depth is not None and depth < 0:
+        console.print(Panel("--depth には0以上の値を指定してください。", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+    try:
+        db = next(get_db())
+        roots = load_tree(db, objective_id, max_depth=depth)
+        
+        if not roots:
+            if objective_id is not None:
+                console.print(Panel(f"目標（ID: {objective_id}）が見つかりません", title="エラー", style="red"))
+                raise typer.Exit(1)
+            console.print(Panel("目標が見つかりませんでした。", title="情報"))
+            return
+        
+        # 配下全体の集計はすべてのルート分を1回のクエリで取得する
+        subtrees = rollups(db, objective_id)
+        for root in roots:
+            subtree = subtrees.get(root.objective.id)
+            progress = format_progress(subtree.progress if subtree else None)
+            branch = Tree(f"{node_label(root)}  [bold]加重進捗（配下を含む）: {progress}[/bold]")
+            stack = [(branch, root)]
+            while stack:
+                parent_branch, node = stack.pop()
+                for child in node.children:
+                    stack.append((parent_branch.add(node_label(child)), child))
+            console.print(branch)
+        
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"目標ツリーの取得中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
+def format_progress(progress):
+    """達成率を表示用の文字列にする（目標値がない場合は '-'）"""
+    return f"{progress * 100:.1f}%" if progress is not None else "-"
+
+
+def node_label(node):
+    """ツリーに表示する目標の1行"""
+    objective = node.objective
+    current = objective.current_value if objective.current_value is not None else 0
+    target = objective.target_value if objective.target_value is not None else "-"
+    return (
+        f"{objective.title} (ID: {objective.id})  {current} / {target}  "
+        f"{format_progress(node.progress)}  [dim]{objective.status}  重み: {node.weight:g}[/dim]"
+    )
+
+
 @app.command()
 def update(
     objective_id: int = typer.Argument(..., help="目標のID"),
@@ -196,6 +284,9 @@ def update(
             objective.measure = measure
         if target is not None:
             objective.target_value = target
+            db.flush()
+            # プロセスに対応付けられた目標は新しい目標値で現在値を計算し直す
+            recompute_objectives(db, objective_ids=[objective_id])
         if current is not None:
             objective.current_value = current
         if time_frame is not None:
@@ -234,24 +325,19 @@ def delete(
             console.print(Panel(f"目標（ID: {objective_id}）が見つかりません", title="エラー", style="red"))
             raise typer.Exit(1)
         
-        # 子目標の確認
-        children = db.query(Objective).filter(Objective.parent_id == objective_id).all()
-        if children and not force:
-            console.print(Panel(f"この目標には{len(children)}個の子目標があります。削除するには --force オプションを使用してください。", 
+        # 子目標の確認（孫以下も含めて数える）
+        descendants = descendant_ids(db, objective_id)
+        if descendants and not force:
+            console.print(Panel(f"この目標には{len(descendants)}個の子目標があります。削除するには --force オプションを使用してください。", 
                               title="警告", style="yellow"))
             raise typer.Exit(1)
         
-        # 子目標の削除（forceが指定された場合）
-        if children and force:
-            for child in children:
-                db.delete(child)
-        
-        # 目標の削除
-        db.delete(objective)
+        # 目標と配下の目標をまとめて削除
+        delete_subtree(db, objective_id)
         db.commit()
         
-        if children and force:
-            console.print(Panel(f"目標（ID: {objective_id}）とその子目標（{len(children)}個）を削除しました", title="成功"))
+        if descendants and force:
+            console.print(Panel(f"目標（ID: {objective_id}）とその子目標（{len(descendants)}個）を削除しました", title="成功"))
         else:
             console.print(Panel(f"目標（ID: {objective_id}）を削除しました", title="成功"))
         
@@ -295,4 +381,113 @@ def status(
         raise typer.Exit(1)
     except Exception as e:
         console.print(Panel(f"状態更新中にエラーが発生しました: {e}", title="エラー", style="red"))
-        raise typer.Exit(1) 
\ No newline at end of file
+        raise typer.Exit(1)
+
+
+@app.command()
+def link(
+    objective_id: int = typer.Argument(..., help="目標のID"),
+    process_id: int = typer.Argument(..., help="プロセスのID"),
+    weight: float = typer.Option(1.0, "--weight", "-w", help="貢献度（重み）")
+):
+    """
+    Link a process to an objective (its instances drive the objective's progress)
+    """
+    if weight < 0:
+        console.print(Panel("貢献度には0以上の値を指定してください。", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+    try:
+        db = next(get_db())
+        if db.get(Objective, objective_id) is None:
+            console.print(Panel(f"目標（ID: {objective_id}）が見つかりません", title="エラー", style="red"))
+            raise typer.Exit(1)
+        if db.get(Process, process_id) is None:
+            console.print(Panel(f"プロセス（ID: {process_id}）が見つかりません", title="エラー", style="red"))
+            raise typer.Exit(1)
+
+        mapping = objective_process_mapping
+        where = (mapping.c.objective_id == objective_id, mapping.c.process_id == process_id)
+        if db.execute(select(mapping.c.objective_id).where(*where)).first():
+            db.execute(sql_update(mapping).where(*where).values(contribution_weight=weight))
+        else:
+            db.execute(insert(mapping).values(objective_id=objective_id, process_id=process_id,
+                                              contribution_weight=weight))
+        recompute_objectives(db, objective_ids=[objective_id])
+        db.commit()
+
+        current = db.get(Objective, objective_id).current_value
+        console.print(Panel(
+            f"目標（ID: {objective_id}）にプロセス（ID: {process_id}）を貢献度 {weight:g} で対応付けました。"
+            f"現在値: {current:g}",
+            title="成功"
+        ))
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"プロセスの対応付け中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
+@app.command()
+def unlink(
+    objective_id: int = typer.Argument(..., help="目標のID"),
+    process_id: int = typer.Argument(..., help="プロセスのID")
+):
+    """
+    Remove the link between a process and an objective
+    """
+    try:
+        db = next(get_db())
+        mapping = objective_process_mapping
+        result = db.execute(sql_delete(mapping).where(
+            mapping.c.objective_id == objective_id, mapping.c.process_id == process_id
+        ))
+        if not result.rowcount:
+            db.rollback()
+            console.print(Panel(f"目標（ID: {objective_id}）とプロセス（ID: {process_id}）は対応付けられていません",
+                                title="エラー", style="red"))
+            raise typer.Exit(1)
+        recompute_objectives(db, objective_ids=[objective_id])
+        db.commit()
+        console.print(Panel(f"目標（ID: {objective_id}）とプロセス（ID: {process_id}）の対応付けを解除しました", title="成功"))
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"対応付けの解除中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
+@app.command()
+def recompute(
+    objective_id: Optional[int] = typer.Argument(None, help="目標のID"),
+    all_objectives: bool = typer.Option(False, "--all", help="すべての目標をまとめて再計算")
+):
+    """
+    Recompute objective progress from the completion of linked process instances
+    """
+    if (objective_id is not None) == all_objectives:
+        console.print(Panel("目標のIDか --all のどちらか一方を指定してください。", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+    try:
+        db = next(get_db())
+        if all_objectives:
+            # インスタンス数のカウンタを数え直してから、対応付けのある目標を1回のUPDATEで更新する
+            rebuild_instance_counters(db)
+            updated = recompute_objectives(db)
+        else:
+            if db.get(Objective, objective_id) is None:
+                console.print(Panel(f"目標（ID: {objective_id}）が見つかりません", title="エラー", style="red"))
+                raise typer.Exit(1)
+            updated = recompute_objectives(db, objective_ids=[objective_id])
+        db.commit()
+        console.print(Panel(f"{updated}件の目標の現在値を再計算しました", title="成功"))
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"目標の再計算中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
@@ -9,20 +9,38 @@ from rich.table import Table
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
+from taskman.database.repository import process_by_name_version, process_query, paginate
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, check_list_options, attribute_getter, write_rows, print_next_page_hint
+)
 from taskman.models.process import Process
 
 console = Console()
 app = typer.Typer()
 
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = ["id", "name", "description", "version", "status", "total_tasks", "completed_tasks"]
+
+
 @app.command()
-def list():
+def list(
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP)
+):
     """
     プロセス一覧を表示
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        processes = db.query(Process).all()
+        query = paginate(process_query(db), Process.id, after=after, limit=limit)
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, attribute_getter(LIST_COLUMNS), fmt)
+            return
+        processes = query.all()
         
         if not processes:
             console.print(Panel("プロセスが見つかりませんでした。", title="情報"))
@@ -43,6 +61,7 @@ def list():
             )
         
         console.print(table)
+        print_next_page_hint(len(processes), limit, processes[-1].id if processes else None)
     except Exception as e:
         console.print(Panel(f"プロセス一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -111,11 +130,19 @@ def create(
                                title="エラー", style="red"))
             raise typer.Exit(1)
         
+        # 名前とバージョンの重複を確認（新しいプロセスはバージョン1）
+        existing = process_by_name_version(db, name, 1)
+        if existing:
+            console.print(Panel(f"プロセス「{name}」のバージョン1は既に存在します（ID: {existing.id}）", 
+                               title="エラー", style="red"))
+            raise typer.Exit(1)
+        
         # 新しいプロセスの作成
         new_process = Process(
             name=name,
             description=description,
-            status=status
+            status=status,
+            version=1
         )
         
         db.add(new_process)
@@ -165,7 +192,14 @@ def update(
         if status is not None:
             process.status = status
         if increment_version:
-            process.version += 1
+            process.version = (process.version or 1) + 1
+        
+        # 名前とバージョンの重複を確認
+        existing = process_by_name_version(db, process.name, process.version, exclude_id=process_id)
+        if existing:
+            console.print(Panel(f"プロセス「{process.name}」のバージョン{process.version}は既に存在します（ID: {existing.id}）", 
+                               title="エラー", style="red"))
+            raise typer.Exit(1)
         
         db.commit()
         console.print(Panel(f"プロセス（ID: {process_id}）を更新しました", title="成功"))
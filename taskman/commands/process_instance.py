@@ -10,38 +10,74 @@ from rich.table import Table
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
+from taskman.database.repository import MergedRows, process_instance_query, paginate
+from taskman.engine.advance import start_process_instance
+from taskman.engine.schedule import forecast_instances
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, INCLUDE_ARCHIVED_HELP, check_list_options, write_rows,
+    print_next_page_hint, status_label
+)
 from taskman.models.process import Process
 from taskman.models.process_instance import ProcessInstance
 from taskman.models.task_instance import TaskInstance
+from taskman.models.archive import ArchivedProcessInstance, ArchivedTaskInstance
 
 console = Console()
 app = typer.Typer()
 
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = [
+    "id", "process_id", "process_name", "status", "started_at", "completed_at", "created_by", "task_count",
+]
+
+
+def list_values(row):
+    """Map a (ProcessInstance, task_count) row to LIST_COLUMNS"""
+    instance, task_count = row
+    process_name = instance.process.name if instance.process else None
+    return (
+        instance.id, instance.process_id, process_name, instance.status,
+        instance.started_at, instance.completed_at, instance.created_by, task_count,
+    )
+
+
 @app.command()
 def list(
     process_id: Optional[int] = typer.Option(None, "--process", "-p", help="プロセスIDでフィルタリング"),
     status: Optional[str] = typer.Option(None, "--status", "-s", help="ステータスでフィルタリング（実行中, 完了, 中断, 失敗）"),
-    user: Optional[str] = typer.Option(None, "--user", "-u", help="作成者でフィルタリング")
+    user: Optional[str] = typer.Option(None, "--user", "-u", help="作成者でフィルタリング"),
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP),
+    include_archived: bool = typer.Option(False, "--include-archived", help=INCLUDE_ARCHIVED_HELP)
 ):
     """
     プロセスインスタンス一覧を表示
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        query = db.query(ProcessInstance)
-        
-        if process_id:
-            query = query.filter(ProcessInstance.process_id == process_id)
-        if status:
-            if status not in ["実行中", "完了", "中断", "失敗"]:
-                console.print(Panel("無効なステータスです。'実行中', '完了', '中断', '失敗'のいずれかを指定してください。", 
-                                   title="エラー", style="red"))
-                raise typer.Exit(1)
-            query = query.filter(ProcessInstance.status == status)
-        if user:
-            query = query.filter(ProcessInstance.created_by == user)
+        
+        if status and status not in ["実行中", "完了", "中断", "失敗"]:
+            console.print(Panel("無効なステータスです。'実行中', '完了', '中断', '失敗'のいずれかを指定してください。", 
+                               title="エラー", style="red"))
+            raise typer.Exit(1)
             
+        query = paginate(
+            process_instance_query(db, process_id=process_id, status=status, created_by=user),
+            ProcessInstance.id, after=after, limit=limit,
+        )
+        if include_archived:
+            archived = paginate(
+                process_instance_query(db, process_id=process_id, status=status, created_by=user, archived=True),
+                ArchivedProcessInstance.id, after=after, limit=limit,
+            )
+            query = MergedRows([query, archived], key=lambda row: row[0].id, limit=limit)
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, list_values, fmt)
+            return
         instances = query.all()
         
         if not instances:
@@ -60,14 +96,11 @@ def list(
         table.add_column("作成者")
         table.add_column("タスク数")
         
-        for instance in instances:
-            # プロセス名を取得
-            process = db.query(Process).filter(Process.id == instance.process_id).first()
+        for instance, task_count in instances:
+            # プロセス名（プロセスは一覧取得時に結合済み）
+            process = instance.process
             process_name = process.name if process else f"不明 (ID: {instance.process_id})"
             
-            # 関連するタスクインスタンス数
-            task_count = db.query(TaskInstance).filter(TaskInstance.process_instance_id == instance.id).count()
-            
             # 日時のフォーマット
             started_at = instance.started_at.strftime("%Y-%m-%d %H:%M") if instance.started_at else "-"
             completed_at = instance.completed_at.strftime("%Y-%m-%d %H:%M") if instance.completed_at else "-"
@@ -75,7 +108,7 @@ def list(
             table.add_row(
                 str(instance.id),
                 process_name,
-                instance.status,
+                status_label(instance),
                 started_at,
                 completed_at,
                 instance.created_by or "-",
@@ -83,6 +116,7 @@ def list(
             )
         
         console.print(table)
+        print_next_page_hint(len(instances), limit, instances[-1][0].id if instances else None)
     except Exception as e:
         console.print(Panel(f"プロセスインスタンス一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -98,6 +132,11 @@ def show(
     try:
         db = next(get_db())
         instance = db.query(ProcessInstance).filter(ProcessInstance.id == instance_id).first()
+        task_model = TaskInstance
+        if not instance:
+            # アーカイブ済みのインスタンス
+            instance = db.query(ArchivedProcessInstance).filter(ArchivedProcessInstance.id == instance_id).first()
+            task_model = ArchivedTaskInstance
         
         if not instance:
             console.print(Panel(f"プロセスインスタンス（ID: {instance_id}）が見つかりません", title="エラー", style="red"))
@@ -108,17 +147,24 @@ def show(
         process_name = process.name if process else f"不明 (ID: {instance.process_id})"
         
         # 関連するタスクインスタンスを取得
-        task_instances = db.query(TaskInstance).filter(
-            TaskInstance.process_instance_id == instance.id
+        task_instances = db.query(task_model).filter(
+            task_model.process_instance_id == instance.id
         ).all()
         
         # 詳細情報の表示
         console.print(Panel(f"[bold]プロセスインスタンス詳細（ID: {instance.id}）[/bold]", title="情報"))
         console.print(f"[bold]プロセス:[/bold] {process_name} (ID: {instance.process_id})")
-        console.print(f"[bold]ステータス:[/bold] {instance.status}")
+        console.print(f"[bold]ステータス:[/bold] {status_label(instance)}")
         console.print(f"[bold]開始日時:[/bold] {instance.started_at.strftime('%Y-%m-%d %H:%M:%S') if instance.started_at else '-'}")
         console.print(f"[bold]終了日時:[/bold] {instance.completed_at.strftime('%Y-%m-%d %H:%M:%S') if instance.completed_at else '-'}")
         console.print(f"[bold]作成者:[/bold] {instance.created_by or '未設定'}")
+        if task_model is ArchivedTaskInstance:
+            console.print(f"[bold]アーカイブ日時:[/bold] {instance.archived_at.strftime('%Y-%m-%d %H:%M:%S')}")
+        elif instance.completed_at is None:
+            # 循環のあるワークフローは予測できない（eta は None）
+            forecast = forecast_instances(db, [instance.id]).get(instance.id)
+            eta = forecast.eta if forecast else None
+            console.print(f"[bold]完了予定:[/bold] {eta.strftime('%Y-%m-%d %H:%M') if eta else '-'}")
         
         # タスクインスタンス情報を表示
         if task_instances:
@@ -192,18 +238,21 @@ def create(
         )
         
         db.add(new_instance)
+        
+        # ワークフローの開始タスクのタスクインスタンスを同じトランザクションで作成
+        result = start_process_instance(db, new_instance)
         db.commit()
         db.refresh(new_instance)
         
-        console.print(Panel(
+        message = (
             f"プロセスインスタンスが作成されました（ID: {new_instance.id}）\n"
-            f"プロセス: {process.name} (ID: {process_id})",
-            title="成功"
-        ))
-        
-        # ワークフロー情報を使ってタスクインスタンスを作成（必要に応じて実装）
-        # この部分は、プロセスのワークフローに基づいて最初のタスクインスタンスを作成する処理など
-        # ここでは簡略化のため省略
+            f"プロセス: {process.name} (ID: {process_id})"
+        )
+        if result.created:
+            message += f"\n開始タスク: {len(result.created)}件のタスクインスタンスを作成しました"
+        console.print(Panel(message, title="成功"))
+        for error in result.errors:
+            console.print(f"[yellow]{error}[/yellow]")
         
     except SQLAlchemyError as e:
         console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
@@ -213,6 +262,15 @@ def create(
         raise typer.Exit(1)
 
 
+def reject_archived(db, instance_id, action):
+    """アーカイブ済みのプロセスインスタンスへの変更を拒否する（アーカイブは完了したインスタンスの保管用）"""
+    archived = db.query(ArchivedProcessInstance.id).filter(ArchivedProcessInstance.id == instance_id).first()
+    if archived:
+        console.print(Panel(f"プロセスインスタンス（ID: {instance_id}）はアーカイブ済みのため{action}できません",
+                            title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
 @app.command()
 def status(
     instance_id: int = typer.Argument(..., help="プロセスインスタンスのID"),
@@ -231,6 +289,7 @@ def status(
         instance = db.query(ProcessInstance).filter(ProcessInstance.id == instance_id).first()
         
         if not instance:
+            reject_archived(db, instance_id, "変更")
             console.print(Panel(f"プロセスインスタンス（ID: {instance_id}）が見つかりません", title="エラー", style="red"))
             raise typer.Exit(1)
         
@@ -267,6 +326,7 @@ def delete(
         instance = db.query(ProcessInstance).filter(ProcessInstance.id == instance_id).first()
         
         if not instance:
+            reject_archived(db, instance_id, "削除")
             console.print(Panel(f"プロセスインスタンス（ID: {instance_id}）が見つかりません", title="エラー", style="red"))
             raise typer.Exit(1)
         
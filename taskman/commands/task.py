@@ -10,32 +10,45 @@ from rich.table import Table
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
+from taskman.database.repository import task_query, paginate
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, check_list_options, attribute_getter, write_rows, print_next_page_hint
+)
 from taskman.models.task import Task
 
 console = Console()
 app = typer.Typer()
 
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = [
+    "id", "process_id", "name", "status", "priority", "assigned_to", "due_date", "estimated_duration",
+]
+
+
 @app.command()
 def list(
     status: str = typer.Option(None, "--status", "-s", help="Filter by status (未着手, 進行中, 完了, 保留)"),
     priority: str = typer.Option(None, "--priority", "-p", help="Filter by priority (低, 中, 高, 緊急)"),
-    assigned_to: str = typer.Option(None, "--assigned", "-a", help="Filter by assignee")
+    assigned_to: str = typer.Option(None, "--assigned", "-a", help="Filter by assignee"),
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP)
 ):
     """
     List all tasks
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        query = db.query(Task)
-        
-        if status:
-            query = query.filter(Task.status == status)
-        if priority:
-            query = query.filter(Task.priority == priority)
-        if assigned_to:
-            query = query.filter(Task.assigned_to == assigned_to)
-            
+        query = paginate(
+            task_query(db, status=status, priority=priority, assigned_to=assigned_to),
+            Task.id, after=after, limit=limit,
+        )
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, attribute_getter(LIST_COLUMNS), fmt)
+            return
         tasks = query.all()
         
         if not tasks:
@@ -61,6 +74,7 @@ def list(
             )
         
         console.print(table)
+        print_next_page_hint(len(tasks), limit, tasks[-1].id if tasks else None)
     except Exception as e:
         console.print(Panel(f"タスク一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -10,38 +10,63 @@ from rich.table import Table
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
+from taskman.database.repository import MergedRows, task_instance_query, paginate
+from taskman.engine.advance import advance
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, INCLUDE_ARCHIVED_HELP, check_list_options, attribute_getter,
+    write_rows, print_next_page_hint, status_label
+)
 from taskman.models.task import Task
 from taskman.models.process_instance import ProcessInstance
 from taskman.models.task_instance import TaskInstance
+from taskman.models.archive import ArchivedTaskInstance
 
 console = Console()
 app = typer.Typer()
 
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = [
+    "id", "process_instance_id", "task_id", "status", "assigned_to", "started_at", "completed_at", "notes",
+]
+
+
 @app.command()
 def list(
     process_instance_id: Optional[int] = typer.Option(None, "--instance", "-i", help="プロセスインスタンスIDでフィルタリング"),
     status: Optional[str] = typer.Option(None, "--status", "-s", help="ステータスでフィルタリング（未着手, 実行中, 完了, 中断, 失敗）"),
-    assigned_to: Optional[str] = typer.Option(None, "--assigned", "-a", help="担当者でフィルタリング")
+    assigned_to: Optional[str] = typer.Option(None, "--assigned", "-a", help="担当者でフィルタリング"),
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP),
+    include_archived: bool = typer.Option(False, "--include-archived", help=INCLUDE_ARCHIVED_HELP)
 ):
     """
     タスクインスタンス一覧を表示
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        query = db.query(TaskInstance)
-        
-        if process_instance_id:
-            query = query.filter(TaskInstance.process_instance_id == process_instance_id)
-        if status:
-            if status not in ["未着手", "実行中", "完了", "中断", "失敗"]:
-                console.print(Panel("無効なステータスです。'未着手', '実行中', '完了', '中断', '失敗'のいずれかを指定してください。", 
-                                   title="エラー", style="red"))
-                raise typer.Exit(1)
-            query = query.filter(TaskInstance.status == status)
-        if assigned_to:
-            query = query.filter(TaskInstance.assigned_to == assigned_to)
+        
+        if status and status not in ["未着手", "実行中", "完了", "中断", "失敗"]:
+            console.print(Panel("無効なステータスです。'未着手', '実行中', '完了', '中断', '失敗'のいずれかを指定してください。", 
+                               title="エラー", style="red"))
+            raise typer.Exit(1)
             
+        query = task_instance_query(
+            db, process_instance_id=process_instance_id, status=status, assigned_to=assigned_to
+        )
+        query = paginate(query, TaskInstance.id, after=after, limit=limit)
+        if include_archived:
+            archived = task_instance_query(
+                db, process_instance_id=process_instance_id, status=status, assigned_to=assigned_to, archived=True
+            )
+            archived = paginate(archived, ArchivedTaskInstance.id, after=after, limit=limit)
+            query = MergedRows([query, archived], key=lambda row: row.id, limit=limit)
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, attribute_getter(LIST_COLUMNS), fmt)
+            return
         task_instances = query.all()
         
         if not task_instances:
@@ -61,16 +86,13 @@ def list(
         table.add_column("終了日時")
         
         for task_instance in task_instances:
-            # タスク名を取得
-            task = db.query(Task).filter(Task.id == task_instance.task_id).first()
+            # タスク名とプロセスインスタンス情報（一覧取得時に結合済み）
+            task = task_instance.task
             task_name = task.name if task else f"不明 (ID: {task_instance.task_id})"
             
-            # プロセスインスタンス情報を取得
-            process_instance = db.query(ProcessInstance).filter(
-                ProcessInstance.id == task_instance.process_instance_id
-            ).first()
+            process_instance = task_instance.process_instance
             process_instance_info = f"ID: {task_instance.process_instance_id}"
-            if process_instance:
+            if process_instance and process_instance.process:
                 process_instance_info = f"{process_instance.process.name} (ID: {task_instance.process_instance_id})"
             
             # 日時のフォーマット
@@ -81,13 +103,14 @@ def list(
                 str(task_instance.id),
                 task_name,
                 process_instance_info,
-                task_instance.status,
+                status_label(task_instance),
                 task_instance.assigned_to or "-",
                 started_at,
                 completed_at
             )
         
         console.print(table)
+        print_next_page_hint(len(task_instances), limit, task_instances[-1].id if task_instances else None)
     except Exception as e:
         console.print(Panel(f"タスクインスタンス一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -233,6 +256,23 @@ def update(
         raise typer.Exit(1)
 
 
+def print_advance_result(db, result):
+    """Print what the workflow engine did after a task instance was completed"""
+    if result.created:
+        task_ids = {task_id for _, task_id in result.created}
+        task_names = dict(db.query(Task.id, Task.name).filter(Task.id.in_(task_ids)).all())
+        names = ", ".join(f"{task_names.get(task_id, '不明')} (タスクID: {task_id})" for _, task_id in result.created)
+        console.print(f"[green]次のタスクを開始しました:[/green] {names}")
+    for _, task_id in result.waiting_joins:
+        console.print(f"[yellow]合流待ち:[/yellow] タスクID {task_id} は他の分岐の完了を待っています")
+    for instance_id in result.completed_instances:
+        console.print(f"[green]プロセスインスタンス（ID: {instance_id}）が完了しました[/green]")
+    for instance_id in result.stalled_instances:
+        console.print(f"[yellow]プロセスインスタンス（ID: {instance_id}）に進める遷移がありません[/yellow]")
+    for error in result.errors:
+        console.print(f"[red]{error}[/red]")
+
+
 @app.command()
 def status(
     task_instance_id: int = typer.Argument(..., help="タスクインスタンスのID"),
@@ -264,10 +304,14 @@ def status(
         if new_status in ["完了", "中断", "失敗"] and not task_instance.completed_at:
             task_instance.completed_at = datetime.now()
         
+        # 完了した場合はワークフローに従って次のタスクに進める（同じトランザクション）
+        result = advance(db, [task_instance]) if new_status != old_status else None
         db.commit()
         
         console.print(Panel(f"タスクインスタンス（ID: {task_instance_id}）のステータスを「{old_status}」から「{new_status}」に更新しました", 
                           title="成功"))
+        if result:
+            print_advance_result(db, result)
         
     except SQLAlchemyError as e:
         console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
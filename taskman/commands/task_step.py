@@ -9,6 +9,10 @@ from rich.table import Table
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
+from taskman.database.repository import task_step_query, paginate
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, check_list_options, attribute_getter, write_rows, print_next_page_hint
+)
 from taskman.models.task import Task
 from taskman.models.task_step import TaskStep
 
@@ -16,20 +20,31 @@ console = Console()
 app = typer.Typer()
 
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = [
+    "id", "task_id", "step_number", "name", "description", "expected_duration",
+    "required_resources", "verification_method",
+]
+
+
 @app.command()
 def list(
-    task_id: Optional[int] = typer.Option(None, "--task", "-t", help="タスクIDでフィルタリング")
+    task_id: Optional[int] = typer.Option(None, "--task", "-t", help="タスクIDでフィルタリング"),
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP)
 ):
     """
     タスクステップ一覧を表示
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        query = db.query(TaskStep)
-        
-        if task_id:
-            query = query.filter(TaskStep.task_id == task_id)
-            
+        query = paginate(task_step_query(db, task_id=task_id), TaskStep.id, after=after, limit=limit)
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, attribute_getter(LIST_COLUMNS), fmt)
+            return
         steps = query.all()
         
         if not steps:
@@ -41,7 +56,7 @@ def list(
         
         # タスク名を表示するためのテーブルヘッダーを設定
         if task_id:
-            task = db.query(Task).filter(Task.id == task_id).first()
+            task = steps[0].task
             task_name = task.name if task else f"不明 (ID: {task_id})"
             title = f"タスク「{task_name}」のステップ一覧"
         else:
@@ -55,12 +70,8 @@ def list(
         table.add_column("予想所要時間")
         
         for step in steps:
-            # タスク名を取得
-            if hasattr(step, 'task') and step.task:
-                task_name = step.task.name
-            else:
-                task = db.query(Task).filter(Task.id == step.task_id).first()
-                task_name = task.name if task else f"不明 (ID: {step.task_id})"
+            # タスク名を取得（タスクは一覧取得時に結合済み）
+            task_name = step.task.name if step.task else f"不明 (ID: {step.task_id})"
             
             # 所要時間の表示形式を整える
             duration = f"{step.expected_duration}分" if step.expected_duration else "-"
@@ -74,6 +85,7 @@ def list(
             )
         
         console.print(table)
+        print_next_page_hint(len(steps), limit, steps[-1].id if steps else None)
     except Exception as e:
         console.print(Panel(f"タスクステップ一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -9,6 +9,13 @@ from rich.table import Table
 from sqlalchemy.exc import SQLAlchemyError
 
 from taskman.database.connection import get_db
+from taskman.database.repository import workflow_query, paginate
+from taskman.engine.graph import get_graph, WorkflowCycleError
+from taskman.engine.schedule import get_schedule
+from taskman.engine.conditions import validate_condition
+from taskman.utils.listing import (
+    LIMIT_HELP, AFTER_HELP, FORMAT_HELP, check_list_options, attribute_getter, write_rows, print_next_page_hint
+)
 from taskman.models.workflow import Workflow
 from taskman.models.process import Process
 from taskman.models.task import Task
@@ -16,20 +23,30 @@ from taskman.models.task import Task
 console = Console()
 app = typer.Typer()
 
+# 機械可読形式（--format json/ndjson/csv）で出力する列
+LIST_COLUMNS = [
+    "id", "process_id", "from_task_id", "to_task_id", "condition_type", "condition_expression", "sequence_number",
+]
+
+
 @app.command()
 def list(
-    process_id: Optional[int] = typer.Option(None, "--process", "-p", help="プロセスIDでフィルタリング")
+    process_id: Optional[int] = typer.Option(None, "--process", "-p", help="プロセスIDでフィルタリング"),
+    limit: Optional[int] = typer.Option(None, "--limit", help=LIMIT_HELP),
+    after: Optional[int] = typer.Option(None, "--after", help=AFTER_HELP),
+    fmt: str = typer.Option("table", "--format", help=FORMAT_HELP)
 ):
     """
     ワークフロー一覧を表示
     """
+    check_list_options(fmt, limit)
+
     try:
         db = next(get_db())
-        query = db.query(Workflow)
-        
-        if process_id:
-            query = query.filter(Workflow.process_id == process_id)
-            
+        query = paginate(workflow_query(db, process_id=process_id), Workflow.id, after=after, limit=limit)
+        if fmt != "table":
+            write_rows(query, LIST_COLUMNS, attribute_getter(LIST_COLUMNS), fmt)
+            return
         workflows = query.all()
         
         if not workflows:
@@ -61,6 +78,7 @@ def list(
             )
         
         console.print(table)
+        print_next_page_hint(len(workflows), limit, workflows[-1].id if workflows else None)
     except Exception as e:
         console.print(Panel(f"ワークフロー一覧の取得中にエラーが発生しました: {e}", title="エラー", style="red"))
         raise typer.Exit(1)
@@ -106,6 +124,125 @@ def show(
         raise typer.Exit(1)
 
 
+@app.command()
+def graph(
+    process_id: int = typer.Argument(..., help="プロセスのID")
+):
+    """
+    プロセスのワークフローグラフ（実行順序、開始・終了タスク、並列分岐）を表示
+    """
+    try:
+        db = next(get_db())
+        try:
+            workflow_graph = get_graph(db, process_id)
+        except WorkflowCycleError as e:
+            console.print(Panel(str(e), title="エラー", style="red"))
+            raise typer.Exit(1)
+
+        if workflow_graph is None:
+            console.print(Panel(f"プロセス（ID: {process_id}）が見つかりません", title="エラー", style="red"))
+            raise typer.Exit(1)
+
+        names = dict(db.query(Task.id, Task.name).filter(Task.process_id == process_id).all())
+
+        def label(task_id):
+            return f"{names.get(task_id, '不明')} (ID: {task_id})" if task_id is not None else "開始点"
+
+        table = Table(title=f"ワークフローグラフ（プロセスID: {process_id}）")
+        table.add_column("順序", style="dim")
+        table.add_column("タスク")
+        table.add_column("深さ")
+        table.add_column("次のタスク")
+        table.add_column("合流")
+
+        for index, task_id in enumerate(workflow_graph.order, start=1):
+            next_tasks = [
+                f"{label(edge.to_task_id) if edge.to_task_id is not None else '終了点'}［{edge.condition_type}］"
+                for edge in workflow_graph.next_edges(task_id)
+            ]
+            table.add_row(
+                str(index),
+                label(task_id),
+                str(workflow_graph.depth.get(task_id, 0)),
+                "\n".join(next_tasks) or "-",
+                "はい" if workflow_graph.is_join(task_id) else "-"
+            )
+
+        console.print(table)
+        console.print(f"[bold]開始タスク:[/bold] {', '.join(label(t) for t in workflow_graph.start_nodes) or 'なし'}")
+        console.print(f"[bold]終了タスク:[/bold] {', '.join(label(t) for t in workflow_graph.end_nodes) or 'なし'}")
+        for group in workflow_graph.parallel_groups:
+            join = label(group.join) if group.join is not None else "終了点"
+            console.print(
+                f"[bold]並列分岐:[/bold] {label(group.fork)} → "
+                f"{', '.join(label(t) for t in group.branches)} → 合流: {join}"
+            )
+
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"ワークフローグラフの取得中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
+@app.command()
+def schedule(
+    process_id: int = typer.Argument(..., help="プロセスのID")
+):
+    """
+    プロセスのクリティカルパス（最早・最遅開始、余裕時間）を表示
+    """
+    try:
+        db = next(get_db())
+        try:
+            process_schedule = get_schedule(db, process_id)
+        except WorkflowCycleError as e:
+            console.print(Panel(str(e), title="エラー", style="red"))
+            raise typer.Exit(1)
+
+        if process_schedule is None:
+            console.print(Panel(f"プロセス（ID: {process_id}）が見つかりません", title="エラー", style="red"))
+            raise typer.Exit(1)
+
+        names = dict(db.query(Task.id, Task.name).filter(Task.process_id == process_id).all())
+
+        table = Table(title=f"スケジュール（プロセスID: {process_id}、単位: 分）")
+        table.add_column("タスク")
+        table.add_column("所要時間")
+        table.add_column("最早開始")
+        table.add_column("最早終了")
+        table.add_column("最遅開始")
+        table.add_column("最遅終了")
+        table.add_column("余裕")
+        table.add_column("クリティカル")
+
+        for task_id in process_schedule.graph.order:
+            item = process_schedule.tasks[task_id]
+            table.add_row(
+                f"{names.get(task_id, '不明')} (ID: {task_id})",
+                str(item.duration),
+                str(item.earliest_start),
+                str(item.earliest_finish),
+                str(item.latest_start),
+                str(item.latest_finish),
+                str(item.slack),
+                "[bold red]はい[/bold red]" if item.critical else "-"
+            )
+
+        console.print(table)
+        console.print(f"[bold]所要時間（合計）:[/bold] {process_schedule.duration}分")
+        path = " → ".join(names.get(task_id, str(task_id)) for task_id in process_schedule.critical_path)
+        console.print(f"[bold]クリティカルパス:[/bold] {path or 'なし'}")
+
+    except SQLAlchemyError as e:
+        console.print(Panel(f"データベースエラー: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(Panel(f"スケジュールの計算中にエラーが発生しました: {e}", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
 @app.command()
 def create(
     process_id: int = typer.Option(..., "--process", "-p", help="プロセスID"),
@@ -166,6 +303,13 @@ def create(
                                title="エラー", style="red"))
             raise typer.Exit(1)
         
+        # 条件式の構文を検証
+        if condition_expression:
+            error = validate_condition(condition_expression)
+            if error:
+                console.print(Panel(f"無効な条件式です: {error}", title="エラー", style="red"))
+                raise typer.Exit(1)
+        
         # 新しいワークフローの作成
         new_workflow = Workflow(
             process_id=process_id,
@@ -263,8 +407,12 @@ def update(
                 raise typer.Exit(1)
             workflow.condition_type = condition_type
         
-        # 条件式の更新
+        # 条件式の検証と更新
         if condition_expression is not None:
+            error = validate_condition(condition_expression) if condition_expression else None
+            if error:
+                console.print(Panel(f"無効な条件式です: {error}", title="エラー", style="red"))
+                raise typer.Exit(1)
             workflow.condition_expression = condition_expression
         
         # 順序番号の更新
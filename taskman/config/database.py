@@ -1,6 +1,8 @@
 """
 Database configuration settings
 """
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings
 
 class DatabaseSettings(BaseSettings):
@@ -11,9 +13,34 @@ class DatabaseSettings(BaseSettings):
     password: str = "password"
     database: str = "taskman_db"
 
+    # Connection pool settings
+    # "queue" keeps a pool of connections; "null" opens a connection per checkout,
+    # which suits one-shot CLI invocations
+    pool_mode: Literal["queue", "null"] = "queue"
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 3600  # seconds; -1 disables recycling
+    pool_pre_ping: bool = True
+
+    # Per-connection settings
+    statement_timeout: Optional[int] = None  # milliseconds
+    init_sql: str = ""  # statements separated by ";" run on every new connection
+
+    # SQLite profile, applied as PRAGMAs on every new connection to a sqlite:// URL.
+    # WAL lets the GUI read while CLI commands write; synchronous=NORMAL is
+    # durable against application crashes and only syncs at checkpoints in WAL mode
+    sqlite_tuning: bool = True  # False leaves SQLite's own defaults
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist", "memory"] = "wal"
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    sqlite_mmap_size: int = 268435456  # bytes (256 MiB); 0 disables memory-mapped I/O
+    sqlite_cache_size: int = -65536  # pages, or KiB when negative (64 MiB)
+    sqlite_busy_timeout: int = 5000  # milliseconds to wait for a lock
+    sqlite_temp_store: Literal["default", "file", "memory"] = "memory"
+
     class Config:
         """Pydantic config"""
         env_prefix = "DB_"
 
 # Create a global instance
-db_settings = DatabaseSettings() 
\ No newline at end of file
+db_settings = DatabaseSettings()
@@ -0,0 +1,179 @@
+"""
+Archiving of completed process instances
+
+Completed process instances older than a cutoff are moved, together with
+their task instances, from process_instance/task_instance to the archive
+tables (taskman.models.archive), so the hot tables only hold recent and
+active work. Rows are moved in batches of process instances with one short
+transaction each (INSERT ... SELECT into the archive, then DELETE), in id
+order so every batch starts where the previous one ended.
+
+Archiving does not change any counter: Process.total_instances and
+completed_instances keep counting archived instances, so objective progress
+is unaffected, and rebuild_instance_counters() counts the archive too.
+
+The hot tables never reuse the id of a deleted row (AUTOINCREMENT on SQLite,
+schema version 9). Databases that still can, such as MySQL before 8.0 after
+a restart, may hand out an archived id again; a process instance whose id,
+or the id of one of its task instances, is already in the archive is then
+skipped and left in the hot table instead of failing the batch.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, func, literal, select
+
+from taskman.models.archive import ArchivedProcessInstance, ArchivedTaskInstance
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.progress import COMPLETED_STATUS
+from taskman.models.task_instance import TaskInstance
+
+# 1回のトランザクションで移動するプロセスインスタンス数
+DEFAULT_BATCH_SIZE = 500
+
+AGE_UNITS = {'d': 'days', 'w': 'weeks', 'h': 'hours'}
+
+
+@dataclass
+class ArchiveResult:
+    """Number of rows moved"""
+    process_instances: int = 0
+    task_instances: int = 0
+    batches: int = 0
+    skipped: int = 0    # IDがアーカイブ済みの行と重なるため移動しなかったプロセスインスタンス
+
+
+def parse_age(value):
+    """
+    Parse an age such as '90d', '12w' or '36h' into a timedelta
+
+    Raises:
+        ValueError: If the value is not a positive number followed by d, w or h
+    """
+    match = re.fullmatch(r'\s*(\d+)\s*([dwh])\s*', value or '')
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid age: {value!r} (use e.g. 90d, 12w or 36h)")
+    return timedelta(**{AGE_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def _archivable(cutoff):
+    """Conditions for a process instance that may be archived"""
+    return (
+        ProcessInstance.status == COMPLETED_STATUS,
+        func.coalesce(ProcessInstance.completed_at, ProcessInstance.started_at) < cutoff,
+    )
+
+
+def _not_in_archive():
+    """Conditions for a process instance none of whose ids is already in the archive (see module docstring)"""
+    return (
+        ProcessInstance.id.notin_(select(ArchivedProcessInstance.id)),
+        ~exists().where(
+            TaskInstance.process_instance_id == ProcessInstance.id,
+            TaskInstance.id.in_(select(ArchivedTaskInstance.id)),
+        ),
+    )
+
+
+def _count(conn, *conditions):
+    return conn.execute(select(func.count()).select_from(ProcessInstance.__table__).where(*conditions)).scalar()
+
+
+def count_archivable(engine, cutoff):
+    """Number of process instances archive_completed() would move"""
+    with engine.connect() as conn:
+        return _count(conn, *_archivable(cutoff), *_not_in_archive())
+
+
+def _copy(conn, source, target, where, extra=None):
+    """INSERT INTO target SELECT matching columns FROM source; return the row count"""
+    extra = extra or {}
+    names = [column.name for column in target.columns if column.name in source.c]
+    columns = [source.c[name] for name in names]
+    columns += [literal(value, target.c[name].type).label(name) for name, value in extra.items()]
+    statement = target.insert().from_select(names + list(extra), select(*columns).where(where))
+    return conn.execute(statement).rowcount
+
+
+def archive_completed(engine, cutoff, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Move completed process instances older than cutoff into the archive tables
+
+    Args:
+        engine: SQLAlchemy engine
+        cutoff: Instances completed (or, without completed_at, started) before this are moved
+        batch_size: Process instances moved per transaction
+        log: Callable receiving a progress message after each batch
+
+    Returns:
+        ArchiveResult
+    """
+    hot_instances = ProcessInstance.__table__
+    hot_tasks = TaskInstance.__table__
+    now = datetime.now()
+    result = ArchiveResult()
+
+    with engine.connect() as conn:
+        result.skipped = _count(conn, *_archivable(cutoff)) - _count(conn, *_archivable(cutoff), *_not_in_archive())
+
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            query = (
+                select(hot_instances.c.id)
+                .where(*_archivable(cutoff), *_not_in_archive(), hot_instances.c.id > last_id)
+                .order_by(hot_instances.c.id)
+                .limit(batch_size)
+            )
+            ids = conn.execute(query).scalars().all()
+            if not ids:
+                break
+
+            tasks = _copy(conn, hot_tasks, ArchivedTaskInstance.__table__,
+                          hot_tasks.c.process_instance_id.in_(ids), {'archived_at': now})
+            instances = _copy(conn, hot_instances, ArchivedProcessInstance.__table__,
+                              hot_instances.c.id.in_(ids), {'archived_at': now})
+            conn.execute(delete(hot_tasks).where(hot_tasks.c.process_instance_id.in_(ids)))
+            conn.execute(delete(hot_instances).where(hot_instances.c.id.in_(ids)))
+
+        last_id = ids[-1]
+        result.process_instances += instances
+        result.task_instances += tasks
+        result.batches += 1
+        if log:
+            log(f"Archived {instances} process instances and {tasks} task instances (up to id {last_id})")
+    return result
+
+
+def restore_archived(engine, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Move every archived row back into the hot tables
+
+    Returns:
+        ArchiveResult with the number of rows restored
+    """
+    archive_instances = ArchivedProcessInstance.__table__
+    archive_tasks = ArchivedTaskInstance.__table__
+    result = ArchiveResult()
+
+    while True:
+        with engine.begin() as conn:
+            ids = conn.execute(
+                select(archive_instances.c.id).order_by(archive_instances.c.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            instances = _copy(conn, archive_instances, ProcessInstance.__table__,
+                              archive_instances.c.id.in_(ids))
+            tasks = _copy(conn, archive_tasks, TaskInstance.__table__,
+                          archive_tasks.c.process_instance_id.in_(ids))
+            conn.execute(delete(archive_tasks).where(archive_tasks.c.process_instance_id.in_(ids)))
+            conn.execute(delete(archive_instances).where(archive_instances.c.id.in_(ids)))
+
+        result.process_instances += instances
+        result.task_instances += tasks
+        result.batches += 1
+        if log:
+            log(f"Restored {instances} process instances and {tasks} task instances")
+    return result
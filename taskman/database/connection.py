@@ -2,8 +2,10 @@
 Database connection setup
 """
 import os
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.declarative import declared_attr
 
 from taskman.config.database import db_settings
@@ -11,11 +13,110 @@ from taskman.config.database import db_settings
 # DBへの接続設定
 DATABASE_URL = os.environ.get("DATABASE_URL") or f"mysql://{db_settings.user}:{db_settings.password}@{db_settings.host}:{db_settings.port}/{db_settings.database}"
 
+
+def engine_options(url, settings=db_settings):
+    """
+    Build create_engine() keyword arguments from the pool settings
+
+    Args:
+        url: Database URL
+        settings: DatabaseSettings instance
+
+    Returns:
+        Dictionary of keyword arguments for create_engine()
+    """
+    is_sqlite = url.startswith("sqlite")
+    options = {
+        "connect_args": {"check_same_thread": False} if is_sqlite else {},
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+    if settings.pool_mode == "null":
+        options["poolclass"] = NullPool
+    elif not is_sqlite:
+        # SQLiteはSQLAlchemyが専用のプールを選択するため、サイズ指定はしない
+        options["pool_size"] = settings.pool_size
+        options["max_overflow"] = settings.max_overflow
+        options["pool_timeout"] = settings.pool_timeout
+        options["pool_recycle"] = settings.pool_recycle
+
+    return options
+
+
+def sqlite_pragmas(url, settings=db_settings):
+    """
+    PRAGMA statements of the SQLite profile
+
+    Args:
+        url: Database URL
+        settings: DatabaseSettings instance
+
+    Returns:
+        List of SQL statements (empty for other databases or with sqlite_tuning off)
+    """
+    if not url.startswith("sqlite") or not settings.sqlite_tuning:
+        return []
+    return [
+        f"PRAGMA journal_mode = {settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}",
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout)}",
+        f"PRAGMA temp_store = {settings.sqlite_temp_store}",
+    ]
+
+
+def connection_init_sql(url, settings=db_settings):
+    """
+    Statements executed on every new DBAPI connection
+
+    Args:
+        url: Database URL
+        settings: DatabaseSettings instance
+
+    Returns:
+        List of SQL statements
+    """
+    statements = []
+    if settings.statement_timeout:
+        if url.startswith("mysql"):
+            statements.append(f"SET SESSION MAX_EXECUTION_TIME = {int(settings.statement_timeout)}")
+        elif url.startswith("postgresql"):
+            statements.append(f"SET statement_timeout = {int(settings.statement_timeout)}")
+    statements.extend(sqlite_pragmas(url, settings))
+    statements.extend(s.strip() for s in settings.init_sql.split(";") if s.strip())
+    return statements
+
+
+def build_engine(url=DATABASE_URL, settings=db_settings):
+    """
+    Create an engine configured from DatabaseSettings
+
+    Args:
+        url: Database URL
+        settings: DatabaseSettings instance
+
+    Returns:
+        SQLAlchemy engine
+    """
+    new_engine = create_engine(url, **engine_options(url, settings))
+
+    init_statements = connection_init_sql(url, settings)
+    if init_statements:
+        @event.listens_for(new_engine, "connect")
+        def run_init_sql(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in init_statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+
+    return new_engine
+
+
 # エンジン作成
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-)
+engine = build_engine(DATABASE_URL)
 
 # セッションファクトリを作成
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -23,12 +124,35 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Baseクラスを作成 - これを継承して各モデルを定義する
 Base = declarative_base()
 
+# シェル/バッチモードで複数のコマンドが共有するセッション
+_shared_session = None
+
+@contextmanager
+def shared_session():
+    """
+    Make get_db() hand out one session until the context exits
+
+    Used by the shell and batch modes so that many commands reuse the same
+    session (and its pooled connection) instead of opening their own.
+    """
+    global _shared_session
+    session = SessionLocal()
+    _shared_session = session
+    try:
+        yield session
+    finally:
+        _shared_session = None
+        session.close()
+
 def get_db():
     """
     Get database session
     """
+    if _shared_session is not None:
+        yield _shared_session
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
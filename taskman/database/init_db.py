@@ -27,11 +27,12 @@ def create_database():
 
 def init_db():
     """
-    Initialize the database by creating all tables
+    Initialize the database by applying every schema migration
     """
+    from taskman.database.migrations import upgrade
+
     try:
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+        upgrade(engine, log=print)
         print("Database tables created successfully!")
     except SQLAlchemyError as e:
         print(f"Error creating database tables: {e}")
@@ -0,0 +1,496 @@
+"""
+Versioned schema migrations
+
+Each Migration has a version number, an upgrade and a downgrade step. The
+versions applied to a database are recorded in the schema_version table, so
+`taskman db migrate` only runs the steps a database is missing.
+
+Steps are written to be safe on large, live tables:
+
+- they check the current schema first, so a database created by
+  Base.metadata.create_all (or one that was migrated halfway) is brought
+  to the same state without errors;
+- data changes go through backfill(), which updates the rows in primary-key
+  ranges with one short transaction per batch instead of one long UPDATE
+  that locks the whole table.
+
+A database created before migrations existed has no schema_version table;
+it is treated as version 0 and every step checks what is already there.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text, update,
+)
+from sqlalchemy.schema import CreateTable
+
+from taskman.database.archive import restore_archived
+from taskman.models.archive import ArchivedProcessInstance, ArchivedTaskInstance
+from taskman.database.connection import Base
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.progress import INSTANCE_COUNTERS, TASK_COUNTERS, _count_values
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+# 1回のバックフィルで更新する行数（IDの範囲）
+DEFAULT_BATCH_SIZE = 1000
+
+schema_metadata = MetaData()
+
+schema_version = Table(
+    'schema_version', schema_metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+class MigrationError(Exception):
+    """Raised for an invalid migration target or a step that cannot be applied"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema version"""
+    version: int
+    name: str
+    upgrade: Callable[['MigrationContext'], None]
+    downgrade: Callable[['MigrationContext'], None]
+
+
+@dataclass
+class MigrationContext:
+    """Engine and options handed to the migration steps"""
+    engine: object
+    batch_size: int = DEFAULT_BATCH_SIZE
+    log: Optional[Callable[[str], None]] = None
+
+    def say(self, message):
+        if self.log:
+            self.log(message)
+
+    def table_names(self):
+        return set(inspect(self.engine).get_table_names())
+
+    def column_names(self, table):
+        return {column['name'] for column in inspect(self.engine).get_columns(table)}
+
+    def index_names(self, table):
+        return {index['name'] for index in inspect(self.engine).get_indexes(table)}
+
+    def backfill(self, table, values, where=None):
+        return backfill(self.engine, table, values, where, self.batch_size, self.say)
+
+
+def backfill(engine, table, values, where=None, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Update a table in primary-key ranges, committing after each batch
+
+    Args:
+        engine: SQLAlchemy engine
+        table: Table with an integer id column
+        values: Values for UPDATE ... SET (may contain correlated subqueries)
+        where: Additional condition for the rows to update
+        batch_size: Width of each id range
+        log: Callable receiving a progress message after each batch
+
+    Returns:
+        Number of rows updated
+    """
+    with engine.connect() as conn:
+        low, high = conn.execute(select(func.min(table.c.id), func.max(table.c.id))).one()
+    if low is None:
+        return 0
+
+    updated = 0
+    for start in range(low, high + 1, batch_size):
+        statement = (
+            update(table)
+            .where(table.c.id >= start, table.c.id < start + batch_size)
+            .values(values)
+        )
+        if where is not None:
+            statement = statement.where(where)
+        with engine.begin() as conn:
+            updated += conn.execute(statement).rowcount
+        if log:
+            log(f"{table.name}: backfilled ids {start}-{min(start + batch_size - 1, high)}")
+    return updated
+
+
+def _add_counter_columns(ctx, table, columns):
+    """Add INTEGER counter columns that are missing; return the added names"""
+    existing = ctx.column_names(table)
+    added = [column for column in columns if column not in existing]
+    with ctx.engine.begin() as conn:
+        for column in added:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+            ctx.say(f"Added column {table}.{column}")
+    return added
+
+
+def _drop_columns(ctx, table, columns):
+    existing = ctx.column_names(table)
+    with ctx.engine.begin() as conn:
+        for column in columns:
+            if column in existing:
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+                ctx.say(f"Dropped column {table}.{column}")
+
+
+# --- 1: 初期スキーマ ---
+
+BASELINE_TABLES = (
+    'objective', 'process', 'task', 'task_step', 'workflow', 'process_instance',
+    'task_instance', 'objective_process_mapping',
+)
+
+
+def _baseline_tables():
+    return [table for table in Base.metadata.sorted_tables if table.name in BASELINE_TABLES]
+
+
+def _create_baseline(ctx):
+    missing = [table for table in _baseline_tables() if table.name not in ctx.table_names()]
+    Base.metadata.create_all(bind=ctx.engine, tables=missing)
+    for table in missing:
+        ctx.say(f"Created table {table.name}")
+
+
+def _drop_baseline(ctx):
+    Base.metadata.drop_all(bind=ctx.engine, tables=_baseline_tables())
+    ctx.say("Dropped all tables")
+
+
+# --- 2: タスクの進捗カウンタ ---
+
+def _add_task_counters(ctx):
+    process = Process.__table__
+    process_instance = ProcessInstance.__table__
+    if _add_counter_columns(ctx, 'process', TASK_COUNTERS):
+        ctx.backfill(process, _count_values(process, Task.__table__, 'process_id', TASK_COUNTERS))
+    if _add_counter_columns(ctx, 'process_instance', TASK_COUNTERS):
+        ctx.backfill(process_instance, _count_values(
+            process_instance, TaskInstance.__table__, 'process_instance_id', TASK_COUNTERS
+        ))
+
+
+def _drop_task_counters(ctx):
+    _drop_columns(ctx, 'process', TASK_COUNTERS)
+    _drop_columns(ctx, 'process_instance', TASK_COUNTERS)
+
+
+# --- 3: プロセスインスタンスのカウンタ ---
+
+def _add_instance_counters(ctx):
+    process = Process.__table__
+    if _add_counter_columns(ctx, 'process', INSTANCE_COUNTERS):
+        ctx.backfill(process, _count_values(
+            process, ProcessInstance.__table__, 'process_id', INSTANCE_COUNTERS
+        ))
+
+
+def _drop_instance_counters(ctx):
+    _drop_columns(ctx, 'process', INSTANCE_COUNTERS)
+
+
+# --- 4: モニター用の複合インデックス ---
+
+MONITOR_INDEXES = (
+    'ix_task_process_status',
+    'ix_task_instance_process_instance_status',
+    'ix_task_instance_updated_at',
+    'ix_process_instance_status_started_at',
+    'ix_workflow_process_sequence_number',
+    'ix_task_step_task_step_number',
+)
+
+
+def _declared_indexes(names):
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name in names:
+                yield table.name, index
+
+
+def _index_steps(names):
+    """(upgrade, downgrade) steps creating/dropping the declared indexes with these names"""
+    def create(ctx):
+        for table, index in _declared_indexes(names):
+            if index.name not in ctx.index_names(table):
+                with ctx.engine.begin() as conn:
+                    index.create(conn)
+                ctx.say(f"Created index {index.name}")
+
+    def drop(ctx):
+        for table, index in _declared_indexes(names):
+            if index.name in ctx.index_names(table):
+                with ctx.engine.begin() as conn:
+                    index.drop(conn)
+                ctx.say(f"Dropped index {index.name}")
+
+    return create, drop
+
+
+# --- 5: 完了したプロセスインスタンスのアーカイブ ---
+
+ARCHIVE_TABLES = ('process_instance_archive', 'task_instance_archive')
+
+
+def _create_archive_tables(ctx):
+    missing = [table for table in Base.metadata.sorted_tables
+               if table.name in ARCHIVE_TABLES and table.name not in ctx.table_names()]
+    Base.metadata.create_all(bind=ctx.engine, tables=missing)
+    for table in missing:
+        ctx.say(f"Created table {table.name}")
+
+
+def _drop_archive_tables(ctx):
+    if set(ARCHIVE_TABLES) <= ctx.table_names():
+        restore_archived(ctx.engine, ctx.batch_size, ctx.say)
+    tables = [table for table in Base.metadata.sorted_tables if table.name in ARCHIVE_TABLES]
+    Base.metadata.drop_all(bind=ctx.engine, tables=tables)
+    ctx.say("Dropped the archive tables")
+
+
+# --- 6: モニターの変更検知用の更新日時インデックス ---
+
+CHANGE_FEED_INDEXES = (
+    'ix_process_updated_at',
+    'ix_task_updated_at',
+    'ix_process_instance_updated_at',
+)
+
+
+# --- 7: プロセスの名前とバージョンの一意制約 ---
+
+PROCESS_NAME_VERSION_INDEX = 'ix_process_name_version'
+
+
+def _duplicate_process_versions(ctx):
+    """(name, version, ids) of the process definitions sharing a name and version"""
+    process = Process.__table__
+    query = (
+        select(process.c.name, process.c.version, func.count(), func.min(process.c.id), func.max(process.c.id))
+        .group_by(process.c.name, process.c.version)
+        .having(func.count() > 1)
+        .order_by(process.c.name, process.c.version)
+    )
+    with ctx.engine.connect() as conn:
+        return conn.execute(query).all()
+
+
+def _add_process_name_version_index(ctx):
+    if PROCESS_NAME_VERSION_INDEX in ctx.index_names('process'):
+        return
+    process = Process.__table__
+    # NULL is never equal to NULL in a unique index; treat a missing version as 1
+    ctx.backfill(process, {'version': 1}, where=process.c.version.is_(None))
+
+    duplicates = _duplicate_process_versions(ctx)
+    if duplicates:
+        listed = "; ".join(
+            f"'{name}' version {version}: {count} rows (ids {low}..{high})"
+            for name, version, count, low, high in duplicates
+        )
+        raise MigrationError(
+            f"Cannot add the unique index on process (name, version): {len(duplicates)} duplicate "
+            f"definition(s): {listed}. Rename them or change their version "
+            f"(taskman process update ID --name/--increment-version), then run the upgrade again."
+        )
+    _create_process_name_version_index(ctx)
+
+
+_create_process_name_version_index, _drop_process_name_version_index = _index_steps((PROCESS_NAME_VERSION_INDEX,))
+
+
+# --- 8: ワークフローステップの状態集計用のインデックス ---
+
+WORKFLOW_STEP_INDEXES = ('ix_task_instance_task_status',)
+
+
+# --- 9: SQLiteで削除したIDを再利用しない（アーカイブ済みの行とIDが重ならないように） ---
+
+AUTOINCREMENT_TABLES = (
+    (ProcessInstance.__table__, ArchivedProcessInstance.__table__),
+    (TaskInstance.__table__, ArchivedTaskInstance.__table__),
+)
+
+
+def _uses_autoincrement(conn, table):
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': table}
+    ).scalar()
+    return 'AUTOINCREMENT' in (sql or '').upper()
+
+
+def _rebuild_sqlite_table(ctx, table, archive, autoincrement):
+    """
+    Recreate a SQLite table with or without AUTOINCREMENT, keeping its rows and indexes
+
+    SQLite cannot change this in place: the rows are copied into a new table
+    that then replaces the old one, all in one transaction. With
+    AUTOINCREMENT the id sequence starts above the archived ids too.
+    """
+    name = table.name
+    with ctx.engine.begin() as conn:
+        if _uses_autoincrement(conn, name) == autoincrement:
+            return
+        existing = inspect(conn)
+        columns = ', '.join(
+            column['name'] for column in existing.get_columns(name) if column['name'] in table.c
+        )
+        indexes = {index['name'] for index in existing.get_indexes(name)}
+        create = str(CreateTable(table).compile(dialect=conn.dialect))
+        if not autoincrement:
+            create = create.replace(' AUTOINCREMENT', '')
+        rebuilt = f'{name}_rebuild'
+        conn.execute(text(create.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {rebuilt} ', 1)))
+        conn.execute(text(f'INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {name}'))
+        conn.execute(text(f'DROP TABLE {name}'))
+        conn.execute(text(f'ALTER TABLE {rebuilt} RENAME TO {name}'))
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name in indexes:
+                index.create(conn)
+        if autoincrement:
+            high = max(
+                conn.execute(select(func.max(table.c.id))).scalar() or 0,
+                conn.execute(select(func.max(archive.c.id))).scalar() or 0,
+            )
+            conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {'name': name})
+            conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                         {'name': name, 'seq': high})
+    ctx.say(f"Rebuilt table {name} {'with' if autoincrement else 'without'} AUTOINCREMENT")
+
+
+def _autoincrement_steps(autoincrement):
+    def step(ctx):
+        if ctx.engine.dialect.name != 'sqlite':
+            # 他のデータベースは削除したIDを再利用しない（古いMySQLの再起動後はアーカイブ側で重複を避ける）
+            return
+        for table, archive in AUTOINCREMENT_TABLES:
+            _rebuild_sqlite_table(ctx, table, archive, autoincrement)
+    return step
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'initial schema', _create_baseline, _drop_baseline),
+    Migration(2, 'task progress counters', _add_task_counters, _drop_task_counters),
+    Migration(3, 'process instance counters', _add_instance_counters, _drop_instance_counters),
+    Migration(4, 'monitor indexes', *_index_steps(MONITOR_INDEXES)),
+    Migration(5, 'process instance archive', _create_archive_tables, _drop_archive_tables),
+    Migration(6, 'change feed indexes', *_index_steps(CHANGE_FEED_INDEXES)),
+    Migration(7, 'unique process name and version',
+              _add_process_name_version_index, _drop_process_name_version_index),
+    Migration(8, 'workflow step status index', *_index_steps(WORKFLOW_STEP_INDEXES)),
+    Migration(9, 'instance ids never reused', _autoincrement_steps(True), _autoincrement_steps(False)),
+]
+
+
+def head():
+    """Latest schema version"""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def applied_versions(engine):
+    """Dict of applied version → applied_at (empty before the first migration)"""
+    if schema_version.name not in inspect(engine).get_table_names():
+        return {}
+    with engine.connect() as conn:
+        return dict(conn.execute(select(schema_version.c.version, schema_version.c.applied_at)).all())
+
+
+def current_version(engine):
+    """Highest applied version (0 for a database that was never migrated)"""
+    return max(applied_versions(engine), default=0)
+
+
+def status(engine):
+    """List of (Migration, applied_at or None) in version order"""
+    applied = applied_versions(engine)
+    return [(migration, applied.get(migration.version)) for migration in MIGRATIONS]
+
+
+def _check_target(target):
+    if target != 0 and target not in {migration.version for migration in MIGRATIONS}:
+        raise MigrationError(f"Unknown schema version: {target} (latest is {head()})")
+
+
+def upgrade(engine, target=None, batch_size=DEFAULT_BATCH_SIZE, log=None):
+    """
+    Apply the migrations up to target
+
+    Args:
+        engine: SQLAlchemy engine
+        target: Version to upgrade to (None for the latest)
+        batch_size: Rows per backfill batch
+        log: Callable receiving progress messages
+
+    Returns:
+        List of the applied Migration
+    """
+    target = head() if target is None else target
+    _check_target(target)
+    current = current_version(engine)
+    if target < current:
+        raise MigrationError(f"Database is at version {current}; use downgrade to go back to {target}")
+
+    schema_metadata.create_all(bind=engine)
+    ctx = MigrationContext(engine, batch_size, log)
+    done = []
+    for migration in MIGRATIONS:
+        if current < migration.version <= target:
+            ctx.say(f"Upgrading to {migration.version}: {migration.name}")
+            migration.upgrade(ctx)
+            with engine.begin() as conn:
+                conn.execute(schema_version.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.now()
+                ))
+            done.append(migration)
+    return done
+
+
+def downgrade(engine, target, log=None):
+    """
+    Revert the migrations above target, newest first
+
+    Args:
+        engine: SQLAlchemy engine
+        target: Version to go back to (0 drops every table)
+        log: Callable receiving progress messages
+
+    Returns:
+        List of the reverted Migration
+    """
+    _check_target(target)
+    current = current_version(engine)
+    if target > current:
+        raise MigrationError(f"Database is at version {current}; use upgrade to go to {target}")
+
+    ctx = MigrationContext(engine, log=log)
+    done = []
+    for migration in reversed(MIGRATIONS):
+        if target < migration.version <= current:
+            ctx.say(f"Downgrading from {migration.version}: {migration.name}")
+            migration.downgrade(ctx)
+            with engine.begin() as conn:
+                conn.execute(schema_version.delete().where(schema_version.c.version == migration.version))
+            done.append(migration)
+    return done
+
+
+def reset(engine, log=None):
+    """
+    Drop every table, including ones a partial migration left behind, and migrate to the latest version
+
+    Returns:
+        List of the applied Migration
+    """
+    Base.metadata.drop_all(bind=engine)
+    schema_metadata.drop_all(bind=engine)
+    if log:
+        log("Dropped all tables")
+    return upgrade(engine, log=log)
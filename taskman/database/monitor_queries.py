@@ -0,0 +1,250 @@
+"""
+SQL of the process monitor's hot queries
+
+The statements used by taskman.app.db.monitor_db live here, outside the
+GUI package, so `taskman db explain` can show their query plans without
+loading the monitor's data layer.
+"""
+
+# ダッシュボードの件数カードとプロセスタイプ別統計
+# タスクインスタンスの集計（1行）にプロセスインスタンスを外部結合し、
+# プロセス名ごとに集計する。インスタンスが0件でもタスク件数の行は残る。
+DASHBOARD_STATS_SQL = """
+SELECT
+    p.name AS process_type,
+    COUNT(CASE WHEN pi.status != '完了' THEN 1 END) AS active_count,
+    COUNT(CASE WHEN pi.status = '完了' THEN 1 END) AS completed_count,
+    MAX(tc.overdue_count) AS overdue_count,
+    MAX(tc.today_count) AS today_count
+FROM (
+    SELECT
+        COUNT(CASE WHEN ti.created_at < CURRENT_DATE THEN 1 END) AS overdue_count,
+        COUNT(CASE WHEN DATE(ti.created_at) = CURRENT_DATE THEN 1 END) AS today_count
+    FROM task_instance ti
+    WHERE ti.status != '完了'
+) tc
+LEFT JOIN process_instance pi ON 1 = 1
+LEFT JOIN process p ON pi.process_id = p.id
+GROUP BY p.name
+"""
+
+# ダッシュボードの一覧（実行中インスタンス、最近のアクティビティ、緊急タスク）
+# 各セクションを LIMIT 付きの派生テーブルにして UNION ALL でまとめる。
+# 進捗はプロセスインスタンスの進捗カウンタから読む。
+DASHBOARD_LISTS_SQL = """
+SELECT * FROM (
+    SELECT
+        'active' AS section,
+        pi.id AS id,
+        p.name AS process_name,
+        NULL AS task_name,
+        pi.status AS status,
+        NULL AS priority,
+        5 AS priority_rank,
+        pi.started_at AS ts,
+        pi.total_tasks AS total_tasks,
+        pi.completed_tasks AS completed_tasks
+    FROM process_instance pi
+    JOIN process p ON pi.process_id = p.id
+    WHERE pi.status != '完了'
+    ORDER BY pi.started_at DESC
+    LIMIT 10
+) active_rows
+UNION ALL
+SELECT * FROM (
+    SELECT
+        'activity' AS section,
+        ti.id AS id,
+        p.name AS process_name,
+        t.name AS task_name,
+        ti.status AS status,
+        NULL AS priority,
+        5 AS priority_rank,
+        ti.updated_at AS ts,
+        0 AS total_tasks,
+        0 AS completed_tasks
+    FROM task_instance ti
+    JOIN process_instance pi ON ti.process_instance_id = pi.id
+    JOIN process p ON pi.process_id = p.id
+    JOIN task t ON ti.task_id = t.id
+    ORDER BY ti.updated_at DESC
+    LIMIT 15
+) activity_rows
+UNION ALL
+SELECT * FROM (
+    SELECT
+        'urgent' AS section,
+        ti.id AS id,
+        p.name AS process_name,
+        t.name AS task_name,
+        ti.status AS status,
+        t.priority AS priority,
+        CASE
+            WHEN t.priority = '緊急' THEN 1
+            WHEN t.priority = '高' THEN 2
+            WHEN t.priority = '中' THEN 3
+            WHEN t.priority = '低' THEN 4
+            ELSE 5
+        END AS priority_rank,
+        ti.created_at AS ts,
+        0 AS total_tasks,
+        0 AS completed_tasks
+    FROM task_instance ti
+    JOIN task t ON ti.task_id = t.id
+    JOIN process_instance pi ON ti.process_instance_id = pi.id
+    JOIN process p ON pi.process_id = p.id
+    WHERE ti.status != '完了'
+    ORDER BY priority_rank, ti.created_at ASC
+    LIMIT 10
+) urgent_rows
+"""
+
+# プロセスのタスク一覧
+PROCESS_TASKS_SQL = """
+SELECT
+    t.id as id,
+    t.process_id,
+    t.name as name,
+    t.status,
+    t.priority,
+    t.assigned_to as owner,
+    t.description
+FROM task t
+WHERE t.process_id = :process_id
+ORDER BY t.id
+"""
+
+# プロセスのワークフロー（遷移）を順序番号の順に
+WORKFLOW_EDGES_SQL = """
+SELECT
+    w.id,
+    w.from_task_id,
+    w.to_task_id,
+    w.condition_type,
+    w.sequence_number
+FROM workflow w
+WHERE w.process_id = :process_id
+ORDER BY w.sequence_number
+"""
+
+# プロセスのワークフローステップ（遷移元・遷移先のタスク名と状態）を順序番号の順に
+# ステップの状態は遷移先のタスク（終了の遷移では遷移元のタスク）の、実行中のプロセス
+# インスタンスにあるタスクインスタンスから求める（完了・中断したインスタンスの履歴は含めない）:
+# 実行中があれば実行中、未着手があれば未着手、失敗があれば失敗、すべて完了なら完了、
+# それ以外（中断を含む）は中断。タスクインスタンスがなければタスク自体の状態。
+# pi.id は実行中のインスタンスのタスクインスタンスでだけ NULL でないため、件数は pi.id で数える。
+WORKFLOW_STEPS_SQL = """
+SELECT
+    w.id,
+    w.sequence_number,
+    ft.name AS from_task_name,
+    tt.name AS to_task_name,
+    CASE
+        WHEN COUNT(CASE WHEN ti.status = '実行中' THEN pi.id END) > 0 THEN '実行中'
+        WHEN COUNT(CASE WHEN ti.status = '未着手' THEN pi.id END) > 0 THEN '未着手'
+        WHEN COUNT(CASE WHEN ti.status = '失敗' THEN pi.id END) > 0 THEN '失敗'
+        WHEN COUNT(pi.id) > 0 AND COUNT(CASE WHEN ti.status = '完了' THEN pi.id END) = COUNT(pi.id) THEN '完了'
+        WHEN COUNT(pi.id) > 0 THEN '中断'
+        ELSE COALESCE(tt.status, ft.status, '未着手')
+    END AS status
+FROM workflow w
+LEFT JOIN task ft ON w.from_task_id = ft.id
+LEFT JOIN task tt ON w.to_task_id = tt.id
+LEFT JOIN task_instance ti ON ti.task_id = COALESCE(w.to_task_id, w.from_task_id)
+LEFT JOIN process_instance pi ON pi.id = ti.process_instance_id AND pi.status = '実行中'
+WHERE w.process_id = :process_id
+GROUP BY w.id, w.sequence_number, ft.name, tt.name, ft.status, tt.status
+ORDER BY w.sequence_number, w.id
+"""
+
+# プロセスインスタンス一覧（フィルタと ORDER BY は呼び出し側で追加する）
+PROCESS_INSTANCES_SQL = """
+SELECT
+    pi.id,
+    p.name as process_name,
+    p.id as process_id,
+    pi.status,
+    pi.started_at,
+    pi.completed_at,
+    pi.created_by,
+    pi.completed_tasks * 100.0 / NULLIF(pi.total_tasks, 0) as progress
+FROM process_instance pi
+JOIN process p ON pi.process_id = p.id
+WHERE 1=1
+"""
+
+# 前回の更新以降に追加・変更されたプロセスインスタンス（プロセスの変更も含む）
+# 進捗カウンタの更新ではインスタンスの updated_at が変わらないため、
+# タスクインスタンスが追加・変更されたインスタンスも含める。
+CHANGED_PROCESS_INSTANCES_SQL = PROCESS_INSTANCES_SQL + """
+AND (
+    pi.id > :after_id
+    OR pi.updated_at >= :updated_since
+    OR p.updated_at >= :process_updated_since
+    OR pi.id IN (
+        SELECT ti.process_instance_id
+        FROM task_instance ti
+        WHERE ti.id > :task_instance_after_id OR ti.updated_at >= :task_instance_updated_since
+    )
+)
+"""
+
+# 変更検知の透かし: テーブルごとの最大ID・最大更新日時・件数
+# モニターの定期更新で最初に実行し、変化がなければほかのクエリは実行しない。
+# 最大値は主キーと updated_at のインデックスの端を読むだけで求まり、
+# 件数は削除（アーカイブを含む）の検知に使う。
+CHANGE_WATERMARKS_SQL = """
+SELECT 'process' AS table_name, MAX(id) AS max_id, MAX(updated_at) AS max_updated_at, COUNT(*) AS row_count
+FROM process
+UNION ALL
+SELECT 'task', MAX(id), MAX(updated_at), COUNT(*) FROM task
+UNION ALL
+SELECT 'process_instance', MAX(id), MAX(updated_at), COUNT(*) FROM process_instance
+UNION ALL
+SELECT 'task_instance', MAX(id), MAX(updated_at), COUNT(*) FROM task_instance
+"""
+
+# プロセスインスタンスのタスクインスタンス一覧
+TASK_INSTANCES_SQL = """
+SELECT
+    ti.id,
+    ti.process_instance_id,
+    t.name,
+    ti.status,
+    ti.assigned_to,
+    ti.started_at,
+    ti.completed_at,
+    t.priority
+FROM task_instance ti
+JOIN task t ON ti.task_id = t.id
+WHERE ti.process_instance_id = :instance_id
+ORDER BY ti.id
+"""
+
+# CLIの `step list --task` と同じアクセスパス
+TASK_STEPS_SQL = """
+SELECT id, step_number, name, expected_duration
+FROM task_step
+WHERE task_id = :task_id
+ORDER BY step_number
+"""
+
+# `taskman db explain` で実行計画を表示するクエリ: 名前 → (SQL, サンプルのパラメータ)
+EXPLAIN_QUERIES = {
+    "dashboard-stats": (DASHBOARD_STATS_SQL, {}),
+    "dashboard-lists": (DASHBOARD_LISTS_SQL, {}),
+    "process-tasks": (PROCESS_TASKS_SQL, {"process_id": 1}),
+    "workflow-edges": (WORKFLOW_EDGES_SQL, {"process_id": 1}),
+    "workflow-steps": (WORKFLOW_STEPS_SQL, {"process_id": 1}),
+    "running-instances": (
+        PROCESS_INSTANCES_SQL + " AND pi.status = :status ORDER BY pi.started_at DESC",
+        {"status": "実行中"},
+    ),
+    "task-instances": (TASK_INSTANCES_SQL, {"instance_id": 1}),
+    "active-task-instances": (
+        "SELECT task_id FROM task_instance WHERE process_instance_id = :instance_id AND status IN ('未着手', '実行中')",
+        {"instance_id": 1},
+    ),
+    "task-steps": (TASK_STEPS_SQL, {"task_id": 1}),
+    "change-watermarks": (CHANGE_WATERMARKS_SQL, {}),
+}
@@ -0,0 +1,215 @@
+"""
+Objective subtrees
+
+Objective.parent_id forms a forest. Subtrees are read through one
+recursive CTE (WITH RECURSIVE), so listing, rendering, aggregating or
+deleting a subtree takes a constant number of statements however deep
+the tree is. The recursion stops after MAX_DEPTH levels, so a parent_id
+cycle in bad data cannot make it loop forever.
+
+Each objective is weighted by the sum of the contribution_weight of its
+objective_process_mapping rows (1 when it has none or all are NULL).
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import case, delete, func, literal, select, update
+
+from taskman.models.mapping import objective_process_mapping
+from taskman.models.objective import Objective
+
+# 再帰の最大深さ（親子関係の循環に対する安全弁）
+MAX_DEPTH = 100
+
+# IN (...) に渡すIDの上限（SQLiteのバインド変数の上限を超えないように分割する）
+IN_BATCH_SIZE = 500
+
+
+@dataclass
+class TreeNode:
+    """One objective of a loaded subtree"""
+    objective: Objective
+    depth: int
+    weight: float
+    children: List['TreeNode'] = field(default_factory=list)
+
+    @property
+    def progress(self):
+        """Own progress (current / target, capped at 1), None without a target"""
+        return _ratio(self.objective.current_value, self.objective.target_value)
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Weighted aggregate over a subtree"""
+    count: int
+    current_value: float     # Σ 重み × 現在値
+    target_value: float      # Σ 重み × 目標値
+    progress: Optional[float]  # 目標値のある目標の達成率（上限1）の重み付き平均
+
+
+def _ratio(current, target):
+    if not target or target <= 0:
+        return None
+    return min((current or 0) / target, 1.0)
+
+
+def subtree_cte(root_id=None, max_depth=None, name='objective_subtree'):
+    """
+    Recursive CTE with the columns (id, parent_id, root_id, depth) of a subtree
+
+    Args:
+        root_id: Root objective (None starts from every objective without a parent)
+        max_depth: Deepest level to include (the root is depth 0)
+        name: CTE name
+    """
+    limit = MAX_DEPTH if max_depth is None else min(max_depth, MAX_DEPTH)
+    anchor = select(
+        Objective.id.label('id'),
+        Objective.parent_id.label('parent_id'),
+        Objective.id.label('root_id'),
+        literal(0).label('depth'),
+    )
+    if root_id is None:
+        anchor = anchor.where(Objective.parent_id.is_(None))
+    else:
+        anchor = anchor.where(Objective.id == root_id)
+    tree = anchor.cte(name, recursive=True)
+    return tree.union_all(
+        select(Objective.id, Objective.parent_id, tree.c.root_id, tree.c.depth + 1)
+        .where(Objective.parent_id == tree.c.id, tree.c.depth < limit)
+    )
+
+
+def weight_subquery():
+    """(objective_id, weight) with the summed contribution weight per objective"""
+    return (
+        select(
+            objective_process_mapping.c.objective_id.label('objective_id'),
+            func.sum(objective_process_mapping.c.contribution_weight).label('weight'),
+        )
+        .group_by(objective_process_mapping.c.objective_id)
+        .subquery('objective_weight')
+    )
+
+
+def descendant_ids(session, root_id, max_depth=None):
+    """IDs of all objectives below root_id (excluding the root itself)"""
+    tree = subtree_cte(root_id, max_depth)
+    return session.execute(select(tree.c.id).where(tree.c.depth > 0)).scalars().all()
+
+
+def load_tree(session, root_id=None, max_depth=None):
+    """
+    Load a subtree with one statement and link it in memory
+
+    Args:
+        session: Database session
+        root_id: Root objective (None loads every tree of the forest)
+        max_depth: Deepest level to load (the root is depth 0)
+
+    Returns:
+        List of root TreeNode (siblings ordered by id); empty if root_id does not exist
+    """
+    tree = subtree_cte(root_id, max_depth)
+    weights = weight_subquery()
+    rows = session.execute(
+        select(Objective, tree.c.depth, func.coalesce(weights.c.weight, 1.0))
+        .join(tree, tree.c.id == Objective.id)
+        .outerjoin(weights, weights.c.objective_id == Objective.id)
+        .order_by(tree.c.depth, Objective.id)
+    ).all()
+
+    nodes = {}
+    roots = []
+    for objective, depth, weight in rows:
+        if objective.id in nodes:
+            continue   # 循環があっても同じ目標は一度だけ
+        node = nodes[objective.id] = TreeNode(objective, depth, float(weight))
+        parent = nodes.get(objective.parent_id) if depth > 0 else None
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+    return roots
+
+
+def rollups(session, root_id=None):
+    """
+    Aggregate subtrees (including their roots) in one statement
+
+    Args:
+        session: Database session
+        root_id: Root objective (None aggregates every tree of the forest)
+
+    Returns:
+        Dict of root objective id → Rollup
+    """
+    tree = subtree_cte(root_id)
+    weights = weight_subquery()
+    weight = func.coalesce(weights.c.weight, 1.0)
+    current = func.coalesce(Objective.current_value, 0.0)
+    has_target = Objective.target_value > 0
+    ratio = case(
+        (current >= Objective.target_value, 1.0),
+        else_=current / Objective.target_value,
+    )
+    rows = session.execute(
+        select(
+            tree.c.root_id,
+            func.count(Objective.id),
+            func.sum(weight * current),
+            func.sum(weight * func.coalesce(Objective.target_value, 0.0)),
+            func.sum(case((has_target, weight * ratio), else_=0.0)),
+            func.sum(case((has_target, weight), else_=0.0)),
+        )
+        .select_from(tree)
+        .join(Objective, Objective.id == tree.c.id)
+        .outerjoin(weights, weights.c.objective_id == Objective.id)
+        .group_by(tree.c.root_id)
+    )
+    return {
+        root: Rollup(
+            count=count,
+            current_value=float(weighted_current or 0),
+            target_value=float(weighted_target or 0),
+            progress=float(weighted_ratio) / float(target_weight) if target_weight else None,
+        )
+        for root, count, weighted_current, weighted_target, weighted_ratio, target_weight in rows
+    }
+
+
+def rollup(session, root_id):
+    """Aggregate one subtree; None if the objective does not exist"""
+    return rollups(session, root_id).get(root_id)
+
+
+def delete_subtree(session, root_id):
+    """
+    Delete an objective with all its descendants and their process mappings
+
+    Parent links inside the subtree are cleared first, so the rows can be
+    removed regardless of the order the database visits them in. The ids
+    are passed IN_BATCH_SIZE at a time. Nothing is committed here.
+
+    Returns:
+        Number of deleted objectives
+    """
+    ids = session.execute(select(subtree_cte(root_id).c.id)).scalars().all()
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        return 0
+    options = {'synchronize_session': False}
+    batches = [ids[start:start + IN_BATCH_SIZE] for start in range(0, len(ids), IN_BATCH_SIZE)]
+    # 親子のリンクをすべて外してから消す（途中のバッチで子が残っている親を消さないため）
+    for batch in batches:
+        session.execute(
+            update(Objective).where(Objective.id.in_(batch)).values(parent_id=None), execution_options=options
+        )
+    for batch in batches:
+        session.execute(
+            delete(objective_process_mapping).where(objective_process_mapping.c.objective_id.in_(batch))
+        )
+        session.execute(delete(Objective).where(Objective.id.in_(batch)), execution_options=options)
+    session.expire_all()
+    return len(ids)
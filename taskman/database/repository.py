@@ -0,0 +1,168 @@
+"""
+Shared query layer for the CLI list commands
+
+Each function returns a Query whose related rows are loaded eagerly
+(joinedload) or through grouped-count subqueries, so rendering a list takes
+a constant number of statements regardless of how many rows it contains.
+"""
+import heapq
+from itertools import islice
+
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
+from taskman.models import (
+    Objective, Process, Task, Workflow, ProcessInstance, TaskInstance, TaskStep,
+    ArchivedProcessInstance, ArchivedTaskInstance,
+)
+
+
+def paginate(query, id_column, after=None, limit=None):
+    """
+    Apply keyset pagination to a query ordered by id
+
+    Args:
+        query: Query already ordered by id_column
+        id_column: Id column of the listed model
+        after: Only rows with an id greater than this
+        limit: Maximum number of rows
+    """
+    if after is not None:
+        query = query.filter(id_column > after)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+class MergedRows:
+    """
+    Rows of several queries ordered by id, merged into one id-ordered list
+
+    Used to list hot and archived rows together (archived rows keep their
+    original ids, so the ids never overlap). Each query should already be
+    paginated with the same after/limit; at most limit rows are returned.
+    Provides the parts of the Query interface the list commands use.
+    """
+
+    def __init__(self, queries, key, limit=None):
+        self.queries = queries
+        self.key = key
+        self.limit = limit
+
+    def __iter__(self):
+        return islice(heapq.merge(*self.queries, key=self.key), self.limit)
+
+    def all(self):
+        return list(self)
+
+    def yield_per(self, count):
+        return self
+
+
+def objective_query(db, status=None):
+    """Objectives, optionally filtered by status"""
+    query = db.query(Objective)
+    if status:
+        query = query.filter(Objective.status == status)
+    return query.order_by(Objective.id)
+
+
+def process_query(db):
+    """All processes"""
+    return db.query(Process).order_by(Process.id)
+
+
+def process_by_name_version(db, name, version, exclude_id=None):
+    """The process with this name and version (unique index ix_process_name_version), or None"""
+    query = db.query(Process).filter(Process.name == name, Process.version == version)
+    if exclude_id is not None:
+        query = query.filter(Process.id != exclude_id)
+    return query.first()
+
+
+def task_query(db, status=None, priority=None, assigned_to=None):
+    """Tasks, optionally filtered by status, priority and assignee"""
+    query = db.query(Task)
+    if status:
+        query = query.filter(Task.status == status)
+    if priority:
+        query = query.filter(Task.priority == priority)
+    if assigned_to:
+        query = query.filter(Task.assigned_to == assigned_to)
+    return query.order_by(Task.id)
+
+
+def workflow_query(db, process_id=None):
+    """Workflows with their from/to tasks joined in the same statement"""
+    query = db.query(Workflow).options(
+        joinedload(Workflow.from_task),
+        joinedload(Workflow.to_task),
+    )
+    if process_id:
+        query = query.filter(Workflow.process_id == process_id)
+    return query.order_by(Workflow.id)
+
+
+def task_step_query(db, task_id=None):
+    """Task steps with their task joined in the same statement"""
+    query = db.query(TaskStep).options(joinedload(TaskStep.task))
+    if task_id:
+        query = query.filter(TaskStep.task_id == task_id)
+    return query.order_by(TaskStep.id)
+
+
+def task_instance_counts(db, model=TaskInstance):
+    """Subquery of task instance counts grouped by process instance"""
+    return (
+        db.query(
+            model.process_instance_id.label('process_instance_id'),
+            func.count(model.id).label('task_count'),
+        )
+        .group_by(model.process_instance_id)
+        .subquery()
+    )
+
+
+def process_instance_query(db, process_id=None, status=None, created_by=None, archived=False):
+    """
+    Process instances with their process and task instance count
+
+    Rows are (ProcessInstance, task_count) tuples; ProcessInstance.process is
+    loaded by the same statement. With archived=True the rows come from the
+    archive tables (ArchivedProcessInstance) instead.
+    """
+    model = ArchivedProcessInstance if archived else ProcessInstance
+    counts = task_instance_counts(db, ArchivedTaskInstance if archived else TaskInstance)
+    query = (
+        db.query(model, func.coalesce(counts.c.task_count, 0).label('task_count'))
+        .options(joinedload(model.process))
+        .outerjoin(counts, counts.c.process_instance_id == model.id)
+    )
+    if process_id:
+        query = query.filter(model.process_id == process_id)
+    if status:
+        query = query.filter(model.status == status)
+    if created_by:
+        query = query.filter(model.created_by == created_by)
+    return query.order_by(model.id)
+
+
+def task_instance_query(db, process_instance_id=None, status=None, assigned_to=None, archived=False):
+    """
+    Task instances with their task and process instance (and its process) joined
+
+    With archived=True the rows come from the archive tables (ArchivedTaskInstance).
+    """
+    model = ArchivedTaskInstance if archived else TaskInstance
+    instance_model = ArchivedProcessInstance if archived else ProcessInstance
+    query = db.query(model).options(
+        joinedload(model.task),
+        joinedload(model.process_instance).joinedload(instance_model.process),
+    )
+    if process_instance_id:
+        query = query.filter(model.process_instance_id == process_instance_id)
+    if status:
+        query = query.filter(model.status == status)
+    if assigned_to:
+        query = query.filter(model.assigned_to == assigned_to)
+    return query.order_by(model.id)
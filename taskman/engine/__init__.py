@@ -0,0 +1,6 @@
+"""
+Workflow execution engine
+
+Interprets the Workflow edges of a process: graph compilation, condition
+evaluation and task-instance advancement.
+"""
@@ -0,0 +1,315 @@
+"""
+Task-instance advancement
+
+When task instances reach 完了 the workflow graph decides what runs next:
+
+- 常時 and 並列 edges are always followed (several 並列 edges fan out).
+- Among 条件付き edges the first one (by sequence number) whose condition
+  holds for the completed task instance is followed.
+- A task with more than one incoming edge is a join: it is only started
+  once no task that can still reach it is active in the process instance.
+- When the end is reached and nothing is active any more, the process
+  instance becomes 完了.
+
+All successor task instances of one call are written with a single
+multi-row INSERT. Nothing is committed here; callers commit, so a status
+change and everything it triggers form one transaction.
+
+Processes without any workflow edges are not driven by the engine, and
+neither are processes whose workflow contains a cycle: a warning is logged
+and reported in AdvanceResult.errors, and task instances are left to be
+created by hand as before.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import insert, select
+
+from taskman.engine.conditions import (
+    CONTEXT_FIELDS, ConditionEvaluationError, ConditionSyntaxError,
+    condition_for_edge, task_instance_context,
+)
+from taskman.engine.graph import CONDITIONAL, WorkflowCycleError, get_graph
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.progress import apply_counter_deltas
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = '完了'
+RUNNING = '実行中'
+NOT_STARTED = '未着手'
+ACTIVE_STATUSES = (NOT_STARTED, RUNNING)
+
+# 開始点からの条件付き辺を評価するときのコンテキスト（完了したタスクがないため空）
+EMPTY_CONTEXT = {name: None for name in CONTEXT_FIELDS}
+
+
+@dataclass
+class AdvanceResult:
+    """What one advancement call did"""
+    created: List[Tuple[int, int]] = field(default_factory=list)            # (プロセスインスタンスID, タスクID)
+    completed_instances: List[int] = field(default_factory=list)
+    waiting_joins: List[Tuple[int, int]] = field(default_factory=list)      # 合流待ちの (プロセスインスタンスID, タスクID)
+    stalled_instances: List[int] = field(default_factory=list)              # 進める辺がなく停止したインスタンス
+    errors: List[str] = field(default_factory=list)                         # 評価できなかった条件式
+
+
+def _evaluate(edge, contexts, errors):
+    """Evaluate the condition of an edge for many contexts (failures count as False)"""
+    try:
+        condition = condition_for_edge(edge)
+    except ConditionSyntaxError as e:
+        errors.append(f"ワークフロー（ID: {edge.id}）: {e}")
+        return [False] * len(contexts)
+    try:
+        return condition.evaluate_batch(contexts)
+    except ConditionEvaluationError:
+        results = []
+        for context in contexts:
+            try:
+                results.append(condition.evaluate(context))
+            except ConditionEvaluationError as e:
+                errors.append(f"ワークフロー（ID: {edge.id}）: {e}")
+                results.append(False)
+        return results
+
+
+def select_targets(edges, contexts, errors):
+    """
+    Decide which edges to follow for a group of contexts sharing the same edges
+
+    Args:
+        edges: Outgoing edges in sequence order
+        contexts: One evaluation context per completed task instance
+        errors: List collecting condition errors
+
+    Returns:
+        One list of target task ids (None for the process end) per context
+    """
+    targets = [[e.to_task_id for e in edges if e.condition_type != CONDITIONAL] for _ in contexts]
+    pending = list(range(len(contexts)))
+    for edge in (e for e in edges if e.condition_type == CONDITIONAL):
+        if not pending:
+            break
+        matches = _evaluate(edge, [contexts[i] for i in pending], errors)
+        for i, matched in zip(list(pending), matches):
+            if matched:
+                targets[i].append(edge.to_task_id)
+                pending.remove(i)
+    return targets
+
+
+class _Plan:
+    """
+    Successor task instances planned for a set of process instances
+
+    The process instances must already be locked with _load_instances so that
+    the active task instances read here cannot change until commit.
+    """
+
+    def __init__(self, session, process_instance_ids, now):
+        self.session = session
+        self.now = now
+        self.result = AdvanceResult()
+        self.rows = []
+        self.end_reached = set()
+        self.touched = []
+        self.active = defaultdict(set)
+        if process_instance_ids:
+            rows = session.execute(
+                select(TaskInstance.process_instance_id, TaskInstance.task_id).where(
+                    TaskInstance.process_instance_id.in_(process_instance_ids),
+                    TaskInstance.status.in_(ACTIVE_STATUSES),
+                )
+            )
+            for process_instance_id, task_id in rows:
+                self.active[process_instance_id].add(task_id)
+
+    def touch(self, process_instance_id):
+        if process_instance_id not in self.touched:
+            self.touched.append(process_instance_id)
+
+    def follow(self, graph, process_instance_id, targets):
+        """Plan the successors of one completed task (or of the start)"""
+        self.touch(process_instance_id)
+        active = self.active[process_instance_id]
+        for target in targets:
+            if target is None:
+                self.end_reached.add(process_instance_id)
+            elif target in active:
+                continue
+            elif graph.is_join(target) and active & graph.ancestors(target):
+                self.result.waiting_joins.append((process_instance_id, target))
+            else:
+                active.add(target)
+                self.rows.append({
+                    'process_instance_id': process_instance_id,
+                    'task_id': target,
+                    'status': NOT_STARTED,
+                })
+                self.result.created.append((process_instance_id, target))
+
+    def apply(self, instances):
+        """Insert the planned rows and complete finished process instances"""
+        if self.rows:
+            self.session.execute(insert(TaskInstance.__table__).values(self.rows))
+            deltas = defaultdict(int)
+            for row in self.rows:
+                deltas[row['process_instance_id']] += 1
+            apply_counter_deltas(
+                self.session, ProcessInstance.__table__, {k: (v, 0) for k, v in deltas.items()}
+            )
+            # ORMに読み込み済みのインスタンスのカウンタと task_instances を再読み込みさせる
+            for process_instance_id in deltas:
+                instance = instances.get(process_instance_id)
+                if instance is not None:
+                    self.session.expire(instance, ['total_tasks', 'completed_tasks', 'task_instances'])
+
+        for process_instance_id in self.touched:
+            if self.active[process_instance_id]:
+                continue
+            if process_instance_id in self.end_reached:
+                instance = instances[process_instance_id]
+                instance.status = COMPLETED
+                instance.completed_at = self.now
+                self.result.completed_instances.append(process_instance_id)
+            else:
+                self.result.stalled_instances.append(process_instance_id)
+        self.session.flush()
+        return self.result
+
+
+def _get_graph(session, process_id, errors):
+    """Compiled graph of a process, or None if it does not exist or contains a cycle"""
+    try:
+        return get_graph(session, process_id)
+    except WorkflowCycleError as e:
+        logger.warning("%s: 自動進行を行いません", e)
+        errors.append(f"{e}: 自動進行を行いません")
+        return None
+
+
+def _load_instances(session, ids):
+    """
+    Lock and (re)load process instances before their active task instances are read
+
+    Completing the branches of a join (or the last tasks) of one instance in
+    concurrent sessions would otherwise let each session see the other's task
+    still active, and the join successor would never be created.
+    """
+    query = (
+        session.query(ProcessInstance)
+        .filter(ProcessInstance.id.in_(ids))
+        .order_by(ProcessInstance.id)
+        .with_for_update()
+        .populate_existing()
+    )
+    return {pi.id: pi for pi in query}
+
+
+def start_process_instance(session, process_instance, now=None):
+    """
+    Create the task instances of the start nodes of a new process instance
+
+    Args:
+        session: Database session (not committed)
+        process_instance: Flushed ProcessInstance
+        now: Completion time if the instance finishes immediately
+
+    Returns:
+        AdvanceResult
+    """
+    session.flush()
+    errors = []
+    graph = _get_graph(session, process_instance.process_id, errors)
+    if graph is None or not graph.edges:
+        return AdvanceResult(errors=errors)
+
+    _load_instances(session, [process_instance.id])
+    plan = _Plan(session, [process_instance.id], now or datetime.now())
+    start_edges = graph.next_edges(None)
+    if start_edges:
+        (targets,) = select_targets(start_edges, [EMPTY_CONTEXT], plan.result.errors)
+    else:
+        targets = list(graph.start_nodes)
+    plan.follow(graph, process_instance.id, targets)
+    return plan.apply({process_instance.id: process_instance})
+
+
+def advance(session, task_instances, now=None):
+    """
+    Advance the process instances of completed task instances
+
+    Task instances that are not 完了, belong to a process instance that is
+    not 実行中, or to a process without workflow edges are ignored.
+    Conditions of the same edge are evaluated for all given task instances
+    in one batch.
+
+    Args:
+        session: Database session (not committed)
+        task_instances: TaskInstance objects whose status was just changed
+        now: Time used for durations and completion timestamps
+
+    Returns:
+        AdvanceResult
+    """
+    now = now or datetime.now()
+    completed = [ti for ti in task_instances if ti.status == COMPLETED]
+    if not completed:
+        return AdvanceResult()
+
+    session.flush()
+    completed.sort(key=lambda ti: ti.id)
+    instances = _load_instances(session, {ti.process_instance_id for ti in completed})
+    graphs = {}
+    errors = []
+    for instance in instances.values():
+        if instance.status == RUNNING and instance.process_id not in graphs:
+            graphs[instance.process_id] = _get_graph(session, instance.process_id, errors)
+
+    runnable = []
+    for ti in completed:
+        instance = instances.get(ti.process_instance_id)
+        graph = graphs.get(instance.process_id) if instance is not None else None
+        if graph is not None and graph.edges:
+            runnable.append((ti, instance, graph))
+    if not runnable:
+        return AdvanceResult(errors=errors)
+
+    plan = _Plan(session, list({instance.id for _, instance, _ in runnable}), now)
+    tasks = {
+        task.id: task
+        for task in session.query(Task).filter(Task.id.in_({ti.task_id for ti, _, _ in runnable}))
+    }
+
+    # 同じタスクの完了はまとめて条件式を評価する
+    groups = defaultdict(list)
+    for item in runnable:
+        groups[(item[2].process_id, item[0].task_id)].append(item)
+
+    decisions = {}
+    for (_, task_id), items in groups.items():
+        graph = items[0][2]
+        edges = graph.next_edges(task_id)
+        if not edges:
+            # 出ていく辺がないタスクは終了ノード
+            for ti, _, _ in items:
+                decisions[ti.id] = [None]
+            continue
+        contexts = [task_instance_context(ti, tasks.get(task_id), now) for ti, _, _ in items]
+        for (ti, _, _), targets in zip(items, select_targets(edges, contexts, plan.result.errors)):
+            decisions[ti.id] = targets
+
+    for ti, instance, graph in runnable:
+        plan.follow(graph, instance.id, decisions[ti.id])
+
+    for error in plan.result.errors:
+        logger.warning(error)
+    # 循環のあるプロセスの警告は _get_graph で記録済み
+    plan.result.errors.extend(errors)
+    return plan.apply(instances)
@@ -0,0 +1,334 @@
+"""
+Condition expressions for 条件付き workflow edges
+
+A condition is a small, side-effect free expression over the context of a
+task instance, written in Python syntax, e.g.
+
+    status == '完了' and '承認' in notes
+    duration is not None and duration > estimated_duration * 1.5
+    priority in ('高', '緊急') or assigned_to == 'manager'
+
+Expressions are parsed once, checked against a whitelist of syntax nodes,
+names and functions, and compiled into a Python function. Compiled
+conditions are kept in an LRU cache keyed by (workflow id, updated_at), so
+editing a workflow naturally invalidates its entry. Each condition also has
+a batch evaluator that runs one compiled loop over many contexts.
+"""
+import ast
+import threading
+from collections import OrderedDict
+
+# 条件式で参照できる変数（タスクインスタンスのコンテキスト）
+CONTEXT_FIELDS = (
+    'status',               # タスクインスタンスのステータス
+    'notes',                # メモ（未設定は空文字）
+    'assigned_to',          # 担当者（未設定は空文字）
+    'task_name',            # タスク名
+    'priority',             # タスクの優先度
+    'estimated_duration',   # タスクの予想所要時間（分）
+    'duration',             # 実際の所要時間（分、開始・完了日時から算出）
+)
+
+# 条件式で呼び出せる関数
+FUNCTIONS = {
+    'len': len,
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'round': round,
+}
+
+_COMPARE_OPS = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot)
+_BIN_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod)
+_UNARY_OPS = (ast.Not, ast.USub, ast.UAdd)
+
+# コンパイル済み条件式のキャッシュの最大件数
+CACHE_SIZE = 1024
+
+_CONTEXT = '__ctx'
+_ROWS = '__rows'
+_MUL = '__mul'
+_MOD = '__mod'
+
+
+class ConditionSyntaxError(ValueError):
+    """Raised when a condition expression is invalid"""
+
+
+class ConditionEvaluationError(RuntimeError):
+    """Raised when a condition cannot be evaluated against a context"""
+
+
+def _check_numbers(left, right):
+    # 文字列の繰り返しや書式指定（'%999999999d' % 1 など）による
+    # 巨大なオブジェクトの生成を防ぐ
+    if not all(isinstance(v, (int, float)) for v in (left, right)):
+        raise TypeError("* と % は数値にのみ使用できます")
+
+
+def _safe_mul(left, right):
+    _check_numbers(left, right)
+    return left * right
+
+
+def _safe_mod(left, right):
+    _check_numbers(left, right)
+    return left % right
+
+
+class _Validator(ast.NodeVisitor):
+    """Reject every syntax node that is not explicitly allowed"""
+
+    def generic_visit(self, node):
+        raise ConditionSyntaxError(f"条件式で使用できない構文です: {type(node).__name__}")
+
+    def visit_Expression(self, node):
+        self.visit(node.body)
+
+    def visit_BoolOp(self, node):
+        for value in node.values:
+            self.visit(value)
+
+    def visit_UnaryOp(self, node):
+        if not isinstance(node.op, _UNARY_OPS):
+            raise ConditionSyntaxError("条件式で使用できない演算子です")
+        self.visit(node.operand)
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, _BIN_OPS):
+            raise ConditionSyntaxError("条件式で使用できない演算子です")
+        self.visit(node.left)
+        self.visit(node.right)
+
+    def visit_Compare(self, node):
+        if not all(isinstance(op, _COMPARE_OPS) for op in node.ops):
+            raise ConditionSyntaxError("条件式で使用できない比較演算子です")
+        self.visit(node.left)
+        for comparator in node.comparators:
+            self.visit(comparator)
+
+    def visit_IfExp(self, node):
+        self.visit(node.test)
+        self.visit(node.body)
+        self.visit(node.orelse)
+
+    def visit_Constant(self, node):
+        if not isinstance(node.value, (str, int, float, bool, type(None))):
+            raise ConditionSyntaxError(f"条件式で使用できない値です: {node.value!r}")
+
+    def visit_Tuple(self, node):
+        for element in node.elts:
+            self.visit(element)
+
+    visit_List = visit_Tuple
+
+    def visit_Name(self, node):
+        if node.id not in CONTEXT_FIELDS:
+            raise ConditionSyntaxError(
+                f"不明な変数です: {node.id}（使用できる変数: {', '.join(CONTEXT_FIELDS)}）"
+            )
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise ConditionSyntaxError(f"使用できる関数は {', '.join(FUNCTIONS)} のみです")
+        if node.keywords:
+            raise ConditionSyntaxError("関数にキーワード引数は指定できません")
+        for arg in node.args:
+            self.visit(arg)
+
+
+class _Rewriter(ast.NodeTransformer):
+    """Turn context names into __ctx['name'] lookups and guard * and %"""
+
+    def visit_Name(self, node):
+        return ast.copy_location(
+            ast.Subscript(
+                value=ast.Name(id=_CONTEXT, ctx=ast.Load()),
+                slice=ast.Constant(node.id),
+                ctx=ast.Load(),
+            ),
+            node,
+        )
+
+    def visit_Call(self, node):
+        # 関数名はそのまま残し、引数だけを変換する
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        guard = {ast.Mult: _MUL, ast.Mod: _MOD}.get(type(node.op))
+        if guard is None:
+            return node
+        return ast.copy_location(
+            ast.Call(func=ast.Name(id=guard, ctx=ast.Load()), args=[node.left, node.right], keywords=[]),
+            node,
+        )
+
+
+def _lambda(args, body):
+    return ast.Lambda(
+        args=ast.arguments(
+            posonlyargs=[], args=[ast.arg(arg=a) for a in args], vararg=None,
+            kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[],
+        ),
+        body=body,
+    )
+
+
+class Condition:
+    """
+    A compiled condition expression
+
+    evaluate(context) returns the truth value of the expression for one
+    context dict; evaluate_batch(contexts) returns a list of truth values.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ConditionSyntaxError(f"条件式を解析できません: {e.msg}") from None
+        _Validator().visit(tree)
+
+        body = _Rewriter().visit(tree).body
+        # 1件用: lambda __ctx: <式>
+        single = ast.Expression(_lambda([_CONTEXT], body))
+        # 一括用: lambda __rows: [bool(<式>) for __ctx in __rows]
+        batch = ast.Expression(_lambda([_ROWS], ast.ListComp(
+            elt=ast.Call(func=ast.Name(id='bool', ctx=ast.Load()), args=[body], keywords=[]),
+            generators=[ast.comprehension(
+                target=ast.Name(id=_CONTEXT, ctx=ast.Store()),
+                iter=ast.Name(id=_ROWS, ctx=ast.Load()),
+                ifs=[], is_async=0,
+            )],
+        )))
+        namespace = {'__builtins__': {}, 'bool': bool, _MUL: _safe_mul, _MOD: _safe_mod, **FUNCTIONS}
+        self._single = eval(compile(ast.fix_missing_locations(single), '<condition>', 'eval'), namespace)
+        self._batch = eval(compile(ast.fix_missing_locations(batch), '<condition>', 'eval'), namespace)
+
+    def evaluate(self, context):
+        """Evaluate the condition for one context"""
+        try:
+            return bool(self._single(context))
+        except Exception as e:
+            raise ConditionEvaluationError(f"条件式 '{self.expression}' を評価できません: {e}") from e
+
+    def evaluate_batch(self, contexts):
+        """
+        Evaluate the condition for many contexts in one compiled loop
+
+        If any context fails, the batch is re-evaluated one by one so the
+        error names the failing expression.
+        """
+        contexts = list(contexts)
+        try:
+            return self._batch(contexts)
+        except Exception:
+            return [self.evaluate(context) for context in contexts]
+
+    def __repr__(self):
+        return f"Condition({self.expression!r})"
+
+
+def compile_condition(expression):
+    """
+    Parse and compile a condition expression
+
+    Raises:
+        ConditionSyntaxError: If the expression is empty, cannot be parsed or
+            uses syntax, names or functions that are not allowed
+    """
+    if expression is None or not expression.strip():
+        raise ConditionSyntaxError("条件式が空です")
+    return Condition(expression)
+
+
+def validate_condition(expression):
+    """Return None if the expression is valid, otherwise the error message"""
+    try:
+        compile_condition(expression)
+    except ConditionSyntaxError as e:
+        return str(e)
+    return None
+
+
+# --- キャッシュ ---
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_condition(workflow_id, updated_at, expression):
+    """
+    Return the compiled condition of a workflow edge from the LRU cache
+
+    Args:
+        workflow_id: Workflow ID
+        updated_at: Workflow.updated_at (a new value means a new cache entry)
+        expression: Workflow.condition_expression
+    """
+    key = (workflow_id, updated_at)
+    with _cache_lock:
+        condition = _cache.get(key)
+        if condition is not None and condition.expression == expression:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+            return condition
+        _stats['misses'] += 1
+
+    condition = compile_condition(expression)
+    with _cache_lock:
+        _cache[key] = condition
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return condition
+
+
+def condition_for_edge(edge):
+    """Return the compiled condition of a workflow edge (Workflow or graph Edge)"""
+    return get_condition(edge.id, edge.updated_at, edge.condition_expression)
+
+
+def cache_info():
+    """Return (hits, misses, current size) of the condition cache"""
+    with _cache_lock:
+        return _stats['hits'], _stats['misses'], len(_cache)
+
+
+def clear_cache():
+    """Drop every compiled condition and reset the statistics"""
+    with _cache_lock:
+        _cache.clear()
+        _stats['hits'] = _stats['misses'] = 0
+
+
+def _minutes_between(start, end):
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds() / 60
+
+
+def task_instance_context(task_instance, task=None, now=None):
+    """
+    Build the evaluation context of a task instance
+
+    Args:
+        task_instance: TaskInstance (or any object with the same attributes)
+        task: Task of the instance (defaults to task_instance.task)
+        now: Time used for the duration of an instance that is not completed
+    """
+    task = task if task is not None else getattr(task_instance, 'task', None)
+    end = task_instance.completed_at or (now if task_instance.started_at else None)
+    return {
+        'status': task_instance.status,
+        'notes': task_instance.notes or '',
+        'assigned_to': task_instance.assigned_to or '',
+        'task_name': task.name if task is not None else '',
+        'priority': task.priority if task is not None else None,
+        'estimated_duration': task.estimated_duration if task is not None else None,
+        'duration': _minutes_between(task_instance.started_at, end),
+    }
@@ -0,0 +1,304 @@
+"""
+Compiled workflow graphs
+
+The Workflow rows of a process are loaded once and compiled into adjacency
+lists with a topological order, start/end nodes, fan-in (join) nodes and
+parallel fan-out groups. Compiled graphs are cached per (process id,
+version, workflow stamp), so resolving the next tasks of a node is a
+dictionary lookup. The stamp (row count, max id and max updated_at of the
+workflow and task rows of the process) is read together with the version,
+so edits made by another process (GUI and CLI) are picked up as well.
+
+Edge conventions: from_task_id NULL means "from the process start" and
+to_task_id NULL means "to the process end". Tasks without any edges are
+both start and end nodes.
+"""
+import threading
+from datetime import datetime
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, select
+
+from taskman.models.process import Process
+from taskman.models.task import Task
+from taskman.models.workflow import Workflow
+
+ALWAYS = '常時'
+CONDITIONAL = '条件付き'
+PARALLEL = '並列'
+
+
+class WorkflowCycleError(ValueError):
+    """Raised when the workflow edges of a process contain a cycle"""
+
+    def __init__(self, process_id, task_ids):
+        self.process_id = process_id
+        self.task_ids = tuple(sorted(task_ids))
+        super().__init__(
+            f"プロセス（ID: {process_id}）のワークフローに循環があります"
+            f"（タスクID: {', '.join(map(str, self.task_ids))}）"
+        )
+
+
+@dataclass(frozen=True)
+class Edge:
+    """One workflow edge (None stands for the process start/end)"""
+    id: int
+    from_task_id: Optional[int]
+    to_task_id: Optional[int]
+    condition_type: str
+    condition_expression: Optional[str]
+    sequence_number: Optional[int]
+    updated_at: Optional[datetime] = None
+
+    @property
+    def sort_key(self):
+        return (self.sequence_number is None, self.sequence_number or 0, self.id)
+
+
+@dataclass(frozen=True)
+class ParallelGroup:
+    """A 並列 fan-out: branch heads that start together and the node where they join"""
+    fork: Optional[int]
+    branches: Tuple[int, ...]
+    join: Optional[int]
+
+
+@dataclass
+class WorkflowGraph:
+    """Compiled workflow of one process version"""
+    process_id: int
+    version: Optional[int]
+    nodes: Tuple[int, ...]
+    edges: Tuple[Edge, ...]
+    successors: Dict[Optional[int], Tuple[Edge, ...]]
+    predecessors: Dict[Optional[int], Tuple[Edge, ...]]
+    order: Tuple[int, ...]
+    depth: Dict[int, int]
+    start_nodes: Tuple[int, ...]
+    end_nodes: Tuple[int, ...]
+    parallel_groups: Tuple[ParallelGroup, ...] = field(default=())
+    _ancestors: Dict[int, frozenset] = field(default_factory=dict, repr=False)
+
+    def next_edges(self, task_id):
+        """Outgoing edges of a task (or of the start for None), in sequence order"""
+        return self.successors.get(task_id, ())
+
+    def incoming_edges(self, task_id):
+        """Incoming edges of a task (or of the end for None)"""
+        return self.predecessors.get(task_id, ())
+
+    def is_join(self, task_id):
+        """True if the task has more than one incoming task edge (fan-in)"""
+        return sum(1 for e in self.incoming_edges(task_id) if e.from_task_id is not None) > 1
+
+    def ancestors(self, task_id):
+        """All task nodes from which task_id can be reached (excluding itself)"""
+        result = self._ancestors.get(task_id)
+        if result is None:
+            seen = set()
+            stack = [task_id]
+            while stack:
+                for edge in self.incoming_edges(stack.pop()):
+                    if edge.from_task_id is not None and edge.from_task_id not in seen:
+                        seen.add(edge.from_task_id)
+                        stack.append(edge.from_task_id)
+            result = self._ancestors[task_id] = frozenset(seen)
+        return result
+
+    @property
+    def joins(self):
+        return tuple(task_id for task_id in self.order if self.is_join(task_id))
+
+
+def compile_graph(process_id, version, task_ids, edges):
+    """
+    Compile workflow edges into a WorkflowGraph
+
+    Args:
+        process_id: Process ID
+        version: Process version (part of the cache key)
+        task_ids: IDs of all tasks of the process
+        edges: Iterable of Edge
+
+    Returns:
+        WorkflowGraph
+
+    Raises:
+        WorkflowCycleError: If the task edges contain a cycle
+    """
+    nodes = tuple(sorted(task_ids))
+    edges = tuple(sorted(edges, key=lambda e: e.sort_key))
+
+    successors = defaultdict(list)
+    predecessors = defaultdict(list)
+    for edge in edges:
+        successors[edge.from_task_id].append(edge)
+        predecessors[edge.to_task_id].append(edge)
+
+    # 入次数はタスク間の辺のみで数える（開始点からの辺は順序に影響しない）
+    indegree = {node: 0 for node in nodes}
+    for edge in edges:
+        if edge.from_task_id is not None and edge.to_task_id is not None:
+            indegree[edge.to_task_id] = indegree.get(edge.to_task_id, 0) + 1
+
+    # Kahn法によるトポロジカルソート（同順位はIDの昇順）
+    ready = deque(sorted(node for node, degree in indegree.items() if degree == 0))
+    order = []
+    depth = {node: 0 for node in ready}
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for edge in successors.get(node, ()):
+            target = edge.to_task_id
+            if target is None:
+                continue
+            depth[target] = max(depth.get(target, 0), depth[node] + 1)
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                ready.append(target)
+
+    if len(order) < len(indegree):
+        raise WorkflowCycleError(process_id, (node for node, degree in indegree.items() if degree > 0))
+
+    has_task_in = {e.to_task_id for e in edges if e.from_task_id is not None}
+    has_task_out = {e.from_task_id for e in edges if e.to_task_id is not None}
+    explicit_start = [e.to_task_id for e in successors.get(None, ()) if e.to_task_id is not None]
+    explicit_end = {e.from_task_id for e in predecessors.get(None, ()) if e.from_task_id is not None}
+
+    # 開始点からの辺があればそれを優先し、なければ入ってくる辺のないタスクを開始ノードとする
+    start_nodes = tuple(dict.fromkeys(explicit_start)) or tuple(n for n in order if n not in has_task_in)
+    end_nodes = tuple(n for n in order if n in explicit_end or n not in has_task_out)
+
+    graph = WorkflowGraph(
+        process_id=process_id,
+        version=version,
+        nodes=tuple(order),
+        edges=edges,
+        successors={k: tuple(v) for k, v in successors.items()},
+        predecessors={k: tuple(v) for k, v in predecessors.items()},
+        order=tuple(order),
+        depth=depth,
+        start_nodes=start_nodes,
+        end_nodes=end_nodes,
+    )
+    graph.parallel_groups = _parallel_groups(graph)
+    return graph
+
+
+def _descendants(graph, node):
+    """All task nodes reachable from node (including itself)"""
+    seen = {node}
+    stack = [node]
+    while stack:
+        for edge in graph.next_edges(stack.pop()):
+            if edge.to_task_id is not None and edge.to_task_id not in seen:
+                seen.add(edge.to_task_id)
+                stack.append(edge.to_task_id)
+    return seen
+
+
+def _parallel_groups(graph):
+    """
+    Find 並列 fan-outs and their join nodes
+
+    The join of a fan-out is the first node in topological order reachable
+    from every branch head; None means the branches only meet at the end.
+    """
+    position = {node: i for i, node in enumerate(graph.order)}
+    groups = []
+    for source, edges in graph.successors.items():
+        branches = tuple(e.to_task_id for e in edges if e.condition_type == PARALLEL and e.to_task_id is not None)
+        if not branches:
+            continue
+        common = set.intersection(*(_descendants(graph, b) for b in branches)) if len(branches) > 1 else set()
+        join = min(common, key=position.get) if common else None
+        groups.append(ParallelGroup(fork=source, branches=branches, join=join))
+    groups.sort(key=lambda g: -1 if g.fork is None else position[g.fork])
+    return tuple(groups)
+
+
+# --- キャッシュ ---
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_graph(session, process_id, version=None):
+    """Load the tasks and edges of a process and compile them (no caching)"""
+    task_ids = session.execute(select(Task.id).where(Task.process_id == process_id)).scalars().all()
+    rows = session.execute(
+        select(
+            Workflow.id, Workflow.from_task_id, Workflow.to_task_id, Workflow.condition_type,
+            Workflow.condition_expression, Workflow.sequence_number, Workflow.updated_at,
+        ).where(Workflow.process_id == process_id)
+    )
+    edges = [Edge(*row) for row in rows]
+    return compile_graph(process_id, version, task_ids, edges)
+
+
+def _stamp_columns(model, process_id):
+    """Scalar subqueries that change whenever rows of model are added, removed or updated"""
+    where = model.process_id == process_id
+    return [
+        select(aggregate).where(where).scalar_subquery()
+        for aggregate in (func.count(model.id), func.max(model.id), func.max(model.updated_at))
+    ]
+
+
+def get_graph(session, process_id):
+    """
+    Return the compiled graph of a process, compiling it on first use
+
+    Args:
+        session: Database session
+        process_id: Process ID
+
+    Returns:
+        WorkflowGraph, or None if the process does not exist
+
+    Raises:
+        WorkflowCycleError: If the workflow contains a cycle
+    """
+    row = session.execute(
+        select(Process.version, *_stamp_columns(Workflow, process_id), *_stamp_columns(Task, process_id))
+        .where(Process.id == process_id)
+    ).first()
+    if row is None:
+        return None
+    version = row[0]
+    key = (process_id, version, tuple(row[1:]))
+
+    with _cache_lock:
+        graph = _cache.get(key)
+    if graph is None:
+        graph = load_graph(session, process_id, version)
+        with _cache_lock:
+            # 古いスタンプのグラフは二度と使われないので捨てる
+            for old in [k for k in _cache if k[0] == process_id]:
+                del _cache[old]
+            _cache[key] = graph
+    return graph
+
+
+def invalidate_graph(process_id=None):
+    """Drop the cached graphs of a process (or of all processes for None)"""
+    with _cache_lock:
+        if process_id is None:
+            _cache.clear()
+            return
+        for key in [k for k in _cache if k[0] == process_id]:
+            del _cache[key]
+
+
+def _invalidate_target(mapper, connection, target):
+    invalidate_graph(target.process_id)
+
+
+# タスクやワークフローの変更時にキャッシュを破棄する
+# （ORMを経由しない変更や別プロセスでの変更はスタンプの比較で検出する）
+for _model in (Workflow, Task):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _invalidate_target)
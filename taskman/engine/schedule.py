@@ -0,0 +1,434 @@
+"""
+Critical-path scheduling and completion forecasts
+
+The planned duration of a task is Task.estimated_duration, or the sum of
+the expected durations of its steps when no estimate is set (minutes).
+A forward and a backward pass over the topological order of the workflow
+graph give the earliest/latest start and finish of every task, its slack
+and the critical path. Both passes visit every edge once, and the result
+is cached with the compiled graph it was computed from, together with a
+stamp of the task steps of the process (row count, max id, max
+updated_at), so edits made by another process are picked up. The
+backward pass also records, for every task, the longest planned time from
+its start to the process end.
+
+Conditional alternatives are scheduled like any other edge, so the plan
+is the longest way through the process.
+
+For running process instances only the tasks the instance already has are
+looked at: completed tasks finish at completed_at, started tasks are
+expected to take their historical average duration (the planned one if
+there is no history) from started_at, and created tasks that have not
+started yet take it from the current time. The averages are cached per
+task until the task_instance table changes (row count, max id, max
+updated_at). The ETA is the latest of these
+finishes plus the planned time remaining after each open task, so no
+instance walks the graph. Branches the engine did not take have no task
+instances and are left out. Processes whose workflow contains a cycle
+cannot be forecast; their instances get no ETA.
+"""
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, literal_column, select
+
+from taskman.engine.graph import WorkflowCycleError, get_graph
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+from taskman.models.task_step import TaskStep
+from taskman.models.workflow import Workflow
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = '完了'
+
+# IN (...) に渡すIDの上限（SQLiteのバインド変数の上限を超えないように分割する）
+IN_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class TaskSchedule:
+    """Planned timing of one task, in minutes from the process start"""
+    task_id: int
+    duration: int
+    earliest_start: int
+    earliest_finish: int
+    latest_start: int
+    latest_finish: int
+    remaining: int      # 開始からプロセス終了までの最長の所要時間
+
+    @property
+    def remaining_after(self):
+        """Longest planned time from the finish of the task to the process end"""
+        return self.remaining - self.duration
+
+    @property
+    def slack(self):
+        return self.latest_start - self.earliest_start
+
+    @property
+    def critical(self):
+        return self.slack == 0
+
+
+@dataclass
+class Schedule:
+    """Critical-path analysis of one process version"""
+    process_id: int
+    version: Optional[int]
+    tasks: Dict[int, TaskSchedule]
+    duration: int
+    critical_path: Tuple[int, ...]
+    graph: object = field(default=None, repr=False)
+
+
+@dataclass
+class Forecast:
+    """Expected completion of one process instance"""
+    process_instance_id: int
+    eta: Optional[datetime]
+    finishes: Dict[int, datetime] = field(default_factory=dict)   # タスクID → 完了（予定）日時（作成済みのタスクのみ）
+
+
+def _task_predecessors(graph, task_id):
+    return [e.from_task_id for e in graph.incoming_edges(task_id) if e.from_task_id is not None]
+
+
+def _task_successors(graph, task_id):
+    return [e.to_task_id for e in graph.next_edges(task_id) if e.to_task_id is not None]
+
+
+def compute_schedule(graph, durations):
+    """
+    Run the forward and backward pass over a compiled graph
+
+    Args:
+        graph: WorkflowGraph
+        durations: Dict of task id → planned duration in minutes (missing is 0)
+
+    Returns:
+        Schedule
+    """
+    earliest_finish = {}
+    earliest_start = {}
+    for task_id in graph.order:
+        start = max((earliest_finish[p] for p in _task_predecessors(graph, task_id)), default=0)
+        earliest_start[task_id] = start
+        earliest_finish[task_id] = start + (durations.get(task_id) or 0)
+
+    end_nodes = set(graph.end_nodes)
+    makespan = max(earliest_finish.values(), default=0)
+
+    latest_start = {}
+    latest_finish = {}
+    remaining = {}
+    for task_id in reversed(graph.order):
+        successors = _task_successors(graph, task_id)
+        finish = min((latest_start[s] for s in successors), default=makespan)
+        if task_id in end_nodes:
+            finish = min(finish, makespan)
+        latest_finish[task_id] = finish
+        latest_start[task_id] = finish - (durations.get(task_id) or 0)
+        remaining[task_id] = (durations.get(task_id) or 0) + max((remaining[s] for s in successors), default=0)
+
+    tasks = {
+        task_id: TaskSchedule(
+            task_id=task_id,
+            duration=durations.get(task_id) or 0,
+            earliest_start=earliest_start[task_id],
+            earliest_finish=earliest_finish[task_id],
+            latest_start=latest_start[task_id],
+            latest_finish=latest_finish[task_id],
+            remaining=remaining[task_id],
+        )
+        for task_id in graph.order
+    }
+
+    # 余裕0のタスクを、前のタスクの最早終了と次の最早開始が一致する辺でたどる
+    path = []
+    current = next((t for t in graph.order if tasks[t].critical and tasks[t].earliest_start == 0), None)
+    while current is not None:
+        path.append(current)
+        finish = tasks[current].earliest_finish
+        current = next(
+            (s for s in _task_successors(graph, current)
+             if tasks[s].critical and tasks[s].earliest_start == finish),
+            None,
+        )
+
+    return Schedule(
+        process_id=graph.process_id,
+        version=graph.version,
+        tasks=tasks,
+        duration=makespan,
+        critical_path=tuple(path),
+        graph=graph,
+    )
+
+
+def load_durations(session, process_id):
+    """Planned duration of every task of a process (estimate, else sum of step durations)"""
+    rows = session.execute(
+        select(Task.id, Task.estimated_duration, func.sum(TaskStep.expected_duration))
+        .outerjoin(TaskStep, TaskStep.task_id == Task.id)
+        .where(Task.process_id == process_id)
+        .group_by(Task.id, Task.estimated_duration)
+    )
+    return {
+        task_id: estimated if estimated is not None else int(step_total or 0)
+        for task_id, estimated, step_total in rows
+    }
+
+
+# --- キャッシュ ---
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+# タスクID → 実績の平均所要時間（実績がなければ None）と、それを読んだときの task_instance の状態
+_history = {}
+_history_mark = None
+
+
+def get_schedule(session, process_id):
+    """
+    Return the critical-path schedule of a process, computing it on first use
+
+    Returns:
+        Schedule, or None if the process does not exist
+
+    Raises:
+        WorkflowCycleError: If the workflow contains a cycle
+    """
+    graph = get_graph(session, process_id)
+    if graph is None:
+        return None
+    stamp = tuple(session.execute(
+        select(func.count(TaskStep.id), func.max(TaskStep.id), func.max(TaskStep.updated_at))
+        .join(Task, Task.id == TaskStep.task_id)
+        .where(Task.process_id == process_id)
+    ).one())
+    key = (process_id, graph.version, stamp)
+    with _cache_lock:
+        schedule = _cache.get(key)
+    # グラフが再コンパイルされていれば計画も作り直す
+    if schedule is None or schedule.graph is not graph:
+        schedule = compute_schedule(graph, load_durations(session, process_id))
+        with _cache_lock:
+            for old in [k for k in _cache if k[0] == process_id]:
+                del _cache[old]
+            _cache[key] = schedule
+    return schedule
+
+
+def invalidate_schedule(process_id=None):
+    """Drop the cached schedules of a process (or of all processes for None)"""
+    global _history_mark
+    with _cache_lock:
+        if process_id is None:
+            _cache.clear()
+            _history.clear()
+            _history_mark = None
+            return
+        for key in [k for k in _cache if k[0] == process_id]:
+            del _cache[key]
+
+
+def _invalidate_process(mapper, connection, target):
+    invalidate_schedule(target.process_id)
+
+
+def _invalidate_all(mapper, connection, target):
+    # ステップはタスク経由でしかプロセスがわからないため、すべて破棄する
+    invalidate_schedule()
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    for _model in (Workflow, Task):
+        event.listen(_model, _event, _invalidate_process)
+    event.listen(TaskStep, _event, _invalidate_all)
+
+
+# --- 完了予測 ---
+
+def _duration_minutes(dialect_name, started, completed):
+    """SQL expression for the minutes between two timestamp columns"""
+    if dialect_name == 'sqlite':
+        return (func.julianday(completed) - func.julianday(started)) * 1440
+    if dialect_name in ('mysql', 'mariadb'):
+        return func.timestampdiff(literal_column('SECOND'), started, completed) / 60.0
+    return func.extract('epoch', completed - started) / 60.0
+
+
+def _batches(ids):
+    """Split ids into lists of at most IN_BATCH_SIZE"""
+    ids = list(ids)
+    for start in range(0, len(ids), IN_BATCH_SIZE):
+        yield ids[start:start + IN_BATCH_SIZE]
+
+
+def historical_durations(session, task_ids):
+    """
+    Average actual duration in minutes of completed task instances per task
+
+    Averages are cached until the row count, max id or max updated_at of
+    task_instance changes; only the tasks not cached yet are aggregated,
+    with one query per IN_BATCH_SIZE tasks.
+    """
+    global _history_mark
+    mark = tuple(session.execute(
+        select(func.count(TaskInstance.id), func.max(TaskInstance.id), func.max(TaskInstance.updated_at))
+    ).one())
+    with _cache_lock:
+        if mark != _history_mark:
+            _history.clear()
+            _history_mark = mark
+        cached = {task_id: _history[task_id] for task_id in task_ids if task_id in _history}
+    missing = [task_id for task_id in task_ids if task_id not in cached]
+
+    minutes = _duration_minutes(
+        session.get_bind().dialect.name, TaskInstance.started_at, TaskInstance.completed_at
+    )
+    loaded = dict.fromkeys(missing)
+    for batch in _batches(missing):
+        rows = session.execute(
+            select(TaskInstance.task_id, func.avg(minutes))
+            .where(
+                TaskInstance.task_id.in_(batch),
+                TaskInstance.status == COMPLETED,
+                TaskInstance.started_at.isnot(None),
+                TaskInstance.completed_at.isnot(None),
+            )
+            .group_by(TaskInstance.task_id)
+        )
+        loaded.update(
+            (task_id, max(0.0, float(average))) for task_id, average in rows if average is not None
+        )
+    with _cache_lock:
+        # 集計中に別のスレッドが新しい状態で読み直していれば保存しない
+        if mark == _history_mark:
+            _history.update(loaded)
+    cached.update(loaded)
+    return {task_id: average for task_id, average in cached.items() if average is not None}
+
+
+def forecast_instance(schedule, started_at, task_instances, history, now):
+    """
+    Forecast the finish of the tasks of one running process instance
+
+    Only the task instances of the process instance are visited; the time
+    left after each open task comes from TaskSchedule.remaining_after.
+
+    Args:
+        schedule: Schedule of the process
+        started_at: Start of the process instance
+        task_instances: TaskInstance rows (or tuples with the same attributes)
+        history: Dict of task id → average actual duration in minutes
+        now: Current time
+
+    Returns:
+        (ETA, dict of task id → finish time of the tasks the instance has)
+    """
+    tasks = schedule.tasks
+    latest = {}
+    for ti in sorted(task_instances, key=lambda ti: ti.id):
+        if ti.task_id in tasks:
+            latest[ti.task_id] = ti   # やり直しがあれば最後のタスクインスタンスを使う
+
+    def expected(task_id):
+        minutes = history.get(task_id)
+        if minutes is None:
+            minutes = tasks[task_id].duration
+        return timedelta(minutes=minutes)
+
+    if not latest:
+        # まだタスクがない: 計画全体が現在から始まる
+        return now + timedelta(minutes=schedule.duration), {}
+
+    finishes = {}
+    ends = []
+    for task_id, ti in latest.items():
+        if ti.status == COMPLETED and ti.completed_at is not None:
+            finishes[task_id] = ti.completed_at
+            ends.append(ti.completed_at)
+            continue
+        if ti.started_at is not None:
+            finish = max(now, ti.started_at + expected(task_id))
+        else:
+            finish = now + expected(task_id)
+        finishes[task_id] = finish
+        ends.append(finish + timedelta(minutes=tasks[task_id].remaining_after))
+
+    if not schedule.graph.edges:
+        # ワークフローのないプロセスでは、まだ作成されていないタスクも現在から実行される
+        ends.extend(now + expected(task_id) for task_id in tasks if task_id not in latest)
+
+    eta = max(ends, default=started_at)
+    return eta, finishes
+
+
+def forecast_instances(session, instance_ids, now=None):
+    """
+    Forecast the completion of many process instances
+
+    Uses one query for the instances and one for their task instances per
+    IN_BATCH_SIZE instances, and one for the duration history per
+    IN_BATCH_SIZE uncached tasks; schedules come from the cache.
+    Instances of a process whose workflow contains a cycle get no ETA.
+
+    Args:
+        session: Database session
+        instance_ids: Process instance IDs
+        now: Current time
+
+    Returns:
+        Dict of process instance id → Forecast
+    """
+    now = now or datetime.now()
+    instances = []
+    task_instances = defaultdict(list)
+    for batch in _batches(instance_ids):
+        instances.extend(session.execute(
+            select(ProcessInstance.id, ProcessInstance.process_id, ProcessInstance.started_at,
+                   ProcessInstance.completed_at)
+            .where(ProcessInstance.id.in_(batch))
+        ))
+        rows = session.execute(
+            select(TaskInstance.id, TaskInstance.process_instance_id, TaskInstance.task_id, TaskInstance.status,
+                   TaskInstance.started_at, TaskInstance.completed_at)
+            .where(TaskInstance.process_instance_id.in_(batch))
+        )
+        for row in rows:
+            task_instances[row.process_instance_id].append(row)
+
+    schedules = {}
+    for instance in instances:
+        if instance.process_id not in schedules:
+            try:
+                schedules[instance.process_id] = get_schedule(session, instance.process_id)
+            except WorkflowCycleError as e:
+                # 循環のあるプロセスのインスタンスだけ予測しない
+                logger.warning("%s: 完了予定を計算できません", e)
+                schedules[instance.process_id] = None
+    history = historical_durations(
+        session, sorted({t for s in schedules.values() if s is not None for t in s.tasks})
+    )
+
+    forecasts = {}
+    for instance in instances:
+        schedule = schedules.get(instance.process_id)
+        if instance.completed_at is not None:
+            forecasts[instance.id] = Forecast(instance.id, instance.completed_at)
+        elif schedule is None:
+            forecasts[instance.id] = Forecast(instance.id, None)
+        else:
+            eta, finishes = forecast_instance(
+                schedule, instance.started_at, task_instances[instance.id], history, now
+            )
+            forecasts[instance.id] = Forecast(instance.id, eta, finishes)
+    return forecasts
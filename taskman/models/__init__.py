@@ -9,6 +9,12 @@ from taskman.models.workflow import Workflow
 from taskman.models.process_instance import ProcessInstance
 from taskman.models.task_instance import TaskInstance
 from taskman.models.task_step import TaskStep
+from taskman.models.archive import ArchivedProcessInstance, ArchivedTaskInstance
+
+# 進捗カウンタのイベントフックを登録
+from taskman.models import progress
+# 目標の進捗のイベントフックを登録（カウンタの更新後に実行されるよう progress の後に読み込む）
+from taskman.models import objective_progress
 
 __all__ = [
     'BaseModel',
@@ -19,4 +25,6 @@ __all__ = [
     'ProcessInstance',
     'TaskInstance',
     'TaskStep',
+    'ArchivedProcessInstance',
+    'ArchivedTaskInstance',
 ] 
\ No newline at end of file
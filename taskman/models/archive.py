@@ -0,0 +1,71 @@
+"""
+Archive models for completed process instances
+
+Rows are moved here from process_instance and task_instance by
+taskman.database.archive and keep their original ids. There are no
+foreign keys, so archived rows do not block changes to the hot tables;
+the relationships are read-only joins with the same attribute names as
+ProcessInstance/TaskInstance, so list and show commands can render both.
+"""
+from sqlalchemy import Column, String, Integer, DateTime, Text, Index
+from sqlalchemy.orm import relationship
+
+from taskman.models.base import BaseModel
+
+
+class ArchivedProcessInstance(BaseModel):
+    """
+    Completed process instance moved out of process_instance
+    """
+    __tablename__ = 'process_instance_archive'
+    __table_args__ = (
+        Index('ix_process_instance_archive_process_id', 'process_id'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    process_id = Column(Integer, nullable=False)
+    status = Column(String(20))
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    created_by = Column(String(100))
+    total_tasks = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_tasks = Column(Integer, nullable=False, default=0, server_default='0')
+    archived_at = Column(DateTime, nullable=False)
+
+    # Relationships
+    process = relationship(
+        'Process', primaryjoin='foreign(ArchivedProcessInstance.process_id) == Process.id', viewonly=True
+    )
+    task_instances = relationship(
+        'ArchivedTaskInstance',
+        primaryjoin='ArchivedProcessInstance.id == foreign(ArchivedTaskInstance.process_instance_id)',
+        viewonly=True,
+    )
+
+
+class ArchivedTaskInstance(BaseModel):
+    """
+    Task instance of an archived process instance
+    """
+    __tablename__ = 'task_instance_archive'
+    __table_args__ = (
+        Index('ix_task_instance_archive_process_instance_id', 'process_instance_id'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    process_instance_id = Column(Integer, nullable=False)
+    task_id = Column(Integer, nullable=False)
+    status = Column(String(20))
+    assigned_to = Column(String(100))
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    notes = Column(Text)
+    archived_at = Column(DateTime, nullable=False)
+
+    # Relationships
+    process_instance = relationship(
+        'ArchivedProcessInstance',
+        primaryjoin='foreign(ArchivedTaskInstance.process_instance_id) == ArchivedProcessInstance.id',
+        viewonly=True,
+    )
+    task = relationship('Task', primaryjoin='foreign(ArchivedTaskInstance.task_id) == Task.id', viewonly=True)
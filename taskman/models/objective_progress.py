@@ -0,0 +1,87 @@
+"""
+Objective progress derived from process-instance completion
+
+An objective linked to processes through objective_process_mapping gets its
+current_value from the completion rate of their instances:
+
+    current_value = target_value × Σ w · (completed_instances / total_instances) / Σ w
+
+where w is the contribution_weight of the mapping (1 when NULL) and a process
+without instances counts as 0. Without a target_value the result is a
+percentage (0-100). Objectives without linked processes keep their manually
+entered current_value; subtree totals are aggregated on read
+(see taskman.database.objective_tree).
+
+The completion rates come from the instance counters on process (maintained
+in taskman.models.progress), so when a process instance is created, deleted
+or changes status only the objectives linked to its process are updated, by
+one UPDATE that reads mapping and process rows. These hooks must be
+registered after the counter hooks, which taskman.models does.
+"""
+from sqlalchemy import event, func, inspect, select, update
+
+from taskman.models.mapping import objective_process_mapping
+from taskman.models.objective import Objective
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.progress import _old_value
+
+# 目標値がない目標の現在値は達成率（%）にする
+DEFAULT_TARGET = 100.0
+
+
+def recompute_objectives(connection, process_ids=None, objective_ids=None):
+    """
+    Recompute current_value of the objectives linked to processes
+
+    Args:
+        connection: SQLAlchemy connection or session
+        process_ids: Only objectives linked to these processes (None for all)
+        objective_ids: Only these objectives (None for all)
+
+    Returns:
+        Number of objectives updated
+    """
+    mapping = objective_process_mapping
+    process = Process.__table__
+    objective = Objective.__table__
+
+    weight = func.coalesce(mapping.c.contribution_weight, 1.0)
+    rate = func.coalesce(process.c.completed_instances * 1.0 / func.nullif(process.c.total_instances, 0), 0.0)
+    fraction = (
+        select(func.sum(weight * rate) / func.nullif(func.sum(weight), 0))
+        .select_from(mapping.join(process, process.c.id == mapping.c.process_id))
+        .where(mapping.c.objective_id == objective.c.id)
+        .scalar_subquery()
+    )
+
+    linked = select(mapping.c.objective_id)
+    if process_ids is not None:
+        process_ids = [p for p in process_ids if p is not None]
+        if not process_ids:
+            return 0
+        linked = linked.where(mapping.c.process_id.in_(process_ids))
+    statement = update(objective).where(objective.c.id.in_(linked)).values(
+        current_value=func.coalesce(objective.c.target_value, DEFAULT_TARGET) * func.coalesce(fraction, 0.0)
+    )
+    if objective_ids is not None:
+        statement = statement.where(objective.c.id.in_(objective_ids))
+    return connection.execute(statement).rowcount
+
+
+@event.listens_for(ProcessInstance, 'after_insert')
+def _after_insert(mapper, connection, target):
+    recompute_objectives(connection, [target.process_id])
+
+
+@event.listens_for(ProcessInstance, 'after_update')
+def _after_update(mapper, connection, target):
+    state = inspect(target)
+    if not (state.attrs.status.history.has_changes() or state.attrs.process_id.history.has_changes()):
+        return
+    recompute_objectives(connection, {_old_value(state, 'process_id'), target.process_id})
+
+
+@event.listens_for(ProcessInstance, 'after_delete')
+def _after_delete(mapper, connection, target):
+    recompute_objectives(connection, [_old_value(inspect(target), 'process_id')])
@@ -1,7 +1,7 @@
 """
 Process model implementation
 """
-from sqlalchemy import Column, String, Text, Integer, Enum
+from sqlalchemy import Column, String, Text, Integer, Enum, Index
 from sqlalchemy.orm import relationship
 
 from taskman.models.base import BaseModel
@@ -13,6 +13,12 @@ class Process(BaseModel):
     Process model representing a workflow process
     """
     __tablename__ = 'process'
+    __table_args__ = (
+        # モニターの変更検知（最大更新日時）
+        Index('ix_process_updated_at', 'updated_at'),
+        # プロセス定義は名前とバージョンで一意（名前とバージョンでの検索にも使う）
+        Index('ix_process_name_version', 'name', 'version', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
@@ -22,6 +28,11 @@ class Process(BaseModel):
         Enum('アクティブ', '非アクティブ', 'ドラフト', name='process_status'),
         default='ドラフト'
     )
+    # 進捗カウンタ（taskman.models.progress のイベントフックで維持）
+    total_tasks = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_tasks = Column(Integer, nullable=False, default=0, server_default='0')
+    total_instances = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_instances = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     objectives = relationship('Objective', secondary=objective_process_mapping, back_populates='processes')
@@ -2,7 +2,7 @@
 ProcessInstance model implementation
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from taskman.models.base import BaseModel
@@ -13,6 +13,14 @@ class ProcessInstance(BaseModel):
     ProcessInstance model representing an instance of a process execution
     """
     __tablename__ = 'process_instance'
+    __table_args__ = (
+        # 実行中インスタンスを開始日時の順に取得
+        Index('ix_process_instance_status_started_at', 'status', 'started_at'),
+        # モニターの変更検知（最大更新日時）
+        Index('ix_process_instance_updated_at', 'updated_at'),
+        # アーカイブ済みの行のIDが再利用されないよう、SQLiteでも削除したIDを使い回さない
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True)
     process_id = Column(Integer, ForeignKey('process.id'), nullable=False)
@@ -23,6 +31,9 @@ class ProcessInstance(BaseModel):
     started_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     created_by = Column(String(100))
+    # 進捗カウンタ（taskman.models.progress のイベントフックで維持）
+    total_tasks = Column(Integer, nullable=False, default=0, server_default='0')
+    completed_tasks = Column(Integer, nullable=False, default=0, server_default='0')
 
     # Relationships
     process = relationship('Process', back_populates='instances')
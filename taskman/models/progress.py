@@ -0,0 +1,185 @@
+"""
+Progress counter maintenance
+
+Process.total_tasks/completed_tasks, ProcessInstance.total_tasks/completed_tasks
+and Process.total_instances/completed_instances are kept consistent by mapper
+event hooks on Task, TaskInstance and ProcessInstance, so progress can be read
+from a single row instead of counting child rows on every query.
+Bulk statements that bypass the ORM must call apply_counter_deltas() themselves;
+rebuild_progress_counters() recomputes everything from scratch.
+
+Counter updates leave updated_at alone: it records changes to the row itself
+(and is shown as the process end date and used by the monitor's change feed),
+not the activity of its children.
+"""
+from sqlalchemy import event, inspect, select, func, update
+
+from taskman.models.archive import ArchivedProcessInstance
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+# 完了とみなすステータス（Task, TaskInstance, ProcessInstance で共通）
+COMPLETED_STATUS = '完了'
+
+# 親テーブルのカウンタ列 (件数, 完了件数)
+TASK_COUNTERS = ('total_tasks', 'completed_tasks')
+INSTANCE_COUNTERS = ('total_instances', 'completed_instances')
+
+
+def _completed(status):
+    return 1 if status == COMPLETED_STATUS else 0
+
+
+def apply_counter_deltas(connection, table, deltas, columns=TASK_COUNTERS):
+    """
+    Apply counter deltas to a parent table
+
+    Args:
+        connection: SQLAlchemy connection or session
+        table: process or process_instance table
+        deltas: {parent_id: (total_delta, completed_delta)}
+        columns: Names of the (total, completed) counter columns
+    """
+    total, completed = columns
+    for parent_id, (total_delta, completed_delta) in deltas.items():
+        if parent_id is None or (total_delta == 0 and completed_delta == 0):
+            continue
+        connection.execute(
+            update(table)
+            .where(table.c.id == parent_id)
+            .values({
+                total: table.c[total] + total_delta,
+                completed: table.c[completed] + completed_delta,
+                # onupdate で更新日時が変わらないよう、現在の値のまま残す
+                'updated_at': table.c.updated_at,
+            })
+        )
+
+
+def _old_value(state, key):
+    """Return the value of an attribute as it was before the current flush"""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[key].value
+
+
+def _keep_history(target, value, oldvalue, initiator):
+    """No-op attribute listener used only to enable active history"""
+
+
+def _register(child_cls, parent_table, fk_name, columns=TASK_COUNTERS):
+    """Register insert/update/delete hooks for one child model"""
+
+    # 期限切れ（expire）済みの属性でも変更前の値を履歴に残すため、
+    # status と親IDの属性で active_history を有効にする
+    for key in ('status', fk_name):
+        event.listen(getattr(child_cls, key), 'set', _keep_history, active_history=True)
+
+    @event.listens_for(child_cls, 'after_insert')
+    def after_insert(mapper, connection, target):
+        apply_counter_deltas(connection, parent_table, {
+            getattr(target, fk_name): (1, _completed(target.status))
+        }, columns)
+
+    @event.listens_for(child_cls, 'after_update')
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        if not (state.attrs.status.history.has_changes()
+                or state.attrs[fk_name].history.has_changes()):
+            return
+
+        old_parent = _old_value(state, fk_name)
+        old_status = _old_value(state, 'status')
+        new_parent = getattr(target, fk_name)
+        new_status = target.status
+
+        if old_parent == new_parent:
+            deltas = {new_parent: (0, _completed(new_status) - _completed(old_status))}
+        else:
+            deltas = {
+                old_parent: (-1, -_completed(old_status)),
+                new_parent: (1, _completed(new_status)),
+            }
+        apply_counter_deltas(connection, parent_table, deltas, columns)
+
+    @event.listens_for(child_cls, 'after_delete')
+    def after_delete(mapper, connection, target):
+        state = inspect(target)
+        apply_counter_deltas(connection, parent_table, {
+            _old_value(state, fk_name): (-1, -_completed(_old_value(state, 'status')))
+        }, columns)
+
+
+_register(Task, Process.__table__, 'process_id')
+_register(TaskInstance, ProcessInstance.__table__, 'process_instance_id')
+_register(ProcessInstance, Process.__table__, 'process_id', INSTANCE_COUNTERS)
+
+
+def _count_values(parent, child, fk, columns, archive=None):
+    """
+    Correlated (total, completed) count subqueries for an UPDATE of parent
+
+    Rows of an archive table with the same fk and status columns are counted too.
+    updated_at is kept as it is.
+    """
+    total, completed = columns
+
+    def counts(table):
+        return (
+            select(func.count()).where(table.c[fk] == parent.c.id).scalar_subquery(),
+            (
+                select(func.count())
+                .where(table.c[fk] == parent.c.id, table.c.status == COMPLETED_STATUS)
+                .scalar_subquery()
+            ),
+        )
+
+    total_count, completed_count = counts(child)
+    if archive is not None:
+        archived_total, archived_completed = counts(archive)
+        total_count = total_count + archived_total
+        completed_count = completed_count + archived_completed
+    return {total: total_count, completed: completed_count, 'updated_at': parent.c.updated_at}
+
+
+def _instance_count_values(process):
+    return _count_values(
+        process, ProcessInstance.__table__, 'process_id', INSTANCE_COUNTERS,
+        archive=ArchivedProcessInstance.__table__,
+    )
+
+
+def rebuild_instance_counters(connection):
+    """
+    Recompute Process.total_instances/completed_instances in one statement
+
+    Archived process instances are counted as well.
+
+    Returns:
+        Number of processes updated
+    """
+    process = Process.__table__
+    return connection.execute(update(process).values(_instance_count_values(process))).rowcount
+
+
+def rebuild_progress_counters(connection):
+    """
+    Recompute every progress counter from the task, task_instance and process_instance tables
+
+    Args:
+        connection: SQLAlchemy connection or session
+
+    Returns:
+        (number of processes, number of process instances) updated
+    """
+    process = Process.__table__
+    process_instance = ProcessInstance.__table__
+    values = _count_values(process, Task.__table__, 'process_id', TASK_COUNTERS)
+    values.update(_instance_count_values(process))
+    processes = connection.execute(update(process).values(values)).rowcount
+    values = _count_values(process_instance, TaskInstance.__table__, 'process_instance_id', TASK_COUNTERS)
+    instances = connection.execute(update(process_instance).values(values)).rowcount
+    return processes, instances
@@ -1,7 +1,7 @@
 """
 Task model implementation
 """
-from sqlalchemy import Column, String, Text, Integer, Enum, ForeignKey, Date
+from sqlalchemy import Column, String, Text, Integer, Enum, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 
 from taskman.models.base import BaseModel
@@ -11,6 +11,12 @@ class Task(BaseModel):
     Task model representing a work item
     """
     __tablename__ = 'task'
+    __table_args__ = (
+        # プロセスごとのタスク一覧・ステータス絞り込み
+        Index('ix_task_process_status', 'process_id', 'status'),
+        # モニターの変更検知（最大更新日時）と最近のアクティビティ
+        Index('ix_task_updated_at', 'updated_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     process_id = Column(Integer, ForeignKey('process.id'), nullable=False)
@@ -2,7 +2,7 @@
 TaskInstance model implementation
 """
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, ForeignKey, Enum, DateTime, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, Enum, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 
 from taskman.models.base import BaseModel
@@ -12,6 +12,17 @@ class TaskInstance(BaseModel):
     TaskInstance model representing an instance of a task execution
     """
     __tablename__ = 'task_instance'
+    __table_args__ = (
+        # インスタンスごとのタスク一覧・進行中タスクの検索
+        Index('ix_task_instance_process_instance_status', 'process_instance_id', 'status'),
+        # 最近のアクティビティ（更新日時の降順）
+        Index('ix_task_instance_updated_at', 'updated_at'),
+        # タスクごとのインスタンスの状態（ワークフローステップの状態の集計、
+        # 実行中のプロセスインスタンスに絞るためインスタンスIDも含める）
+        Index('ix_task_instance_task_status', 'task_id', 'status', 'process_instance_id'),
+        # アーカイブ済みの行のIDが再利用されないよう、SQLiteでも削除したIDを使い回さない
+        {'sqlite_autoincrement': True},
+    )
 
     id = Column(Integer, primary_key=True)
     process_instance_id = Column(Integer, ForeignKey('process_instance.id'), nullable=False)
@@ -1,7 +1,7 @@
 """
 TaskStep model implementation
 """
-from sqlalchemy import Column, String, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from taskman.models.base import BaseModel
@@ -11,6 +11,10 @@ class TaskStep(BaseModel):
     TaskStep model representing a step in a task
     """
     __tablename__ = 'task_step'
+    __table_args__ = (
+        # タスクのステップをステップ番号の順に取得
+        Index('ix_task_step_task_step_number', 'task_id', 'step_number'),
+    )
 
     id = Column(Integer, primary_key=True)
     task_id = Column(Integer, ForeignKey('task.id'), nullable=False)
@@ -1,7 +1,7 @@
 """
 Workflow model implementation
 """
-from sqlalchemy import Column, Integer, Text, Enum, ForeignKey
+from sqlalchemy import Column, Integer, Text, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from taskman.models.base import BaseModel
@@ -10,6 +10,11 @@ class Workflow(BaseModel):
     """
     Workflow model representing task transitions
     """
+    __table_args__ = (
+        # プロセスの遷移を順序番号の順に取得
+        Index('ix_workflow_process_sequence_number', 'process_id', 'sequence_number'),
+    )
+
     process_id = Column(Integer, ForeignKey('process.id'), nullable=False)
     from_task_id = Column(Integer, ForeignKey('task.id'))
     to_task_id = Column(Integer, ForeignKey('task.id'))
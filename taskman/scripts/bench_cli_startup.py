@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+CLI起動時間のベンチマーク
+
+`taskman version` を新しいプロセスで繰り返し実行し、
+遅延ロード（現在の実装）と全コマンドモジュールを先に読み込む場合
+（遅延ロード導入前の動作）の起動時間を比較します。
+
+使用方法:
+    python taskman/scripts/bench_cli_startup.py [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# 遅延ロード: 現在のエントリポイントそのまま
+LAZY_SCRIPT = "from taskman.cli import app; app(['version'])"
+
+# 先読み: 全コマンドモジュールを読み込んでから実行（導入前の動作を再現）
+EAGER_SCRIPT = (
+    "import importlib\n"
+    "from taskman.cli.app import app, COMMAND_MODULES\n"
+    "for module_name, _ in COMMAND_MODULES.values():\n"
+    "    importlib.import_module(module_name)\n"
+    "app(['version'])\n"
+)
+
+
+def run_once(script, env):
+    """スクリプトを新しいインタプリタで1回実行し、経過秒数を返す"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def measure(script, runs, env):
+    """指定回数実行した経過時間（ミリ秒）のリストを返す"""
+    # 初回はバイトコードのコンパイルなどを含むため除外する
+    run_once(script, env)
+    return [run_once(script, env) * 1000 for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI起動時間のベンチマーク")
+    parser.add_argument("--runs", type=int, default=20, help="計測回数")
+    args = parser.parse_args()
+
+    root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [root_dir, env.get("PYTHONPATH")]))
+    # MySQLドライバがなくても計測できるようにSQLiteを使う
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+    results = {
+        "eager": measure(EAGER_SCRIPT, args.runs, env),
+        "lazy": measure(LAZY_SCRIPT, args.runs, env),
+    }
+
+    print(f"taskman version x {args.runs} runs")
+    for name, timings in results.items():
+        print(
+            f"  {name:<6} median {statistics.median(timings):7.1f} ms"
+            f"  min {min(timings):7.1f} ms  max {max(timings):7.1f} ms"
+        )
+
+    eager = statistics.median(results["eager"])
+    lazy = statistics.median(results["lazy"])
+    print(f"  reduction {eager - lazy:7.1f} ms ({(eager - lazy) / eager * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLiteプロファイルのベンチマーク
+
+SQLiteの既定値（ロールバックジャーナル、synchronous=FULL）と
+SQLiteプロファイル（WAL、synchronous=NORMAL、mmap など）で、
+一時ファイルのデータベースに対して次を比較します。
+
+- 書き込みスループット: 1行ずつコミットするタスクインスタンスの挿入
+- 読み取りレイテンシ: 書き込みと並行してダッシュボードの集計クエリを実行
+  （GUIの更新中にCLIが書き込む状況の再現）。ロックで失敗した回数も数える
+
+使用方法:
+    python taskman/scripts/bench_sqlite_profile.py [--writes 500] [--seconds 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT_DIR)
+# MySQLドライバがなくても読み込めるようにSQLiteを使う
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from sqlalchemy import insert, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from taskman.config.database import DatabaseSettings  # noqa: E402
+from taskman.database.connection import Base, build_engine  # noqa: E402
+from taskman.database.monitor_queries import DASHBOARD_STATS_SQL  # noqa: E402
+from taskman.models import Process, ProcessInstance, Task, TaskInstance  # noqa: E402
+
+PROFILES = {
+    "default": DatabaseSettings(sqlite_tuning=False),
+    "tuned": DatabaseSettings(),
+}
+
+# 既存データの件数（ダッシュボードのクエリが読む量）
+SEED_INSTANCES = 2000
+TASKS_PER_INSTANCE = 5
+
+
+def seed(engine):
+    """テーブルを作成し、プロセス1件とインスタンス・タスクインスタンスを投入する"""
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Process.__table__).values(id=1, name="ベンチマーク", status="アクティブ"))
+        conn.execute(insert(Task.__table__).values(id=1, process_id=1, name="作業", status="未着手"))
+        conn.execute(insert(ProcessInstance.__table__), [
+            {"id": i, "process_id": 1, "status": "完了" if i % 3 else "実行中"}
+            for i in range(1, SEED_INSTANCES + 1)
+        ])
+        conn.execute(insert(TaskInstance.__table__), [
+            {"process_instance_id": i, "task_id": 1, "status": "完了" if i % 3 else "実行中"}
+            for i in range(1, SEED_INSTANCES + 1)
+            for _ in range(TASKS_PER_INSTANCE)
+        ])
+
+
+def write_rows(engine, count, stop=None):
+    """1行ずつコミットして挿入し、挿入できた行数を返す"""
+    written = 0
+    while written < count and not (stop and stop.is_set()):
+        with engine.begin() as conn:
+            conn.execute(insert(TaskInstance.__table__).values(
+                process_instance_id=written % SEED_INSTANCES + 1, task_id=1, status="未着手"
+            ))
+        written += 1
+    return written
+
+
+def measure_writes(url, settings, count):
+    """書き込みスループット（行/秒）を返す"""
+    engine = build_engine(url, settings)
+    try:
+        start = time.perf_counter()
+        write_rows(engine, count)
+        return count / (time.perf_counter() - start)
+    finally:
+        engine.dispose()
+
+
+def measure_reads(url, settings, seconds):
+    """書き込みと並行して読み取り、(レイテンシ[ms]のリスト, 失敗回数) を返す"""
+    writer_engine = build_engine(url, settings)
+    reader_engine = build_engine(url, settings)
+    stop = threading.Event()
+    writer = threading.Thread(target=write_rows, args=(writer_engine, sys.maxsize, stop))
+    writer.start()
+
+    timings, failures = [], 0
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with reader_engine.connect() as conn:
+                    conn.execute(text(DASHBOARD_STATS_SQL)).all()
+                timings.append((time.perf_counter() - start) * 1000)
+            except OperationalError:
+                failures += 1
+    finally:
+        stop.set()
+        writer.join()
+        writer_engine.dispose()
+        reader_engine.dispose()
+    return timings, failures
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLiteプロファイルのベンチマーク")
+    parser.add_argument("--writes", type=int, default=500, help="書き込みスループットの計測で挿入する行数")
+    parser.add_argument("--seconds", type=float, default=3.0, help="読み取りレイテンシの計測秒数")
+    args = parser.parse_args()
+
+    print(f"writes: {args.writes} single-row commits / reads: {args.seconds:.0f}s concurrent with a writer")
+    for name, settings in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            engine = build_engine(url, settings)
+            seed(engine)
+            engine.dispose()
+
+            throughput = measure_writes(url, settings, args.writes)
+            timings, failures = measure_reads(url, settings, args.seconds)
+
+        line = f"  {name:<8} writes {throughput:8.0f} rows/s"
+        if timings:
+            line += (
+                f"  reads {len(timings):5d}  median {statistics.median(timings):6.2f} ms"
+                f"  p95 {percentile(timings, 0.95):6.2f} ms"
+            )
+        print(line + f"  locked {failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+プロセスモニターのバックグラウンド読み込みのテスト
+ワーカースレッドでの読み込み、更新要求のまとめ、古い読み込みの破棄を確認する
+"""
+
+import sys
+import threading
+import time
+import unittest
+
+from PyQt6.QtWidgets import QApplication
+
+from taskman.app.gui.loader import LoadCancelled, RefreshLoader, load_snapshot
+
+
+class FakeSource:
+    """ProcessDatabase/ActivityDatabase の代わりに固定データを返すデータソース"""
+
+    def __init__(self, gate=None, error=None, watermarks=None):
+        self.gate = gate
+        self.error = error
+        self.watermarks = watermarks or {'process': 1, 'process_instance': 1}
+        self.threads = set()
+        self.closed = False
+        self.calls = []
+
+    def get_change_watermarks(self):
+        self.calls.append('watermarks')
+        return self.watermarks
+
+    def refresh_registry(self, watermark):
+        return False
+
+    def get_running_processes(self):
+        self.threads.add(threading.get_ident())
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error:
+            raise RuntimeError(self.error)
+        return [{'id': 1, 'name': '受注'}]
+
+    def get_recent_activities(self, limit=10):
+        return [{'description': '開始'}]
+
+    def get_process_definitions(self):
+        return [{'name': '受注', 'version': 1}]
+
+    def get_process_details(self, process_id):
+        return {'id': process_id, 'name': '受注'}
+
+    def get_process_instances(self):
+        self.calls.append('process_instances')
+        return [{'id': 10}]
+
+    def close(self):
+        self.closed = True
+
+
+def wait_until(condition, timeout=5.0):
+    """条件を満たすまでイベントを処理しながら待つ"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("タイムアウトしました")
+        QApplication.processEvents()
+        time.sleep(0.005)
+
+
+class TestRefreshLoader(unittest.TestCase):
+    """RefreshLoader のテスト"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance()
+        if cls.app is None:
+            cls.app = QApplication(sys.argv)
+
+    def setUp(self):
+        self.sources = []
+        self.gate = None
+        self.error = None
+        self.watermarks = None
+        self.loader = RefreshLoader(source_factory=self.open_source)
+        self.loaded = []
+        self.failed = []
+        self.loader.loaded.connect(self.loaded.append)
+        self.loader.failed.connect(self.failed.append)
+
+    def tearDown(self):
+        if self.gate is not None:
+            self.gate.set()
+        self.loader.shutdown()
+
+    def open_source(self):
+        source = FakeSource(self.gate, self.error, self.watermarks)
+        self.sources.append(source)
+        return source, source
+
+    def test_load_snapshot(self):
+        """詳細はプロセスが選択されている場合だけ読み込まれることを確認"""
+        source = FakeSource()
+
+        snapshot = load_snapshot(source, source, 1)
+        self.assertEqual(snapshot.running_processes, [{'id': 1, 'name': '受注'}])
+        self.assertEqual(snapshot.process_instances, [{'id': 10}])
+        self.assertIsNone(snapshot.process_details)
+
+        snapshot = load_snapshot(source, source, 2, process_id=5)
+        self.assertEqual(snapshot.process_details['id'], 5)
+
+        cancelled = threading.Event()
+        cancelled.set()
+        with self.assertRaises(LoadCancelled):
+            load_snapshot(source, source, 3, cancelled=cancelled)
+
+    def test_unchanged_parts_are_skipped(self):
+        """透かしが変わらなければ透かし以外を読み込まないことを確認"""
+        source = FakeSource()
+        first = load_snapshot(source, source, 1)
+
+        source.calls.clear()
+        snapshot = load_snapshot(source, source, 2, previous=first)
+        self.assertEqual(source.calls, ['watermarks'])
+        self.assertTrue(snapshot.unchanged)
+
+        # 選択したプロセスが変わった場合は詳細だけを読み込む
+        snapshot = load_snapshot(source, source, 3, process_id=5, previous=first)
+        self.assertEqual(snapshot.process_details['id'], 5)
+        self.assertIsNone(snapshot.running_processes)
+
+    def test_loader_diffs_against_applied_snapshot(self):
+        """2回目以降は反映済みの読み込みとの差分になり、full=True ですべて読み込むことを確認"""
+        self.loader.request()
+        wait_until(lambda: len(self.loaded) == 1 and not self.loader.busy)
+        self.loader.request()
+        wait_until(lambda: len(self.loaded) == 2 and not self.loader.busy)
+        self.assertTrue(self.loaded[1].unchanged)
+        self.assertIs(self.loader.applied, self.loaded[1])
+
+        self.loader.request(full=True)
+        wait_until(lambda: len(self.loaded) == 3 and not self.loader.busy)
+        self.assertEqual(self.loaded[2].process_instances, [{'id': 10}])
+
+    def test_loads_on_worker_thread(self):
+        """読み込みがワーカースレッドで行われ、結果がシグナルで届くことを確認"""
+        self.loader.request(7)
+        wait_until(lambda: self.loaded and not self.loader.busy)
+
+        (snapshot,) = self.loaded
+        self.assertEqual(snapshot.process_id, 7)
+        self.assertEqual(snapshot.process_details['id'], 7)
+        self.assertNotIn(threading.get_ident(), self.sources[0].threads)
+        self.assertTrue(self.sources[0].closed)
+
+    def test_overlapping_requests_are_coalesced(self):
+        """読み込み中の要求は1回の再読み込みにまとめられ、古い結果は破棄されることを確認"""
+        self.gate = threading.Event()
+        self.loader.request(1)
+        wait_until(lambda: self.sources and self.sources[0].threads)
+
+        for process_id in (2, 3, 4):
+            self.loader.request(process_id)
+        self.assertTrue(self.loader.busy)
+        self.gate.set()
+        wait_until(lambda: self.loaded and not self.loader.busy)
+        QApplication.processEvents()
+
+        # 最初の読み込み + まとめた再読み込みの2回だけ
+        self.assertEqual(len(self.sources), 2)
+        self.assertEqual([s.process_id for s in self.loaded], [4])
+        self.assertEqual(self.loaded[0].generation, self.loader.generation)
+
+    def test_failure_is_reported(self):
+        """読み込みの失敗がシグナルで通知されることを確認"""
+        self.error = "接続できません"
+        self.loader.request()
+        wait_until(lambda: self.failed and not self.loader.busy)
+
+        self.assertEqual(self.failed, ["接続できません"])
+        self.assertEqual(self.loaded, [])
+        self.assertTrue(self.sources[0].closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
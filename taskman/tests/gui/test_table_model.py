@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+一覧表示用のテーブルモデルのテスト
+列指向の保持、スクロールに合わせた行の公開、差分の置き換えを確認する
+"""
+
+import sys
+import unittest
+from datetime import datetime
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from taskman.app.gui.tabs import DashboardTab, ProcessInstanceTab
+from taskman.app.gui.tabs.table_model import Column, ColumnarTableModel
+
+
+def instances(count, start=1):
+    return [
+        {'id': i, 'process_name': '受注', 'status': '実行中', 'started_at': f'2026-01-01 00:00:{i % 60:02d}'}
+        for i in range(start + count - 1, start - 1, -1)
+    ]
+
+
+class TestColumnarTableModel(unittest.TestCase):
+    """ColumnarTableModel のテスト"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance()
+        if cls.app is None:
+            cls.app = QApplication(sys.argv)
+
+    def setUp(self):
+        self.model = ColumnarTableModel([
+            Column('id', "ID"),
+            Column('status', "ステータス"),
+            Column('completed_at', "終了時間", default='-'),
+        ], fetch_size=100)
+
+    def display(self, row, column):
+        return self.model.data(self.model.index(row, column), Qt.ItemDataRole.DisplayRole)
+
+    def test_rows_are_fetched_lazily(self):
+        """行は fetch_size 件ずつ公開されることを確認"""
+        self.model.set_rows(instances(250))
+
+        self.assertEqual(self.model.total_rows(), 250)
+        self.assertEqual(self.model.rowCount(), 100)
+        self.assertTrue(self.model.canFetchMore())
+
+        self.model.fetchMore()
+        self.model.fetchMore()
+        self.assertEqual(self.model.rowCount(), 250)
+        self.assertFalse(self.model.canFetchMore())
+
+        self.model.set_rows(instances(3))
+        self.assertEqual(self.model.rowCount(), 3)
+
+    def test_data_and_headers(self):
+        """表示用の文字列、既定値、生の値、見出しを確認"""
+        self.model.set_rows([{'id': 7, 'status': '完了', 'completed_at': None}])
+
+        self.assertEqual(self.display(0, 0), '7')
+        self.assertEqual(self.display(0, 2), '-')
+        self.assertEqual(self.model.data(self.model.index(0, 0), Qt.ItemDataRole.UserRole), 7)
+        self.assertEqual(self.model.value(0, 'status'), '完了')
+        self.assertEqual(self.model.headerData(1, Qt.Orientation.Horizontal), "ステータス")
+
+    def test_upsert_rows(self):
+        """同じIDの行は置き換え、新しい行は先頭に追加されることを確認"""
+        self.model.set_rows(instances(3))
+        changed = []
+        self.model.dataChanged.connect(lambda top, bottom: changed.append(top.row()))
+
+        self.model.upsert_rows([
+            {'id': 5, 'status': '実行中'},
+            {'id': 4, 'status': '実行中'},
+            {'id': 2, 'status': '完了', 'completed_at': '2026-01-02'},
+        ])
+
+        self.assertEqual([self.model.value(i, 'id') for i in range(5)], [5, 4, 3, 2, 1])
+        self.assertEqual(self.model.rowCount(), 5)
+        self.assertEqual(self.display(3, 1), '完了')
+        self.assertEqual(self.display(3, 2), '2026-01-02')
+        self.assertEqual(changed, [1])
+        self.assertEqual(self.model.row_of(1), 4)
+
+
+class TestTabs(unittest.TestCase):
+    """モデルを使うタブのテスト"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance()
+        if cls.app is None:
+            cls.app = QApplication(sys.argv)
+
+    def test_dashboard_formats(self):
+        """ダッシュボードの進捗と完了予定の表示形式を確認"""
+        tab = DashboardTab()
+        tab.instance_model.set_rows([{'id': 1, 'name': '受注', 'progress': 40, 'eta': datetime(2026, 3, 1, 9, 30)}])
+
+        model = tab.instance_table.model()
+        self.assertIs(model, tab.instance_model)
+        self.assertEqual(model.data(model.index(0, 3)), '40%')
+        self.assertEqual(model.data(model.index(0, 5)), '2026-03-01 09:30')
+
+    def test_instance_tab_view_over_large_list(self):
+        """大量のインスタンスでもビューには公開した行だけが並ぶことを確認"""
+        tab = ProcessInstanceTab()
+        tab.instance_model.set_rows(instances(100_000))
+
+        self.assertEqual(tab.instance_table.model().rowCount(), tab.instance_model.fetch_size)
+        self.assertEqual(tab.instance_model.value(0, 'id'), 100_000)
+
+
+if __name__ == '__main__':
+    unittest.main()
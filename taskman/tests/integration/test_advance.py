@@ -0,0 +1,267 @@
+"""
+統合テスト - ワークフローによるタスクインスタンスの自動進行のテスト
+
+このモジュールでは、プロセスインスタンスの作成時に開始タスクが作成され、
+タスクインスタンスの完了に応じて後続タスクの作成、並列分岐の合流待ち、
+条件付き遷移、プロセスインスタンスの完了が行われることをテストします。
+"""
+
+import threading
+
+import pytest
+from sqlalchemy import event
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.engine.advance import advance, start_process_instance
+from taskman.engine.graph import invalidate_graph
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+from taskman.models.workflow import Workflow
+
+
+class TestAdvanceIntegration:
+    """タスクインスタンスの自動進行の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """受付 → (審査, 在庫確認を並列) → 出荷 → 終了 のプロセスを作成"""
+        from taskman.database import connection
+
+        invalidate_graph()
+        self.runner = CliRunner()
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        process = Process(name="受注処理", status="アクティブ")
+        self.session.add(process)
+        self.session.flush()
+        tasks = [Task(process_id=process.id, name=name) for name in ("受付", "審査", "在庫確認", "出荷")]
+        self.session.add_all(tasks)
+        self.session.flush()
+        self.accept, self.review, self.stock, self.ship = (t.id for t in tasks)
+        self.session.add_all([
+            Workflow(process_id=process.id, from_task_id=None, to_task_id=self.accept),
+            Workflow(process_id=process.id, from_task_id=self.accept, to_task_id=self.review, condition_type="並列"),
+            Workflow(process_id=process.id, from_task_id=self.accept, to_task_id=self.stock, condition_type="並列"),
+            Workflow(process_id=process.id, from_task_id=self.review, to_task_id=self.ship),
+            Workflow(process_id=process.id, from_task_id=self.stock, to_task_id=self.ship),
+            Workflow(process_id=process.id, from_task_id=self.ship, to_task_id=None),
+        ])
+        self.session.commit()
+        self.process_id = process.id
+
+        yield
+
+        self.session.close()
+        db = connection.SessionLocal()
+        for model in (TaskInstance, ProcessInstance, Workflow, Task, Process):
+            db.query(model).delete()
+        db.commit()
+        db.close()
+        invalidate_graph()
+
+    def task_instances(self, instance_id):
+        """プロセスインスタンスのタスクインスタンスを {タスクID: ステータス} で返す"""
+        self.session.expire_all()
+        rows = self.session.query(TaskInstance).filter_by(process_instance_id=instance_id).all()
+        return {ti.task_id: ti for ti in rows}
+
+    def complete(self, task_instance_id):
+        result = self.runner.invoke(app, ["task-instance", "status", str(task_instance_id), "完了"])
+        assert result.exit_code == 0, result.stdout
+        return result.stdout
+
+    def test_full_run_through_cli(self):
+        """作成から完了までCLIだけで進むことを確認"""
+        result = self.runner.invoke(app, ["instance", "create", "--process", str(self.process_id)])
+        assert result.exit_code == 0, result.stdout
+        assert "開始タスク: 1件" in result.stdout
+        instance_id = self.session.query(ProcessInstance.id).scalar()
+
+        instances = self.task_instances(instance_id)
+        assert set(instances) == {self.accept}
+
+        output = self.complete(instances[self.accept].id)
+        assert "次のタスクを開始しました" in output
+        instances = self.task_instances(instance_id)
+        assert set(instances) == {self.accept, self.review, self.stock}
+
+        # 片方の分岐だけ完了しても合流先は作成されない
+        output = self.complete(instances[self.review].id)
+        assert "合流待ち" in output
+        assert self.ship not in self.task_instances(instance_id)
+
+        self.complete(instances[self.stock].id)
+        instances = self.task_instances(instance_id)
+        assert instances[self.ship].status == "未着手"
+
+        output = self.complete(instances[self.ship].id)
+        assert "が完了しました" in output
+
+        process_instance = self.session.get(ProcessInstance, instance_id)
+        assert process_instance.status == "完了"
+        assert process_instance.completed_at is not None
+        assert (process_instance.total_tasks, process_instance.completed_tasks) == (4, 4)
+
+    def test_batch_advance_uses_one_insert(self):
+        """多数のインスタンスをまとめて進めるとINSERTが1回で済むことを確認"""
+        instances = [ProcessInstance(process_id=self.process_id, status="実行中") for _ in range(20)]
+        self.session.add_all(instances)
+        self.session.flush()
+        for instance in instances:
+            start_process_instance(self.session, instance)
+        self.session.commit()
+
+        starts = self.session.query(TaskInstance).filter_by(task_id=self.accept).all()
+        for ti in starts:
+            ti.status = "完了"
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.connection.engine, "before_cursor_execute", count)
+        try:
+            result = advance(self.session, starts)
+            self.session.commit()
+        finally:
+            event.remove(self.connection.engine, "before_cursor_execute", count)
+
+        assert len(result.created) == 40
+        assert len([s for s in statements if s.startswith("INSERT INTO task_instance")]) == 1
+        assert self.session.query(TaskInstance).filter_by(status="未着手").count() == 40
+
+    def test_conditional_routing(self):
+        """条件付き遷移で条件を満たす最初の辺だけが選ばれることを確認"""
+        rework = Task(process_id=self.process_id, name="差戻し")
+        self.session.add(rework)
+        self.session.flush()
+        self.session.query(Workflow).filter_by(from_task_id=self.review).delete()
+        self.session.add_all([
+            Workflow(process_id=self.process_id, from_task_id=self.review, to_task_id=rework.id,
+                     condition_type="条件付き", condition_expression="'差戻し' in notes", sequence_number=1),
+            Workflow(process_id=self.process_id, from_task_id=self.review, to_task_id=self.ship,
+                     condition_type="条件付き", condition_expression="True", sequence_number=2),
+            Workflow(process_id=self.process_id, from_task_id=rework.id, to_task_id=None),
+        ])
+        self.session.commit()
+
+        approved, rejected = (ProcessInstance(process_id=self.process_id, status="実行中") for _ in range(2))
+        self.session.add_all([approved, rejected])
+        self.session.flush()
+        reviews = [
+            TaskInstance(process_instance_id=approved.id, task_id=self.review, status="完了", notes="承認"),
+            TaskInstance(process_instance_id=rejected.id, task_id=self.review, status="完了", notes="差戻しします"),
+        ]
+        self.session.add_all(reviews)
+
+        result = advance(self.session, reviews)
+        self.session.commit()
+
+        assert sorted(result.created) == sorted([(approved.id, self.ship), (rejected.id, rework.id)])
+
+    def test_stalled_when_no_condition_matches(self):
+        """条件を満たす遷移がない場合は停止として報告されることを確認"""
+        self.session.query(Workflow).filter_by(from_task_id=self.ship).delete()
+        self.session.add(Workflow(process_id=self.process_id, from_task_id=self.ship, to_task_id=None,
+                                  condition_type="条件付き", condition_expression="duration > 100000"))
+        self.session.commit()
+
+        instance = ProcessInstance(process_id=self.process_id, status="実行中")
+        self.session.add(instance)
+        self.session.flush()
+        ship = TaskInstance(process_instance_id=instance.id, task_id=self.ship, status="完了")
+        self.session.add(ship)
+
+        result = advance(self.session, [ship])
+
+        assert result.stalled_instances == [instance.id]
+        assert instance.status == "実行中"
+
+    def test_join_branches_completed_in_separate_sessions(self):
+        """並列分岐の両方を別々のセッションで同時に完了しても合流先が1件だけ作成されることを確認"""
+        instance = ProcessInstance(process_id=self.process_id, status="実行中")
+        self.session.add(instance)
+        self.session.flush()
+        start_process_instance(self.session, instance)
+        self.session.commit()
+        instance_id = instance.id
+        accept = self.task_instances(instance_id)[self.accept]
+        accept.status = "完了"
+        advance(self.session, [accept])
+        self.session.commit()
+        branches = [ti.id for task_id, ti in self.task_instances(instance_id).items() if task_id != self.accept]
+        assert len(branches) == 2
+
+        barrier = threading.Barrier(len(branches))
+        errors = []
+
+        def complete_branch(task_instance_id):
+            session = self.connection.SessionLocal()
+            try:
+                task_instance = session.get(TaskInstance, task_instance_id)
+                task_instance.status = "完了"
+                barrier.wait()
+                advance(session, [task_instance])
+                session.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                session.close()
+
+        threads = [threading.Thread(target=complete_branch, args=(ti_id,)) for ti_id in branches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        ships = self.session.query(TaskInstance).filter_by(process_instance_id=instance_id, task_id=self.ship).all()
+        assert [ti.status for ti in ships] == ["未着手"]
+
+    def test_process_without_workflow_is_manual(self):
+        """ワークフローのないプロセスでは自動作成されないことを確認"""
+        process = Process(name="手動プロセス", status="アクティブ")
+        self.session.add(process)
+        self.session.flush()
+        self.session.add(Task(process_id=process.id, name="手動タスク"))
+        self.session.commit()
+
+        result = self.runner.invoke(app, ["instance", "create", "--process", str(process.id)])
+
+        assert result.exit_code == 0, result.stdout
+        assert self.session.query(TaskInstance).count() == 0
+
+    def test_cyclic_workflow_is_manual(self):
+        """循環のあるワークフローでは自動進行せず、作成とステータス変更は行えることを確認"""
+        process = Process(name="循環プロセス", status="アクティブ")
+        self.session.add(process)
+        self.session.flush()
+        a, b = Task(process_id=process.id, name="A"), Task(process_id=process.id, name="B")
+        self.session.add_all([a, b])
+        self.session.flush()
+        self.session.add_all([
+            Workflow(process_id=process.id, from_task_id=a.id, to_task_id=b.id),
+            Workflow(process_id=process.id, from_task_id=b.id, to_task_id=a.id),
+        ])
+        self.session.commit()
+        process_id, task_id = process.id, a.id
+
+        result = self.runner.invoke(app, ["instance", "create", "--process", str(process_id)])
+
+        assert result.exit_code == 0, result.stdout
+        assert "循環があります" in result.stdout
+        instance_id = self.session.query(ProcessInstance.id).filter_by(process_id=process_id).scalar()
+        assert self.task_instances(instance_id) == {}
+
+        task_instance = TaskInstance(process_instance_id=instance_id, task_id=task_id, status="実行中")
+        self.session.add(task_instance)
+        self.session.commit()
+        stdout = self.complete(task_instance.id)
+
+        assert "循環があります" in stdout
+        assert {t: ti.status for t, ti in self.task_instances(instance_id).items()} == {task_id: "完了"}
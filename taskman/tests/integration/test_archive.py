@@ -0,0 +1,235 @@
+"""
+統合テスト - 完了したプロセスインスタンスのアーカイブのテスト
+
+このモジュールでは、古い完了済みプロセスインスタンスとそのタスクインスタンスが
+バッチでアーカイブテーブルへ移動されること、カウンタが変わらないこと、
+--include-archived で一覧に含められること、および db archive コマンドをテストします。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, update
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.database.archive import archive_completed, parse_age, restore_archived
+from taskman.models.archive import ArchivedProcessInstance, ArchivedTaskInstance
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.progress import rebuild_instance_counters
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+
+class TestArchiveIntegration:
+    """アーカイブの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """古い完了2件・最近の完了2件・古い実行中1件のインスタンスを作成"""
+        from taskman.database import connection
+
+        # 表の列が端末幅で省略されないよう、幅を固定して実行する
+        self.runner = CliRunner(env={"COLUMNS": "200"})
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        process = Process(name="受注", status="アクティブ")
+        self.session.add(process)
+        self.session.flush()
+        task = Task(process_id=process.id, name="受付", status="未着手")
+        self.session.add(task)
+        self.session.flush()
+
+        old = datetime.now() - timedelta(days=120)
+        recent = datetime.now() - timedelta(days=10)
+        specs = [
+            ("完了", old, old),          # アーカイブ対象
+            ("完了", old, old),          # アーカイブ対象
+            ("完了", recent, recent),    # 新しい
+            ("実行中", old, None),       # 未完了
+            ("完了", recent, recent),    # 新しい
+        ]
+        self.instances = []
+        for status, started_at, completed_at in specs:
+            instance = ProcessInstance(
+                process_id=process.id, status=status, started_at=started_at, completed_at=completed_at
+            )
+            self.session.add(instance)
+            self.session.flush()
+            self.session.add(TaskInstance(process_instance_id=instance.id, task_id=task.id, status="完了"))
+            self.instances.append(instance.id)
+        self.session.commit()
+        self.process = process.id
+        self.task = task.id
+        self.cutoff = datetime.now() - timedelta(days=90)
+
+        yield
+
+        self.session.close()
+        db = connection.SessionLocal()
+        for model in (ArchivedTaskInstance, ArchivedProcessInstance, TaskInstance, ProcessInstance, Task, Process):
+            db.query(model).delete()
+        db.commit()
+        db.close()
+
+    def counters(self):
+        self.session.expire_all()
+        process = self.session.get(Process, self.process)
+        return process.total_instances, process.completed_instances
+
+    def test_parse_age(self):
+        """--older-than の書式を確認"""
+        assert parse_age("90d") == timedelta(days=90)
+        assert parse_age("2w") == timedelta(weeks=2)
+        assert parse_age("36h") == timedelta(hours=36)
+        for value in ("90", "0d", "1y", ""):
+            with pytest.raises(ValueError):
+                parse_age(value)
+
+    def test_archive_moves_old_completed_instances_in_batches(self):
+        """古い完了済みインスタンスだけがタスクインスタンスごとバッチで移動されることを確認"""
+        before = self.counters()
+
+        result = archive_completed(self.connection.engine, self.cutoff, batch_size=1)
+
+        assert (result.process_instances, result.task_instances, result.batches) == (2, 2, 2)
+        hot = {i.id for i in self.session.query(ProcessInstance)}
+        assert hot == set(self.instances[2:])
+        archived = self.session.query(ArchivedProcessInstance).order_by(ArchivedProcessInstance.id).all()
+        assert [a.id for a in archived] == self.instances[:2]
+        assert archived[0].archived_at is not None
+        assert archived[0].process.name == "受注"
+        assert [t.task.name for t in archived[0].task_instances] == ["受付"]
+        assert self.session.query(TaskInstance).count() == 3
+
+        # カウンタはアーカイブ分も数え続け、数え直しても変わらない
+        assert self.counters() == before == (5, 4)
+        rebuild_instance_counters(self.session)
+        self.session.commit()
+        assert self.counters() == before
+
+        assert archive_completed(self.connection.engine, self.cutoff).process_instances == 0
+
+    def test_restore_archived(self):
+        """アーカイブした行を元のテーブルに戻せることを確認"""
+        archive_completed(self.connection.engine, self.cutoff)
+
+        result = restore_archived(self.connection.engine)
+
+        assert (result.process_instances, result.task_instances) == (2, 2)
+        assert self.session.query(ProcessInstance).count() == 5
+        assert self.session.query(ArchivedProcessInstance).count() == 0
+
+    def test_list_include_archived(self):
+        """--include-archived でアーカイブ済みの行も ID 順に一覧に含まれることを確認"""
+        archive_completed(self.connection.engine, self.cutoff)
+
+        result = self.runner.invoke(app, ["instance", "list", "--format", "csv"])
+        assert result.exit_code == 0, result.stdout
+        assert len(result.stdout.strip().splitlines()) == 1 + 3
+
+        result = self.runner.invoke(
+            app, ["instance", "list", "--include-archived", "--format", "csv", "--limit", "3"]
+        )
+        assert result.exit_code == 0, result.stdout
+        ids = [int(line.split(",")[0]) for line in result.stdout.strip().splitlines()[1:]]
+        assert ids == self.instances[:3]
+
+        result = self.runner.invoke(app, ["instance", "list", "--include-archived"])
+        assert result.exit_code == 0, result.stdout
+        assert "（アーカイブ）" in result.stdout
+
+        result = self.runner.invoke(app, ["task-instance", "list", "--include-archived", "--format", "csv"])
+        assert result.exit_code == 0, result.stdout
+        assert len(result.stdout.strip().splitlines()) == 1 + 5
+
+    def test_show_archived_instance(self):
+        """アーカイブ済みのインスタンスの詳細が表示されることを確認"""
+        archive_completed(self.connection.engine, self.cutoff)
+
+        result = self.runner.invoke(app, ["instance", "show", str(self.instances[0])])
+
+        assert result.exit_code == 0, result.stdout
+        assert "アーカイブ日時" in result.stdout
+        assert "受付" in result.stdout
+
+    def test_archived_instance_cannot_be_changed(self):
+        """アーカイブ済みのインスタンスはステータス変更も削除もできないことを確認"""
+        archive_completed(self.connection.engine, self.cutoff)
+        before = self.counters()
+
+        result = self.runner.invoke(app, ["instance", "status", str(self.instances[0]), "実行中"])
+        assert result.exit_code == 1
+        assert "アーカイブ済みのため変更できません" in result.stdout
+
+        result = self.runner.invoke(app, ["instance", "delete", str(self.instances[0]), "--force"], input="y\n")
+        assert result.exit_code == 1
+        assert "アーカイブ済みのため削除できません" in result.stdout
+
+        archived = self.session.get(ArchivedProcessInstance, self.instances[0])
+        assert archived.status == "完了"
+        assert self.session.query(ArchivedTaskInstance).count() == 2
+        assert self.counters() == before
+
+    def test_archive_command(self):
+        """db archive コマンド（--dry-run と不正な期間）を確認"""
+        result = self.runner.invoke(app, ["db", "archive", "--older-than", "90d", "--dry-run"])
+        assert result.exit_code == 0, result.stdout
+        assert "2 process instances" in result.stdout
+        assert self.session.query(ArchivedProcessInstance).count() == 0
+
+        result = self.runner.invoke(app, ["db", "archive", "--older-than", "3 months"])
+        assert result.exit_code == 1
+        assert "Invalid age" in result.stdout
+
+        result = self.runner.invoke(app, ["db", "archive", "--older-than", "90d"])
+        assert result.exit_code == 0, result.stdout
+        assert "Archived 2 process instances and 2 task instances" in result.stdout
+
+    def test_ids_are_not_reused_after_archiving_the_newest(self):
+        """最大IDのインスタンスをアーカイブしても、そのIDが新しい行に使われないことを確認"""
+        result = archive_completed(self.connection.engine, datetime.now() + timedelta(days=1))
+        assert result.process_instances == 4
+        newest_task = max(a.id for a in self.session.query(ArchivedTaskInstance))
+
+        instance = ProcessInstance(process_id=self.process, status="実行中")
+        self.session.add(instance)
+        self.session.flush()
+        task_instance = TaskInstance(process_instance_id=instance.id, task_id=self.task, status="未着手")
+        self.session.add(task_instance)
+        self.session.commit()
+
+        assert instance.id > self.instances[-1]
+        assert task_instance.id > newest_task
+
+    def test_ids_already_in_archive_are_skipped(self):
+        """IDがアーカイブ済みの行と重なるインスタンスは移動せずに残すことを確認"""
+        first, second = self.instances[:2]
+        # IDを再利用するデータベース（再起動後の古いMySQLなど）で起きる重なりを再現する
+        self.session.execute(insert(ArchivedProcessInstance).values(
+            id=first, process_id=self.process, status="完了", archived_at=datetime.now()
+        ))
+        self.session.commit()
+
+        result = archive_completed(self.connection.engine, self.cutoff)
+
+        assert (result.process_instances, result.skipped) == (1, 1)
+        assert self.session.get(ProcessInstance, first) is not None
+        assert self.session.get(ProcessInstance, second) is None
+
+        result = self.runner.invoke(app, ["db", "archive", "--older-than", "90d"])
+        assert result.exit_code == 0, result.stdout
+        assert "Skipped 1 process instances" in result.stdout
+
+    def test_started_at_used_without_completed_at(self):
+        """完了日時がなければ開始日時で判定されることを確認"""
+        self.session.execute(
+            update(ProcessInstance).where(ProcessInstance.id == self.instances[0]).values(completed_at=None)
+        )
+        self.session.commit()
+
+        result = archive_completed(self.connection.engine, self.cutoff)
+
+        assert result.process_instances == 2
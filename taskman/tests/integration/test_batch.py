@@ -0,0 +1,120 @@
+"""
+統合テスト - バッチモードのテスト
+
+このモジュールでは、taskman batch コマンドがファイルや標準入力から読み込んだ
+複数のコマンドを1つのプロセスとセッションで実行することをテストします。
+"""
+
+import pytest
+from sqlalchemy import event
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.models.process import Process
+from taskman.models.task import Task
+
+
+class TestBatchCommandIntegration:
+    """バッチモードの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db, tmp_path):
+        """テスト用のランナーとバッチファイルの保存先を準備"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.tmp_path = tmp_path
+        self.connection = connection
+
+        yield
+
+        db = connection.SessionLocal()
+        db.query(Task).delete()
+        db.query(Process).delete()
+        db.commit()
+        db.close()
+
+    def write_batch(self, text):
+        """バッチファイルを作成してパスを返す"""
+        path = self.tmp_path / "commands.txt"
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    def test_batch_file(self):
+        """ファイルから複数のコマンドを実行するテスト"""
+        path = self.write_batch(
+            "# プロセスとタスクをまとめて登録\n"
+            "process create --name 'バッチプロセス' --description 説明\n"
+            "\n"
+            "task create --name 'バッチタスク1' --process 1\n"
+            "task create --name 'バッチタスク2' --process 1\n"
+            "task list\n"
+        )
+
+        result = self.runner.invoke(app, ["batch", path])
+
+        assert result.exit_code == 0, result.stdout
+        assert "バッチタスク2" in result.stdout
+        assert "4 commands succeeded" in result.stdout
+
+        db = self.connection.SessionLocal()
+        assert db.query(Task).count() == 2
+        db.close()
+
+    def test_batch_reuses_one_session(self, monkeypatch):
+        """全コマンドが1つのセッションを共有することを確認"""
+        created = []
+        factory = self.connection.SessionLocal
+
+        def counting_factory():
+            session = factory()
+            created.append(session)
+            return session
+
+        monkeypatch.setattr(self.connection, "SessionLocal", counting_factory)
+        path = self.write_batch("process create --name A\nprocess create --name B\nprocess list\n")
+
+        result = self.runner.invoke(app, ["batch", path])
+
+        assert result.exit_code == 0, result.stdout
+        assert len(created) == 1
+
+    def test_batch_reports_failures(self):
+        """失敗したコマンドの行番号が報告されることを確認"""
+        path = self.write_batch(
+            "process create --name A\n"
+            "process show 999\n"
+            "process unknown-command\n"
+            "process create --name B\n"
+        )
+
+        result = self.runner.invoke(app, ["batch", path])
+
+        assert result.exit_code == 1
+        assert "2 commands succeeded, 2 failed (lines: 2, 3)" in result.stdout
+
+    def test_stop_on_error(self):
+        """--stop-on-error で最初の失敗で停止することを確認"""
+        path = self.write_batch("process show 999\nprocess create --name A\n")
+
+        result = self.runner.invoke(app, ["batch", path, "--stop-on-error"])
+
+        assert result.exit_code == 1
+        db = self.connection.SessionLocal()
+        assert db.query(Process).count() == 0
+        db.close()
+
+    def test_batch_from_stdin(self):
+        """標準入力からコマンドを読み込むテスト"""
+        result = self.runner.invoke(app, ["batch", "-"], input="process create --name 標準入力\n")
+
+        assert result.exit_code == 0, result.stdout
+        assert "1 commands succeeded" in result.stdout
+
+    def test_nested_batch_is_rejected(self):
+        """バッチの中からshell/batchを実行できないことを確認"""
+        path = self.write_batch("batch other.txt\n")
+
+        result = self.runner.invoke(app, ["batch", path])
+
+        assert result.exit_code == 1
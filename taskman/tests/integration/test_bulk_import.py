@@ -0,0 +1,198 @@
+"""
+統合テスト - 一括インポートのテスト
+
+このモジュールでは、taskman import コマンドによる CSV / NDJSON からの
+タスク、タスクステップ、ワークフローの一括登録をテストします。
+"""
+
+import json
+
+import pytest
+from sqlalchemy import event
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.models.process import Process
+from taskman.models.task import Task
+from taskman.models.task_step import TaskStep
+from taskman.models.workflow import Workflow
+
+
+class TestBulkImportIntegration:
+    """一括インポートの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db, tmp_path):
+        """テスト用のプロセスとタスクを作成"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.tmp_path = tmp_path
+        self.connection = connection
+
+        db = connection.SessionLocal()
+        process = Process(name="インポート先プロセス")
+        other = Process(name="別のプロセス")
+        db.add_all([process, other])
+        db.flush()
+        task = Task(name="既存タスク", process_id=process.id)
+        other_task = Task(name="別プロセスのタスク", process_id=other.id)
+        db.add_all([task, other_task])
+        db.flush()
+        db.add(TaskStep(task_id=task.id, step_number=1, name="既存ステップ"))
+        db.commit()
+        self.process_id = process.id
+        self.task_id = task.id
+        self.other_task_id = other_task.id
+        db.close()
+
+        yield
+
+        db = connection.SessionLocal()
+        db.query(Workflow).delete()
+        db.query(TaskStep).delete()
+        db.query(Task).delete()
+        db.query(Process).delete()
+        db.commit()
+        db.close()
+
+    def write_file(self, name, text):
+        """入力ファイルを作成してパスを返す"""
+        path = self.tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+
+    def write_ndjson(self, name, rows):
+        return self.write_file(name, "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+
+    def test_import_tasks_csv(self):
+        """CSVからタスクを登録し、プロセスの進捗カウンタが更新されることを確認"""
+        path = self.write_file(
+            "tasks.csv",
+            "process_id,name,priority,status,due_date\n"
+            f"{self.process_id},CSVタスク1,高,,2026-01-31\n"
+            f"{self.process_id},CSVタスク2,,完了,\n",
+        )
+
+        result = self.runner.invoke(app, ["import", "tasks", path])
+
+        assert result.exit_code == 0, result.stdout
+        assert "タスク 2件を登録しました" in result.stdout
+
+        db = self.connection.SessionLocal()
+        task = db.query(Task).filter(Task.name == "CSVタスク1").one()
+        assert task.priority == "高"
+        assert task.status == "未着手"
+        assert str(task.due_date) == "2026-01-31"
+        process = db.get(Process, self.process_id)
+        assert (process.total_tasks, process.completed_tasks) == (3, 1)
+        db.close()
+
+    def test_row_errors_are_reported(self):
+        """不正な行は行番号付きで報告され、正しい行は登録されることを確認"""
+        path = self.write_file(
+            "tasks.ndjson",
+            json.dumps({"process_id": self.process_id, "name": "正しい行"}) + "\n"
+            + json.dumps({"process_id": 999, "name": "存在しないプロセス"}) + "\n"
+            + "{壊れたJSON\n"
+            + json.dumps({"process_id": self.process_id, "name": "優先度不正", "priority": "最高"}) + "\n",
+        )
+
+        result = self.runner.invoke(app, ["import", "tasks", path])
+
+        assert result.exit_code == 1
+        assert "プロセス（ID: 999）が見つかりません" in result.stdout
+        assert "JSONを解析できません" in result.stdout
+        assert "priority" in result.stdout
+        assert "タスク 1件を登録しました（エラー 3件）" in result.stdout
+
+        db = self.connection.SessionLocal()
+        assert db.query(Task).filter(Task.name == "正しい行").count() == 1
+        db.close()
+
+    def test_strict_rolls_back_everything(self):
+        """--strict ではエラーがあると1件も登録されないことを確認"""
+        path = self.write_ndjson("tasks.ndjson", [
+            {"process_id": self.process_id, "name": "正しい行"},
+            {"process_id": 999, "name": "不正な行"},
+        ])
+
+        result = self.runner.invoke(app, ["import", "tasks", path, "--strict"])
+
+        assert result.exit_code == 1
+        db = self.connection.SessionLocal()
+        assert db.query(Task).count() == 2
+        db.close()
+
+    def test_dry_run(self):
+        """--dry-run では検証のみ行われることを確認"""
+        path = self.write_ndjson("tasks.ndjson", [{"process_id": self.process_id, "name": "ドライラン"}])
+
+        result = self.runner.invoke(app, ["import", "tasks", path, "--dry-run"])
+
+        assert result.exit_code == 0, result.stdout
+        assert "1件を登録できます" in result.stdout
+        db = self.connection.SessionLocal()
+        assert db.query(Task).filter(Task.name == "ドライラン").count() == 0
+        db.close()
+
+    def test_import_steps_assigns_numbers(self):
+        """ステップ番号の自動採番と重複チェックを確認"""
+        path = self.write_ndjson("steps.ndjson", [
+            {"task_id": self.task_id, "name": "自動採番1"},
+            {"task_id": self.task_id, "name": "番号指定", "step_number": 5},
+            {"task_id": self.task_id, "name": "自動採番2"},
+            {"task_id": self.task_id, "name": "重複", "step_number": 1},
+        ])
+
+        result = self.runner.invoke(app, ["import", "steps", path])
+
+        assert result.exit_code == 1
+        assert "ステップ番号 1 は既に" in result.stdout
+
+        db = self.connection.SessionLocal()
+        numbers = {s.name: s.step_number for s in db.query(TaskStep).filter(TaskStep.task_id == self.task_id)}
+        assert numbers == {"既存ステップ": 1, "自動採番1": 2, "番号指定": 5, "自動採番2": 6}
+        db.close()
+
+    def test_import_workflows_checks_task_process(self):
+        """ワークフローのタスクが同じプロセスに属することを確認"""
+        path = self.write_file(
+            "workflows.csv",
+            "process_id,from_task_id,to_task_id,condition_type,condition_expression\n"
+            f"{self.process_id},,{self.task_id},常時,\n"
+            f"{self.process_id},{self.task_id},{self.other_task_id},常時,\n"
+            f"{self.process_id},{self.task_id},,条件付き,\n",
+        )
+
+        result = self.runner.invoke(app, ["import", "workflows", path])
+
+        assert result.exit_code == 1
+        assert f"タスク（ID: {self.other_task_id}）はプロセス" in result.stdout
+        assert "condition_expression が必要です" in result.stdout
+
+        db = self.connection.SessionLocal()
+        assert db.query(Workflow).count() == 1
+        db.close()
+
+    def test_statement_count_is_per_chunk(self):
+        """参照チェックとINSERTが行ごとではなくチャンクごとに発行されることを確認"""
+        rows = [{"process_id": self.process_id, "name": f"タスク{i}"} for i in range(200)]
+        path = self.write_ndjson("tasks.ndjson", rows)
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = self.connection.engine
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            result = self.runner.invoke(app, ["import", "tasks", path, "--batch-size", "100"])
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        assert result.exit_code == 0, result.stdout
+        inserts = [s for s in statements if s.startswith("INSERT INTO task ")]
+        assert len(inserts) == 2
+        assert len(statements) < 10
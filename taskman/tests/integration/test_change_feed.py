@@ -0,0 +1,155 @@
+"""
+統合テスト - プロセスモニターの変更検知のテスト
+
+このモジュールでは、透かしによる変更検知で、データに変化がなければ
+定期更新のクエリが1回だけになること、追加・変更されたプロセスインスタンスが
+差分で読み込まれること、削除があれば全件を読み込み直すことをテストします。
+"""
+
+import pytest
+from sqlalchemy import event, update
+
+from taskman.app.db.activity_db import ActivityDatabase
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.app.db.process_db import ProcessDatabase
+from taskman.app.gui.loader import load_snapshot
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+
+class TestChangeFeedIntegration:
+    """変更検知の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """プロセス1件とインスタンス2件を作成"""
+        from taskman.database import connection
+
+        self.engine = connection.engine
+        self.session = connection.SessionLocal()
+        process = Process(name="受注", status="アクティブ")
+        self.session.add(process)
+        self.session.flush()
+        self.session.add(Task(process_id=process.id, name="受付", status="未着手"))
+        self.session.add_all([
+            ProcessInstance(process_id=process.id, status="実行中"),
+            ProcessInstance(process_id=process.id, status="実行中"),
+        ])
+        self.session.commit()
+        self.process = process.id
+
+        self.db = ProcessMonitorDB()
+        self.db.session = connection.SessionLocal()
+        self.db.connected = True
+        self.sources = (ProcessDatabase(self.db), ActivityDatabase(self.db))
+
+        yield
+
+        self.db.session.close()
+        self.session.close()
+
+    def load(self, previous=None, process_id=None):
+        # 前回の読み込み以降に書き込まれた行が見えるようトランザクションを終える
+        self.db.session.commit()
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", count)
+        try:
+            snapshot = load_snapshot(*self.sources, 1, process_id, previous=previous)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count)
+        return snapshot, statements
+
+    def test_first_load_reads_everything(self):
+        """初回はすべての部分を読み込むことを確認"""
+        snapshot, _ = self.load(process_id=self.process)
+
+        assert set(snapshot.watermarks) == {"process", "task", "process_instance", "task_instance"}
+        assert snapshot.watermarks["process_instance"].row_count == 2
+        assert len(snapshot.process_instances) == 2
+        assert snapshot.process_details["name"] == "受注"
+        assert [a["description"] for a in snapshot.activities] == ["受付が未着手になりました"]
+        assert snapshot.process_instance_updates is None
+
+    def test_idle_refresh_is_one_query(self):
+        """変化がなければ透かしのクエリ1回だけで済むことを確認"""
+        first, _ = self.load(process_id=self.process)
+
+        snapshot, statements = self.load(first, process_id=self.process)
+
+        assert len(statements) == 1
+        assert snapshot.unchanged
+        assert snapshot.watermarks == first.watermarks
+
+    def test_changed_instances_are_read_as_delta(self):
+        """追加・変更されたインスタンスだけが差分で読み込まれることを確認"""
+        first, _ = self.load()
+        changed = first.process_instances[-1]["id"]
+        self.session.execute(
+            update(ProcessInstance).where(ProcessInstance.id == changed).values(status="完了")
+        )
+        added = ProcessInstance(process_id=self.process, status="実行中")
+        self.session.add(added)
+        self.session.commit()
+
+        snapshot, _ = self.load(first)
+
+        assert snapshot.process_instances is None
+        updates = {row["id"]: row["status"] for row in snapshot.process_instance_updates}
+        assert updates[changed] == "完了"
+        assert updates[added.id] == "実行中"
+        # 実行中のプロセスの一覧はインスタンスに依存するため読み込み直す
+        assert snapshot.running_processes is not None
+
+    def test_task_instance_change_reads_only_its_instance(self):
+        """タスクインスタンスのステータス変更では、そのインスタンスだけが差分で読み込まれることを確認"""
+        self.session.add(ProcessInstance(process_id=self.process, status="実行中"))
+        self.session.commit()
+        task = self.session.query(Task).one()
+        oldest, middle, newest = (i.id for i in self.session.query(ProcessInstance).order_by(ProcessInstance.id))
+        task_instances = {
+            instance_id: TaskInstance(process_instance_id=instance_id, task_id=task.id, status="実行中")
+            for instance_id in (oldest, middle, newest)
+        }
+        self.session.add_all(task_instances.values())
+        self.session.commit()
+        first, _ = self.load()
+
+        task_instances[oldest].status = "完了"
+        self.session.commit()
+        snapshot, _ = self.load(first)
+
+        assert snapshot.process_instances is None
+        updates = {row["id"]: row["progress"] for row in snapshot.process_instance_updates}
+        assert updates[oldest] == 100
+        # 透かしと同じ更新日時のタスクインスタンス（最新のもの）のインスタンスは、透かしが
+        # 等号を含むため再び返る。プロセスの更新日時は変わらないため、ほかのインスタンスは読まない
+        assert set(updates) == {oldest, newest}
+        assert middle not in updates
+
+        # タスクインスタンスの削除は差分では反映できないため全件を読み込み直す
+        self.session.delete(task_instances[middle])
+        self.session.commit()
+        snapshot, _ = self.load(snapshot)
+        assert snapshot.process_instance_updates is None
+        assert len(snapshot.process_instances) == 3
+
+    def test_deletion_reloads_all_instances(self):
+        """削除があった場合は差分ではなく全件を読み込み直すことを確認"""
+        first, _ = self.load()
+        # 最大IDの行を消すとSQLiteではIDが再利用される（その場合は差分の置き換えで正しく反映される）ため、それ以外を消す
+        self.session.query(ProcessInstance).filter(
+            ProcessInstance.id == first.process_instances[-1]["id"]
+        ).delete()
+        self.session.add(ProcessInstance(process_id=self.process, status="実行中"))
+        self.session.commit()
+
+        snapshot, _ = self.load(first)
+
+        assert snapshot.process_instance_updates is None
+        assert len(snapshot.process_instances) == 2
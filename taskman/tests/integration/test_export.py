@@ -0,0 +1,97 @@
+"""
+統合テスト - データエクスポートのテスト
+
+このモジュールでは、taskman export コマンドによる全テーブルの
+NDJSON / CSV ファイルへのストリーミング出力をテストします。
+"""
+
+import csv
+import gzip
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.commands.export import EXPORT_TABLES, export_tables
+from taskman.config.database import DatabaseSettings
+from taskman.database.connection import build_engine
+from taskman.models.process import Process
+from taskman.models.task import Task
+
+
+class TestExportIntegration:
+    """エクスポートの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db, tmp_path):
+        """テスト用のプロセスとタスクを作成"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.output_dir = tmp_path / "export"
+        self.connection = connection
+
+        db = connection.SessionLocal()
+        process = Process(name="エクスポートプロセス")
+        db.add(process)
+        db.flush()
+        db.add_all([Task(name=f"タスク{i}", process_id=process.id) for i in range(5)])
+        db.commit()
+        db.close()
+
+        yield
+
+        db = connection.SessionLocal()
+        db.query(Task).delete()
+        db.query(Process).delete()
+        db.commit()
+        db.close()
+
+    def test_export_ndjson(self):
+        """全テーブルがNDJSONで出力されることを確認"""
+        result = self.runner.invoke(app, ["export", "-o", str(self.output_dir), "--batch-size", "2"])
+
+        assert result.exit_code == 0, result.stdout
+        assert sorted(p.name for p in self.output_dir.iterdir()) == sorted(f"{n}.ndjson" for n in EXPORT_TABLES)
+
+        lines = (self.output_dir / "task.ndjson").read_text(encoding="utf-8").splitlines()
+        rows = [json.loads(line) for line in lines]
+        assert [row["name"] for row in rows] == [f"タスク{i}" for i in range(5)]
+        assert rows[0]["status"] == "未着手"
+        assert "created_at" in rows[0]
+
+    def test_export_csv_gzip(self):
+        """CSVのgzip圧縮出力とテーブルの指定を確認"""
+        result = self.runner.invoke(
+            app, ["export", "-o", str(self.output_dir), "--format", "csv", "--gzip", "--tables", "process,task"]
+        )
+
+        assert result.exit_code == 0, result.stdout
+        assert sorted(p.name for p in self.output_dir.iterdir()) == ["process.csv.gz", "task.csv.gz"]
+
+        with gzip.open(self.output_dir / "process.csv.gz", "rt", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["name"] == "エクスポートプロセス"
+        assert rows[0]["total_tasks"] == "5"
+
+    def test_unknown_table(self):
+        """存在しないテーブルを指定した場合のエラーを確認"""
+        result = self.runner.invoke(app, ["export", "-o", str(self.output_dir), "--tables", "unknown"])
+
+        assert result.exit_code == 1
+        assert "不明なテーブルです" in result.stdout
+
+    def test_parallel_export(self):
+        """テーブルごとに並列で出力しても結果が同じであることを確認"""
+        engine = build_engine(str(self.connection.engine.url), DatabaseSettings(pool_mode="null"))
+        names = list(EXPORT_TABLES)
+        self.output_dir.mkdir()
+
+        results = export_tables(engine, names, str(self.output_dir), "ndjson", jobs=4)
+        engine.dispose()
+
+        assert [name for name, _, _ in results] == names
+        counts = {name: count for name, _, count in results}
+        assert counts["task"] == 5
+        assert counts["process"] == 1
@@ -0,0 +1,90 @@
+"""
+統合テスト - 複合インデックスと実行計画表示のテスト
+
+このモジュールでは、モデルに宣言した複合インデックスが作成されること、
+マイグレーションで既存のデータベースに不足しているインデックスが追加されること、
+db explain コマンドでモニターのクエリがインデックスを使うことをテストします。
+"""
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.database.connection import Base
+from taskman.database.migrations import upgrade
+
+# モデルに宣言したインデックス: (テーブル, インデックス名, 列)
+EXPECTED_INDEXES = [
+    ("task_instance", "ix_task_instance_process_instance_status", ["process_instance_id", "status"]),
+    ("task_instance", "ix_task_instance_updated_at", ["updated_at"]),
+    ("task_instance", "ix_task_instance_task_status", ["task_id", "status", "process_instance_id"]),
+    ("task", "ix_task_process_status", ["process_id", "status"]),
+    ("process_instance", "ix_process_instance_status_started_at", ["status", "started_at"]),
+    ("workflow", "ix_workflow_process_sequence_number", ["process_id", "sequence_number"]),
+    ("task_step", "ix_task_step_task_step_number", ["task_id", "step_number"]),
+]
+
+
+class TestIndexesIntegration:
+    """複合インデックスの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db, temp_db_path):
+        """インデックス確認用の別のデータベースを用意"""
+        self.runner = CliRunner()
+        self.engine = create_engine(temp_db_path)
+        Base.metadata.create_all(bind=self.engine)
+        yield
+        self.engine.dispose()
+
+    def indexes(self, table):
+        return {index["name"]: index["column_names"] for index in inspect(self.engine).get_indexes(table)}
+
+    def test_indexes_are_created(self):
+        """create_all でインデックスが作成されることを確認"""
+        for table, name, columns in EXPECTED_INDEXES:
+            assert self.indexes(table).get(name) == columns
+
+    def test_migrate_adds_missing_indexes(self):
+        """マイグレーション導入前のデータベースに不足しているインデックスだけが追加されることを確認"""
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_task_instance_process_instance_status"))
+            conn.execute(text("DROP INDEX ix_workflow_process_sequence_number"))
+
+        messages = []
+        upgrade(self.engine, log=messages.append)
+
+        created = [m for m in messages if m.startswith("Created index")]
+        assert created == [
+            "Created index ix_task_instance_process_instance_status",
+            "Created index ix_workflow_process_sequence_number",
+        ]
+        assert "ix_workflow_process_sequence_number" in self.indexes("workflow")
+
+    def test_explain_uses_indexes(self):
+        """db explain でモニターのクエリがインデックスを使うことを確認"""
+        result = self.runner.invoke(app, ["db", "explain"])
+
+        assert result.exit_code == 0, result.stdout
+        for name in ("task-instances", "running-instances", "task-steps", "workflow-edges", "workflow-steps"):
+            assert name in result.stdout
+        assert "ix_task_instance_process_instance_status" in result.stdout
+        assert "ix_process_instance_status_started_at" in result.stdout
+        assert "ix_task_step_task_step_number" in result.stdout
+        assert "ix_task_instance_task_status" in result.stdout
+
+    def test_explain_single_query(self):
+        """--query で1つのクエリだけを表示できることを確認"""
+        result = self.runner.invoke(app, ["db", "explain", "--query", "workflow-edges"])
+
+        assert result.exit_code == 0, result.stdout
+        assert "ix_workflow_process_sequence_number" in result.stdout
+        assert "task-steps" not in result.stdout
+
+    def test_explain_unknown_query(self):
+        """存在しないクエリ名ではエラーになることを確認"""
+        result = self.runner.invoke(app, ["db", "explain", "--query", "nope"])
+
+        assert result.exit_code == 1
+        assert "Unknown query" in result.stdout
@@ -0,0 +1,119 @@
+"""
+統合テスト - 一覧コマンドのページネーションと出力形式のテスト
+
+このモジュールでは、各 list コマンドの --limit/--after による
+キーセットページネーションと、--format json/ndjson/csv 出力をテストします。
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+from taskman.models.task_step import TaskStep
+from taskman.models.workflow import Workflow
+from taskman.models.objective import Objective
+
+
+LIST_COMMANDS = ["objective", "process", "task", "workflow", "instance", "task-instance", "step"]
+
+
+class TestListOutputIntegration:
+    """一覧コマンドの出力の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """各テーブルに5行ずつテストデータを作成"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+
+        db = connection.SessionLocal()
+        process = Process(name="一覧プロセス")
+        db.add(process)
+        db.flush()
+        instance = ProcessInstance(process_id=process.id, status="実行中", created_by="tester")
+        db.add(instance)
+        db.flush()
+        for i in range(5):
+            task = Task(name=f"タスク{i}", process_id=process.id)
+            db.add(task)
+            db.flush()
+            db.add_all([
+                Objective(title=f"目標{i}"),
+                Workflow(process_id=process.id, to_task_id=task.id),
+                TaskStep(task_id=task.id, step_number=1, name=f"ステップ{i}"),
+                TaskInstance(process_instance_id=instance.id, task_id=task.id, status="未着手"),
+            ])
+        for i in range(4):
+            db.add(Process(name=f"追加プロセス{i}"))
+            db.add(ProcessInstance(process_id=process.id, status="完了"))
+        db.commit()
+        db.close()
+
+        yield
+
+        db = connection.SessionLocal()
+        for model in (TaskInstance, ProcessInstance, TaskStep, Workflow, Task, Process, Objective):
+            db.query(model).delete()
+        db.commit()
+        db.close()
+
+    def list_ids(self, command, *args):
+        result = self.runner.invoke(app, [command, "list", "--format", "ndjson", *args])
+        assert result.exit_code == 0, result.stdout
+        return [json.loads(line)["id"] for line in result.stdout.splitlines()]
+
+    @pytest.mark.parametrize("command", LIST_COMMANDS)
+    def test_keyset_pagination(self, command):
+        """--limit/--after で全件を重複なくページングできることを確認"""
+        all_ids = self.list_ids(command)
+        assert len(all_ids) == 5
+
+        first = self.list_ids(command, "--limit", "2")
+        second = self.list_ids(command, "--limit", "2", "--after", str(first[-1]))
+        rest = self.list_ids(command, "--after", str(second[-1]))
+
+        assert first + second + rest == all_ids
+
+    def test_json_format(self):
+        """JSON配列として出力されることを確認"""
+        result = self.runner.invoke(app, ["instance", "list", "--format", "json", "--limit", "1"])
+
+        assert result.exit_code == 0, result.stdout
+        rows = json.loads(result.stdout)
+        assert rows[0]["process_name"] == "一覧プロセス"
+        assert rows[0]["task_count"] == 5
+        assert rows[0]["created_by"] == "tester"
+
+    def test_csv_format(self):
+        """CSVとして出力されることを確認"""
+        result = self.runner.invoke(app, ["task", "list", "--format", "csv"])
+
+        assert result.exit_code == 0, result.stdout
+        rows = list(csv.DictReader(io.StringIO(result.stdout)))
+        assert [row["name"] for row in rows] == [f"タスク{i}" for i in range(5)]
+        assert rows[0]["assigned_to"] == ""
+
+    def test_table_next_page_hint(self):
+        """表形式でページが埋まったときに次のページの指定方法が表示されることを確認"""
+        result = self.runner.invoke(app, ["task", "list", "--limit", "2"])
+
+        assert result.exit_code == 0, result.stdout
+        assert "タスク1" in result.stdout
+        assert "タスク2" not in result.stdout
+        assert "--after" in result.stdout
+
+    def test_invalid_format(self):
+        """未対応の出力形式を指定した場合のエラーを確認"""
+        result = self.runner.invoke(app, ["process", "list", "--format", "xml"])
+
+        assert result.exit_code == 1
+        assert "無効な出力形式です" in result.stdout
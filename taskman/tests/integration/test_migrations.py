@@ -0,0 +1,235 @@
+"""
+統合テスト - スキーママイグレーションのテスト
+
+このモジュールでは、バージョン管理されたマイグレーションの適用と取り消し、
+マイグレーション導入前のデータベースへの適用（列の追加とバッチでの
+バックフィル）、および db migrate/upgrade/downgrade/status/reset
+コマンドをテストします。
+"""
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, select, text
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.database.connection import Base
+from taskman.database.migrations import (
+    MIGRATIONS, MigrationError, current_version, downgrade, head, status, upgrade,
+)
+from taskman.models.process import Process
+
+
+class TestMigrationsIntegration:
+    """マイグレーションの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db, temp_db_path):
+        """マイグレーション用の空のデータベースを用意"""
+        self.runner = CliRunner()
+        self.engine = create_engine(temp_db_path)
+        yield
+        self.engine.dispose()
+
+    def tables(self):
+        return set(inspect(self.engine).get_table_names())
+
+    def columns(self, table):
+        return {column["name"] for column in inspect(self.engine).get_columns(table)}
+
+    def test_upgrade_empty_database(self):
+        """空のデータベースが最新バージョンまで作成されることを確認"""
+        applied = upgrade(self.engine)
+
+        assert [m.version for m in applied] == [m.version for m in MIGRATIONS]
+        assert current_version(self.engine) == head()
+        assert {t.name for t in Base.metadata.sorted_tables} <= self.tables()
+        assert "ix_task_process_status" in {i["name"] for i in inspect(self.engine).get_indexes("task")}
+        assert upgrade(self.engine) == []
+
+    def test_upgrade_and_downgrade_step_by_step(self):
+        """指定したバージョンまでの適用と取り消しを確認"""
+        upgrade(self.engine, 1)
+        assert current_version(self.engine) == 1
+        assert [applied_at is not None for _, applied_at in status(self.engine)] == [True] + [False] * (head() - 1)
+
+        upgrade(self.engine)
+        reverted = downgrade(self.engine, 2)
+
+        assert [m.version for m in reverted] == list(range(head(), 2, -1))
+        assert "total_instances" not in self.columns("process")
+        assert "total_tasks" in self.columns("process")
+        assert "ix_task_process_status" not in {i["name"] for i in inspect(self.engine).get_indexes("task")}
+
+        downgrade(self.engine, 0)
+        assert current_version(self.engine) == 0
+        assert "process" not in self.tables()
+
+    def test_invalid_targets(self):
+        """存在しないバージョンや逆方向の指定がエラーになることを確認"""
+        upgrade(self.engine, 2)
+
+        with pytest.raises(MigrationError):
+            upgrade(self.engine, 99)
+        with pytest.raises(MigrationError):
+            upgrade(self.engine, 1)
+        with pytest.raises(MigrationError):
+            downgrade(self.engine, 3)
+
+    def test_legacy_database_is_backfilled_in_batches(self):
+        """カウンタ列のない既存データベースで列が追加されバッチで埋められることを確認"""
+        Base.metadata.create_all(bind=self.engine)
+        with self.engine.begin() as conn:
+            for column in ("total_tasks", "completed_tasks", "total_instances", "completed_instances"):
+                conn.execute(text(f"ALTER TABLE process DROP COLUMN {column}"))
+            for i in range(1, 6):
+                conn.execute(text(
+                    "INSERT INTO process (id, name, status, created_at) VALUES (:id, :name, 'アクティブ', CURRENT_TIMESTAMP)"
+                ), {"id": i, "name": f"プロセス{i}"})
+            conn.execute(text(
+                "INSERT INTO task (process_id, name, status, created_at) "
+                "VALUES (1, 'A', '完了', CURRENT_TIMESTAMP), (1, 'B', '未着手', CURRENT_TIMESTAMP), "
+                "(5, 'C', '完了', CURRENT_TIMESTAMP)"
+            ))
+            conn.execute(text(
+                "INSERT INTO process_instance (process_id, status, started_at) VALUES (5, '完了', CURRENT_TIMESTAMP)"
+            ))
+
+        updates = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE process "):
+                updates.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", count)
+        try:
+            upgrade(self.engine, batch_size=2)
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count)
+
+        process = Process.__table__
+        with self.engine.connect() as conn:
+            rows = {row.id: row for row in conn.execute(select(process))}
+        assert (rows[1].total_tasks, rows[1].completed_tasks) == (2, 1)
+        assert (rows[5].total_tasks, rows[5].completed_tasks) == (1, 1)
+        assert (rows[5].total_instances, rows[5].completed_instances) == (1, 1)
+        assert rows[3].total_tasks == 0
+        # ID 1-5 を2件ずつ: タスクのカウンタとインスタンスのカウンタで各3回
+        assert len(updates) == 6
+
+    def test_instance_tables_rebuilt_with_autoincrement(self):
+        """AUTOINCREMENTのないインスタンスのテーブルが行とインデックスを残したまま作り直されることを確認"""
+        def table_sql(name):
+            with self.engine.connect() as conn:
+                return conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+                ).scalar()
+
+        upgrade(self.engine)
+        downgrade(self.engine, 8)
+        assert "AUTOINCREMENT" not in table_sql("process_instance")
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO process (id, name, status) VALUES (1, '受注', 'アクティブ')"))
+            conn.execute(text("INSERT INTO task (id, process_id, name) VALUES (1, 1, '受付')"))
+            conn.execute(text("INSERT INTO process_instance (id, process_id, status) VALUES (3, 1, '実行中')"))
+            conn.execute(text(
+                "INSERT INTO task_instance (id, process_instance_id, task_id, status) VALUES (4, 3, 1, '未着手')"
+            ))
+            # ID 7 のインスタンスとタスクインスタンスはアーカイブ済み
+            conn.execute(text(
+                "INSERT INTO process_instance_archive (id, process_id, status, archived_at) "
+                "VALUES (7, 1, '完了', CURRENT_TIMESTAMP)"
+            ))
+            conn.execute(text(
+                "INSERT INTO task_instance_archive (id, process_instance_id, task_id, status, archived_at) "
+                "VALUES (7, 7, 1, '完了', CURRENT_TIMESTAMP)"
+            ))
+        indexes = {i["name"] for i in inspect(self.engine).get_indexes("task_instance")}
+
+        upgrade(self.engine)
+
+        assert "AUTOINCREMENT" in table_sql("process_instance")
+        assert "AUTOINCREMENT" in table_sql("task_instance")
+        assert {i["name"] for i in inspect(self.engine).get_indexes("task_instance")} == indexes
+        with self.engine.begin() as conn:
+            assert conn.execute(text("SELECT status FROM task_instance WHERE id = 4")).scalar() == "未着手"
+            conn.execute(text("INSERT INTO process_instance (process_id, status) VALUES (1, '実行中')"))
+            conn.execute(text("INSERT INTO task_instance (process_instance_id, task_id, status) VALUES (3, 1, '未着手')"))
+            assert conn.execute(text("SELECT max(id) FROM process_instance")).scalar() == 8
+            assert conn.execute(text("SELECT max(id) FROM task_instance")).scalar() == 8
+
+    def test_duplicate_process_versions_fail_clearly(self):
+        """名前とバージョンが重複したプロセスがあると一意インデックスの追加が失敗することを確認"""
+        upgrade(self.engine, 6)
+        with self.engine.begin() as conn:
+            # 一意インデックスが追加される前に作成されたデータベース
+            conn.execute(text("DROP INDEX ix_process_name_version"))
+            for i, (name, version) in enumerate([("受注", 1), ("受注", 1), ("請求", None), ("請求", 1)], 1):
+                conn.execute(text(
+                    "INSERT INTO process (id, name, version, status, created_at) "
+                    "VALUES (:id, :name, :version, 'アクティブ', CURRENT_TIMESTAMP)"
+                ), {"id": i, "name": name, "version": version})
+
+        with pytest.raises(MigrationError) as error:
+            upgrade(self.engine)
+
+        message = str(error.value)
+        assert "2 duplicate definition(s)" in message
+        assert "'受注' version 1: 2 rows (ids 1..2)" in message
+        assert "'請求' version 1" in message  # バージョンのない行は1として扱う
+        assert current_version(self.engine) == 6
+
+        with self.engine.begin() as conn:
+            conn.execute(text("UPDATE process SET version = 2 WHERE id IN (2, 4)"))
+        upgrade(self.engine)
+        assert current_version(self.engine) == head()
+        assert "ix_process_name_version" in {i["name"] for i in inspect(self.engine).get_indexes("process")}
+
+    def test_cli_migrate_and_status(self):
+        """db migrate と db status コマンドを確認"""
+        result = self.runner.invoke(app, ["db", "status"])
+        assert result.exit_code == 0, result.stdout
+        assert "Current version: 0" in result.stdout
+        assert "pending" in result.stdout
+
+        result = self.runner.invoke(app, ["db", "migrate"])
+        assert result.exit_code == 0, result.stdout
+        assert f"schema version is {head()}" in result.stdout
+
+        result = self.runner.invoke(app, ["db", "status"])
+        assert f"Current version: {head()}" in result.stdout
+        assert "(0 pending)" in result.stdout
+
+        result = self.runner.invoke(app, ["db", "upgrade"])
+        assert "up to date" in result.stdout
+
+    def test_cli_upgrade_unknown_version(self):
+        """存在しないバージョンへの upgrade がエラーになることを確認"""
+        result = self.runner.invoke(app, ["db", "upgrade", "99"])
+
+        assert result.exit_code == 1
+        assert "Unknown schema version" in result.stdout
+
+    def test_cli_downgrade_and_reset(self):
+        """db downgrade と db reset コマンドを確認（確認を拒否すると何もしない）"""
+        from taskman.database import connection
+
+        upgrade(connection.engine)
+        result = self.runner.invoke(app, ["db", "downgrade", "3"], input="n\n")
+        assert result.exit_code == 1
+        assert current_version(connection.engine) == head()
+
+        result = self.runner.invoke(app, ["db", "downgrade", "3", "--yes"])
+        assert result.exit_code == 0, result.stdout
+        assert current_version(connection.engine) == 3
+
+        session = connection.SessionLocal()
+        session.add(Process(name="消える", status="アクティブ"))
+        session.commit()
+        session.close()
+
+        result = self.runner.invoke(app, ["db", "reset", "--yes"])
+        assert result.exit_code == 0, result.stdout
+        assert current_version(connection.engine) == head()
+        session = connection.SessionLocal()
+        assert session.query(Process).count() == 0
+        session.close()
@@ -0,0 +1,103 @@
+"""
+統合テスト - プロセスモニターの読み取りキャッシュと書き込みのテスト
+
+このモジュールでは、1回の更新の中で get_processes が1回だけ実行されること、
+およびGUIからのインスタンスの開始・完了・中断がデータベースに反映され、
+キャッシュが破棄されることをテストします。
+"""
+
+import pytest
+from sqlalchemy import event
+
+from taskman.app.db.activity_db import ActivityDatabase
+from taskman.app.db.cache import CachedMonitorDB, MonitorCache
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.app.db.process_db import ProcessDatabase
+from taskman.app.gui.loader import load_snapshot
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+
+
+class TestMonitorCacheIntegration:
+    """読み取りキャッシュの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """アクティブなプロセスと休止中のプロセスを作成"""
+        from taskman.database import connection
+
+        self.engine = connection.engine
+        session = connection.SessionLocal()
+        process = Process(name="受注", status="アクティブ")
+        inactive = Process(name="旧受注", status="非アクティブ")
+        session.add_all([process, inactive])
+        session.flush()
+        session.add(Task(process_id=process.id, name="受付", status="未着手"))
+        session.commit()
+        self.process, self.inactive = process.id, inactive.id
+        session.close()
+
+        monitor = ProcessMonitorDB()
+        monitor.session = connection.SessionLocal()
+        monitor.connected = True
+        self.cache = MonitorCache()
+        self.db = CachedMonitorDB(monitor, self.cache)
+        self.process_db = ProcessDatabase(self.db)
+        self.activity_db = ActivityDatabase(self.db)
+
+        yield
+
+        monitor.session.close()
+
+    def count_statements(self, action):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", count)
+        try:
+            action()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count)
+        return statements
+
+    def test_refresh_runs_get_processes_once(self):
+        """1回の更新で同じプロセス一覧のクエリが重複しないことを確認"""
+        statements = self.count_statements(
+            lambda: load_snapshot(self.process_db, self.activity_db, 1, self.process)
+        )
+
+        process_lists = [s for s in statements if "ORDER BY p.status != 'アクティブ'" in s]
+        assert len(process_lists) == 1
+        assert self.cache.stats().by_method['get_processes'] == (1, 1)
+
+        # 選択時の名前とバージョンの検索はプロセス定義のレジストリから
+        found = []
+        statements = self.count_statements(
+            lambda: found.append(self.process_db.get_process_id_by_name_version("受注", 1))
+        )
+        assert found == [self.process]
+        assert statements == []
+
+    def test_start_complete_and_cancel(self):
+        """インスタンスの開始・完了・中断が反映され、キャッシュが破棄されることを確認"""
+        assert self.process_db.get_process_instances() == []
+
+        first = self.process_db.start_process_instance(self.process)
+        second = self.process_db.start_process_instance(self.process)
+        self.process_db.complete_process_instance(first)
+        self.process_db.cancel_process_instance(second)
+
+        statuses = {row['id']: row['status'] for row in self.process_db.get_process_instances()}
+        assert statuses == {first: "完了", second: "中断"}
+        assert self.process_db.get_process_instance_by_id(first)['completed_at'] is not None
+
+        with pytest.raises(ValueError):
+            self.process_db.complete_process_instance(first)
+        with pytest.raises(ValueError):
+            self.process_db.start_process_instance(self.inactive)
+        with pytest.raises(ValueError):
+            self.process_db.cancel_process_instance(9999)
+        assert self.db.session.query(ProcessInstance).count() == 2
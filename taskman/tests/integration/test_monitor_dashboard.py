@@ -0,0 +1,114 @@
+"""
+統合テスト - プロセスモニターのダッシュボード集計のテスト
+
+このモジュールでは、ProcessMonitorDBのダッシュボード集計が
+実際のデータベース（SQLite）に対して正しい結果を返すことをテストします。
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+
+class TestDashboardSummaryIntegration:
+    """ダッシュボード集計の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """テスト用のプロセスとインスタンスを作成"""
+        from taskman.database import connection
+
+        self.session = connection.SessionLocal()
+        now = datetime.utcnow()
+
+        process = Process(name="受注処理", status="アクティブ")
+        other = Process(name="請求処理", status="アクティブ")
+        self.session.add_all([process, other])
+        self.session.flush()
+
+        tasks = [
+            Task(process_id=process.id, name="受付", priority="緊急"),
+            Task(process_id=process.id, name="確認", priority="低"),
+        ]
+        self.session.add_all(tasks)
+        self.session.flush()
+
+        running = ProcessInstance(process_id=process.id, status="実行中", started_at=now)
+        finished = ProcessInstance(process_id=process.id, status="完了", started_at=now - timedelta(days=3))
+        billing = ProcessInstance(process_id=other.id, status="実行中", started_at=now - timedelta(hours=1))
+        self.session.add_all([running, finished, billing])
+        self.session.flush()
+
+        self.session.add_all([
+            TaskInstance(process_instance_id=running.id, task_id=tasks[0].id, status="完了",
+                         created_at=now - timedelta(days=2), updated_at=now - timedelta(minutes=5)),
+            TaskInstance(process_instance_id=running.id, task_id=tasks[1].id, status="実行中",
+                         created_at=now - timedelta(days=2), updated_at=now),
+            TaskInstance(process_instance_id=finished.id, task_id=tasks[0].id, status="未着手",
+                         created_at=now - timedelta(days=1), updated_at=now - timedelta(minutes=10)),
+        ])
+        self.session.commit()
+
+        self.running_id = running.id
+        self.billing_id = billing.id
+
+        self.db = ProcessMonitorDB()
+        self.db.session = self.session
+        self.db.connected = True
+
+        yield
+
+        self.session.close()
+
+    def test_cards(self):
+        """件数カードの集計テスト"""
+        summary = self.db.get_dashboard_summary()
+
+        assert summary is not None
+        assert summary['active_instances_count'] == 2
+        assert summary['completed_instances_count'] == 1
+        assert summary['overdue_tasks_count'] == 2
+        assert summary['today_tasks_count'] == 0
+
+    def test_active_instances(self):
+        """実行中インスタンス一覧と進捗の集計テスト"""
+        summary = self.db.get_dashboard_summary()
+
+        ids = [instance['id'] for instance in summary['active_instances']]
+        assert ids == [self.running_id, self.billing_id]
+        assert summary['active_instances'][0]['progress'] == 50
+        assert summary['active_instances'][1]['progress'] == 0
+
+    def test_activities_and_urgent_tasks(self):
+        """アクティビティと緊急タスクの並び順テスト"""
+        summary = self.db.get_dashboard_summary()
+
+        assert [a['task_name'] for a in summary['activities']] == ["確認", "受付", "受付"]
+        assert [u['priority'] for u in summary['urgent_tasks']] == ["緊急", "低"]
+
+    def test_process_stats(self):
+        """プロセスタイプ統計のテスト"""
+        summary = self.db.get_dashboard_summary()
+
+        stats = {s['process_type']: s for s in summary['process_stats']}
+        assert stats["受注処理"]['active_count'] == 1
+        assert stats["受注処理"]['completed_count'] == 1
+        assert stats["請求処理"]['active_count'] == 1
+
+    def test_empty_database(self):
+        """データが存在しない場合のテスト"""
+        self.session.query(TaskInstance).delete()
+        self.session.query(ProcessInstance).delete()
+        self.session.commit()
+
+        summary = self.db.get_dashboard_summary()
+
+        assert summary['active_instances_count'] == 0
+        assert summary['overdue_tasks_count'] == 0
+        assert summary['active_instances'] == []
+        assert summary['process_stats'] == []
@@ -0,0 +1,156 @@
+"""
+統合テスト - プロセスインスタンスの完了からの目標進捗のテスト
+
+このモジュールでは、目標に対応付けたプロセスのインスタンス完了率から
+貢献度で重み付けして目標の現在値が計算され、インスタンスの完了時に
+関係する目標だけが更新されること、および一括再計算をテストします。
+"""
+
+import pytest
+from sqlalchemy import event, update
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.models.mapping import objective_process_mapping
+from taskman.models.objective import Objective
+from taskman.models.objective_progress import recompute_objectives
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+
+
+class TestObjectiveProgressIntegration:
+    """目標進捗の自動計算の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """売上目標(目標値200)に受注(重み3)と請求(重み1)を対応付ける"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        orders = Process(name="受注", status="アクティブ")
+        billing = Process(name="請求", status="アクティブ")
+        other = Process(name="採用", status="アクティブ")
+        sales = Objective(title="売上", target_value=200, current_value=0)
+        manual = Objective(title="手動目標", target_value=10, current_value=7)
+        self.session.add_all([orders, billing, other, sales, manual])
+        self.session.commit()
+        self.orders, self.billing, self.other = orders.id, billing.id, other.id
+        self.sales, self.manual = sales.id, manual.id
+
+        for process_id, weight in ((self.orders, 3), (self.billing, 1)):
+            result = self.runner.invoke(app, ["objective", "link", str(self.sales), str(process_id), "--weight", str(weight)])
+            assert result.exit_code == 0, result.stdout
+
+        yield
+
+        self.session.close()
+        db = connection.SessionLocal()
+        db.execute(objective_process_mapping.delete())
+        for model in (ProcessInstance, Objective, Process):
+            db.query(model).delete()
+        db.commit()
+        db.close()
+
+    def current(self, objective_id):
+        self.session.expire_all()
+        return self.session.get(Objective, objective_id).current_value
+
+    def add_instances(self, process_id, statuses):
+        instances = [ProcessInstance(process_id=process_id, status=status) for status in statuses]
+        self.session.add_all(instances)
+        self.session.commit()
+        return instances
+
+    def test_weighted_completion_rate(self):
+        """インスタンス完了率を貢献度で重み付けした現在値を確認"""
+        self.add_instances(self.orders, ["完了", "実行中"])          # 50%
+        self.add_instances(self.billing, ["完了", "完了", "完了", "実行中"])  # 75%
+
+        # 200 × (3×0.5 + 1×0.75) / 4
+        assert self.current(self.sales) == pytest.approx(112.5)
+        assert self.current(self.manual) == 7
+
+    def test_completion_updates_only_linked_objectives(self):
+        """インスタンスの完了時に対応付けのある目標だけを更新することを確認"""
+        (instance,) = self.add_instances(self.orders, ["実行中"])
+        assert self.current(self.sales) == 0
+
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.connection.engine, "before_cursor_execute", count)
+        try:
+            instance.status = "完了"
+            self.session.commit()
+        finally:
+            event.remove(self.connection.engine, "before_cursor_execute", count)
+
+        assert self.current(self.sales) == pytest.approx(150)
+        objective_updates = [s for s in statements if s.startswith("UPDATE objective")]
+        assert len(objective_updates) == 1
+        assert "objective_process_mapping.process_id IN" in objective_updates[0]
+
+    def test_delete_instance_recomputes(self):
+        """インスタンスの削除でも再計算されることを確認"""
+        done, running = self.add_instances(self.orders, ["完了", "実行中"])
+        self.session.delete(running)
+        self.session.commit()
+
+        assert self.current(self.sales) == pytest.approx(150)
+
+    def test_unlinked_processes_do_not_change_objectives(self):
+        """対応付けのないプロセスのインスタンスでは目標が変わらないことを確認"""
+        self.add_instances(self.other, ["完了"])
+
+        assert self.current(self.sales) == 0
+        assert recompute_objectives(self.session, process_ids=[self.other]) == 0
+
+    def test_target_update_recomputes(self):
+        """目標値の変更で現在値が計算し直されることを確認"""
+        self.add_instances(self.orders, ["完了"])
+
+        result = self.runner.invoke(app, ["objective", "update", str(self.sales), "--target", "400"])
+
+        assert result.exit_code == 0, result.stdout
+        assert self.current(self.sales) == pytest.approx(300)
+
+    def test_recompute_all(self):
+        """--all でカウンタを数え直して一括再計算されることを確認"""
+        self.add_instances(self.orders, ["完了", "完了"])
+        self.add_instances(self.billing, ["実行中"])
+        # カウンタと現在値を壊しておく
+        self.session.execute(update(Process.__table__).values(total_instances=0, completed_instances=0))
+        self.session.execute(update(Objective.__table__).values(current_value=0))
+        self.session.commit()
+
+        result = self.runner.invoke(app, ["objective", "recompute", "--all"])
+
+        assert result.exit_code == 0, result.stdout
+        assert "1件の目標" in result.stdout
+        assert self.current(self.sales) == pytest.approx(150)
+        assert self.current(self.manual) == 0   # 対応付けのない目標は更新されない
+
+    def test_recompute_requires_id_or_all(self):
+        """IDと --all のどちらも指定しないとエラーになることを確認"""
+        result = self.runner.invoke(app, ["objective", "recompute"])
+
+        assert result.exit_code == 1
+        assert "どちらか一方" in result.stdout
+
+    def test_unlink(self):
+        """対応付けの解除で現在値が計算し直されることを確認"""
+        self.add_instances(self.orders, ["完了"])
+        self.add_instances(self.billing, ["実行中"])
+
+        result = self.runner.invoke(app, ["objective", "unlink", str(self.sales), str(self.billing)])
+
+        assert result.exit_code == 0, result.stdout
+        assert self.current(self.sales) == pytest.approx(200)
+
+        result = self.runner.invoke(app, ["objective", "unlink", str(self.sales), str(self.billing)])
+        assert result.exit_code == 1
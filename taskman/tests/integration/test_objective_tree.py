@@ -0,0 +1,194 @@
+"""
+統合テスト - 目標ツリー（再帰CTE）のテスト
+
+このモジュールでは、目標の配下の取得・深さ制限付きのツリー表示・
+貢献度で重み付けした集計・配下を含む削除が、それぞれ一定回数の
+クエリで行われることをテストします。
+"""
+
+import pytest
+from sqlalchemy import event, insert, select
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.database import objective_tree
+from taskman.database.objective_tree import (
+    MAX_DEPTH, delete_subtree, descendant_ids, load_tree, rollup, rollups,
+)
+from taskman.models.mapping import objective_process_mapping
+from taskman.models.objective import Objective
+from taskman.models.process import Process
+
+
+class TestObjectiveTreeIntegration:
+    """目標ツリーの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """売上(50/100、重み3) → (新規顧客(10/10) → 紹介(目標なし), 既存顧客(5/20)) のツリーを作成"""
+        from taskman.database import connection
+
+        # 表の列が端末幅で省略されないよう、幅を固定して実行する
+        self.runner = CliRunner(env={"COLUMNS": "200"})
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        root = Objective(title="売上", current_value=50, target_value=100)
+        self.session.add(root)
+        self.session.flush()
+        new = Objective(title="新規顧客", current_value=10, target_value=10, parent_id=root.id)
+        existing = Objective(title="既存顧客", current_value=5, target_value=20, parent_id=root.id)
+        self.session.add_all([new, existing])
+        self.session.flush()
+        referral = Objective(title="紹介", parent_id=new.id)
+        process = Process(name="営業", status="アクティブ")
+        self.session.add_all([referral, process])
+        self.session.flush()
+        self.session.execute(insert(objective_process_mapping).values(
+            objective_id=root.id, process_id=process.id, contribution_weight=3
+        ))
+        self.session.commit()
+        self.root, self.new, self.existing, self.referral = root.id, new.id, existing.id, referral.id
+
+        yield
+
+        self.session.close()
+        db = connection.SessionLocal()
+        db.execute(objective_process_mapping.delete())
+        db.query(Objective).update({Objective.parent_id: None})
+        db.query(Objective).delete()
+        db.query(Process).delete()
+        db.commit()
+        db.close()
+
+    def count_statements(self, func, *args, **kwargs):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.connection.engine, "before_cursor_execute", count)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            event.remove(self.connection.engine, "before_cursor_execute", count)
+        return result, statements
+
+    def test_load_tree_in_one_statement(self):
+        """ツリー全体が1回のクエリで読み込まれることを確認"""
+        roots, statements = self.count_statements(load_tree, self.session, self.root)
+
+        assert len(statements) == 1
+        (root,) = roots
+        assert [c.objective.title for c in root.children] == ["新規顧客", "既存顧客"]
+        assert [c.objective.title for c in root.children[0].children] == ["紹介"]
+        assert root.weight == 3
+        assert root.children[1].progress == 0.25
+
+    def test_depth_limit(self):
+        """深さ制限でそれより下の目標が読み込まれないことを確認"""
+        (root,) = load_tree(self.session, self.root, max_depth=1)
+
+        assert all(not child.children for child in root.children)
+        assert sorted(descendant_ids(self.session, self.root)) == sorted([self.new, self.existing, self.referral])
+        assert sorted(descendant_ids(self.session, self.root, max_depth=1)) == sorted([self.new, self.existing])
+
+    def test_weighted_rollup(self):
+        """貢献度で重み付けした集計を確認"""
+        subtree, statements = self.count_statements(rollup, self.session, self.root)
+
+        assert len(statements) == 1
+        assert subtree.count == 4
+        assert subtree.current_value == 3 * 50 + 10 + 5
+        assert subtree.target_value == 3 * 100 + 10 + 20
+        # (3×0.5 + 1×1.0 + 1×0.25) / (3 + 1 + 1)、目標値のない「紹介」は除外
+        assert subtree.progress == pytest.approx(0.55)
+        assert rollup(self.session, 9999) is None
+
+    def test_rollups_for_every_root(self):
+        """すべてのルートの集計が1回のクエリで得られることを確認"""
+        self.session.add(Objective(title="コスト", current_value=1, target_value=4))
+        self.session.commit()
+
+        result, statements = self.count_statements(rollups, self.session)
+
+        assert len(statements) == 1
+        assert {r.count for r in result.values()} == {4, 1}
+
+    def test_parent_cycle_terminates(self):
+        """親子関係に循環があっても再帰が打ち切られることを確認"""
+        self.session.get(Objective, self.new).parent_id = self.referral
+        self.session.commit()
+
+        ids = descendant_ids(self.session, self.new)
+
+        assert len(ids) <= MAX_DEPTH
+        assert set(ids) == {self.new, self.referral}
+        (node,) = load_tree(self.session, self.new)
+        assert [c.objective.id for c in node.children] == [self.referral]
+
+    def test_delete_subtree(self):
+        """配下の目標と対応付けがまとめて削除されることを確認"""
+        deleted = delete_subtree(self.session, self.root)
+        self.session.commit()
+
+        assert deleted == 4
+        assert self.session.query(Objective).count() == 0
+        assert self.session.execute(select(objective_process_mapping)).first() is None
+
+    def test_delete_subtree_in_batches(self, monkeypatch):
+        """IN (...) のIDを分割しても配下がすべて削除されることを確認"""
+        monkeypatch.setattr(objective_tree, "IN_BATCH_SIZE", 2)
+        sizes = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith(("UPDATE", "DELETE")):
+                sizes.append(len(parameters))
+
+        event.listen(self.connection.engine, "before_cursor_execute", count)
+        try:
+            deleted = delete_subtree(self.session, self.root)
+        finally:
+            event.remove(self.connection.engine, "before_cursor_execute", count)
+        self.session.commit()
+
+        assert deleted == 4
+        assert self.session.query(Objective).count() == 0
+        assert self.session.execute(select(objective_process_mapping)).first() is None
+        # 4件のIDを2件ずつ UPDATE・関連の DELETE・目標の DELETE に分けて実行する
+        assert len(sizes) == 6
+        assert max(sizes) <= 2 + 2   # ID 2件 + UPDATE の parent_id と updated_at
+
+    def test_delete_command_counts_grandchildren(self):
+        """delete コマンドが孫の目標も数え、--force で削除することを確認"""
+        result = self.runner.invoke(app, ["objective", "delete", str(self.root)])
+        assert result.exit_code == 1
+        assert "3個の子目標があります" in result.stdout
+
+        result = self.runner.invoke(app, ["objective", "delete", str(self.root), "--force"])
+        assert result.exit_code == 0, result.stdout
+        assert self.session.query(Objective).count() == 0
+
+    def test_tree_command(self):
+        """tree コマンドでツリーと加重進捗が表示されることを確認"""
+        result = self.runner.invoke(app, ["objective", "tree", str(self.root), "--depth", "1"])
+
+        assert result.exit_code == 0, result.stdout
+        assert "加重進捗（配下を含む）: 55.0%" in result.stdout
+        assert "既存顧客" in result.stdout
+        assert "紹介" not in result.stdout
+
+    def test_tree_command_unknown_objective(self):
+        """存在しない目標ではエラーになることを確認"""
+        result = self.runner.invoke(app, ["objective", "tree", "9999"])
+
+        assert result.exit_code == 1
+        assert "見つかりません" in result.stdout
+
+    def test_show_prints_subtree_summary(self):
+        """show コマンドで配下の件数と加重進捗が表示されることを確認"""
+        result = self.runner.invoke(app, ["objective", "show", str(self.root)])
+
+        assert result.exit_code == 0, result.stdout
+        assert "配下の目標: 3件" in result.stdout
+        assert "新規顧客" in result.stdout
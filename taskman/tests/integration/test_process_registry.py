@@ -0,0 +1,119 @@
+"""
+統合テスト - プロセス定義の名前とバージョンによる検索のテスト
+
+このモジュールでは、プロセスの (名前, バージョン) の一意制約、
+ProcessMonitorDB の名前とバージョンでの検索、透かしが変化した時だけ
+差分で更新されるプロセス定義のレジストリ、および process create/update
+コマンドでの重複の拒否をテストします。
+"""
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from typer.testing import CliRunner
+
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.app.db.registry import ProcessRegistry
+from taskman.cli import app
+from taskman.models.process import Process
+
+
+class CountingDB:
+    """get_process_versions の呼び出しを記録する ProcessMonitorDB のラッパー"""
+
+    def __init__(self, db):
+        self.db = db
+        self.calls = []
+
+    def get_process_versions(self, updated_since=None):
+        self.calls.append(updated_since)
+        return self.db.get_process_versions(updated_since)
+
+
+class TestProcessRegistryIntegration:
+    """プロセス定義の検索の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """受注 v1/v2 と請求 v1 を作成"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.session = connection.SessionLocal()
+        self.processes = [
+            Process(name="受注", version=1, status="アクティブ"),
+            Process(name="受注", version=2, status="ドラフト"),
+            Process(name="請求", version=1, status="アクティブ"),
+        ]
+        self.session.add_all(self.processes)
+        self.session.commit()
+
+        self.monitor = ProcessMonitorDB()
+        self.monitor.session = connection.SessionLocal()
+        self.monitor.connected = True
+        self.db = CountingDB(self.monitor)
+
+        yield
+
+        self.monitor.session.close()
+        self.session.close()
+
+    def watermark(self):
+        self.monitor.session.commit()
+        return self.monitor.get_change_watermarks()['process']
+
+    def test_name_version_is_unique(self):
+        """同じ名前とバージョンのプロセスは作成できないことを確認"""
+        self.session.add(Process(name="受注", version=2, status="ドラフト"))
+        with pytest.raises(IntegrityError):
+            self.session.commit()
+
+    def test_monitor_lookup(self):
+        """名前とバージョンで1件を取得できることを確認"""
+        process = self.monitor.get_process_by_name_version("受注", 2)
+
+        assert process['id'] == self.processes[1].id
+        assert process['version'] == 2
+        assert self.monitor.get_process_by_name_version("受注", 3) is None
+        assert {p['version'] for p in self.monitor.get_processes()} == {1, 2}
+
+    def test_registry_refreshes_incrementally(self):
+        """透かしが変わった時だけ、変更された行を差分で読むことを確認"""
+        registry = ProcessRegistry()
+        assert registry.refresh(self.db, self.watermark())
+        assert registry.versions("受注") == [1, 2]
+        assert registry.lookup("請求", 1) == self.processes[2].id
+        assert self.db.calls == [None]
+
+        assert not registry.refresh(self.db, self.watermark())
+        assert len(self.db.calls) == 1
+
+        # 名前の変更と追加は差分で反映される
+        self.processes[2].name = "請求書"
+        self.session.add(Process(name="受注", version=3, status="ドラフト"))
+        self.session.commit()
+        registry.refresh(self.db, self.watermark())
+        assert self.db.calls[1] is not None
+        assert len(self.db.calls) == 2
+        assert registry.versions("受注") == [1, 2, 3]
+        assert registry.lookup("請求", 1) is None
+        assert registry.names() == ["受注", "請求書"]
+
+        # 削除があればすべて読み込み直す
+        self.session.delete(self.processes[0])
+        self.session.commit()
+        registry.refresh(self.db, self.watermark())
+        assert self.db.calls[-1] is None
+        assert registry.versions("受注") == [2, 3]
+
+    def test_cli_rejects_duplicates(self):
+        """process create/update で名前とバージョンの重複がエラーになることを確認"""
+        result = self.runner.invoke(app, ["process", "create", "--name", "請求"])
+        assert result.exit_code == 1
+        assert "既に存在します" in result.stdout
+
+        result = self.runner.invoke(app, ["process", "update", str(self.processes[0].id), "--increment-version"])
+        assert result.exit_code == 1
+        assert "バージョン2は既に存在します" in result.stdout
+
+        result = self.runner.invoke(app, ["process", "update", str(self.processes[1].id), "--increment-version"])
+        assert result.exit_code == 0, result.stdout
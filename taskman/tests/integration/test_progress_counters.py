@@ -0,0 +1,166 @@
+"""
+統合テスト - 進捗カウンタのテスト
+
+このモジュールでは、Task/TaskInstance の作成・削除・ステータス変更に応じて
+Process/ProcessInstance の進捗カウンタが維持されることをテストします。
+"""
+
+import pytest
+from sqlalchemy import inspect, text
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+
+
+class TestProgressCountersIntegration:
+    """進捗カウンタの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """テスト用のプロセスとインスタンスを作成"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        self.process = Process(name="カウンタテスト", status="アクティブ")
+        self.session.add(self.process)
+        self.session.flush()
+        self.instance = ProcessInstance(process_id=self.process.id)
+        self.session.add(self.instance)
+        self.session.commit()
+
+        yield
+
+        self.session.close()
+
+    def counters(self, obj):
+        """最新のカウンタ値を取得"""
+        self.session.refresh(obj)
+        return obj.total_tasks, obj.completed_tasks
+
+    def test_task_hooks(self):
+        """タスクの作成・ステータス変更・削除のテスト"""
+        first = Task(process_id=self.process.id, name="A")
+        second = Task(process_id=self.process.id, name="B", status="完了")
+        self.session.add_all([first, second])
+        self.session.commit()
+        assert self.counters(self.process) == (2, 1)
+
+        first.status = "完了"
+        self.session.commit()
+        assert self.counters(self.process) == (2, 2)
+
+        second.status = "保留"
+        self.session.commit()
+        assert self.counters(self.process) == (2, 1)
+
+        self.session.delete(first)
+        self.session.commit()
+        assert self.counters(self.process) == (1, 0)
+
+    def test_task_instance_hooks(self):
+        """タスクインスタンスの作成・ステータス変更・削除のテスト"""
+        task = Task(process_id=self.process.id, name="A")
+        self.session.add(task)
+        self.session.flush()
+
+        task_instance = TaskInstance(process_instance_id=self.instance.id, task_id=task.id)
+        self.session.add(task_instance)
+        self.session.commit()
+        assert self.counters(self.instance) == (1, 0)
+
+        task_instance.status = "完了"
+        self.session.commit()
+        assert self.counters(self.instance) == (1, 1)
+
+        self.session.delete(task_instance)
+        self.session.commit()
+        assert self.counters(self.instance) == (0, 0)
+
+    def test_move_task_between_processes(self):
+        """別プロセスへのタスク移動のテスト"""
+        other = Process(name="移動先", status="アクティブ")
+        task = Task(process_id=self.process.id, name="A", status="完了")
+        self.session.add_all([other, task])
+        self.session.commit()
+
+        task.process_id = other.id
+        self.session.commit()
+
+        assert self.counters(self.process) == (0, 0)
+        assert self.counters(other) == (1, 1)
+
+    def test_rebuild_command(self):
+        """カウンタ再計算コマンドのテスト"""
+        task = Task(process_id=self.process.id, name="A", status="完了")
+        self.session.add(task)
+        self.session.commit()
+
+        # ORMを経由しない更新はフックが動かないため、カウンタがずれる
+        self.session.query(Task).update({Task.status: "未着手"})
+        self.session.commit()
+        assert self.counters(self.process) == (1, 1)
+
+        result = self.runner.invoke(app, ["db", "rebuild-counters"])
+        assert result.exit_code == 0, result.stdout
+        assert self.counters(self.process) == (1, 0)
+
+    def test_rebuild_command_does_not_change_schema(self):
+        """カウンタ列がなければ列を追加せず、マイグレーションを促すことを確認"""
+        self.session.close()
+        engine = self.connection.engine
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE process DROP COLUMN completed_instances"))
+
+        result = self.runner.invoke(app, ["db", "rebuild-counters"])
+
+        assert result.exit_code == 1
+        assert "process.completed_instances" in result.stdout
+        assert "db migrate" in result.stdout
+        assert "completed_instances" not in {c["name"] for c in inspect(engine).get_columns("process")}
+
+    def test_counters_keep_updated_at(self):
+        """カウンタの更新でプロセスとインスタンスの更新日時が変わらないことを確認"""
+        self.session.refresh(self.process)
+        self.session.refresh(self.instance)
+        stamps = (self.process.updated_at, self.instance.updated_at)
+
+        task = Task(process_id=self.process.id, name="A")
+        self.session.add(task)
+        self.session.flush()
+        task_instance = TaskInstance(process_instance_id=self.instance.id, task_id=task.id)
+        self.session.add(task_instance)
+        self.session.commit()
+        task_instance.status = "完了"
+        self.session.add(ProcessInstance(process_id=self.process.id))
+        self.session.commit()
+        result = self.runner.invoke(app, ["db", "rebuild-counters"])
+        assert result.exit_code == 0, result.stdout
+
+        assert self.counters(self.process) == (1, 0)
+        assert self.counters(self.instance) == (1, 1)
+        assert (self.process.updated_at, self.instance.updated_at) == stamps
+
+    def test_monitor_progress(self):
+        """プロセスモニターの進捗率がカウンタから計算されることのテスト"""
+        self.session.add_all([
+            Task(process_id=self.process.id, name="A", status="完了"),
+            Task(process_id=self.process.id, name="B"),
+            Task(process_id=self.process.id, name="C"),
+            Task(process_id=self.process.id, name="D"),
+        ])
+        self.session.commit()
+
+        db = ProcessMonitorDB()
+        db.session = self.session
+        db.connected = True
+
+        assert db.get_process_by_id(self.process.id)['progress'] == 25
+        assert db.get_process_instance_by_id(self.instance.id)['progress'] == 0
@@ -0,0 +1,97 @@
+"""
+統合テスト - 一覧コマンドのクエリ層のテスト
+
+このモジュールでは、一覧コマンドが行数に関係なく一定回数の
+SQL文で結果を取得できることをテストします。
+"""
+
+import pytest
+from sqlalchemy import event
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+from taskman.models.task_step import TaskStep
+from taskman.models.workflow import Workflow
+
+
+class TestListQueryIntegration:
+    """一覧コマンドのSQL文数の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """テスト用のデータを作成し、SQL文の実行回数を記録する"""
+        from taskman.database import connection
+
+        self.runner = CliRunner()
+        self.engine = connection.engine
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self.record)
+
+        yield
+
+        event.remove(self.engine, "before_cursor_execute", self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        """実行されたSQL文を記録"""
+        self.statements.append(statement)
+
+    def populate(self, rows):
+        """指定した件数の関連データを作成"""
+        from taskman.database import connection
+
+        session = connection.SessionLocal()
+        # プロセスは名前とバージョンで一意なので、呼び出しごとに名前を変える
+        process = Process(name=f"一覧テスト{rows}", status="アクティブ")
+        session.add(process)
+        session.flush()
+        tasks = [Task(process_id=process.id, name=f"タスク{i}") for i in range(rows)]
+        session.add_all(tasks)
+        session.flush()
+        instances = [ProcessInstance(process_id=process.id, created_by="tester") for _ in range(rows)]
+        session.add_all(instances)
+        session.flush()
+        session.add_all(
+            [TaskInstance(process_instance_id=pi.id, task_id=t.id) for pi, t in zip(instances, tasks)]
+            + [TaskStep(task_id=t.id, step_number=1, name="手順") for t in tasks]
+            + [Workflow(process_id=process.id, from_task_id=a.id, to_task_id=b.id)
+               for a, b in zip(tasks, tasks[1:])]
+        )
+        session.commit()
+        session.close()
+
+    def count_statements(self, args):
+        """コマンド実行時のSQL文数を返す"""
+        self.statements.clear()
+        result = self.runner.invoke(app, args)
+        assert result.exit_code == 0, result.stdout
+        return len(self.statements)
+
+    @pytest.mark.parametrize("args", [
+        ["instance", "list"],
+        ["task-instance", "list"],
+        ["step", "list"],
+        ["workflow", "list"],
+    ])
+    def test_statement_count_is_constant(self, args):
+        """行数を増やしてもSQL文数が変わらないことを確認"""
+        self.populate(3)
+        small = self.count_statements(args)
+
+        self.populate(30)
+        large = self.count_statements(args)
+
+        assert small == large
+
+    def test_instance_list_task_count(self):
+        """タスクインスタンス数がグループ集計で表示されることを確認"""
+        self.populate(2)
+
+        result = self.runner.invoke(app, ["instance", "list"])
+
+        assert result.exit_code == 0
+        assert "一覧テスト" in result.stdout
+        assert "tester" in result.stdout
@@ -0,0 +1,263 @@
+"""
+統合テスト - クリティカルパスと完了予測のテスト
+
+このモジュールでは、タスクの予想所要時間とステップの所要時間からの計画、
+プロセスのバージョンごとのキャッシュ、実行中インスタンスの完了予測、
+CLIとダッシュボードでの表示をテストします。
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from typer.testing import CliRunner
+
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.cli import app
+from taskman.engine.graph import invalidate_graph
+from taskman.engine import schedule as schedule_module
+from taskman.engine.schedule import forecast_instances, get_schedule, invalidate_schedule
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+from taskman.models.task_step import TaskStep
+from taskman.models.workflow import Workflow
+
+
+class TestScheduleIntegration:
+    """クリティカルパスと完了予測の統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """受付(10分) → (審査(30分), 在庫確認(ステップ合計20分)を並列) → 出荷(5分)"""
+        from taskman.database import connection
+
+        invalidate_graph()
+        invalidate_schedule()
+        self.runner = CliRunner()
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        process = Process(name="受注処理", status="アクティブ")
+        self.session.add(process)
+        self.session.flush()
+        tasks = [
+            Task(process_id=process.id, name="受付", estimated_duration=10),
+            Task(process_id=process.id, name="審査", estimated_duration=30),
+            Task(process_id=process.id, name="在庫確認"),
+            Task(process_id=process.id, name="出荷", estimated_duration=5),
+        ]
+        self.session.add_all(tasks)
+        self.session.flush()
+        self.accept, self.review, self.stock, self.ship = (t.id for t in tasks)
+        self.session.add_all([
+            TaskStep(task_id=self.stock, step_number=1, name="棚確認", expected_duration=15),
+            TaskStep(task_id=self.stock, step_number=2, name="引当", expected_duration=5),
+            Workflow(process_id=process.id, from_task_id=None, to_task_id=self.accept),
+            Workflow(process_id=process.id, from_task_id=self.accept, to_task_id=self.review, condition_type="並列"),
+            Workflow(process_id=process.id, from_task_id=self.accept, to_task_id=self.stock, condition_type="並列"),
+            Workflow(process_id=process.id, from_task_id=self.review, to_task_id=self.ship),
+            Workflow(process_id=process.id, from_task_id=self.stock, to_task_id=self.ship),
+            Workflow(process_id=process.id, from_task_id=self.ship, to_task_id=None),
+        ])
+        self.session.commit()
+        self.process_id = process.id
+
+        yield
+
+        self.session.close()
+        db = connection.SessionLocal()
+        for model in (TaskInstance, ProcessInstance, Workflow, TaskStep, Task, Process):
+            db.query(model).delete()
+        db.commit()
+        db.close()
+        invalidate_graph()
+        invalidate_schedule()
+
+    def running_instance(self, now):
+        """受付が完了し、審査が実行中のインスタンスを作成"""
+        instance = ProcessInstance(process_id=self.process_id, status="実行中", started_at=now - timedelta(minutes=30))
+        self.session.add(instance)
+        self.session.flush()
+        self.session.add_all([
+            TaskInstance(process_instance_id=instance.id, task_id=self.accept, status="完了",
+                         started_at=now - timedelta(minutes=30), completed_at=now - timedelta(minutes=20)),
+            TaskInstance(process_instance_id=instance.id, task_id=self.review, status="実行中",
+                         started_at=now - timedelta(minutes=20)),
+            TaskInstance(process_instance_id=instance.id, task_id=self.stock, status="未着手"),
+        ])
+        self.session.commit()
+        return instance.id
+
+    def test_schedule_uses_step_durations(self):
+        """予想所要時間がないタスクはステップの所要時間の合計を使うことを確認"""
+        schedule = get_schedule(self.session, self.process_id)
+
+        assert schedule.tasks[self.stock].duration == 20
+        assert schedule.duration == 45
+        assert schedule.critical_path == (self.accept, self.review, self.ship)
+        assert schedule.tasks[self.stock].slack == 10
+
+    def test_schedule_is_cached_per_version(self):
+        """2回目はグラフとステップのスタンプの確認だけで済み、タスクの変更で再計算されることを確認"""
+        get_schedule(self.session, self.process_id)
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.connection.engine, "before_cursor_execute", count)
+        try:
+            get_schedule(self.session, self.process_id)
+        finally:
+            event.remove(self.connection.engine, "before_cursor_execute", count)
+        assert len(statements) == 2
+
+        self.session.get(Task, self.stock).estimated_duration = 60
+        self.session.commit()
+
+        schedule = get_schedule(self.session, self.process_id)
+        assert schedule.duration == 75
+        assert schedule.critical_path == (self.accept, self.stock, self.ship)
+
+    def test_forecast_uses_history(self):
+        """同じタスクの過去の実績所要時間が予測に使われることを確認"""
+        now = datetime.now()
+        instance_id = self.running_instance(now)
+
+        eta = forecast_instances(self.session, [instance_id], now)[instance_id].eta
+        # 在庫確認は未着手のため現在から20分、その後に出荷5分
+        assert eta == now + timedelta(minutes=25)
+
+        # 過去のインスタンスでは審査に60分かかっていた
+        past = ProcessInstance(process_id=self.process_id, status="完了", completed_at=now - timedelta(days=1))
+        self.session.add(past)
+        self.session.flush()
+        self.session.add(TaskInstance(process_instance_id=past.id, task_id=self.review, status="完了",
+                                      started_at=now - timedelta(days=2),
+                                      completed_at=now - timedelta(days=2) + timedelta(minutes=60)))
+        self.session.commit()
+
+        forecasts = forecast_instances(self.session, [instance_id, past.id], now)
+        # 審査は開始から60分 → 残り40分、その後に出荷5分
+        assert abs(forecasts[instance_id].eta - (now + timedelta(minutes=45))) < timedelta(seconds=1)
+        assert forecasts[past.id].eta == past.completed_at
+
+    def test_schedule_follows_step_changes_without_orm_events(self):
+        """ORMを経由しない（別プロセスからの）ステップの変更でも計画が作り直されることを確認"""
+        assert get_schedule(self.session, self.process_id).tasks[self.stock].duration == 20
+
+        table = TaskStep.__table__
+        with self.connection.engine.begin() as conn:
+            conn.execute(table.update().where(table.c.step_number == 2).values(expected_duration=25))
+        self.session.commit()
+
+        schedule = get_schedule(self.session, self.process_id)
+        assert schedule.tasks[self.stock].duration == 40
+        assert schedule.critical_path == (self.accept, self.stock, self.ship)
+
+    def test_history_is_cached_until_task_instances_change(self):
+        """実績の平均はタスクインスタンスが変わるまで再集計されないことを確認"""
+        now = datetime.now()
+        instance_id = self.running_instance(now)
+        forecast_instances(self.session, [instance_id], now)
+
+        def averages():
+            statements = []
+
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(self.connection.engine, "before_cursor_execute", count)
+            try:
+                forecasts = forecast_instances(self.session, [instance_id], now)
+            finally:
+                event.remove(self.connection.engine, "before_cursor_execute", count)
+            return forecasts[instance_id].eta, [s for s in statements if "avg(" in s]
+
+        eta, statements = averages()
+        assert statements == []
+
+        # 別プロセスで審査が60分で完了した実績が追加される
+        with self.connection.engine.begin() as conn:
+            conn.execute(TaskInstance.__table__.insert().values(
+                process_instance_id=instance_id, task_id=self.review, status="完了",
+                started_at=now - timedelta(days=2), completed_at=now - timedelta(days=2) + timedelta(minutes=60),
+            ))
+        self.session.commit()
+
+        eta, statements = averages()
+        assert len(statements) == 1
+        assert eta is not None
+
+    def test_schedule_command(self):
+        """workflow schedule コマンドでクリティカルパスが表示されることを確認"""
+        result = self.runner.invoke(app, ["workflow", "schedule", str(self.process_id)])
+
+        assert result.exit_code == 0, result.stdout
+        assert "所要時間（合計）: 45分" in result.stdout
+        assert "クリティカルパス: 受付 → 審査 → 出荷" in result.stdout
+
+    def test_schedule_command_unknown_process(self):
+        """存在しないプロセスではエラーになることを確認"""
+        result = self.runner.invoke(app, ["workflow", "schedule", "9999"])
+
+        assert result.exit_code == 1
+        assert "見つかりません" in result.stdout
+
+    def test_instance_show_prints_eta(self):
+        """instance show に完了予定が表示されることを確認"""
+        instance_id = self.running_instance(datetime.now())
+
+        result = self.runner.invoke(app, ["instance", "show", str(instance_id)])
+
+        assert result.exit_code == 0, result.stdout
+        assert "完了予定:" in result.stdout
+
+    def test_dashboard_eta(self):
+        """ダッシュボードの実行中インスタンスに完了予定が含まれることを確認"""
+        instance_id = self.running_instance(datetime.now())
+        db = ProcessMonitorDB()
+        db.session = self.session
+        db.connected = True
+
+        summary = db.get_dashboard_summary()
+
+        (active,) = summary['active_instances']
+        assert active['id'] == instance_id
+        assert active['eta'] is not None and active['eta'] > datetime.now()
+        assert set(db.get_process_etas()) == {self.process_id}
+
+    def test_cyclic_process_does_not_hide_other_etas(self):
+        """循環のあるプロセスがあっても他のプロセスの完了予定は求められることを確認"""
+        self.running_instance(datetime.now())
+        cyclic = Process(name="循環", status="アクティブ")
+        self.session.add(cyclic)
+        self.session.flush()
+        a, b = Task(process_id=cyclic.id, name="A"), Task(process_id=cyclic.id, name="B")
+        self.session.add_all([a, b])
+        self.session.flush()
+        self.session.add_all([
+            Workflow(process_id=cyclic.id, from_task_id=a.id, to_task_id=b.id),
+            Workflow(process_id=cyclic.id, from_task_id=b.id, to_task_id=a.id),
+            ProcessInstance(process_id=cyclic.id, status="実行中"),
+        ])
+        self.session.commit()
+        db = ProcessMonitorDB()
+        db.session = self.session
+        db.connected = True
+
+        assert set(db.get_process_etas()) == {self.process_id}
+
+    def test_forecast_in_batches(self, monkeypatch):
+        """IN (...) のIDを分割しても同じ予測になることを確認"""
+        now = datetime.now()
+        ids = [self.running_instance(now) for _ in range(5)]
+        expected = {i: f.eta for i, f in forecast_instances(self.session, ids, now).items()}
+
+        monkeypatch.setattr(schedule_module, "IN_BATCH_SIZE", 2)
+        forecasts = forecast_instances(self.session, ids, now)
+
+        assert {i: f.eta for i, f in forecasts.items()} == expected
+        assert len(expected) == 5
@@ -162,6 +162,44 @@ class TestWorkflowCommandsIntegration:
         result = self.runner.invoke(app, ["workflow", "show", "999"])
 
 
+    def test_create_validates_condition(self):
+        """条件付きワークフローの作成時に条件式が検証されることを確認"""
+        result = self.runner.invoke(
+            app,
+            [
+                "workflow", "create",
+                "--process", self.process_id,
+                "--condition-type", "条件付き",
+                "--condition", "__import__('os').system('ls')"
+            ]
+        )
+        assert result.exit_code == 1
+        assert "無効な条件式です" in result.stdout
+
+        result = self.runner.invoke(
+            app,
+            [
+                "workflow", "create",
+                "--process", self.process_id,
+                "--condition-type", "条件付き",
+                "--condition", "status == '完了' and '承認' in notes"
+            ]
+        )
+        assert result.exit_code == 0, result.stdout
+
+    def test_update_validates_condition(self):
+        """ワークフローの更新時に条件式が検証されることを確認"""
+        result = self.runner.invoke(
+            app,
+            ["workflow", "create", "--process", self.process_id, "--condition-type", "常時"]
+        )
+        assert result.exit_code == 0, result.stdout
+
+        result = self.runner.invoke(app, ["workflow", "update", "1", "--condition", "unknown_field > 1"])
+        assert result.exit_code == 1
+        assert "不明な変数です: unknown_field" in result.stdout
+
+
 # テストを実行するためのコード
 if __name__ == "__main__":
     pytest.main(["-xvs", __file__]) 
\ No newline at end of file
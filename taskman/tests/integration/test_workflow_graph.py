@@ -0,0 +1,171 @@
+"""
+統合テスト - ワークフローグラフのキャッシュとコマンドのテスト
+
+このモジュールでは、データベースから読み込んだワークフローグラフが
+プロセスのバージョンとワークフローのスタンプごとにキャッシュされ、
+ワークフローの変更で作り直されること、および workflow graph コマンドとモニターの
+ワークフローデータをテストします。
+"""
+
+import pytest
+from sqlalchemy import event
+from typer.testing import CliRunner
+
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.cli import app
+from taskman.engine.graph import get_graph, invalidate_graph
+from taskman.models.process import Process
+from taskman.models.task import Task
+from taskman.models.workflow import Workflow
+
+
+class TestWorkflowGraphIntegration:
+    """ワークフローグラフの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """受付 → (審査, 在庫確認を並列) → 出荷 のプロセスを作成"""
+        from taskman.database import connection
+
+        invalidate_graph()
+        self.runner = CliRunner()
+        self.connection = connection
+        self.session = connection.SessionLocal()
+
+        process = Process(name="受注処理")
+        self.session.add(process)
+        self.session.flush()
+        tasks = [Task(process_id=process.id, name=name) for name in ("受付", "審査", "在庫確認", "出荷")]
+        self.session.add_all(tasks)
+        self.session.flush()
+        accept, review, stock, ship = (t.id for t in tasks)
+        self.session.add_all([
+            Workflow(process_id=process.id, from_task_id=None, to_task_id=accept),
+            Workflow(process_id=process.id, from_task_id=accept, to_task_id=review, condition_type="並列"),
+            Workflow(process_id=process.id, from_task_id=accept, to_task_id=stock, condition_type="並列"),
+            Workflow(process_id=process.id, from_task_id=review, to_task_id=ship),
+            Workflow(process_id=process.id, from_task_id=stock, to_task_id=ship),
+            Workflow(process_id=process.id, from_task_id=ship, to_task_id=None),
+        ])
+        self.session.commit()
+        self.process_id = process.id
+        self.task_ids = (accept, review, stock, ship)
+
+        yield
+
+        self.session.close()
+        db = connection.SessionLocal()
+        db.query(Workflow).delete()
+        db.query(Task).delete()
+        db.query(Process).delete()
+        db.commit()
+        db.close()
+        invalidate_graph()
+
+    def count_statements(self, func):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = self.connection.engine
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            result = func()
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        return result, len(statements)
+
+    def test_graph_is_cached(self):
+        """2回目以降はバージョンとスタンプの確認の1クエリだけで取得できることを確認"""
+        accept, review, stock, ship = self.task_ids
+
+        graph, first = self.count_statements(lambda: get_graph(self.session, self.process_id))
+        again, second = self.count_statements(lambda: get_graph(self.session, self.process_id))
+
+        assert graph.order == (accept, review, stock, ship)
+        assert graph.parallel_groups[0].join == ship
+        assert again is graph
+        assert first == 3
+        assert second == 1
+
+    def test_cache_invalidated_on_workflow_change(self):
+        """ワークフローの追加でキャッシュが破棄されることを確認"""
+        accept, review, stock, ship = self.task_ids
+        get_graph(self.session, self.process_id)
+
+        self.session.add(Workflow(process_id=self.process_id, from_task_id=review, to_task_id=None))
+        self.session.commit()
+
+        graph = get_graph(self.session, self.process_id)
+        assert graph.end_nodes == (review, ship)
+
+    def test_version_is_part_of_key(self):
+        """プロセスのバージョンごとに別のグラフがキャッシュされることを確認"""
+        first = get_graph(self.session, self.process_id)
+
+        process = self.session.get(Process, self.process_id)
+        process.version = 2
+        self.session.commit()
+
+        second = get_graph(self.session, self.process_id)
+        assert second is not first
+        assert second.version == 2
+
+    def test_cache_follows_changes_without_orm_events(self):
+        """ORMを経由しない（別プロセスからの）ワークフローの変更でもグラフが作り直されることを確認"""
+        accept, review, stock, ship = self.task_ids
+        first = get_graph(self.session, self.process_id)
+        table = Workflow.__table__
+
+        with self.connection.engine.begin() as conn:
+            conn.execute(table.insert().values(process_id=self.process_id, from_task_id=review, to_task_id=None))
+        self.session.commit()
+        second = get_graph(self.session, self.process_id)
+        assert second is not first
+        assert second.end_nodes == (review, ship)
+
+        with self.connection.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.from_task_id == review, table.c.to_task_id.is_(None)))
+        self.session.commit()
+        third = get_graph(self.session, self.process_id)
+        assert third is not second
+        assert third.end_nodes == (ship,)
+        assert get_graph(self.session, self.process_id) is third
+
+    def test_graph_command(self):
+        """workflow graph コマンドで実行順序と並列分岐が表示されることを確認"""
+        result = self.runner.invoke(app, ["workflow", "graph", str(self.process_id)])
+
+        assert result.exit_code == 0, result.stdout
+        assert "出荷" in result.stdout
+        assert "並列分岐" in result.stdout
+
+    def test_graph_command_reports_cycle(self):
+        """循環のあるワークフローでエラーが表示されることを確認"""
+        accept, review, stock, ship = self.task_ids
+        self.session.add(Workflow(process_id=self.process_id, from_task_id=ship, to_task_id=accept))
+        self.session.commit()
+
+        result = self.runner.invoke(app, ["workflow", "graph", str(self.process_id)])
+
+        assert result.exit_code == 1
+        assert "循環があります" in result.stdout
+
+    def test_monitor_workflow_uses_edges(self):
+        """モニターのワークフローデータが実際の辺から作られることを確認"""
+        accept, review, stock, ship = self.task_ids
+        db = ProcessMonitorDB()
+        db.session = self.connection.SessionLocal()
+        db.connected = True
+
+        data = db.get_workflow_for_process(self.process_id)
+        db.session.close()
+
+        transitions = {(t["from_task_id"], t["to_task_id"]) for t in data["transitions"]}
+        assert transitions == {(accept, review), (accept, stock), (review, ship), (stock, ship)}
+        assert data["start_task_ids"] == [accept]
+        assert data["end_task_ids"] == [ship]
+        positions = {t["id"]: (t["position_x"], t["position_y"]) for t in data["tasks"]}
+        assert positions[review][0] == positions[stock][0]
+        assert positions[review][1] != positions[stock][1]
@@ -0,0 +1,129 @@
+"""
+統合テスト - ワークフローステップの取得のテスト
+
+このモジュールでは、ProcessMonitorDB.get_workflow_steps が遷移元・遷移先の
+タスク名とタスクインスタンスから求めたステップの状態を、遷移の数によらず
+1回のクエリで返すこと、状態には実行中のプロセスインスタンスだけを数えることをテストします。
+"""
+
+import pytest
+from sqlalchemy import event
+
+from taskman.app.db.monitor_db import ProcessMonitorDB
+from taskman.models.process import Process
+from taskman.models.process_instance import ProcessInstance
+from taskman.models.task import Task
+from taskman.models.task_instance import TaskInstance
+from taskman.models.workflow import Workflow
+
+
+class TestWorkflowStepsIntegration:
+    """ワークフローステップの統合テスト"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, test_db):
+        """受付 → 審査 → 出荷 → 請求 のプロセスとインスタンスを作成"""
+        from taskman.database import connection
+
+        self.engine = connection.engine
+        self.session = connection.SessionLocal()
+        self.process = Process(name="受注", status="アクティブ")
+        self.session.add(self.process)
+        self.session.flush()
+        self.tasks = {
+            name: Task(process_id=self.process.id, name=name, status=status)
+            for name, status in [("受付", "完了"), ("審査", "進行中"), ("出荷", "未着手"), ("請求", "保留")]
+        }
+        self.session.add_all(self.tasks.values())
+        self.session.flush()
+
+        ids = [None] + [task.id for task in self.tasks.values()] + [None]
+        self.session.add_all(
+            Workflow(process_id=self.process.id, from_task_id=from_id, to_task_id=to_id, sequence_number=number)
+            for number, (from_id, to_id) in enumerate(zip(ids, ids[1:]), start=1)
+        )
+
+        # 受付: すべて完了、審査: 実行中あり、出荷: 失敗と完了、請求: インスタンスなし
+        first = ProcessInstance(process_id=self.process.id, status="実行中")
+        second = ProcessInstance(process_id=self.process.id, status="実行中")
+        self.session.add_all([first, second])
+        self.session.flush()
+        for instance, name, status in [
+            (first, "受付", "完了"), (second, "受付", "完了"),
+            (first, "審査", "完了"), (second, "審査", "実行中"),
+            (first, "出荷", "失敗"), (second, "出荷", "完了"),
+        ]:
+            self.session.add(TaskInstance(
+                process_instance_id=instance.id, task_id=self.tasks[name].id, status=status
+            ))
+        self.session.commit()
+        self.process_id = self.process.id
+        self.last_task_id = self.tasks["請求"].id
+
+        self.db = ProcessMonitorDB()
+        self.db.session = connection.SessionLocal()
+        self.db.connected = True
+
+        yield
+
+        self.db.session.close()
+        self.session.close()
+
+    def count_statements(self, action):
+        statements = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(self.engine, "before_cursor_execute", count)
+        try:
+            result = action()
+        finally:
+            event.remove(self.engine, "before_cursor_execute", count)
+        return result, statements
+
+    def test_steps_names_and_status(self):
+        """ステップの名前・順序と状態が求められることを確認"""
+        steps = self.db.get_workflow_steps(self.process_id)
+
+        assert [(step['sequence'], step['name'], step['status']) for step in steps] == [
+            (1, "スタート → 受付", "完了"),
+            (2, "受付 → 審査", "実行中"),
+            (3, "審査 → 出荷", "失敗"),
+            (4, "出荷 → 請求", "保留"),
+            (5, "請求 → エンド", "保留"),
+        ]
+        assert all(step['id'] == step['workflow_id'] for step in steps)
+        assert self.db.get_workflow_steps(9999) == []
+
+    def test_only_running_instances_count(self):
+        """完了したプロセスインスタンスのタスクインスタンスはステップの状態に含めないことを確認"""
+        done = ProcessInstance(process_id=self.process_id, status="完了")
+        self.session.add(done)
+        self.session.flush()
+        for name, status in [("受付", "実行中"), ("審査", "失敗"), ("請求", "完了")]:
+            self.session.add(TaskInstance(
+                process_instance_id=done.id, task_id=self.tasks[name].id, status=status
+            ))
+        self.session.commit()
+
+        steps = self.db.get_workflow_steps(self.process_id)
+
+        assert [step['status'] for step in steps] == ["完了", "実行中", "失敗", "保留", "保留"]
+
+    def test_single_query(self):
+        """遷移の数によらずクエリが1回だけ実行されることを確認"""
+        steps, statements = self.count_statements(lambda: self.db.get_workflow_steps(self.process_id))
+        assert len(steps) == 5
+        assert len(statements) == 1
+
+        self.session.add_all(
+            Workflow(process_id=self.process_id, from_task_id=self.last_task_id, to_task_id=self.last_task_id,
+                     sequence_number=number)
+            for number in range(6, 106)
+        )
+        self.session.commit()
+
+        steps, statements = self.count_statements(lambda: self.db.get_workflow_steps(self.process_id))
+        assert len(steps) == 105
+        assert len(statements) == 1
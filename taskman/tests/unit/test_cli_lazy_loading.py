@@ -0,0 +1,56 @@
+"""
+CLIの遅延ロードの単体テスト
+
+サブコマンドのモジュールが、そのサブコマンドの実行時にのみ
+インポートされることをテストします。
+"""
+import os
+import subprocess
+import sys
+
+from typer.testing import CliRunner
+
+from taskman.cli import app
+from taskman.cli.app import COMMAND_MODULES
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def loaded_modules_after(args, prefixes):
+    """新しいインタプリタでコマンドを実行し、読み込まれたモジュール名の一覧を返す"""
+    script = (
+        "import sys\n"
+        "from taskman.cli import app\n"
+        f"app({args!r}, standalone_mode=False)\n"
+        f"print(sorted(m for m in sys.modules if m.startswith({prefixes!r})))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR, DATABASE_URL="sqlite:///:memory:")
+    result = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+class TestLazyCommandLoading:
+    """サブコマンドの遅延ロードのテスト"""
+
+    def test_version_does_not_load_commands(self):
+        """versionコマンドではコマンドモジュールとSQLAlchemyが読み込まれないことを確認"""
+        loaded = loaded_modules_after(["version"], ("taskman.commands.", "taskman.database", "sqlalchemy"))
+
+        assert loaded == "[]"
+
+    def test_subcommand_loads_only_its_module(self):
+        """サブコマンドの実行時にそのモジュールだけが読み込まれることを確認"""
+        loaded = loaded_modules_after(["step", "--help"], ("taskman.commands.",))
+
+        assert loaded == "['taskman.commands.task_step']"
+
+    def test_help_lists_registered_commands(self):
+        """ルートのヘルプに登録済みのサブコマンドが表示されることを確認"""
+        result = CliRunner().invoke(app, ["--help"])
+
+        assert result.exit_code == 0
+        for name, (_, help_text) in COMMAND_MODULES.items():
+            assert name in result.stdout
+            assert help_text in result.stdout
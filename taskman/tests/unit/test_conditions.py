@@ -0,0 +1,140 @@
+"""
+条件式コンパイラの単体テスト
+
+条件付きワークフローの条件式が安全な構文のみを受け付け、
+1件ずつ・一括のどちらでも正しく評価され、
+ワークフローごとにキャッシュされることをテストします。
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from taskman.engine import conditions
+from taskman.engine.conditions import (
+    ConditionEvaluationError, ConditionSyntaxError, compile_condition, get_condition,
+    task_instance_context, validate_condition,
+)
+
+
+def context(**values):
+    base = {
+        'status': '完了', 'notes': '', 'assigned_to': '', 'task_name': '審査',
+        'priority': '中', 'estimated_duration': 30, 'duration': 20,
+    }
+    base.update(values)
+    return base
+
+
+class TestConditionCompiler:
+    """条件式のコンパイルと評価のテスト"""
+
+    @pytest.mark.parametrize("expression, expected", [
+        ("status == '完了'", True),
+        ("'承認' in notes", True),
+        ("priority in ('高', '緊急') or assigned_to == 'manager'", True),
+        ("duration > estimated_duration * 1.5", False),
+        ("len(notes) > 3 and not (duration >= 60)", True),
+        ("'差戻し' if duration > 10 else '承認'", True),
+    ])
+    def test_evaluate(self, expression, expected):
+        """代表的な条件式の評価結果を確認"""
+        condition = compile_condition(expression)
+
+        assert condition.evaluate(context(notes='部長承認済み', assigned_to='manager')) is expected
+
+    @pytest.mark.parametrize("expression", [
+        "__import__('os')",
+        "notes.upper()",
+        "open('/etc/passwd')",
+        "[x for x in notes]",
+        "lambda: 1",
+        "unknown == 1",
+        "2 ** 100",
+        "status ==",
+        "",
+    ])
+    def test_rejects_unsafe_or_invalid(self, expression):
+        """許可されていない構文・変数・関数がエラーになることを確認"""
+        with pytest.raises(ConditionSyntaxError):
+            compile_condition(expression)
+        assert validate_condition(expression)
+
+    def test_guards_string_repetition(self):
+        """文字列の繰り返しや書式指定が評価時に拒否されることを確認"""
+        with pytest.raises(ConditionEvaluationError):
+            compile_condition("len(notes * 1000000) > 0").evaluate(context(notes='x'))
+        with pytest.raises(ConditionEvaluationError):
+            compile_condition("len('%99999999d' % duration) > 0").evaluate(context())
+
+    def test_evaluate_batch(self):
+        """一括評価の結果が1件ずつの評価と一致することを確認"""
+        condition = compile_condition("duration is not None and duration > estimated_duration")
+        contexts = [context(duration=d) for d in (10, 45, None, 31)]
+
+        assert condition.evaluate_batch(contexts) == [condition.evaluate(c) for c in contexts]
+        assert condition.evaluate_batch(contexts) == [False, True, False, True]
+
+    def test_evaluate_batch_reports_failing_row(self):
+        """一括評価で評価できない行があるとエラーになることを確認"""
+        condition = compile_condition("duration > 10")
+
+        with pytest.raises(ConditionEvaluationError):
+            condition.evaluate_batch([context(duration=20), context(duration=None)])
+
+
+class TestConditionCache:
+    """条件式キャッシュのテスト"""
+
+    @pytest.fixture(autouse=True)
+    def clear(self):
+        conditions.clear_cache()
+        yield
+        conditions.clear_cache()
+
+    def test_cached_by_workflow_and_updated_at(self):
+        """同じワークフローと更新日時ではコンパイル済みの条件式が再利用されることを確認"""
+        updated_at = datetime(2026, 1, 1)
+
+        first = get_condition(1, updated_at, "duration > 10")
+        second = get_condition(1, updated_at, "duration > 10")
+        changed = get_condition(1, updated_at + timedelta(seconds=1), "duration > 20")
+
+        assert first is second
+        assert changed is not first
+        assert conditions.cache_info() == (1, 2, 2)
+
+    def test_lru_eviction(self, monkeypatch):
+        """最大件数を超えると最も古いエントリが破棄されることを確認"""
+        monkeypatch.setattr(conditions, "CACHE_SIZE", 2)
+
+        first = get_condition(1, None, "duration > 1")
+        get_condition(2, None, "duration > 2")
+        get_condition(1, None, "duration > 1")
+        get_condition(3, None, "duration > 3")
+
+        assert get_condition(1, None, "duration > 1") is first
+        assert conditions.cache_info()[2] == 2
+        assert get_condition(2, None, "duration > 2") is not None
+        assert conditions.cache_info()[1] == 4
+
+
+class TestTaskInstanceContext:
+    """タスクインスタンスのコンテキストのテスト"""
+
+    def test_context_fields(self):
+        """所要時間と未設定の値が正しく変換されることを確認"""
+        started = datetime(2026, 1, 1, 9, 0)
+        instance = SimpleNamespace(
+            status='完了', notes=None, assigned_to=None,
+            started_at=started, completed_at=started + timedelta(minutes=90),
+        )
+        task = SimpleNamespace(name='審査', priority='高', estimated_duration=60)
+
+        ctx = task_instance_context(instance, task)
+
+        assert ctx == {
+            'status': '完了', 'notes': '', 'assigned_to': '', 'task_name': '審査',
+            'priority': '高', 'estimated_duration': 60, 'duration': 90.0,
+        }
+        assert set(ctx) == set(conditions.CONTEXT_FIELDS)
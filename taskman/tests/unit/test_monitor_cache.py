@@ -0,0 +1,162 @@
+"""
+プロセスモニターの読み取りキャッシュの単体テスト
+
+メソッドごとの有効期間、サイズ上限付きのLRU、書き込みと透かしの変化による
+破棄、ヒット・ミスの統計をテストします。
+"""
+
+from taskman.app.db.cache import CachedMonitorDB, MonitorCache
+from taskman.app.db.change_feed import Watermark
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeMonitorDB:
+    """呼び出し回数を数える ProcessMonitorDB の代わり"""
+
+    def __init__(self):
+        self.calls = []
+        self.watermarks = {
+            'process': Watermark(1, 'a', 1),
+            'task': Watermark(1, 'a', 1),
+            'process_instance': Watermark(1, 'a', 1),
+        }
+
+    def get_processes(self):
+        self.calls.append('get_processes')
+        return [{'id': 1, 'name': '受注'}]
+
+    def get_process_instances(self, filters=None):
+        self.calls.append(('get_process_instances', filters))
+        return [{'id': 10}]
+
+    def get_tasks_by_process_id(self, process_id):
+        self.calls.append(('get_tasks_by_process_id', process_id))
+        return [{'id': process_id}]
+
+    def get_workflow_steps(self, process_id):
+        self.calls.append(('get_workflow_steps', process_id))
+        return [{'id': 1, 'status': '実行中'}]
+
+    def get_change_watermarks(self):
+        return self.watermarks
+
+    def complete_process_instance(self, instance_id):
+        self.calls.append(('complete', instance_id))
+
+    def connect(self):
+        return True
+
+
+class TestMonitorCache:
+    """MonitorCache と CachedMonitorDB のテスト"""
+
+    def setup_method(self):
+        self.clock = Clock()
+        self.cache = MonitorCache(size=3, clock=self.clock)
+        self.source = FakeMonitorDB()
+        self.db = CachedMonitorDB(self.source, self.cache)
+
+    def test_repeated_calls_hit_the_cache(self):
+        """同じメソッドと引数の2回目以降はクエリを実行しないことを確認"""
+        assert self.db.get_processes() == self.db.get_processes()
+        self.db.get_process_instances(filters={'status': '実行中'})
+        self.db.get_process_instances(filters={'status': '実行中'})
+        self.db.get_process_instances()
+
+        assert self.source.calls == [
+            'get_processes', ('get_process_instances', {'status': '実行中'}), ('get_process_instances', None),
+        ]
+        stats = self.db.cache_stats()
+        assert (stats.hits, stats.misses, stats.size) == (2, 3, 3)
+        assert stats.by_method['get_processes'] == (1, 1)
+        assert stats.hit_rate == 0.4
+
+    def test_results_are_copied(self):
+        """呼び出し側が結果を書き換えてもキャッシュは変わらないことを確認"""
+        self.db.get_processes()[0]['eta'] = 'x'
+
+        assert 'eta' not in self.db.get_processes()[0]
+
+    def test_ttl_expiry(self):
+        """メソッドごとの有効期間が過ぎると読み込み直すことを確認"""
+        self.db.get_processes()
+        self.db.get_process_instances()
+        self.clock.now = 15  # get_process_instances は10秒、get_processes は30秒
+
+        self.db.get_processes()
+        self.db.get_process_instances()
+
+        assert self.source.calls.count('get_processes') == 1
+        assert self.source.calls.count(('get_process_instances', None)) == 2
+
+    def test_lru_eviction(self):
+        """上限を超えると最も古く使われたエントリが捨てられることを確認"""
+        for process_id in (1, 2, 3):
+            self.db.get_tasks_by_process_id(process_id)
+        self.db.get_tasks_by_process_id(1)
+        self.db.get_tasks_by_process_id(4)  # 2 が捨てられる
+
+        self.source.calls.clear()
+        self.db.get_tasks_by_process_id(1)
+        self.db.get_tasks_by_process_id(2)
+        assert self.source.calls == [('get_tasks_by_process_id', 2)]
+
+    def test_write_invalidates(self):
+        """アプリ自身の書き込みで関係するエントリが破棄されることを確認"""
+        self.db.get_processes()
+        self.db.get_tasks_by_process_id(1)
+
+        self.db.complete_process_instance(10)
+        self.db.get_processes()
+        self.db.get_tasks_by_process_id(1)
+
+        assert self.source.calls.count('get_processes') == 2
+        assert self.source.calls.count(('get_tasks_by_process_id', 1)) == 1
+
+    def test_watermark_change_invalidates_dependents(self):
+        """透かしが変化したテーブルに依存するエントリだけが破棄されることを確認"""
+        self.db.get_change_watermarks()
+        self.db.get_processes()
+        self.db.get_tasks_by_process_id(1)
+
+        self.db.get_change_watermarks()  # 変化なし
+        self.db.get_processes()
+        assert self.source.calls.count('get_processes') == 1
+
+        self.source.watermarks = dict(self.source.watermarks, process_instance=Watermark(2, 'b', 2))
+        self.db.get_change_watermarks()
+        self.db.get_processes()
+        self.db.get_tasks_by_process_id(1)
+        assert self.source.calls.count('get_processes') == 1
+        assert self.source.calls.count(('get_tasks_by_process_id', 1)) == 1
+
+        # タスクの変化はプロセスの進捗（カウンタ）も変えるため、プロセス一覧も破棄する
+        self.source.watermarks = dict(self.source.watermarks, task=Watermark(2, 'b', 2))
+        self.db.get_change_watermarks()
+        self.db.get_processes()
+        self.db.get_tasks_by_process_id(1)
+        assert self.source.calls.count('get_processes') == 2
+        assert self.source.calls.count(('get_tasks_by_process_id', 1)) == 2
+
+    def test_instance_status_invalidates_workflow_steps(self):
+        """ステップの状態は実行中のインスタンスから求めるため、インスタンスの変化で破棄されることを確認"""
+        self.db.get_change_watermarks()
+        self.db.get_workflow_steps(1)
+
+        self.source.watermarks = dict(self.source.watermarks, process_instance=Watermark(1, 'b', 1))
+        self.db.get_change_watermarks()
+        self.db.get_workflow_steps(1)
+
+        assert self.source.calls.count(('get_workflow_steps', 1)) == 2
+
+    def test_other_attributes_are_forwarded(self):
+        """キャッシュしないメソッドはそのまま転送されることを確認"""
+        assert self.db.connect() is True
+        assert self.cache.stats().misses == 0
@@ -0,0 +1,129 @@
+"""
+クリティカルパスと完了予測の単体テスト
+
+ワークフローグラフに対する最早・最遅開始、余裕時間、クリティカルパスの計算と、
+実行中インスタンスの実績からの完了予測をテストします。
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from taskman.engine.graph import Edge, compile_graph
+from taskman.engine.schedule import compute_schedule, forecast_instance
+
+Row = namedtuple("Row", "id task_id status started_at completed_at")
+
+NOW = datetime(2026, 10, 17, 12, 0)
+
+
+def edge(edge_id, from_task_id, to_task_id, condition_type="常時"):
+    return Edge(edge_id, from_task_id, to_task_id, condition_type, None, None)
+
+
+# 1 → (2, 3 を並列) → 4 → 終了
+DIAMOND = compile_graph(1, 1, [1, 2, 3, 4], [
+    edge(1, None, 1),
+    edge(2, 1, 2, "並列"),
+    edge(3, 1, 3, "並列"),
+    edge(4, 2, 4),
+    edge(5, 3, 4),
+    edge(6, 4, None),
+])
+DURATIONS = {1: 10, 2: 30, 3: 20, 4: 5}
+
+
+class TestComputeSchedule:
+    """compute_schedule のテスト"""
+
+    def test_forward_and_backward_pass(self):
+        """最早・最遅開始と余裕時間を確認"""
+        schedule = compute_schedule(DIAMOND, DURATIONS)
+
+        assert schedule.duration == 45
+        timings = {t: (s.earliest_start, s.latest_start, s.slack) for t, s in schedule.tasks.items()}
+        assert timings == {1: (0, 0, 0), 2: (10, 10, 0), 3: (10, 20, 10), 4: (40, 40, 0)}
+
+    def test_critical_path(self):
+        """余裕のない経路がクリティカルパスになることを確認"""
+        schedule = compute_schedule(DIAMOND, DURATIONS)
+
+        assert schedule.critical_path == (1, 2, 4)
+        assert not schedule.tasks[3].critical
+
+    def test_remaining_duration(self):
+        """各タスクの開始からプロセス終了までの最長の所要時間を確認"""
+        schedule = compute_schedule(DIAMOND, DURATIONS)
+
+        assert {t: s.remaining for t, s in schedule.tasks.items()} == {1: 45, 2: 35, 3: 25, 4: 5}
+        assert schedule.tasks[1].remaining_after == 35
+
+    def test_missing_durations_are_zero(self):
+        """所要時間が不明なタスクは0分として扱われることを確認"""
+        schedule = compute_schedule(DIAMOND, {2: 15})
+
+        assert schedule.duration == 15
+        assert schedule.tasks[3].slack == 15
+
+
+class TestForecastInstance:
+    """forecast_instance のテスト"""
+
+    def setup_method(self):
+        self.schedule = compute_schedule(DIAMOND, DURATIONS)
+
+    def test_replays_actual_progress(self):
+        """完了済みは実績、実行中は開始日時から、未作成は現在時刻から予測されることを確認"""
+        rows = [
+            Row(1, 1, "完了", NOW - timedelta(minutes=60), NOW - timedelta(minutes=50)),
+            Row(2, 2, "実行中", NOW - timedelta(minutes=40), None),
+            Row(3, 3, "完了", NOW - timedelta(minutes=45), NOW - timedelta(minutes=30)),
+        ]
+
+        eta, finishes = forecast_instance(self.schedule, NOW - timedelta(hours=1), rows, {}, NOW)
+
+        assert finishes[1] == NOW - timedelta(minutes=50)
+        assert finishes[2] == NOW                       # 開始から30分後 = 現在
+        assert 4 not in finishes                        # 未作成のタスクは残りの所要時間として数える
+        assert eta == NOW + timedelta(minutes=5)
+
+    def test_history_overrides_plan(self):
+        """実績の平均所要時間が計画より優先されることを確認"""
+        rows = [Row(1, 1, "実行中", NOW, None)]
+
+        eta, _ = forecast_instance(self.schedule, NOW, rows, {1: 60, 2: 30, 4: 5}, NOW)
+
+        assert eta == NOW + timedelta(minutes=95)
+
+    def test_overdue_task_finishes_now_at_the_earliest(self):
+        """予定を過ぎた実行中タスクは現在時刻以降に完了すると予測されることを確認"""
+        rows = [Row(1, 1, "実行中", NOW - timedelta(days=1), None)]
+
+        _, finishes = forecast_instance(self.schedule, NOW - timedelta(days=1), rows, {}, NOW)
+
+        assert finishes[1] == NOW
+
+    def test_not_started_instance_takes_the_whole_plan(self):
+        """タスクがまだないインスタンスは計画全体が現在から始まることを確認"""
+        eta, finishes = forecast_instance(self.schedule, NOW, [], {}, NOW)
+
+        assert eta == NOW + timedelta(minutes=45)
+        assert finishes == {}
+
+    def test_branch_not_taken_is_skipped(self):
+        """エンジンが選ばなかった分岐は予測から除外されることを確認"""
+        graph = compile_graph(2, 1, [1, 2, 3], [
+            edge(1, None, 1),
+            Edge(2, 1, 2, "条件付き", "True", 1),
+            Edge(3, 1, 3, "条件付き", "True", 2),
+            edge(4, 2, None),
+            edge(5, 3, None),
+        ])
+        schedule = compute_schedule(graph, {1: 10, 2: 10, 3: 500})
+        rows = [
+            Row(1, 1, "完了", NOW - timedelta(minutes=20), NOW - timedelta(minutes=10)),
+            Row(2, 2, "未着手", None, None),
+        ]
+
+        eta, finishes = forecast_instance(schedule, NOW - timedelta(minutes=20), rows, {}, NOW)
+
+        assert 3 not in finishes
+        assert eta == NOW + timedelta(minutes=10)
@@ -0,0 +1,59 @@
+"""
+行シリアライズの単体テスト
+
+RowWriter が JSON / NDJSON / CSV の各形式で行を1行ずつ
+正しく書き出すことをテストします。
+"""
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+
+from taskman.utils.serialization import RowWriter
+
+COLUMNS = ["id", "name", "due_date", "updated_at"]
+ROWS = [
+    (1, "タスク", date(2026, 1, 31), datetime(2026, 1, 2, 3, 4, 5)),
+    (2, "カンマ,を含む", None, None),
+]
+
+
+def write(fmt, rows):
+    stream = io.StringIO()
+    writer = RowWriter(stream, fmt, COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+    writer.close()
+    return stream.getvalue()
+
+
+class TestRowWriter:
+    """RowWriter のテスト"""
+
+    def test_ndjson(self):
+        """1行に1オブジェクトが出力され、日付がISO形式になることを確認"""
+        lines = write("ndjson", ROWS).splitlines()
+
+        assert json.loads(lines[0]) == {
+            "id": 1, "name": "タスク", "due_date": "2026-01-31", "updated_at": "2026-01-02T03:04:05",
+        }
+        assert json.loads(lines[1])["due_date"] is None
+
+    def test_json(self):
+        """JSON配列として読み込めることを確認"""
+        assert [row["id"] for row in json.loads(write("json", ROWS))] == [1, 2]
+        assert json.loads(write("json", [])) == []
+
+    def test_csv(self):
+        """ヘッダ行と値が出力され、Noneが空文字になることを確認"""
+        assert write("csv", ROWS).splitlines() == [
+            "id,name,due_date,updated_at",
+            "1,タスク,2026-01-31,2026-01-02T03:04:05",
+            '2,"カンマ,を含む",,',
+        ]
+
+    def test_unknown_format(self):
+        """未対応の形式ではエラーになることを確認"""
+        with pytest.raises(ValueError):
+            RowWriter(io.StringIO(), "xml", COLUMNS)
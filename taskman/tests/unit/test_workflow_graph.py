@@ -0,0 +1,74 @@
+"""
+ワークフローグラフのコンパイルの単体テスト
+
+Workflow の辺からトポロジカル順序、開始・終了ノード、合流ノード、
+並列分岐グループが正しく求められ、循環が検出されることをテストします。
+"""
+import pytest
+
+from taskman.engine.graph import Edge, WorkflowCycleError, compile_graph
+
+
+def edge(edge_id, from_task_id, to_task_id, condition_type="常時", sequence_number=None, expression=None):
+    return Edge(edge_id, from_task_id, to_task_id, condition_type, expression, sequence_number)
+
+
+# 1 → (2, 3 を並列) → 4 → 終了
+DIAMOND = [
+    edge(1, None, 1),
+    edge(2, 1, 2, "並列"),
+    edge(3, 1, 3, "並列"),
+    edge(4, 2, 4),
+    edge(5, 3, 4),
+    edge(6, 4, None),
+]
+
+
+class TestCompileGraph:
+    """compile_graph のテスト"""
+
+    def test_diamond(self):
+        """並列分岐と合流を含むグラフの構造を確認"""
+        graph = compile_graph(1, 1, [1, 2, 3, 4], DIAMOND)
+
+        assert graph.order == (1, 2, 3, 4)
+        assert graph.start_nodes == (1,)
+        assert graph.end_nodes == (4,)
+        assert graph.depth == {1: 0, 2: 1, 3: 1, 4: 2}
+        assert graph.joins == (4,)
+        assert [e.to_task_id for e in graph.next_edges(1)] == [2, 3]
+        assert [e.to_task_id for e in graph.next_edges(None)] == [1]
+
+        (group,) = graph.parallel_groups
+        assert (group.fork, group.branches, group.join) == (1, (2, 3), 4)
+
+    def test_sequence_number_orders_edges(self):
+        """同じタスクから出る辺が順序番号の順に並ぶことを確認"""
+        graph = compile_graph(1, 1, [1, 2, 3], [
+            edge(1, 1, 2, "条件付き", sequence_number=2, expression="True"),
+            edge(2, 1, 3, "条件付き", sequence_number=1, expression="True"),
+        ])
+
+        assert [e.to_task_id for e in graph.next_edges(1)] == [3, 2]
+
+    def test_implicit_start_and_end(self):
+        """開始点・終了点の辺がない場合、入出力のないタスクが開始・終了になることを確認"""
+        graph = compile_graph(1, 1, [1, 2, 3, 9], [edge(1, 1, 2), edge(2, 2, 3)])
+
+        assert set(graph.start_nodes) == {1, 9}
+        assert set(graph.end_nodes) == {3, 9}
+
+    def test_branches_joining_at_end(self):
+        """合流しない並列分岐の合流点が None（終了点）になることを確認"""
+        graph = compile_graph(1, 1, [1, 2, 3], [edge(1, 1, 2, "並列"), edge(2, 1, 3, "並列")])
+
+        assert graph.parallel_groups[0].join is None
+
+    def test_cycle_detection(self):
+        """循環があるとエラーになることを確認"""
+        with pytest.raises(WorkflowCycleError) as excinfo:
+            compile_graph(7, 1, [1, 2, 3], [edge(1, None, 1), edge(2, 1, 2), edge(3, 2, 3), edge(4, 3, 2)])
+
+        assert excinfo.value.process_id == 7
+        assert excinfo.value.task_ids == (2, 3)
+        assert "循環があります" in str(excinfo.value)
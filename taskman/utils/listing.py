@@ -0,0 +1,74 @@
+"""
+Shared options and output for the CLI list commands
+
+List commands page through rows by id (keyset pagination: --after/--limit)
+and can stream rows as JSON, NDJSON or CSV instead of rendering a table.
+"""
+import sys
+
+import typer
+from rich.console import Console
+from rich.panel import Panel
+
+from taskman.utils.serialization import RowWriter
+
+console = Console()
+
+LIST_FORMATS = ("table", "json", "ndjson", "csv")
+
+# 機械可読形式で出力するときに1回のフェッチで読み込む行数
+STREAM_BATCH_SIZE = 500
+
+LIMIT_HELP = "表示する最大件数"
+AFTER_HELP = "このIDより後の行から表示（前のページの最後のIDを指定）"
+FORMAT_HELP = "出力形式（table, json, ndjson, csv）"
+INCLUDE_ARCHIVED_HELP = "アーカイブ済みの行も表示"
+
+
+def check_list_options(fmt, limit):
+    """Validate --format and --limit, exiting with an error panel if invalid"""
+    if fmt not in LIST_FORMATS:
+        console.print(Panel(
+            f"無効な出力形式です。{', '.join(LIST_FORMATS)} のいずれかを指定してください。",
+            title="エラー", style="red",
+        ))
+        raise typer.Exit(1)
+    if limit is not None and limit < 1:
+        console.print(Panel("--limit は1以上を指定してください。", title="エラー", style="red"))
+        raise typer.Exit(1)
+
+
+def attribute_getter(columns):
+    """Return a function mapping an object to the tuple of its column attributes"""
+    def values(obj):
+        return tuple(getattr(obj, column) for column in columns)
+    return values
+
+
+def write_rows(query, columns, to_values, fmt):
+    """
+    Stream query results to stdout in a machine-readable format
+
+    Args:
+        query: Query to iterate (fetched STREAM_BATCH_SIZE rows at a time)
+        columns: Output column names
+        to_values: Function mapping a result row to a tuple in column order
+        fmt: 'json', 'ndjson' or 'csv'
+    """
+    writer = RowWriter(sys.stdout, fmt, columns)
+    for row in query.yield_per(STREAM_BATCH_SIZE):
+        writer.writerow(to_values(row))
+    writer.close()
+
+
+def status_label(row):
+    """Status for a table cell, marking rows read from the archive tables"""
+    if getattr(row, "archived_at", None) is not None:
+        return f"{row.status}（アーカイブ）"
+    return row.status
+
+
+def print_next_page_hint(count, limit, last_id):
+    """Print the --after value for the next page when the page is full"""
+    if limit is not None and count >= limit:
+        console.print(f"[dim]次のページ: --after {last_id}[/dim]")
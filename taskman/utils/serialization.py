@@ -0,0 +1,81 @@
+"""
+Streaming row serialization
+
+Rows are written one at a time as JSON, NDJSON or CSV, so callers can
+serialize query results while they are still being fetched.
+"""
+import csv
+import gzip
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+OUTPUT_FORMATS = ("json", "ndjson", "csv")
+
+
+def to_primitive(value):
+    """Convert a database value to a JSON/CSV friendly value"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def open_output(path, compress=False):
+    """
+    Open a text file for writing, gzip-compressed if requested
+
+    Args:
+        path: Output file path (".gz" is appended when compressing)
+        compress: Write a gzip-compressed file
+
+    Returns:
+        (text stream, actual path)
+    """
+    if compress:
+        path = f"{path}.gz"
+        return gzip.open(path, "wt", encoding="utf-8", newline=""), path
+    return open(path, "w", encoding="utf-8", newline=""), path
+
+
+class RowWriter:
+    """
+    Write rows with a fixed set of columns to a text stream
+
+    json writes a single array (the brackets are written by the first row and
+    close()), ndjson writes one object per line and csv writes a header row
+    followed by one line per row.
+    """
+
+    def __init__(self, stream, fmt, columns):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"形式は {', '.join(OUTPUT_FORMATS)} のいずれかを指定してください")
+        self.stream = stream
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.count = 0
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.writer(stream, lineterminator="\n")
+            self._csv.writerow(self.columns)
+
+    def writerow(self, values):
+        """Write one row given as a sequence in column order"""
+        values = [to_primitive(v) for v in values]
+        if self._csv is not None:
+            self._csv.writerow(["" if v is None else v for v in values])
+        else:
+            line = json.dumps(dict(zip(self.columns, values)), ensure_ascii=False)
+            if self.fmt == "json":
+                line = ("[\n" if self.count == 0 else ",\n") + line
+            else:
+                line += "\n"
+            self.stream.write(line)
+        self.count += 1
+
+    def close(self):
+        """Finish the output (closes the JSON array); the stream is left open"""
+        if self.fmt == "json":
+            self.stream.write("\n]\n" if self.count else "[]\n")
+        self.stream.flush()